@@ -8,11 +8,10 @@ import streamlit as st
 from utils.data_loader import load_data
 from utils.generate_sidebar import generate_sidebar
 from utils.filters import (
-    apply_dispensary_filters,
-    apply_sentiment_filters,
     get_filter_summary,
     has_active_filters
 )
+from utils.filter_cache import filter_dataset
 
 # Page config
 st.set_page_config(
@@ -23,16 +22,14 @@ st.set_page_config(
 
 # Load data
 data = load_data()
-dispensaries_all = data['dispensaries']
 density = data['density']
-tweet_sentiment_all = data['tweet_sentiment']
 
 # Get sidebar filters
 sidebar_filters = generate_sidebar()
 
 # Apply filters to data
-dispensaries = apply_dispensary_filters(dispensaries_all, sidebar_filters)
-tweet_sentiment = apply_sentiment_filters(tweet_sentiment_all, sidebar_filters)
+dispensaries = filter_dataset("dispensaries", sidebar_filters)
+tweet_sentiment = filter_dataset("tweet_sentiment", sidebar_filters)
 
 # Title
 st.title("Cannabis Analytics Dashboard")
@@ -84,7 +81,8 @@ with growth_col1:
 
 with growth_col2:
     st.write("#### Regional Distribution")
-    region_dist = dispensaries['County'].value_counts().head(10)
+    region_dist = dispensaries['County'].value_counts()
+    region_dist = region_dist[region_dist > 0].head(10)
     st.bar_chart(region_dist)
 
 # Additional Information
@@ -17,11 +17,13 @@ Data Sources:
 """
 import pandas as pd
 import streamlit as st
+import plotly.express as px
 
 from utils.generate_sidebar import generate_sidebar
 from utils.data_loader import load_data
-from utils.filters import apply_dispensary_filters, get_filter_summary, has_active_filters
+from utils.filters import get_filter_summary, has_active_filters
 from utils.plot_helpers import create_choropleth_map, create_line_chart
+from utils.raster import get_map_render_mode
 
 # Page config
 st.set_page_config(
@@ -30,19 +32,19 @@ st.set_page_config(
 
 # Load data
 data = load_data()
-dispensaries_all = data["dispensaries"]
 density = data["density"]
 tweet_sentiment = data["tweet_sentiment"]
-ca_counties = data["ca_counties"]
+county_geometries = data["county_geometries"]
+dispensary_cube = data["dispensary_cube"]
 
 # Get sidebar filters
 sidebar_filters = generate_sidebar()
 
-# Apply filters to data
-dispensaries = apply_dispensary_filters(dispensaries_all, sidebar_filters)
+# Dispensary metrics are rolled up from the pre-aggregated cube
+market_totals = dispensary_cube.totals(sidebar_filters)
 
 # Check for empty filtered data
-if len(dispensaries) == 0:
+if market_totals["Records"] == 0:
     st.warning("⚠️ No data matches your current filter selections. Try adjusting the filters in the sidebar.")
     st.stop()
 
@@ -64,7 +66,7 @@ st.subheader("Market Snapshot")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_dispensaries = len(dispensaries)
+    total_dispensaries = market_totals["Records"]
     st.metric("Active Retailers", f"{total_dispensaries:,}", "Licensed Dispensaries")
 
 with col2:
@@ -87,7 +89,7 @@ with col1:
     # Choropleth map
     fig_map = create_choropleth_map(
         density,
-        geojson=ca_counties,
+        geojson=county_geometries,
         locations="County",
         color="Dispensary_PerCapita",
         title="Cannabis Retailer Distribution by County",
@@ -95,7 +97,8 @@ with col1:
         labels={
             "Dispensary_PerCapita": "Dispensaries per 100k residents",
             "County": "County",
-        }
+        },
+        mode=get_map_render_mode()
     )
     st.plotly_chart(fig_map, use_container_width=True)
 
@@ -115,17 +118,10 @@ with col2:
 # Market Growth Analysis
 st.subheader("Market Growth Trends")
 
-# Calculate growth metrics
-yearly_data = (
-    dispensaries.groupby("Year")
-    .agg(
-        {
-            "License Number": "nunique",  # Count unique licenses
-            "Dispensary Name": "nunique",  # Count unique dispensaries
-        }
-    )
-    .reset_index()
-)
+# Calculate growth metrics (unique licenses and dispensaries per year)
+yearly_data = dispensary_cube.rollup(["Year"], sidebar_filters).rename(
+    columns={"Licenses": "License Number", "Dispensaries": "Dispensary Name"}
+)[["Year", "License Number", "Dispensary Name"]]
 
 yearly_data["Growth_Rate"] = yearly_data["Dispensary Name"].pct_change() * 100
 
@@ -169,16 +165,13 @@ with col2:
 # Market Size Analysis
 st.subheader("Market Size Analysis")
 
-# Data is already filtered by sidebar filters
-filtered_data = dispensaries
-
 # Display filtered metrics
 col1, col2, col3 = st.columns(3)
 
 with col1:
     st.metric(
         label="Total Licenses",
-        value=f"{filtered_data['License Number'].nunique():,}",
+        value=f"{market_totals['Licenses']:,}",
         help="Number of unique licenses in selected range",
         label_visibility="visible",
     )
@@ -186,7 +179,7 @@ with col1:
 with col2:
     st.metric(
         label="Total Dispensaries",
-        value=f"{filtered_data['Dispensary Name'].nunique():,}",
+        value=f"{market_totals['Dispensaries']:,}",
         help="Number of unique dispensaries in selected range",
         label_visibility="visible",
     )
@@ -194,7 +187,7 @@ with col2:
 with col3:
     st.metric(
         label="Counties Served",
-        value=f"{filtered_data['County'].nunique():,}",
+        value=f"{market_totals['Counties']:,}",
         help="Number of counties with active dispensaries",
         label_visibility="visible",
     )
@@ -203,11 +196,9 @@ with col3:
 st.subheader("Regional Distribution")
 
 # Calculate regional metrics
-regional_data = (
-    filtered_data.groupby("County")
-    .agg({"License Number": "nunique", "Dispensary Name": "nunique"})
-    .reset_index()
-)
+regional_data = dispensary_cube.rollup(["County"], sidebar_filters).rename(
+    columns={"Licenses": "License Number", "Dispensaries": "Dispensary Name"}
+)[["County", "License Number", "Dispensary Name"]]
 
 col1, col2 = st.columns(2)
 
@@ -279,8 +270,8 @@ st.subheader("Key Market Insights")
 
 # Calculate dynamic insights
 # 1. Market concentration - top 5 counties market share
-top_5_dispensaries = dispensaries.groupby("County")["Dispensary Name"].nunique().nlargest(5).sum()
-total_dispensaries_by_county = dispensaries.groupby("County")["Dispensary Name"].nunique().sum()
+top_5_dispensaries = regional_data["Dispensary Name"].nlargest(5).sum()
+total_dispensaries_by_county = regional_data["Dispensary Name"].sum()
 top_5_share = (top_5_dispensaries / total_dispensaries_by_county * 100) if total_dispensaries_by_county > 0 else 0
 
 # 2. Growth trajectory - calculate recent growth rate
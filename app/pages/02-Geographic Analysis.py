@@ -23,9 +23,18 @@ import streamlit as st
 
 from utils.generate_sidebar import generate_sidebar
 from utils.data_loader import load_data
-from utils.filters import apply_dispensary_filters, apply_density_filters, apply_sentiment_filters, get_filter_summary, has_active_filters
+from utils.filters import get_filter_summary, has_active_filters
+from utils.filter_cache import filter_dataset
 from utils.data_utils import normalize_county_name
-from utils.plot_helpers import create_choropleth_map, create_bar_chart, create_histogram, create_scatter_plot
+from utils.plot_helpers import (
+    create_bar_chart,
+    create_choropleth_map,
+    create_hexbin_map,
+    create_histogram,
+    create_scatter_plot,
+)
+from utils.hexbin import HEX_RESOLUTIONS
+from utils.raster import get_map_render_mode
 from config.regions import SIMPLE_REGIONS, CALIFORNIA_REGIONS
 
 # Page config
@@ -35,18 +44,15 @@ st.set_page_config(
 
 # Load data
 data = load_data()
-dispensaries_all = data["dispensaries"]
-density_all = data["density"]
-tweet_sentiment_all = data["tweet_sentiment"]
-counties = data["ca_counties"]
+county_geometries = data["county_geometries"]
 
 # Get sidebar filters
 sidebar_filters = generate_sidebar()
 
 # Apply filters to data
-dispensaries = apply_dispensary_filters(dispensaries_all, sidebar_filters)
-density = apply_density_filters(density_all, sidebar_filters)
-tweet_sentiment = apply_sentiment_filters(tweet_sentiment_all, sidebar_filters)
+dispensaries = filter_dataset("dispensaries", sidebar_filters)
+density = filter_dataset("density", sidebar_filters)
+tweet_sentiment = filter_dataset("tweet_sentiment", sidebar_filters)
 
 # Check for empty filtered data
 if len(density) == 0:
@@ -75,17 +81,38 @@ st.subheader("Geographic Distribution Overview")
 # Create choropleth map
 fig_map = create_choropleth_map(
     density,
-    geojson=counties,
+    geojson=county_geometries,
     locations="County",
     color="Dispensary_PerCapita",
     title="Cannabis Retailer Density by County",
     hover_data=["County"],
-    labels={"Dispensary_PerCapita": "Retailers per 100k Residents", "County": "County"}
+    labels={"Dispensary_PerCapita": "Retailers per 100k Residents", "County": "County"},
+    mode=get_map_render_mode()
 )
 
 # Display map
 st.plotly_chart(fig_map, use_container_width=True)
 
+# Dispensary locations binned into hexagons (only for data with coordinates)
+dispensary_hexbins = data["dispensary_hexbins"]
+if dispensary_hexbins is not None:
+    st.subheader("Dispensary Density Within Counties")
+    resolution = st.select_slider(
+        "Hexagon size",
+        options=list(HEX_RESOLUTIONS),
+        value=2,
+        format_func=lambda r: f"{HEX_RESOLUTIONS[r] * 111:.0f} km",
+        help="Radius of the hexagons the dispensary locations are counted in",
+    )
+    fig_hexbin = create_hexbin_map(
+        dispensary_hexbins,
+        resolution,
+        title="Dispensaries per Hexagon",
+        rows=dispensaries.index,
+        counties=county_geometries,
+    )
+    st.plotly_chart(fig_hexbin, use_container_width=True)
+
 # County Analysis
 st.subheader("County-Level Analysis")
 
@@ -224,7 +251,7 @@ st.subheader("Market Opportunity Analysis")
 # Calculate opportunity scores
 opportunity_counties = density.copy()
 opportunity_counties["Sentiment"] = (
-    tweet_sentiment.groupby("County")["BERT_Sentiment"]
+    tweet_sentiment.groupby("County", observed=True)["BERT_Sentiment"]
     .mean()
     .reset_index(name="Sentiment")["Sentiment"]
 )
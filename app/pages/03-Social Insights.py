@@ -7,10 +7,11 @@ providing insights into public perception and temporal trends:
 - Temporal sentiment trends (sentiment over time)
 - Geographic sentiment distribution by county
 - Correlation between market density and sentiment
+- Agreement of the VADER, BERT and GPT sentiment labels
 - Sentiment volatility analysis
 
 Data Sources:
-- Tweet_Sentiment.csv: Social media posts with BERT sentiment scores
+- Tweet_Sentiment.csv: Social media posts with VADER, BERT and GPT sentiment scores
 - Dispensary_Density.csv: For correlation analysis with market metrics
 
 Sentiment Processing:
@@ -28,7 +29,9 @@ from plotly.subplots import make_subplots
 
 from utils.generate_sidebar import generate_sidebar
 from utils.data_loader import load_data
-from utils.filters import apply_sentiment_filters, apply_density_filters, get_filter_summary, has_active_filters
+from utils.filters import get_filter_summary, has_active_filters
+from utils.filter_cache import filter_dataset
+from utils.model_agreement import CLASS_NAMES, PAIRS, agreement_table, confusion_frame
 from utils.data_utils import add_county_suffix
 from utils.plot_helpers import create_bar_chart, create_scatter_plot
 from utils.error_messages import (
@@ -44,18 +47,18 @@ st.set_page_config(
 
 # Load data
 data = load_data()
-tweet_sentiment_all = data["tweet_sentiment"]
-density_all = data["density"]
 
 # Get sidebar filters
 sidebar_filters = generate_sidebar()
 
-# Apply filters to data
-tweet_sentiment = apply_sentiment_filters(tweet_sentiment_all, sidebar_filters)
-density = apply_density_filters(density_all, sidebar_filters)
+# Apply filters to data (sentiment metrics are rolled up from the pre-aggregated cube)
+sentiment_cube = data["sentiment_cube"]
+sentiment_totals = sentiment_cube.totals(sidebar_filters)
+agreement_cube = data["agreement_cube"]
+density = filter_dataset("density", sidebar_filters)
 
 # Check for empty filtered data
-if len(tweet_sentiment) == 0:
+if sentiment_totals["Records"] == 0:
     filter_summary = get_filter_summary(sidebar_filters) if has_active_filters(sidebar_filters) else None
     show_no_data_error(filter_info=filter_summary, page_name="Social Insights")
     st.stop()
@@ -76,15 +79,10 @@ if has_active_filters(sidebar_filters):
 # Overall Sentiment Metrics
 st.subheader("Sentiment Overview")
 
-# Convert sentiment to numeric and handle any non-numeric values
-tweet_sentiment["BERT_Sentiment"] = pd.to_numeric(
-    tweet_sentiment["BERT_Sentiment"], errors="coerce"
-)
-
 # Calculate key metrics
-avg_sentiment = tweet_sentiment["BERT_Sentiment"].mean()
-positive_ratio = (tweet_sentiment["BERT_Sentiment"] > 0).mean() * 100
-tweet_count = len(tweet_sentiment)
+avg_sentiment = sentiment_totals["Mean"]
+positive_ratio = sentiment_totals["Positive_Ratio"]
+tweet_count = sentiment_totals["Records"]
 
 # Display metrics
 col1, col2, col3 = st.columns(3)
@@ -116,25 +114,26 @@ with col3:
 # Temporal Analysis
 st.subheader("Temporal Sentiment Analysis")
 
-# Ensure Tweet_Date is datetime and create a proper date column
-tweet_sentiment["Tweet_Date"] = pd.to_datetime(
-    tweet_sentiment["Year"].astype(str)
-    + "-"
-    + tweet_sentiment["Month"].astype(str)
-    + "-01"
-)
-
 # Calculate temporal metrics with error handling
 try:
-    # Calculate monthly metrics using 'ME' (month end)
-    monthly_sentiment = (
-        tweet_sentiment.groupby(pd.Grouper(key="Tweet_Date", freq="ME"))
-        .agg({"BERT_Sentiment": ["mean", "size", lambda x: (x > 0).mean() * 100]})
-        .reset_index()
-    )
-
-    # Flatten column names
-    monthly_sentiment.columns = ["Date", "Sentiment", "Volume", "Positive_Ratio"]
+    # Calculate monthly metrics, dated at month end ('ME')
+    monthly = sentiment_cube.rollup(["Year", "Month"], sidebar_filters)
+    month_end = pd.to_datetime(
+        pd.DataFrame({"year": monthly["Year"], "month": monthly["Month"], "day": 1})
+    ) + pd.offsets.MonthEnd(0)
+    monthly_sentiment = pd.DataFrame({
+        "Sentiment": monthly["Mean"].to_numpy(),
+        "Volume": monthly["Records"].to_numpy(),
+        "Positive_Ratio": monthly["Positive_Ratio"].to_numpy(),
+    }, index=pd.DatetimeIndex(month_end, name="Date"))
+
+    # Keep months without tweets in the timeline (zero volume)
+    if len(monthly_sentiment) > 0:
+        monthly_sentiment = monthly_sentiment.reindex(
+            pd.date_range(month_end.min(), month_end.max(), freq="ME", name="Date")
+        )
+        monthly_sentiment["Volume"] = monthly_sentiment["Volume"].fillna(0).astype(int)
+    monthly_sentiment = monthly_sentiment.reset_index()
 
     # Create figure with secondary y-axis
     fig = make_subplots(specs=[[{"secondary_y": True}]])
@@ -255,22 +254,17 @@ except Exception as e:
 # Geographic Sentiment Analysis
 st.subheader("Geographic Sentiment Distribution")
 
-# Standardize county names using centralized utility
-tweet_sentiment["County"] = tweet_sentiment["County"].apply(add_county_suffix)
-
-# Calculate county-level sentiment
-county_sentiment = (
-    tweet_sentiment.groupby("County")
-    .agg({"BERT_Sentiment": ["mean", "count", lambda x: (x > 0).mean() * 100]})
-    .reset_index()
-)
-
+# Calculate county-level sentiment (cube county names carry the " County" suffix)
+county_sentiment = sentiment_cube.rollup(["County"], sidebar_filters)[
+    ["County", "Mean", "Count", "Positive_Ratio"]
+]
 county_sentiment.columns = [
     "County",
     "Average Sentiment",
     "Tweet Count",
     "Positive Ratio",
 ]
+county_sentiment["County"] = county_sentiment["County"].astype(str)
 county_sentiment = county_sentiment.round(2)
 
 # Sort by tweet count to show most active counties
@@ -407,6 +401,79 @@ elif len(market_correlation) == 1:
 else:
     show_correlation_warning(0)
 
+# Model Agreement Analysis
+st.subheader("Model Agreement")
+
+agreement_totals = agreement_cube.totals(sidebar_filters)
+if agreement_totals["Rated"] == 0 and all(agreement_totals[f"{a}_{b}_Compared"] == 0 for a, b in PAIRS):
+    st.info("No tweets in the selection are labeled by more than one sentiment model.")
+else:
+    pair_columns = st.columns(len(PAIRS) + 1)
+    for column, (a, b) in zip(pair_columns, PAIRS):
+        kappa = agreement_totals[f"{a}_{b}_Kappa"]
+        agreement = agreement_totals[f"{a}_{b}_Agreement"]
+        column.metric(
+            f"{a} vs {b}",
+            f"κ {kappa:.2f}" if pd.notna(kappa) else "N/A",
+            f"{agreement:.1f}% agree" if pd.notna(agreement) else None,
+            delta_color="off",
+            help=f"Cohen's kappa and label agreement over {agreement_totals[f'{a}_{b}_Compared']:,} tweets "
+                 "labeled by both models",
+        )
+    unanimous = agreement_totals["Unanimous_Ratio"]
+    pair_columns[-1].metric(
+        "All Three Agree",
+        f"{unanimous:.1f}%" if pd.notna(unanimous) else "N/A",
+        help=f"Share of the {agreement_totals['Rated']:,} tweets labeled by all three models",
+    )
+
+    pair_labels = [f"{a} vs {b}" for a, b in PAIRS]
+    selected_pair = PAIRS[pair_labels.index(st.selectbox("Model pair", pair_labels))]
+    confusion = confusion_frame(agreement_totals, *selected_pair)
+    fig_confusion = go.Figure(
+        go.Heatmap(
+            z=confusion.to_numpy(),
+            x=[f"{selected_pair[1]} {name}" for name in CLASS_NAMES],
+            y=[f"{selected_pair[0]} {name}" for name in CLASS_NAMES],
+            colorscale="Greens",
+            text=confusion.to_numpy(),
+            texttemplate="%{text:,}",
+            hovertemplate="%{y} / %{x}: %{z:,} tweets<extra></extra>",
+        )
+    )
+    fig_confusion.update_layout(
+        title=f"Confusion Matrix: {selected_pair[0]} vs {selected_pair[1]}",
+        yaxis_autorange="reversed",
+    )
+    st.plotly_chart(fig_confusion, use_container_width=True)
+
+    # Per-county agreement, rolled up from the pre-aggregated cube and cached
+    county_agreement = agreement_table(sidebar_filters)
+    kappa_columns = {f"{a}_{b}_Kappa": f"κ {a}/{b}" for a, b in PAIRS}
+    county_agreement = county_agreement[
+        ["County", "Rated"] + list(kappa_columns) + ["Unanimous_Ratio"]
+    ].rename(columns={**kappa_columns, "Rated": "Rated Tweets", "Unanimous_Ratio": "Unanimous %"})
+    county_agreement["County"] = county_agreement["County"].astype(str)
+    st.dataframe(
+        county_agreement.sort_values("Rated Tweets", ascending=False),
+        use_container_width=True,
+        column_config={
+            "Rated Tweets": st.column_config.NumberColumn(
+                "Rated Tweets", help="Tweets labeled by all three models", format="%d"
+            ),
+            **{
+                label: st.column_config.NumberColumn(
+                    label, help="Cohen's kappa (1 = perfect agreement, 0 = chance level)", format="%.2f"
+                )
+                for label in kappa_columns.values()
+            },
+            "Unanimous %": st.column_config.NumberColumn(
+                "Unanimous %", help="Share of rated tweets all three models label alike", format="%.1f%%"
+            ),
+        },
+        hide_index=True,
+    )
+
 # Key Insights
 st.subheader("Key Insights")
 
@@ -24,21 +24,24 @@ import plotly.express as px
 import plotly.graph_objects as go
 
 from utils.generate_sidebar import generate_sidebar
-from utils.data_loader import load_data
+from utils.data_loader import get_data_store, load_data
 from utils.cached_calculations import get_data_quality_metrics
 from utils.plot_helpers import create_bar_chart
 from utils.data_validation import validate_all_datasets
+from utils.data_utils import COUNTY_KEY_COLUMN
+from utils.filter_cache import get_filter_cache
+from utils.figure_cache import chart_stats, get_figure_cache, get_size_budget
 
 # Page config
 st.set_page_config(
     page_title="Data Quality | Cannabis Analytics", page_icon="🔍", layout="wide"
 )
 
-# Load data
+# Load data (quality is assessed on source columns, not keys derived at load time)
 data = load_data()
-dispensaries = data["dispensaries"]
-density = data["density"]
-tweet_sentiment = data["tweet_sentiment"]
+dispensaries = data["dispensaries"].drop(columns=COUNTY_KEY_COLUMN, errors="ignore")
+density = data["density"].drop(columns=COUNTY_KEY_COLUMN, errors="ignore")
+tweet_sentiment = data["tweet_sentiment"].drop(columns=COUNTY_KEY_COLUMN, errors="ignore")
 
 # Get sidebar filters (for consistency, even if not used for filtering)
 sidebar_filters = generate_sidebar()
@@ -392,11 +395,52 @@ st.markdown("""
 **Data Update Frequency:**
 - Dispensaries data: Updated monthly from California Cannabis Authority
 - Density calculations: Recalculated monthly based on census data
-- Tweet sentiment: Real-time collection with daily aggregation
-
-**Last Data Refresh:** {data refresh placeholder - would be populated from actual metadata}
+- Tweet sentiment: New `Tweet_Sentiment_*.csv` batches are appended incrementally as they arrive
+- Changed data files are reloaded in the background and picked up on the next rerun
 """)
 
+current_snapshot = get_data_store().snapshot()
+refreshed_at = pd.Timestamp(current_snapshot.created_at, unit="s").strftime("%Y-%m-%d %H:%M:%S UTC")
+st.markdown(f"**Last Data Refresh:** {refreshed_at} (data version {current_snapshot.version})")
+
+# Filter cache usage (shared by all pages and sessions in this server process)
+cache_stats = get_filter_cache().stats()
+with st.expander("⚡ Filter Cache Usage"):
+    cache_cols = st.columns(4)
+    cache_cols[0].metric("Hit Rate", f"{cache_stats['hit_rate']:.1%}")
+    cache_cols[1].metric("Hits / Misses", f"{cache_stats['hits']:,} / {cache_stats['misses']:,}")
+    cache_cols[2].metric(
+        "Entries", f"{cache_stats['entries']} / {cache_stats['max_entries']}",
+        help=f"{cache_stats['evictions']:,} evictions so far"
+    )
+    cache_cols[3].metric(
+        "Memory",
+        f"{cache_stats['bytes'] / 1024 ** 2:.1f} / {cache_stats['max_bytes'] / 1024 ** 2:.0f} MB"
+    )
+
+# Chart figure cache and the most recent chart builds in this server process
+figure_stats = get_figure_cache().stats()
+recent_charts = pd.DataFrame(chart_stats())
+with st.expander("📊 Chart Cache Usage"):
+    chart_cols = st.columns(4)
+    chart_cols[0].metric("Hit Rate", f"{figure_stats['hit_rate']:.1%}")
+    chart_cols[1].metric("Hits / Misses", f"{figure_stats['hits']:,} / {figure_stats['misses']:,}")
+    chart_cols[2].metric("Entries", f"{figure_stats['entries']} / {figure_stats['max_entries']}")
+    chart_cols[3].metric(
+        "Memory",
+        f"{figure_stats['bytes'] / 1024 ** 2:.1f} / {figure_stats['max_bytes'] / 1024 ** 2:.0f} MB"
+    )
+    if not recent_charts.empty:
+        largest = (
+            recent_charts.groupby(["chart", "title"], as_index=False)
+            .agg(builds=("ms", "size"), avg_ms=("ms", "mean"), kb=("bytes", "max"))
+            .assign(kb=lambda df: df["kb"] / 1024)
+            .sort_values("kb", ascending=False)
+            .head(10)
+        )
+        largest["over_budget"] = largest["kb"] * 1024 > get_size_budget()
+        st.dataframe(largest.round(1), use_container_width=True, hide_index=True)
+
 # Data Quality Recommendations
 st.subheader("📝 Recommendations")
 
@@ -1,35 +1,20 @@
 import pandas as pd
 import plotly.express as px
-import json
 import os
+from functools import lru_cache
 
+from utils.load_geojson import get_geojson
+from utils.plot_helpers import build_choropleth_figure
 
-def create_choropleth(data, value_column, location_column):
-    """
-    Create a choropleth map of California counties
 
-    Args:
-        data (pd.DataFrame): DataFrame containing county data
-        value_column (str): Name of column containing values to plot
-        location_column (str): Name of column containing county names
-
-    Returns:
-        plotly.graph_objects.Figure: Choropleth map
-    """
-    # Load California counties GeoJSON
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(os.path.dirname(current_dir))
-    geojson_path = os.path.join(
-        project_root, "data", "California_County_Boundaries.geojson"
-    )
-
-    with open(geojson_path, "r") as f:
-        ca_counties = json.load(f)
-
-    # Create the choropleth plot
+@lru_cache(maxsize=8)
+def _choropleth_base(value_column, location_column):
+    """Trace styling and layout shared by every call with the same columns."""
+    # Built once with Plotly Express on an empty frame, then reused
+    empty = pd.DataFrame({location_column: pd.Series(dtype=object), value_column: pd.Series(dtype=float)})
     fig = px.choropleth(
-        data,
-        geojson=ca_counties,
+        empty,
+        geojson={"type": "FeatureCollection", "features": []},
         locations=location_column,
         featureidkey="properties.NAME",
         color=value_column,
@@ -58,4 +43,35 @@ def create_choropleth(data, value_column, location_column):
         coloraxis_colorbar=dict(title="Density", tickformat=".1f"),
     )
 
-    return fig
+    trace = fig.data[0].to_plotly_json()
+    for prop in ("geojson", "locations", "z", "customdata"):
+        trace.pop(prop, None)
+    return trace, fig.layout.to_plotly_json()
+
+
+def create_choropleth(data, value_column, location_column):
+    """
+    Create a choropleth map of California counties
+
+    Args:
+        data (pd.DataFrame): DataFrame containing county data
+        value_column (str): Name of column containing values to plot
+        location_column (str): Name of column containing county names
+
+    Returns:
+        plotly.graph_objects.Figure: Choropleth map
+    """
+    # Load California counties GeoJSON
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(os.path.dirname(current_dir))
+    geojson_path = os.path.join(
+        project_root, "data", "California_County_Boundaries.geojson"
+    )
+
+    # Parsed once per process and shared with the dashboard pages
+    ca_counties = get_geojson(geojson_path)
+
+    trace, layout = _choropleth_base(value_column, location_column)
+    return build_choropleth_figure(
+        trace, layout, data, ca_counties, location_column, value_column
+    )
@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
+
+from utils.plot_helpers import histogram_counts, histogram_trace
 
 # Green color scale for cannabis theme
 GREEN_SCALE = "Greens"
@@ -8,12 +10,16 @@ GREEN_SCALE = "Greens"
 
 @st.cache_data()
 def create_sentiment_distribution_plot(data, sentiment_column, title):
-    fig = px.histogram(
-        data, x=sentiment_column, title=title, color_continuous_scale=GREEN_SCALE
-    )
+    # Binned on the server with the fixed sentiment bins; only the counts are sent
+    counts, edges = histogram_counts(data[sentiment_column], metric=sentiment_column)
+    fig = go.Figure(histogram_trace(counts, edges, sentiment_column))
     fig.update_layout(
+        title={"text": title},
         template="plotly_dark",
         paper_bgcolor="rgba(0,0,0,0)",
         plot_bgcolor="rgba(0,0,0,0)",
+        bargap=0,
+        xaxis_title=sentiment_column,
+        yaxis_title="count",
     )
     return fig
@@ -70,7 +70,7 @@ def calculate_county_sentiment(
         DataFrame with county-level sentiment metrics
     """
     county_sentiment = (
-        sentiment_df.groupby("County")
+        sentiment_df.groupby("County", observed=True)
         .agg({"BERT_Sentiment": ["mean", "count", lambda x: (x > 0).mean() * 100]})
         .reset_index()
     )
@@ -179,6 +179,9 @@ def calculate_license_type_distribution(
     else:
         return pd.DataFrame(), {}
 
+    # Categorical columns report unobserved categories with a zero count
+    type_counts = type_counts[type_counts > 0]
+
     distribution_df = type_counts.reset_index()
     distribution_df.columns = ["License Type", "Count"]
 
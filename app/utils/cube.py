@@ -0,0 +1,579 @@
+"""
+Pre-aggregated cubes of the dispensary and sentiment datasets.
+
+Most page metrics are group-bys over County, Year, Month and License
+Designation (the license column the sidebar filters on). The cubes are built
+once at load time and hold one cell per observed combination of those
+dimensions, so a filter change is answered by masking and rolling up a few
+thousand cells instead of rescanning raw rows.
+
+Cells are kept in a DataFrame with the same column names as the source
+datasets, so the sidebar filters are applied with the mask builders from
+``filters`` and select exactly the rows they would select in the raw data.
+
+Distinct counts (licenses, dispensary names) are kept as one sketch per
+cell of at most 2 ** SKETCH_PRECISION bytes. While a column has few enough
+distinct values for that, the sketch is an exact bitmap over the values,
+packed eight per byte, and rolling up cells is a bitwise OR followed by a
+popcount. Beyond that it is a HyperLogLog: rolling up takes the register
+maxima and the count is an estimate with a standard error of
+1.04 / sqrt(2 ** SKETCH_PRECISION), about 2.3%.
+"""
+
+import copy
+from abc import ABC, abstractmethod
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .data_utils import (
+    COUNTY_KEY_COLUMN,
+    add_county_key,
+    add_county_suffix,
+    build_county_dimension,
+    rebase_county_key,
+)
+from .filters import get_dispensary_mask, get_sentiment_mask
+from .model_agreement import (
+    MODEL_COLUMNS,
+    PAIRS,
+    agreement_measures,
+    confusion_columns,
+    confusion_counts,
+    label_codes,
+)
+
+# Number of set bits for every byte value
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+# Distinct-count sketches use 2 ** SKETCH_PRECISION bytes per cell at most
+SKETCH_PRECISION = 11
+
+DISPENSARY_DIMENSIONS = ["County", "Year", "Month", "License Designation"]
+SENTIMENT_DIMENSIONS = ["County", "Year", "Month"]
+
+
+def _ensure_county_key(df: pd.DataFrame) -> pd.DataFrame:
+    """Add County_Key to frames that were not produced by the loader."""
+    if COUNTY_KEY_COLUMN in df.columns or "County" not in df.columns:
+        return df
+    return add_county_key(df, build_county_dimension([df["County"]]))
+
+
+def _cell_codes(df: pd.DataFrame, dimensions: Sequence[str]) -> List[np.ndarray]:
+    """Integer codes for each cube dimension (-1 for missing values)."""
+    codes = []
+    for column in dimensions:
+        if column == "County":
+            column = COUNTY_KEY_COLUMN
+        if column not in df.columns:
+            codes.append(np.full(len(df), -1, dtype=np.int64))
+        elif isinstance(df[column].dtype, pd.CategoricalDtype):
+            codes.append(df[column].cat.codes.to_numpy().astype(np.int64))
+        else:
+            codes.append(pd.factorize(df[column], sort=True)[0].astype(np.int64))
+    return codes
+
+
+def _build_cells(df: pd.DataFrame, dimensions: Sequence[str]):
+    """
+    Assign each row to a cube cell.
+
+    Returns:
+        tuple: (cell index per row, cell DataFrame with one row per cell)
+    """
+    df = _ensure_county_key(df)
+    codes = _cell_codes(df, dimensions)
+
+    if len(df) == 0:
+        row_cells = np.zeros(0, dtype=np.int64)
+        first_rows = np.zeros(0, dtype=np.int64)
+    else:
+        # Combine the per-dimension codes into one integer per cell
+        combined = np.zeros(len(df), dtype=np.int64)
+        for code in codes:
+            combined = combined * (int(code.max()) + 2) + (code + 1)
+        _, first_rows, row_cells = np.unique(
+            combined, return_index=True, return_inverse=True
+        )
+
+    cells = {}
+    for column in dimensions:
+        source = COUNTY_KEY_COLUMN if column == "County" else column
+        if source in df.columns:
+            cells[source] = df[source].iloc[first_rows].reset_index(drop=True)
+
+    cells = _add_county_labels(
+        pd.DataFrame(cells, index=pd.RangeIndex(len(first_rows)))
+    )
+    return row_cells.ravel(), cells
+
+
+def _add_county_labels(cells: pd.DataFrame) -> pd.DataFrame:
+    """Add display names with the " County" suffix, sharing the key's codes."""
+    if COUNTY_KEY_COLUMN in cells.columns:
+        key = cells[COUNTY_KEY_COLUMN]
+        cells["County"] = pd.Categorical.from_codes(
+            key.cat.codes.to_numpy(),
+            [add_county_suffix(name) for name in key.cat.categories],
+        )
+    return cells
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Number of significant bits of each uint64 value."""
+    values = values.copy()
+    length = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        wide = values >= np.uint64(1 << shift)
+        length[wide] += shift
+        values[wide] >>= np.uint64(shift)
+    return length + (values > 0)
+
+
+class _DistinctSketch:
+    """Per-cell sketches of the distinct non-null values of one column."""
+
+    def __init__(self, data: np.ndarray, exact: bool):
+        """
+        Initialize from precomputed sketches.
+
+        Args:
+            data: One row per cell, read-only once the cube holds it
+            exact: True for packed bitmaps, False for HyperLogLog registers
+        """
+        self.data = data
+        self.exact = exact
+        self.data.flags.writeable = False
+
+    @classmethod
+    def from_values(
+        cls, values: pd.Series, row_cells: np.ndarray, n_cells: int
+    ) -> "_DistinctSketch":
+        """
+        Sketch the distinct values seen in each cell.
+
+        Args:
+            values: Column to count distinct values of
+            row_cells: Cell index of every row
+            n_cells: Number of cells
+
+        Returns:
+            _DistinctSketch: Exact bitmaps if they fit the size bound,
+            HyperLogLog registers otherwise
+        """
+        ids, uniques = pd.factorize(values)
+        present = ids >= 0
+        # Deduplicate (cell, value) pairs before updating the sketches
+        pairs = np.unique(row_cells[present] * max(len(uniques), 1) + ids[present])
+        cell, value = np.divmod(pairs, max(len(uniques), 1))
+
+        n_bytes = (len(uniques) + 7) // 8
+        if n_bytes <= 1 << SKETCH_PRECISION:
+            bitmaps = np.zeros((n_cells, n_bytes), dtype=np.uint8)
+            np.bitwise_or.at(
+                bitmaps, (cell, value >> 3), (0x80 >> (value & 7)).astype(np.uint8)
+            )
+            return cls(bitmaps, exact=True)
+
+        # The first SKETCH_PRECISION bits of a value's hash pick its register,
+        # which keeps the highest position of the first set bit in the rest
+        hashes = pd.util.hash_array(np.asarray(uniques, dtype=object))[value]
+        rest_bits = 64 - SKETCH_PRECISION
+        register = (hashes >> np.uint64(rest_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        rank = (rest_bits + 1 - _bit_length(rest)).astype(np.uint8)
+
+        registers = np.zeros((n_cells, 1 << SKETCH_PRECISION), dtype=np.uint8)
+        np.maximum.at(registers, (cell, register), rank)
+        return cls(registers, exact=False)
+
+    def _count(self, merged: np.ndarray) -> np.ndarray:
+        """Distinct counts of merged sketches (one per row)."""
+        if self.exact:
+            return _POPCOUNT[merged].sum(axis=-1)
+
+        m = merged.shape[-1]
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.ldexp(1.0, -merged.astype(np.int64)).sum(axis=-1)
+        # Linear counting is more accurate for small counts
+        zeros = (merged == 0).sum(axis=-1)
+        with np.errstate(divide="ignore"):
+            linear = m * np.log(m / zeros)
+        estimate = np.where((estimate <= 2.5 * m) & (zeros > 0), linear, estimate)
+        return np.rint(estimate).astype(np.int64)
+
+    def _merge(self):
+        return np.bitwise_or if self.exact else np.maximum
+
+    def count_groups(self, positions: np.ndarray, starts: np.ndarray) -> np.ndarray:
+        """
+        Count the distinct values of groups of cells.
+
+        Args:
+            positions: Cell positions, ordered by group
+            starts: Offset of each group's first cell in positions
+
+        Returns:
+            np.ndarray: Distinct count per group
+        """
+        if self.data.shape[1] == 0 or len(positions) == 0:
+            return np.zeros(len(starts), dtype=np.int64)
+        return self._count(self._merge().reduceat(self.data[positions], starts, axis=0))
+
+    def count(self, mask: Optional[np.ndarray] = None) -> int:
+        """
+        Count the distinct values of the cells selected by a mask.
+
+        Args:
+            mask: Boolean cell mask (default: all cells)
+
+        Returns:
+            int: Distinct count
+        """
+        selected = self.data if mask is None else self.data[mask]
+        if selected.shape[1] == 0 or len(selected) == 0:
+            return 0
+        return int(self._count(self._merge().reduce(selected, axis=0)))
+
+
+def _sum_by_cell(values: np.ndarray, row_cells: np.ndarray, n_cells: int) -> np.ndarray:
+    return np.bincount(row_cells, weights=values, minlength=n_cells)
+
+
+class _Cube(ABC):
+    """Shared slicing and roll-up logic for the dataset cubes."""
+
+    dimensions: List[str] = []
+
+    def __init__(
+        self, cells: pd.DataFrame, sketches: Optional[Dict[str, _DistinctSketch]] = None
+    ):
+        """
+        Initialize a cube from precomputed cells.
+
+        Args:
+            cells: One row per cell with dimension and additive measure columns
+            sketches: Distinct-value sketches per measure name
+        """
+        self.cells = cells
+        # Cubes are shared by all sessions; the sketch arrays are read-only
+        self.sketches = MappingProxyType(dict(sketches or {}))
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def read_only_view(self) -> "_Cube":
+        """
+        Get a copy of the cube whose cells are a view of this cube's.
+
+        Sketches are read-only and shared; the cells frame is a shallow copy
+        (see data_store.read_only_view()).
+
+        Returns:
+            Cube of the same type sharing this cube's data
+        """
+        view = copy.copy(self)
+        view.cells = self.cells.copy(deep=False)
+        return view
+
+    @abstractmethod
+    def _mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Boolean mask of the cells selected by the filters (None for all)."""
+
+    def _finish(self, result: pd.DataFrame) -> pd.DataFrame:
+        """Add derived (non-additive) measures to a rolled-up frame."""
+        return result
+
+    @property
+    def measures(self) -> List[str]:
+        """Additive measure columns held per cell."""
+        return [
+            c
+            for c in self.cells.columns
+            if c not in self.dimensions and c != COUNTY_KEY_COLUMN
+        ]
+
+    def rollup(
+        self, by: Sequence[str], filters: Optional[Dict[str, Any]] = None
+    ) -> pd.DataFrame:
+        """
+        Aggregate the cells matching the filters by the given dimensions.
+
+        Rows whose dimension values are missing are dropped, as in a pandas
+        groupby.
+
+        Args:
+            by: Dimension columns to group by (e.g. ["Year"] or ["County"])
+            filters: Filter dictionary from generate_sidebar()
+
+        Returns:
+            pd.DataFrame: One row per observed group with all measures
+        """
+        by = list(by)
+        mask = self._mask(filters)
+        cells = self.cells if mask is None else self.cells[mask]
+
+        grouped = cells.groupby(by, observed=True, sort=True)
+        result = grouped[self.measures].sum()
+
+        if self.sketches and len(cells):
+            # Cells with a missing dimension value belong to no group (NaN)
+            group_ids = grouped.ngroup()
+            keep = group_ids.notna().to_numpy()
+            positions = (
+                np.flatnonzero(mask) if mask is not None else np.arange(len(self.cells))
+            )
+            positions = positions[keep]
+            group_ids = group_ids[keep].to_numpy(dtype=np.int64)
+            order = np.argsort(group_ids, kind="stable")
+            starts = np.flatnonzero(np.r_[True, np.diff(group_ids[order]) != 0])
+
+            for name, sketch in self.sketches.items():
+                result[name] = (
+                    sketch.count_groups(positions[order], starts) if len(order) else 0
+                )
+        else:
+            for name in self.sketches:
+                result[name] = 0
+
+        return self._finish(result.reset_index())
+
+    def totals(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Aggregate all cells matching the filters into a single set of measures.
+
+        Args:
+            filters: Filter dictionary from generate_sidebar()
+
+        Returns:
+            dict: Measure name to value, plus "Counties" (counties with data)
+        """
+        mask = self._mask(filters)
+        cells = self.cells if mask is None else self.cells[mask]
+
+        totals = pd.DataFrame({name: [cells[name].sum()] for name in self.measures})
+        for name, sketch in self.sketches.items():
+            totals[name] = sketch.count(mask)
+
+        result = {
+            name: values[0]
+            for name, values in self._finish(totals).to_dict("list").items()
+        }
+        result["Counties"] = (
+            int(cells["County"].nunique()) if "County" in cells.columns else 0
+        )
+        return result
+
+
+class DispensaryCube(_Cube):
+    """
+    Dispensary records by County x Year x Month x License Designation.
+
+    Measures: Records (row count), Licenses (distinct License Number) and
+    Dispensaries (distinct Dispensary Name, see _DistinctSketch).
+    """
+
+    dimensions = DISPENSARY_DIMENSIONS
+
+    @classmethod
+    def from_frame(cls, dispensaries: pd.DataFrame) -> "DispensaryCube":
+        """
+        Build the cube from the loaded dispensary dataset.
+
+        Args:
+            dispensaries: Dispensary dataset (ideally with County_Key)
+
+        Returns:
+            DispensaryCube: The pre-aggregated cube
+        """
+        row_cells, cells = _build_cells(dispensaries, cls.dimensions)
+        n_cells = len(cells)
+        cells["Records"] = np.bincount(row_cells, minlength=n_cells).astype(np.int64)
+
+        sketches = {}
+        for name, column in [
+            ("Licenses", "License Number"),
+            ("Dispensaries", "Dispensary Name"),
+        ]:
+            if column in dispensaries.columns:
+                sketches[name] = _DistinctSketch.from_values(
+                    dispensaries[column], row_cells, n_cells
+                )
+        return cls(cells, sketches)
+
+    def _mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        return get_dispensary_mask(self.cells, filters or {})
+
+
+class _TweetCube(_Cube):
+    """Cubes of the tweet sentiment dataset, growing with ingested batches."""
+
+    dimensions = SENTIMENT_DIMENSIONS
+
+    def _mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        return get_sentiment_mask(self.cells, filters or {})
+
+    def append(self, sentiment: pd.DataFrame) -> "_TweetCube":
+        """
+        Fold newly ingested tweets into a new cube.
+
+        Only the appended rows are scanned; their cells are added to the
+        matching existing cells (or appended as new cells). The current cube
+        is left unchanged for sessions still using it.
+
+        Args:
+            sentiment: New tweet rows, with a County_Key on the same county
+                dimension as the cube or a superset of it
+
+        Returns:
+            Cube covering the existing and the new rows
+        """
+        batch = type(self).from_frame(sentiment)
+        if len(batch) == 0:
+            return self
+
+        existing = self.cells.drop(columns="County")
+        new = batch.cells.drop(columns="County")
+        if COUNTY_KEY_COLUMN in new.columns:
+            existing = rebase_county_key(
+                existing, new[COUNTY_KEY_COLUMN].cat.categories
+            )
+
+        keys = [
+            c for c in [COUNTY_KEY_COLUMN, "Year", "Month"] if c in existing.columns
+        ]
+        merged = (
+            pd.concat([existing, new], ignore_index=True)
+            .groupby(keys, observed=True, dropna=False, sort=False)[self.measures]
+            .sum()
+            .reset_index()
+        )
+        return type(self)(_add_county_labels(merged))
+
+
+class SentimentCube(_TweetCube):
+    """
+    Tweet sentiment by County x Year x Month.
+
+    Additive measures: Records (tweets), Count (tweets with a BERT score),
+    Sum and SumSq (of BERT_Sentiment) and Positive (score > 0). Roll-ups
+    add Mean, Std and Positive_Ratio (percent of all tweets).
+    """
+
+    @classmethod
+    def from_frame(
+        cls, sentiment: pd.DataFrame, score_column: str = "BERT_Sentiment"
+    ) -> "SentimentCube":
+        """
+        Build the cube from the loaded tweet sentiment dataset.
+
+        Args:
+            sentiment: Tweet sentiment dataset (ideally with County_Key)
+            score_column: Numeric sentiment column to aggregate
+
+        Returns:
+            SentimentCube: The pre-aggregated cube
+        """
+        row_cells, cells = _build_cells(sentiment, cls.dimensions)
+        n_cells = len(cells)
+
+        scores = (
+            pd.to_numeric(sentiment[score_column], errors="coerce").to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+            if score_column in sentiment.columns
+            else np.full(len(sentiment), np.nan)
+        )
+        valid = ~np.isnan(scores)
+        filled = np.where(valid, scores, 0.0)
+
+        cells["Records"] = np.bincount(row_cells, minlength=n_cells).astype(np.int64)
+        cells["Count"] = np.bincount(
+            row_cells, weights=valid, minlength=n_cells
+        ).astype(np.int64)
+        cells["Sum"] = _sum_by_cell(filled, row_cells, n_cells)
+        cells["SumSq"] = _sum_by_cell(filled * filled, row_cells, n_cells)
+        cells["Positive"] = np.bincount(
+            row_cells, weights=filled > 0, minlength=n_cells
+        ).astype(np.int64)
+        return cls(cells)
+
+    def _finish(self, result: pd.DataFrame) -> pd.DataFrame:
+        count = result["Count"].astype(float)
+        records = result["Records"].astype(float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result["Mean"] = (result["Sum"] / count).where(count > 0)
+            # Sample standard deviation, matching pandas' std()
+            variance = (result["SumSq"] - count * result["Mean"] ** 2) / (count - 1)
+            result["Std"] = np.sqrt(variance.clip(lower=0)).where(count > 1)
+            result["Positive_Ratio"] = (result["Positive"] / records * 100).where(
+                records > 0
+            )
+        return result
+
+
+class AgreementCube(_TweetCube):
+    """
+    Agreement of the VADER, BERT and GPT labels by County x Year x Month.
+
+    Additive measures: Records (tweets), the 3x3 confusion counts of every
+    model pair (<A>_<B>_<i><j>, see model_agreement.confusion_columns()),
+    Rated (tweets labeled by all models) and Unanimous (of those, tweets
+    all models label alike). Roll-ups add <A>_<B>_Compared, _Agreement and
+    _Disagreement (percent of compared tweets) and _Kappa per pair, and
+    Unanimous_Ratio (percent of rated tweets).
+    """
+
+    @classmethod
+    def from_frame(cls, sentiment: pd.DataFrame) -> "AgreementCube":
+        """
+        Build the cube from the loaded tweet sentiment dataset.
+
+        Args:
+            sentiment: Tweet sentiment dataset (ideally with County_Key)
+
+        Returns:
+            AgreementCube: The pre-aggregated cube
+        """
+        row_cells, cells = _build_cells(sentiment, cls.dimensions)
+        n_cells = len(cells)
+        codes = label_codes(sentiment)
+
+        cells["Records"] = np.bincount(row_cells, minlength=n_cells).astype(np.int64)
+        for a, b in PAIRS:
+            counts = confusion_counts(codes[a], codes[b], row_cells, n_cells).reshape(
+                n_cells, 9
+            )
+            for i, column in enumerate(confusion_columns(a, b)):
+                cells[column] = counts[:, i]
+
+        stacked = np.stack([codes[model] for model in MODEL_COLUMNS])
+        rated = (stacked >= 0).all(axis=0)
+        unanimous = rated & (stacked == stacked[0]).all(axis=0)
+        cells["Rated"] = np.bincount(
+            row_cells, weights=rated, minlength=n_cells
+        ).astype(np.int64)
+        cells["Unanimous"] = np.bincount(
+            row_cells, weights=unanimous, minlength=n_cells
+        ).astype(np.int64)
+        return cls(cells)
+
+    def _finish(self, result: pd.DataFrame) -> pd.DataFrame:
+        derived = {}
+        for a, b in PAIRS:
+            confusion = (
+                result[confusion_columns(a, b)]
+                .to_numpy(dtype=np.int64)
+                .reshape(-1, 3, 3)
+            )
+            for name, values in agreement_measures(confusion).items():
+                derived[f"{a}_{b}_{name}"] = values
+        rated = result["Rated"].astype(float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            derived["Unanimous_Ratio"] = (
+                (result["Unanimous"] / rated * 100).where(rated > 0).to_numpy()
+            )
+        return pd.concat([result, pd.DataFrame(derived, index=result.index)], axis=1)
@@ -3,9 +3,20 @@ Module for loading and processing data from various sources.
 """
 
 import os
+import numpy as np
 import pandas as pd
 import streamlit as st
-from .load_geojson import load_geojson
+from .load_geojson import get_geojson
+from .geometry import load_county_geometries
+from .spatial_index import fill_counties_from_coordinates, has_coordinates
+from .dataset_cache import read_cached_frame, source_fingerprint, write_cached_frame
+from .data_store import DataSnapshot, DataStore, enable_copy_on_write
+from .data_watcher import SOURCE_FILES, DataWatcher, get_watch_interval, source_fingerprints
+from .data_utils import add_county_key, build_county_dimension
+from .cube import AgreementCube, DispensaryCube, SentimentCube
+from .hexbin import DispensaryHexbins
+from .model_agreement import BERT_LABELED_COLUMN
+from .ingest import apply_batches, find_tweet_batches, ingest_tweet_batches
 from .error_messages import (
     show_file_missing_error,
     show_column_missing_error,
@@ -19,10 +30,10 @@ def get_data_dir():
     return os.path.join(os.path.dirname(current_dir), "data")
 
 
-def convert_sentiment_score(score):
-    """Convert sentiment score from string format to numeric."""
+def parse_sentiment_score(score):
+    """Parse a sentiment score to the numeric scale (NaN if there is none)."""
     if pd.isna(score):
-        return 0
+        return np.nan
 
     # If it's already numeric, return as is
     if isinstance(score, (int, float)):
@@ -35,125 +46,169 @@ def convert_sentiment_score(score):
             # Convert 5-star scale to -1 to 1 scale
             return (stars - 3) / 2
         except (ValueError, IndexError):
-            return 0
+            return np.nan
 
-    # For other string values, default to 0
-    return 0
+    # Numbers read as text, e.g. scores written by utils.sentiment_scoring
+    # into a column that also holds star labels
+    if isinstance(score, str):
+        try:
+            value = float(score)
+        except ValueError:
+            return np.nan
+        return value if np.isfinite(value) else np.nan
 
+    # Other values carry no score
+    return np.nan
 
-# Required columns for each dataset
-REQUIRED_COLUMNS = {
-    "dispensaries": ["County", "Year", "License Number", "Dispensary Name", "License Type"],
-    "density": ["County", "Dispensary_PerCapita", "Population"],
-    "tweet_sentiment": ["BERT_Sentiment", "County"]
-}
 
+def convert_sentiment_score(score):
+    """Convert sentiment score from string format to numeric."""
+    value = parse_sentiment_score(score)
+    return 0 if np.isnan(value) else value
 
-@st.cache_data
-def load_data():
+
+def parse_sentiment_scores(scores):
     """
-    Load all data files and return them as a dictionary.
+    Parse a whole column of sentiment scores to the numeric scale.
 
-    This function is cached to improve performance. Data is loaded once
-    and reused across page views within the same session.
+    Vectorized equivalent of ``parse_sentiment_score``. The column is
+    factorized into integer codes over its distinct labels ("1 star" ...
+    "5 stars" in practice), each distinct label is parsed once, and the
+    codes are mapped through the resulting lookup table.
+
+    Args:
+        scores (pd.Series): Raw sentiment column (star strings or numbers)
 
     Returns:
-        dict: Dictionary containing processed data frames
+        pd.Series: Float sentiment scores on the -1 to 1 scale, NaN for
+        missing and malformed values
+    """
+    if pd.api.types.is_numeric_dtype(scores):
+        return scores.astype(float)
 
-    Raises:
-        FileNotFoundError: If required data files are missing
-        ValueError: If required columns are missing from data files
+    codes, uniques = pd.factorize(scores, use_na_sentinel=True)
+
+    # One slot per distinct label, plus a trailing NaN for the -1 NaN code
+    lookup = np.array(
+        [parse_sentiment_score(value) for value in pd.Index(uniques).tolist()]
+        + [np.nan],
+        dtype=float,
+    )
+
+    return pd.Series(lookup[codes], index=scores.index, name=scores.name)
+
+
+def convert_sentiment_scores(scores):
     """
-    data_dir = get_data_dir()
+    Convert a whole column of sentiment scores to the numeric scale.
 
-    # Validate required files exist
-    required_files = {
-        "Dispensaries.csv": ["County"],
-        "Dispensary_Density.csv": ["County", "Dispensary_PerCapita"],
-        "Tweet_Sentiment.csv": ["BERT_Sentiment"],
-        "California_County_Boundaries.geojson": None
-    }
+    Vectorized equivalent of ``convert_sentiment_score``: missing and
+    malformed values get the 0 fallback, exactly like the scalar function.
 
-    for filename in required_files.keys():
-        file_path = os.path.join(data_dir, filename)
-        if not os.path.exists(file_path):
-            show_file_missing_error(filename, file_path)
-            st.stop()
+    Args:
+        scores (pd.Series): Raw sentiment column (star strings or numbers)
 
-    # Load dispensaries data
-    try:
-        dispensaries = pd.read_csv(
-            os.path.join(data_dir, "Dispensaries.csv"), index_col=None
-        )
+    Returns:
+        pd.Series: Float sentiment scores on the -1 to 1 scale
+    """
+    return parse_sentiment_scores(scores).fillna(0.0)
+
+
+# Required columns for each dataset
+REQUIRED_COLUMNS = {
+    "dispensaries": ["County", "Year", "License Number", "Dispensary Name", "License Type"],
+    "density": ["County", "Dispensary_PerCapita", "Population"],
+    "tweet_sentiment": ["BERT_Sentiment", "County"]
+}
 
-        if dispensaries.empty:
-            st.warning("⚠️ Dispensaries.csv is empty")
+# Declared column types for each dataset (see DATA_SCHEMA.md). Low-cardinality
+# strings are categoricals, Year/Month and flags are small nullable integers
+# (nullable so a missing value never fails the whole file), and model scores
+# are float32. Columns not listed are left to pandas inference; that includes
+# BERT_Sentiment, which is converted to float32 after reading, so a numeric
+# column is read as numbers rather than as text labels.
+COLUMN_DTYPES = {
+    "dispensaries": {
+        "Year": "Int16",
+        "Month": "Int8",
+        "County": "category",
+        "License Term": "category",
+        "License Designation": "category",
+        "License Type": "category",
+        "Rec License": "Int8",
+        "Medical": "Int8",
+        "Non-Storefront": "Int8",
+        "Latitude": "float64",
+        "Longitude": "float64",
+    },
+    "density": {
+        "Year": "Int16",
+        "County": "category",
+        "Dispensary_Count": "Int32",
+        "Population": "Int32",
+        "Dispensary_PerCapita": "float64",
+    },
+    "tweet_sentiment": {
+        "Year": "Int16",
+        "Month": "Int8",
+        "County": "category",
+        "State": "category",
+        "Key word": "category",
+        "VADER_Sentiment": "float32",
+        "Predictions": "Int8",
+        "GPT_Sentiment": "Int8",
+    },
+}
 
-        # Derive Year from License_Date if Year column doesn't exist
-        if "Year" not in dispensaries.columns and "License_Date" in dispensaries.columns:
-            dispensaries["Year"] = pd.to_datetime(dispensaries["License_Date"]).dt.year
 
-        # Validate all required columns for dispensaries
-        missing_cols = [col for col in REQUIRED_COLUMNS["dispensaries"] if col not in dispensaries.columns]
-        if missing_cols:
-            show_column_missing_error(
-                "Dispensaries.csv",
-                missing_cols,
-                REQUIRED_COLUMNS["dispensaries"]
-            )
-            st.stop()
-    except Exception as e:
-        show_loading_error("Dispensaries.csv", str(e))
-        st.stop()
+def apply_schema(df, dataset):
+    """
+    Cast the columns of a loaded frame to the declared dtypes.
 
-    # Load density data
-    try:
-        density = pd.read_csv(
-            os.path.join(data_dir, "Dispensary_Density.csv"), index_col=None
-        )
+    Only columns that are present and not already of the declared type are
+    converted, so this is cheap to call on frames read with ``dtype=``.
 
-        if density.empty:
-            st.warning("⚠️ Dispensary_Density.csv is empty")
+    Args:
+        df (pd.DataFrame): Frame to convert
+        dataset (str): Dataset name, a key of COLUMN_DTYPES
 
-        # Validate all required columns for density
-        missing_cols = [col for col in REQUIRED_COLUMNS["density"] if col not in density.columns]
-        if missing_cols:
-            show_column_missing_error(
-                "Dispensary_Density.csv",
-                missing_cols,
-                REQUIRED_COLUMNS["density"]
-            )
-            st.stop()
-    except Exception as e:
-        show_loading_error("Dispensary_Density.csv", str(e))
-        st.stop()
+    Returns:
+        pd.DataFrame: Frame with declared dtypes applied
+    """
+    casts = {
+        col: dtype
+        for col, dtype in COLUMN_DTYPES[dataset].items()
+        if col in df.columns and df[col].dtype != dtype
+    }
+    if not casts:
+        return df
+    return df.astype(casts)
 
-    # Load tweet sentiment data and process
-    try:
-        tweet_sentiment = pd.read_csv(
-            os.path.join(data_dir, "Tweet_Sentiment.csv"), index_col=None
-        )
 
-        if tweet_sentiment.empty:
-            st.warning("⚠️ Tweet_Sentiment.csv is empty")
+def prepare_tweet_sentiment(tweet_sentiment, synthetic_start="2020-01-01"):
+    """
+    Convert sentiment scores and normalize the date columns of raw tweet data.
 
-        # Validate all required columns for tweet_sentiment
-        missing_cols = [col for col in REQUIRED_COLUMNS["tweet_sentiment"] if col not in tweet_sentiment.columns]
-        if missing_cols:
-            show_column_missing_error(
-                "Tweet_Sentiment.csv",
-                missing_cols,
-                REQUIRED_COLUMNS["tweet_sentiment"]
-            )
-            st.stop()
-    except Exception as e:
-        show_loading_error("Tweet_Sentiment.csv", str(e))
-        st.stop()
+    BERT_Sentiment is converted to the -1 to 1 scale with missing or
+    malformed ratings set to 0, and BERT_LABELED_COLUMN flags the tweets
+    that had a rating.
 
-    # Convert sentiment scores
-    tweet_sentiment["BERT_Sentiment"] = tweet_sentiment["BERT_Sentiment"].apply(
-        convert_sentiment_score
-    )
+    If no date column exists, synthetic daily dates starting from
+    synthetic_start are created and ``tweet_sentiment.attrs["synthetic_dates"]``
+    is set so the caller can warn the user (the flag survives the Parquet cache).
+
+    Args:
+        tweet_sentiment (pd.DataFrame): Tweet data as read from the CSV
+        synthetic_start (str or Timestamp): First synthetic date, if needed
+
+    Returns:
+        pd.DataFrame: Processed tweet data
+    """
+    # Convert sentiment scores, remembering which tweets had one: the 0
+    # fallback of missing scores is indistinguishable from a neutral rating
+    scores = parse_sentiment_scores(tweet_sentiment["BERT_Sentiment"])
+    tweet_sentiment[BERT_LABELED_COLUMN] = scores.notna().to_numpy()
+    tweet_sentiment["BERT_Sentiment"] = scores.fillna(0.0).astype("float32")
 
     # Handle date columns
     date_columns = ["Tweet_Date", "Created_At", "Date"]
@@ -166,14 +221,10 @@ def load_data():
 
     # If no valid date column exists, create one based on index
     if not any(col in tweet_sentiment.columns for col in date_columns):
-        st.warning(
-            "⚠️ No date column found in Tweet_Sentiment.csv. "
-            "Using synthetic dates starting from 2020-01-01. "
-            "Temporal analysis may not reflect actual dates."
-        )
         tweet_sentiment["Tweet_Date"] = pd.date_range(
-            start="2020-01-01", periods=len(tweet_sentiment), freq="D"
+            start=synthetic_start, periods=len(tweet_sentiment), freq="D"
         )
+        tweet_sentiment.attrs["synthetic_dates"] = True
 
     # Ensure we have a primary date column
     if "Tweet_Date" not in tweet_sentiment.columns:
@@ -182,20 +233,306 @@ def load_data():
                 tweet_sentiment["Tweet_Date"] = tweet_sentiment[col]
                 break
 
+    return tweet_sentiment
+
+
+class DataLoadError(Exception):
+    """Raised when the data files cannot be loaded outside a script run."""
+
+
+def _fail(interactive, show_error, filename, *args):
+    """
+    Report a loading error.
+
+    In a script run the error is shown with the given error_messages helper
+    and the run is stopped. Background loads (which have no page to report
+    to) raise DataLoadError instead.
+    """
+    if not interactive:
+        if show_error is show_file_missing_error:
+            reason = f"file not found at {args[0]}"
+        elif show_error is show_column_missing_error:
+            reason = f"missing required columns: {', '.join(args[0])}"
+        else:
+            reason = args[0]
+        raise DataLoadError(f"{filename}: {reason}")
+    show_error(filename, *args)
+    st.stop()
+
+
+def read_datasets(data_dir=None, interactive=True):
+    """
+    Read and process all data files.
+
+    Processed frames are persisted to a Parquet cache (see dataset_cache), so
+    new server processes skip the CSV parse while the source files are
+    unchanged. Missing files or columns are reported in the UI and stop the
+    script run.
+
+    Args:
+        data_dir (str, optional): Data directory (default: get_data_dir())
+        interactive (bool): Report errors in the UI and stop the script run
+            (default). If False, raise DataLoadError instead.
+
+    Returns:
+        tuple: (dict of processed data, list of user-facing warning messages)
+
+    Raises:
+        DataLoadError: If interactive is False and a file cannot be loaded
+    """
+    data_dir = data_dir or get_data_dir()
+    warnings = []
+
+    # Validate required files exist
+    required_files = {
+        "Dispensaries.csv": ["County"],
+        "Dispensary_Density.csv": ["County", "Dispensary_PerCapita"],
+        "Tweet_Sentiment.csv": ["BERT_Sentiment"],
+        "California_County_Boundaries.geojson": None
+    }
+
+    for filename in required_files.keys():
+        file_path = os.path.join(data_dir, filename)
+        if not os.path.exists(file_path):
+            _fail(interactive, show_file_missing_error, filename, file_path)
+
+    # Load dispensaries data (from the columnar cache when it is current)
+    dispensaries_path = os.path.join(data_dir, "Dispensaries.csv")
+    dispensaries = read_cached_frame("dispensaries", dispensaries_path)
+    if dispensaries is None:
+        try:
+            # Taken before parsing, so a rewrite during the parse is detected
+            fingerprint = source_fingerprint(dispensaries_path)
+            dispensaries = pd.read_csv(
+                dispensaries_path, index_col=None, dtype=COLUMN_DTYPES["dispensaries"]
+            )
+
+            # Derive Year from License_Date if Year column doesn't exist
+            if "Year" not in dispensaries.columns and "License_Date" in dispensaries.columns:
+                dispensaries["Year"] = pd.to_datetime(dispensaries["License_Date"]).dt.year
+                dispensaries = apply_schema(dispensaries, "dispensaries")
+
+            # Validate all required columns for dispensaries (County may be
+            # assigned from coordinates once the boundaries are loaded)
+            missing_cols = [
+                col for col in REQUIRED_COLUMNS["dispensaries"]
+                if col not in dispensaries.columns
+                and not (col == "County" and has_coordinates(dispensaries))
+            ]
+            if missing_cols:
+                _fail(
+                    interactive,
+                    show_column_missing_error,
+                    "Dispensaries.csv",
+                    missing_cols,
+                    REQUIRED_COLUMNS["dispensaries"]
+                )
+        except DataLoadError:
+            raise
+        except Exception as e:
+            _fail(interactive, show_loading_error, "Dispensaries.csv", str(e))
+
+        write_cached_frame("dispensaries", dispensaries_path, dispensaries, fingerprint=fingerprint)
+
+    if dispensaries.empty:
+        warnings.append("⚠️ Dispensaries.csv is empty")
+
+    # Load density data
+    density_path = os.path.join(data_dir, "Dispensary_Density.csv")
+    density = read_cached_frame("density", density_path)
+    if density is None:
+        try:
+            # Taken before parsing, so a rewrite during the parse is detected
+            fingerprint = source_fingerprint(density_path)
+            density = pd.read_csv(
+                density_path, index_col=None, dtype=COLUMN_DTYPES["density"]
+            )
+
+            # Validate all required columns for density
+            missing_cols = [col for col in REQUIRED_COLUMNS["density"] if col not in density.columns]
+            if missing_cols:
+                _fail(
+                    interactive,
+                    show_column_missing_error,
+                    "Dispensary_Density.csv",
+                    missing_cols,
+                    REQUIRED_COLUMNS["density"]
+                )
+        except DataLoadError:
+            raise
+        except Exception as e:
+            _fail(interactive, show_loading_error, "Dispensary_Density.csv", str(e))
+
+        write_cached_frame("density", density_path, density, fingerprint=fingerprint)
+
+    if density.empty:
+        warnings.append("⚠️ Dispensary_Density.csv is empty")
+
+    # Load tweet sentiment data and process
+    tweet_sentiment_path = os.path.join(data_dir, "Tweet_Sentiment.csv")
+    tweet_sentiment = read_cached_frame("tweet_sentiment", tweet_sentiment_path)
+    if tweet_sentiment is None:
+        try:
+            # Taken before parsing, so a rewrite during the parse is detected
+            fingerprint = source_fingerprint(tweet_sentiment_path)
+            tweet_sentiment = pd.read_csv(
+                tweet_sentiment_path, index_col=None, dtype=COLUMN_DTYPES["tweet_sentiment"]
+            )
+
+            # Validate all required columns for tweet_sentiment
+            missing_cols = [col for col in REQUIRED_COLUMNS["tweet_sentiment"] if col not in tweet_sentiment.columns]
+            if missing_cols:
+                _fail(
+                    interactive,
+                    show_column_missing_error,
+                    "Tweet_Sentiment.csv",
+                    missing_cols,
+                    REQUIRED_COLUMNS["tweet_sentiment"]
+                )
+        except DataLoadError:
+            raise
+        except Exception as e:
+            _fail(interactive, show_loading_error, "Tweet_Sentiment.csv", str(e))
+
+        tweet_sentiment = prepare_tweet_sentiment(tweet_sentiment)
+        write_cached_frame(
+            "tweet_sentiment", tweet_sentiment_path, tweet_sentiment, fingerprint=fingerprint
+        )
+
+    if tweet_sentiment.empty:
+        warnings.append("⚠️ Tweet_Sentiment.csv is empty")
+
+    if tweet_sentiment.attrs.get("synthetic_dates"):
+        warnings.append(
+            "⚠️ No date column found in Tweet_Sentiment.csv. "
+            "Using synthetic dates starting from 2020-01-01. "
+            "Temporal analysis may not reflect actual dates."
+        )
+
     # Load GeoJSON with error handling
+    geojson_path = os.path.join(data_dir, "California_County_Boundaries.geojson")
     try:
-        ca_counties = load_geojson(
-            os.path.join(data_dir, "California_County_Boundaries.geojson")
-        )
+        ca_counties = get_geojson(geojson_path)
+        # Simplified levels of detail shipped to the browser by the map pages
+        county_geometries = load_county_geometries(geojson_path, ca_counties)
     except Exception as e:
-        show_loading_error("California_County_Boundaries.geojson", str(e))
-        st.stop()
+        _fail(interactive, show_loading_error, "California_County_Boundaries.geojson", str(e))
+
+    # Counties of dispensaries delivered with coordinates only
+    dispensaries = fill_counties_from_coordinates(dispensaries, ca_counties)
+
+    # Canonical county key shared by all datasets, computed once at load time
+    county_dimension = build_county_dimension(
+        [dispensaries["County"], density["County"], tweet_sentiment["County"]],
+        extra_names=ca_counties.county_index.keys,
+    )
+    dispensaries = add_county_key(dispensaries, county_dimension)
+    density = add_county_key(density, county_dimension)
+    tweet_sentiment = add_county_key(tweet_sentiment, county_dimension)
 
     data = {
         "dispensaries": dispensaries,
         "density": density,
         "tweet_sentiment": tweet_sentiment,
         "ca_counties": ca_counties,
+        "county_geometries": county_geometries,
+        "county_dimension": county_dimension,
+        # Pre-aggregated cubes answering the page group-bys without raw scans
+        "dispensary_cube": DispensaryCube.from_frame(dispensaries),
+        "sentiment_cube": SentimentCube.from_frame(tweet_sentiment),
+        "agreement_cube": AgreementCube.from_frame(tweet_sentiment),
+        # Hexagon cells of dispensaries with coordinates (None without them)
+        "dispensary_hexbins": DispensaryHexbins.from_frame(dispensaries),
+    }
+
+    return data, warnings
+
+
+def load_snapshot_contents(data_dir=None, interactive=True):
+    """
+    Read all datasets, including tweet batches, for a new snapshot.
+
+    The input files are fingerprinted before they are read, so a change made
+    while loading is still detected by the data watcher afterwards.
+
+    Args:
+        data_dir (str, optional): Data directory (default: get_data_dir())
+        interactive (bool): See read_datasets()
+
+    Returns:
+        tuple: (dict of processed data, list of warnings, dict of sources)
+    """
+    data_dir = data_dir or get_data_dir()
+    batches = find_tweet_batches(data_dir)
+    sources = {
+        name: fingerprint
+        for name, fingerprint in source_fingerprints(data_dir).items()
+        if name in SOURCE_FILES
     }
+    data, warnings = read_datasets(data_dir, interactive=interactive)
+
+    result = apply_batches(DataSnapshot(data, 0, warnings, sources), data_dir, batches)
+    if result is None:
+        return data, warnings, sources
+    return result[0]
+
+
+@st.cache_resource
+def get_data_store():
+    """
+    Get the process-wide data store shared by all sessions and pages.
+
+    Turns on pandas Copy-on-Write, which the read-only views handed out by
+    the store rely on. Unless DATA_WATCH_INTERVAL is 0, a background
+    DataWatcher keeps the store current when files in the data directory
+    change.
+
+    Returns:
+        DataStore: Store holding the single parsed copy of the datasets
+    """
+    enable_copy_on_write()
+    store = DataStore(load_snapshot_contents)
+
+    interval = get_watch_interval()
+    if interval > 0:
+        data_dir = get_data_dir()
+        DataWatcher(
+            store,
+            data_dir,
+            builder=lambda: load_snapshot_contents(data_dir, interactive=False),
+            interval=interval,
+        ).start()
+
+    return store
+
+
+def load_data():
+    """
+    Load all data files and return them as a dictionary.
+
+    The datasets are parsed once per process and shared by every session
+    (see data_store). Each call returns read-only views: they share memory
+    with the store, and any modification a page makes - such as replacing a
+    column - only affects its own view.
+
+    Changed data files are picked up in the background by the data watcher
+    (see data_watcher); with the watcher disabled, new
+    ``Tweet_Sentiment_*.csv`` batch files are appended on the next call
+    (see ingest).
+
+    Returns:
+        dict: Dictionary containing processed data frames
+
+    Raises:
+        FileNotFoundError: If required data files are missing
+        ValueError: If required columns are missing from data files
+    """
+    store = get_data_store()
+    if get_watch_interval() == 0:
+        ingest_tweet_batches(store)
+    snapshot = store.snapshot()
+
+    for message in snapshot.warnings:
+        st.warning(message)
 
-    return data
+    return snapshot.views()
@@ -0,0 +1,230 @@
+"""
+Process-wide shared store for the loaded datasets.
+
+``st.cache_data`` pickles its return value and hands every caller a fresh
+deep copy, so every rerun of every session paid for a full copy of each
+frame. The DataStore keeps a single parsed copy per process and hands out
+read-only views instead.
+
+Views are shallow copies that share column memory with the store. With
+pandas Copy-on-Write (always on in pandas 3, turned on for pandas 2 by
+enable_copy_on_write() when the app creates its store) any write to a view -
+including column assignments such as ``density["County"] = ...`` - copies
+the affected column first, so pages can never mutate the shared frames.
+Other shared objects (the county boundaries, the cubes) provide their own
+read_only_view().
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+def enable_copy_on_write() -> None:
+    """
+    Turn on pandas Copy-on-Write for the whole process.
+
+    Views of the shared frames rely on it. The app calls this when it creates
+    its data store (see data_loader.get_data_store()), so scripts and tests
+    that only import the utils keep pandas' default behaviour. A no-op on
+    pandas 3, where Copy-on-Write is always on.
+    """
+    if int(pd.__version__.split(".")[0]) == 2:
+        pd.set_option("mode.copy_on_write", True)
+
+
+def read_only_view(value: Any) -> Any:
+    """
+    Return a cheap, mutation-safe view of a shared value.
+
+    Args:
+        value: A DataFrame, Series or any other shared object
+
+    Returns:
+        A shallow copy for pandas objects, the object's own read_only_view()
+        if it has one, the value itself otherwise
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if hasattr(value, "read_only_view"):
+        return value.read_only_view()
+    return value
+
+
+class DataSnapshot:
+    """An immutable, versioned bundle of loaded datasets."""
+
+    def __init__(
+        self,
+        data: Dict[str, Any],
+        version: int,
+        warnings: Optional[List[str]] = None,
+        sources: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize a snapshot.
+
+        Args:
+            data: Mapping of dataset name to DataFrame (or other object)
+            version: Monotonically increasing version number
+            warnings: User-facing warnings raised while loading
+            sources: Input file name to fingerprint for every file the
+                snapshot was built from (including appended tweet batches)
+        """
+        self._data = dict(data)
+        self.version = version
+        self.warnings = list(warnings or [])
+        self.sources = dict(sources or {})
+        self.created_at = time.time()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._data
+
+    def names(self) -> List[str]:
+        """Return the dataset names held by this snapshot."""
+        return list(self._data)
+
+    def get(self, name: str) -> Any:
+        """
+        Get a read-only view of a single dataset.
+
+        Args:
+            name: Dataset name (e.g., "tweet_sentiment")
+
+        Returns:
+            Read-only view of the dataset
+        """
+        return read_only_view(self._data[name])
+
+    def views(self) -> Dict[str, Any]:
+        """
+        Get read-only views of all datasets.
+
+        Returns:
+            dict: Dataset name to read-only view, same keys as load_data()
+        """
+        return {name: read_only_view(value) for name, value in self._data.items()}
+
+
+class DataStore:
+    """Lazily loads datasets once per process and serves read-only views."""
+
+    def __init__(self, loader: Callable[[], Tuple]):
+        """
+        Initialize the store.
+
+        Args:
+            loader: Callable returning (data dict, list of warnings) or
+                (data dict, list of warnings, sources dict)
+        """
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._snapshot: Optional[DataSnapshot] = None
+        self._next_version = 1
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether a snapshot has been loaded."""
+        return self._snapshot is not None
+
+    def snapshot(self) -> DataSnapshot:
+        """
+        Get the current snapshot, loading it on first use.
+
+        Concurrent first calls block on a lock so the datasets are parsed
+        only once. If the loader raises, nothing is stored and the next
+        call retries.
+
+        Returns:
+            DataSnapshot: The current snapshot
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            return self._load_locked()
+
+    def _load_locked(self) -> DataSnapshot:
+        if self._snapshot is None:
+            self._swap(*self._loader())
+        return self._snapshot
+
+    def _swap(
+        self,
+        data: Dict[str, Any],
+        warnings: List[str],
+        sources: Optional[Dict[str, Any]] = None
+    ) -> DataSnapshot:
+        self._snapshot = DataSnapshot(data, self._next_version, warnings, sources)
+        self._next_version += 1
+        return self._snapshot
+
+    def update(
+        self,
+        updater: Callable[
+            [DataSnapshot],
+            Optional[Tuple[Dict[str, Any], List[str], Dict[str, Any]]]
+        ]
+    ) -> DataSnapshot:
+        """
+        Derive a new snapshot from the current one and swap it in atomically.
+
+        The updater runs under the store lock, so concurrent updates are
+        applied one after the other. Sessions holding the previous snapshot
+        (or views of it) keep using it unchanged.
+
+        Args:
+            updater: Callable receiving the current snapshot and returning
+                (data, warnings, sources) for the new one, or None if there
+                is nothing to change
+
+        Returns:
+            DataSnapshot: The current snapshot after the update
+        """
+        with self._lock:
+            current = self._load_locked()
+            result = updater(current)
+            if result is None:
+                return current
+
+            return self._swap(*result)
+
+    def replace(
+        self,
+        data: Dict[str, Any],
+        warnings: List[str],
+        sources: Optional[Dict[str, Any]] = None
+    ) -> DataSnapshot:
+        """
+        Swap in a snapshot that was built outside the store.
+
+        Used by background reloads: the new datasets are parsed without
+        holding the lock, so requests keep being served from the previous
+        snapshot until the swap.
+
+        Args:
+            data: Mapping of dataset name to DataFrame (or other object)
+            warnings: User-facing warnings raised while loading
+            sources: Input file name to fingerprint
+
+        Returns:
+            DataSnapshot: The new current snapshot
+        """
+        with self._lock:
+            return self._swap(data, warnings, sources)
+
+    def views(self) -> Dict[str, Any]:
+        """
+        Get read-only views of all datasets in the current snapshot.
+
+        Returns:
+            dict: Dataset name to read-only view
+        """
+        return self.snapshot().views()
+
+    @property
+    def version(self) -> int:
+        """Version number of the current snapshot."""
+        return self.snapshot().version
@@ -1,8 +1,12 @@
 """
 Data utility functions for common transformations and cleaning operations.
 """
+import numpy as np
 import pandas as pd
-from typing import Optional, List, Tuple
+from typing import Iterable, Optional, List, Tuple
+
+# Name of the canonical county key column added to every dataset at load time
+COUNTY_KEY_COLUMN = "County_Key"
 
 
 def normalize_county_name(name: Optional[str]) -> Optional[str]:
@@ -114,6 +118,125 @@ def normalize_dataframe_counties(df: pd.DataFrame, column_name: str = "County")
     return df_copy
 
 
+def normalize_county_codes(counties: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """
+    Factorize a county column into codes over its normalized names.
+
+    normalize_county_name() is called once per distinct value rather than
+    once per row, so this stays fast on categorical or highly repetitive
+    columns with millions of rows.
+
+    Args:
+        counties: Column of county names in any format
+
+    Returns:
+        Tuple of (integer codes, -1 for missing; Index of normalized names)
+    """
+    codes, uniques = pd.factorize(counties, use_na_sentinel=True)
+    normalized = [normalize_county_name(value) for value in pd.Index(uniques).tolist()]
+
+    names = pd.Index(sorted({n for n in normalized if n is not None}), dtype=object)
+
+    # One slot per distinct value, plus a trailing -1 for the NaN code
+    lookup = np.append(names.get_indexer(normalized), -1)
+
+    return lookup[codes], names
+
+
+def build_county_dimension(
+    county_columns: Iterable[pd.Series],
+    extra_names: Optional[Iterable[str]] = None
+) -> pd.Index:
+    """
+    Build the county dimension table shared by all datasets.
+
+    The dimension is the sorted set of normalized county names found in any
+    of the given columns (plus extra_names, e.g. GeoJSON feature names).
+    Its positions are the canonical county codes used by add_county_key().
+
+    Args:
+        county_columns: County columns of the loaded datasets
+        extra_names: Additional county names to include
+
+    Returns:
+        pd.Index: Sorted normalized county names
+
+    Example:
+        >>> build_county_dimension([pd.Series(["Los Angeles County", "Alameda"])])
+        Index(['Alameda', 'Los Angeles'], dtype='object', name='County_Key')
+    """
+    names = set()
+    for counties in county_columns:
+        _, normalized = normalize_county_codes(counties)
+        names.update(normalized)
+
+    for name in extra_names or []:
+        normalized = normalize_county_name(name)
+        if normalized is not None:
+            names.add(normalized)
+
+    return pd.Index(sorted(names), dtype=object, name=COUNTY_KEY_COLUMN)
+
+
+def add_county_key(
+    df: pd.DataFrame,
+    dimension: pd.Index,
+    column_name: str = "County"
+) -> pd.DataFrame:
+    """
+    Add the canonical County_Key column to a DataFrame.
+
+    County_Key is a categorical whose categories are the shared county
+    dimension, so its integer codes are comparable across datasets and
+    filtering by county becomes an integer lookup.
+
+    Args:
+        df: DataFrame containing county names
+        dimension: County dimension from build_county_dimension()
+        column_name: Name of the column containing county names
+
+    Returns:
+        DataFrame with a County_Key column (counties outside the dimension are NaN)
+    """
+    if column_name not in df.columns:
+        return df
+
+    codes, names = normalize_county_codes(df[column_name])
+    dimension_codes = np.append(dimension.get_indexer(names), -1)[codes]
+
+    df = df.copy(deep=False)
+    df[COUNTY_KEY_COLUMN] = pd.Categorical.from_codes(
+        dimension_codes, categories=dimension
+    )
+    return df
+
+
+def rebase_county_key(df: pd.DataFrame, dimension: pd.Index) -> pd.DataFrame:
+    """
+    Move an existing County_Key column onto a larger county dimension.
+
+    Used when appended data introduces new counties: only the integer codes
+    are remapped, the county names are not normalized again.
+
+    Args:
+        df: DataFrame with a County_Key column
+        dimension: New county dimension containing all current categories
+
+    Returns:
+        DataFrame whose County_Key categories are the new dimension
+    """
+    if COUNTY_KEY_COLUMN not in df.columns:
+        return df
+
+    key = df[COUNTY_KEY_COLUMN]
+    if key.cat.categories.equals(dimension):
+        return df
+
+    df = df.copy(deep=False)
+    df[COUNTY_KEY_COLUMN] = key.cat.set_categories(dimension)
+    return df
+
+
 def validate_county_names(
     df: pd.DataFrame,
     column_name: str = "County",
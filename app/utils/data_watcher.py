@@ -0,0 +1,188 @@
+"""
+Background hot reload of the data directory.
+
+A DataWatcher thread polls the fingerprints (size and modification time) of
+the input files. When they change it builds a complete new snapshot off the
+request path and swaps it into the data store in one step; sessions keep
+serving the previous version until their next rerun, so a refresh never
+makes a user wait for a cold parse.
+
+- Changed main files (or a changed or removed tweet batch) trigger a full
+  rebuild.
+- New tweet batches only are appended incrementally (see ingest).
+
+A change is acted on once the fingerprints are unchanged for one polling
+interval, so files that are still being copied are not read half-written.
+
+Environment variables:
+    DATA_WATCH_INTERVAL: Polling interval in seconds (default: 30, 0 disables)
+"""
+import logging
+import os
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .data_store import DataStore
+from .dataset_cache import source_fingerprint
+from .ingest import find_tweet_batches, ingest_tweet_batches
+
+logger = logging.getLogger(__name__)
+
+# Files every snapshot is built from, besides the tweet batches
+SOURCE_FILES = [
+    "Dispensaries.csv",
+    "Dispensary_Density.csv",
+    "Tweet_Sentiment.csv",
+    "California_County_Boundaries.geojson",
+]
+
+
+def get_watch_interval() -> float:
+    """
+    Get the polling interval of the data watcher.
+
+    Returns:
+        float: Interval in seconds (0 if watching is disabled)
+    """
+    try:
+        return max(float(os.getenv("DATA_WATCH_INTERVAL", "30")), 0.0)
+    except ValueError:
+        return 30.0
+
+
+def source_fingerprints(data_dir: str) -> Dict[str, Dict[str, int]]:
+    """
+    Fingerprint all input files in the data directory.
+
+    Args:
+        data_dir: Data directory
+
+    Returns:
+        dict: File name to fingerprint for the existing main files and batches
+    """
+    fingerprints = {}
+    for name in SOURCE_FILES:
+        try:
+            fingerprints[name] = source_fingerprint(os.path.join(data_dir, name))
+        except OSError:
+            continue
+    fingerprints.update(find_tweet_batches(data_dir))
+    return fingerprints
+
+
+class DataWatcher:
+    """Polls the data directory and hot-swaps new snapshots into a store."""
+
+    def __init__(
+        self,
+        store: DataStore,
+        data_dir: str,
+        builder: Callable[[], Tuple[Dict[str, Any], list, Dict[str, Any]]],
+        interval: float = 30.0
+    ):
+        """
+        Initialize the watcher.
+
+        Args:
+            store: Data store to keep current (held weakly; the watcher stops
+                once the store is discarded)
+            data_dir: Data directory to watch
+            builder: Callable building (data, warnings, sources) for a full
+                reload; must raise instead of reporting errors in the UI
+            interval: Polling interval in seconds
+        """
+        self._store_ref = weakref.ref(store)
+        self.data_dir = data_dir
+        self.builder = builder
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pending: Optional[Dict[str, Any]] = None
+        self._failed: Optional[Dict[str, Any]] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the polling thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "DataWatcher":
+        """Start polling in a daemon thread."""
+        if not self.is_running:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="data-watcher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop polling and wait for the thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self._store_ref() is None:
+                return
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Data watcher poll failed")
+
+    def check(self) -> Optional[str]:
+        """
+        Poll once and apply any settled change.
+
+        Returns:
+            str or None: "reloaded", "appended" or None if nothing was applied
+        """
+        store = self._store_ref()
+        if store is None or not store.is_loaded:
+            return None
+
+        current = source_fingerprints(self.data_dir)
+        snapshot = store.snapshot()
+        if current == snapshot.sources:
+            self._pending = None
+            return None
+
+        # Wait until the files stop changing before reading them
+        if current != self._pending:
+            self._pending = current
+            return None
+        if current == self._failed:
+            return None
+
+        if self._needs_reload(snapshot.sources, current):
+            return self._reload(store, current)
+
+        ingested = ingest_tweet_batches(store, self.data_dir)
+        return "appended" if ingested else None
+
+    def _needs_reload(self, loaded: Dict[str, Any], current: Dict[str, Any]) -> bool:
+        """Whether the change requires a full rebuild rather than an append."""
+        if any(loaded.get(name) != current.get(name) for name in SOURCE_FILES):
+            return True
+        # Applied batches that were edited or removed cannot be un-appended
+        return any(
+            name not in SOURCE_FILES and current.get(name) != fingerprint
+            for name, fingerprint in loaded.items()
+        )
+
+    def _reload(self, store: DataStore, current: Dict[str, Any]) -> Optional[str]:
+        """Build a new snapshot without holding the store lock, then swap it in."""
+        logger.info("Data files changed; rebuilding datasets in the background")
+        try:
+            data, warnings, sources = self.builder()
+        except Exception as e:
+            # Keep serving the current snapshot until the files change again
+            logger.warning("Background data reload failed: %s", e)
+            self._failed = current
+            return None
+
+        self._failed = None
+        snapshot = store.replace(data, warnings, sources)
+        logger.info("Swapped in data version %d", snapshot.version)
+        return "reloaded"
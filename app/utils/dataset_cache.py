@@ -0,0 +1,236 @@
+"""
+Persistent columnar cache of parsed datasets.
+
+Parsing the CSV files and re-deriving columns (Year, dates, sentiment scores)
+happens on every cold start of a server process. This module stores the
+processed DataFrames as Parquet files so later processes can read the
+already-typed frames directly.
+
+Each cache entry is keyed on the source file's size and modification time
+(plus CACHE_VERSION), so replacing a CSV automatically invalidates its entry.
+
+Environment variables:
+    DATASET_CACHE_DIR: Directory for cache files (default: data/.cache)
+    DATASET_CACHE: Set to "false" to disable the cache entirely
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Dict, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the post-processing in load_data() changes so that frames
+# produced by older code are never served from the cache.
+CACHE_VERSION = 4
+
+
+def get_cache_dir(data_dir: Optional[str] = None) -> str:
+    """
+    Get the directory where cached datasets are stored.
+
+    Args:
+        data_dir: Data directory the cache lives under (default: project data dir)
+
+    Returns:
+        str: Absolute path of the cache directory
+    """
+    cache_dir = os.getenv("DATASET_CACHE_DIR")
+    if cache_dir:
+        return os.path.abspath(cache_dir)
+
+    if data_dir is None:
+        from .data_loader import get_data_dir
+        data_dir = get_data_dir()
+
+    return os.path.join(data_dir, ".cache")
+
+
+def is_cache_enabled() -> bool:
+    """
+    Check if the dataset cache is enabled.
+
+    Returns:
+        bool: True if Parquet support is available and the cache is not disabled
+    """
+    setting = os.getenv("DATASET_CACHE", "true").lower()
+    return PARQUET_AVAILABLE and setting not in ("false", "0", "no")
+
+
+def source_fingerprint(source_path: str) -> Dict[str, int]:
+    """
+    Fingerprint a source file by its size and modification time.
+
+    Args:
+        source_path: Path to the source file
+
+    Returns:
+        dict: {"size": bytes, "mtime_ns": modification time in nanoseconds}
+    """
+    stat = os.stat(source_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def cache_key(
+    name: str,
+    source_path: str,
+    fingerprint: Optional[Dict[str, int]] = None
+) -> str:
+    """
+    Build the cache key for a dataset derived from a source file.
+
+    Args:
+        name: Dataset name (e.g., "tweet_sentiment")
+        source_path: Path to the source file the dataset is parsed from
+        fingerprint: Fingerprint of the source file (default: its current one)
+
+    Returns:
+        str: Hex digest identifying this version of the dataset
+    """
+    if fingerprint is None:
+        fingerprint = source_fingerprint(source_path)
+    raw = "|".join([
+        name,
+        os.path.basename(source_path),
+        str(fingerprint["size"]),
+        str(fingerprint["mtime_ns"]),
+        str(CACHE_VERSION),
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _cache_path(cache_dir: str, name: str, key: str) -> str:
+    return os.path.join(cache_dir, f"{name}-{key}.parquet")
+
+
+def read_cached_frame(
+    name: str,
+    source_path: str,
+    cache_dir: Optional[str] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Read a processed dataset from the cache if it matches the source file.
+
+    Args:
+        name: Dataset name
+        source_path: Path to the source file the dataset is parsed from
+        cache_dir: Cache directory (default: get_cache_dir())
+
+    Returns:
+        pd.DataFrame or None: Cached frame, or None on a miss or unreadable entry
+    """
+    if not is_cache_enabled():
+        return None
+
+    try:
+        key = cache_key(name, source_path)
+    except OSError:
+        return None
+
+    path = _cache_path(cache_dir or get_cache_dir(os.path.dirname(source_path)), name, key)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:  # Corrupt or incompatible entry: fall back to CSV
+        logger.warning("Ignoring unreadable dataset cache '%s': %s", path, e)
+        return None
+
+
+def write_cached_frame(
+    name: str,
+    source_path: str,
+    df: pd.DataFrame,
+    cache_dir: Optional[str] = None,
+    fingerprint: Optional[Dict[str, int]] = None
+) -> Optional[str]:
+    """
+    Store a processed dataset in the cache, replacing stale entries.
+
+    The file is written to a temporary name and atomically renamed, so
+    concurrent processes never read a partially written entry. Failures
+    (read-only filesystem, unsupported column types) are logged and ignored.
+
+    Pass the fingerprint taken before the source file was read: the entry is
+    stored under it, and nothing is written if the file changed since, so a
+    frame parsed from old contents is never served for the new ones.
+
+    Args:
+        name: Dataset name
+        source_path: Path to the source file the dataset was parsed from
+        df: Processed DataFrame
+        cache_dir: Cache directory (default: get_cache_dir())
+        fingerprint: source_fingerprint() of the file before it was read
+            (default: its current one)
+
+    Returns:
+        str or None: Path of the cache file, or None if nothing was written
+    """
+    if not is_cache_enabled():
+        return None
+
+    cache_dir = cache_dir or get_cache_dir(os.path.dirname(source_path))
+
+    try:
+        if fingerprint is not None and source_fingerprint(source_path) != fingerprint:
+            logger.info("Not caching '%s': %s changed while it was read", name, source_path)
+            return None
+        key = cache_key(name, source_path, fingerprint)
+        os.makedirs(cache_dir, exist_ok=True)
+        path = _cache_path(cache_dir, name, key)
+
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    except Exception as e:
+        logger.warning("Could not write dataset cache for '%s': %s", name, e)
+        return None
+
+    # Remove entries for older versions of the same dataset
+    prefix = f"{name}-"
+    for filename in os.listdir(cache_dir):
+        stale = os.path.join(cache_dir, filename)
+        if filename.startswith(prefix) and filename.endswith(".parquet") and stale != path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+    return path
+
+
+def clear_cache(cache_dir: Optional[str] = None) -> int:
+    """
+    Remove all cached datasets.
+
+    Args:
+        cache_dir: Cache directory (default: get_cache_dir())
+
+    Returns:
+        int: Number of files removed
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    removed = 0
+    for filename in os.listdir(cache_dir):
+        if filename.endswith(".parquet"):
+            os.remove(os.path.join(cache_dir, filename))
+            removed += 1
+    return removed
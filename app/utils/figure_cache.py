@@ -0,0 +1,306 @@
+"""
+Process-wide cache of serialized chart figures, with build instrumentation.
+
+The chart helpers in plot_helpers rebuild their Plotly Express figures on
+every rerun, although most reruns draw the same data. cached_figure()
+memoizes the figure JSON keyed on (helper name, arguments, fingerprint of
+the data columns the arguments name); a hit rebuilds the figure from its
+JSON without Plotly's property validation, which is an order of magnitude
+cheaper than building it. Every returned figure is a fresh object, so pages
+may still modify it. While a page leaves it untouched, st.plotly_chart()
+serializes it from the cached JSON instead of deep-copying it (see
+CachedFigure).
+
+Each call logs its build time and, when the figure was serialized anyway
+(cached calls, or any call in debug mode), its payload size. In debug mode
+(DEBUG=true), charts whose serialized size exceeds the budget are logged as
+warnings and flagged in the page.
+
+Environment variables:
+    FIGURE_CACHE_MAX_ENTRIES: Maximum number of cached figures (default: 128)
+    FIGURE_CACHE_MAX_MB: Memory cap for cached figures in MB (default: 64)
+    FIGURE_SIZE_BUDGET_KB: Payload budget per chart in KB (default: 512)
+"""
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+from config.env import Config
+from .filter_cache import FilterCache
+
+logger = logging.getLogger(__name__)
+
+# Most recent chart builds kept for chart_stats()
+MAX_RECORDS = 200
+
+_records: Deque[Dict[str, Any]] = deque(maxlen=MAX_RECORDS)
+_records_lock = threading.Lock()
+
+
+@st.cache_resource
+def get_figure_cache() -> FilterCache:
+    """
+    Get the process-wide figure cache shared by all sessions and pages.
+
+    Returns:
+        FilterCache: LRU cache of figure JSON sized from the FIGURE_CACHE_*
+        environment variables
+    """
+    max_entries = int(os.getenv("FIGURE_CACHE_MAX_ENTRIES", "128"))
+    max_mb = float(os.getenv("FIGURE_CACHE_MAX_MB", "64"))
+    return FilterCache(max_entries=max_entries, max_bytes=int(max_mb * 1024 * 1024))
+
+
+def get_size_budget() -> int:
+    """
+    Get the payload budget per chart.
+
+    Returns:
+        int: Budget in bytes
+    """
+    try:
+        return int(float(os.getenv("FIGURE_SIZE_BUDGET_KB", "512")) * 1024)
+    except ValueError:
+        return 512 * 1024
+
+
+def _is_plain(value: Any) -> bool:
+    """Whether a value serializes to JSON unambiguously."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_is_plain(v) for v in value)
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and _is_plain(v) for k, v in value.items())
+    return False
+
+
+def _strings(value: Any) -> List[str]:
+    """All strings in a plain argument value, dict keys included."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        return [s for v in value for s in _strings(v)]
+    if isinstance(value, dict):
+        return [s for item in value.items() for s in _strings(item)]
+    return []
+
+
+def _has_dict(value: Any) -> bool:
+    """Whether a plain argument value contains a dict."""
+    if isinstance(value, dict):
+        return True
+    if isinstance(value, (list, tuple)):
+        return any(_has_dict(v) for v in value)
+    return False
+
+
+def used_columns(data: pd.DataFrame, args: tuple, kwargs: Dict[str, Any]) -> List[Any]:
+    """
+    Get the data columns a chart helper call reads.
+
+    Chart helpers only read the columns named in their arguments (x, y,
+    color, size, hover_data, ...). If no argument names a column, the chart
+    may read any of them. Dict arguments (hover_data={"c": True}, labels)
+    and non-string column labels can name columns in ways that are not
+    tracked here, so all columns are used for them.
+
+    Args:
+        data: DataFrame passed to the helper
+        args: Other positional arguments
+        kwargs: Keyword arguments
+
+    Returns:
+        list: Column labels, in frame order
+    """
+    if _has_dict([args, list(kwargs.values())]) or not all(isinstance(c, str) for c in data.columns):
+        return list(data.columns)
+    names = set(_strings([args, kwargs]))
+    columns = [c for c in data.columns if c in names]
+    return columns or list(data.columns)
+
+
+def data_fingerprint(data: pd.DataFrame, columns: Optional[List[Any]] = None) -> Optional[str]:
+    """
+    Hash the content of some columns of a DataFrame, and its index.
+
+    Args:
+        data: Chart data
+        columns: Columns to hash (default: all)
+
+    Returns:
+        str or None: Hex digest, or None if the columns cannot be hashed
+    """
+    columns = list(data.columns) if columns is None else columns
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        digest.update(pd.util.hash_pandas_object(data.index).to_numpy().tobytes())
+        for column in columns:
+            digest.update(pd.util.hash_pandas_object(data[column], index=False).to_numpy().tobytes())
+    except TypeError:
+        return None  # Unhashable cells, e.g. lists
+    digest.update(repr([(str(c), str(data[c].dtype)) for c in columns]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def figure_key(name: str, data: Any, args: tuple, kwargs: Dict[str, Any]) -> Optional[tuple]:
+    """
+    Build the cache key of a chart helper call.
+
+    Args:
+        name: Helper name
+        data: DataFrame passed to the helper
+        args: Other positional arguments
+        kwargs: Keyword arguments
+
+    Returns:
+        tuple or None: Cache key, or None if the call cannot be cached
+    """
+    if not isinstance(data, pd.DataFrame) or not _is_plain(args) or not _is_plain(kwargs):
+        return None
+    if data.columns.has_duplicates:
+        return None
+    fingerprint = data_fingerprint(data, used_columns(data, args, kwargs))
+    if fingerprint is None:
+        return None
+    arguments = json.dumps([args, kwargs], sort_keys=True)
+    return name, arguments, fingerprint
+
+
+def _record(name: str, title: str, seconds: float, nbytes: Optional[int], hit: Optional[bool]) -> None:
+    """Log one chart build and flag it if it exceeds the size budget."""
+    record = {
+        "chart": name,
+        "title": title,
+        "ms": seconds * 1000,
+        "bytes": nbytes,
+        "cache": "hit" if hit else "miss" if hit is False else "uncached",
+    }
+    with _records_lock:
+        _records.append(record)
+    logger.debug(
+        "Chart %s '%s': %.1f ms, %s bytes (%s)",
+        name, title, record["ms"], "?" if nbytes is None else nbytes, record["cache"]
+    )
+
+    budget = get_size_budget()
+    if nbytes is not None and nbytes > budget and Config.get_debug_mode():
+        message = f"Chart '{title or name}' is {nbytes / 1024:.0f} KB, over the {budget / 1024:.0f} KB budget"
+        logger.warning(message)
+        st.warning(f"🐞 {message}")
+
+
+def chart_stats() -> List[Dict[str, Any]]:
+    """
+    Get the most recent chart builds of this process.
+
+    Returns:
+        list: Records with chart, title, ms, bytes (None if the figure was
+        not serialized) and cache ("hit", "miss" or "uncached"), oldest first
+    """
+    with _records_lock:
+        return list(_records)
+
+
+def _title(spec: Dict[str, Any]) -> str:
+    """Title text of a figure dict."""
+    title = spec.get("layout", {}).get("title", {})
+    return (title.get("text") if isinstance(title, dict) else title) or ""
+
+
+class CachedFigure(go.Figure):
+    """
+    A figure rebuilt from cached JSON.
+
+    st.plotly_chart() serializes a figure through to_dict(), which deep-copies
+    every trace. Until anything other than to_dict() or to_plotly_json() is
+    accessed on this figure, those return a fresh parse of the cached JSON
+    instead. Any other access - reading a property included - may lead to a
+    modification, so from then on the figure behaves like a plain go.Figure.
+    """
+
+    _CLEAN_ACCESS = frozenset({"to_dict", "to_plotly_json", "_payload", "cached_title", "__class__"})
+
+    def __init__(self, payload: str):
+        """
+        Build the figure from its JSON.
+
+        Args:
+            payload: JSON of a validated figure (validation is skipped)
+        """
+        spec = json.loads(payload)
+        super().__init__(spec, _validate=False)
+        object.__setattr__(self, "_payload", payload)
+        object.__setattr__(self, "cached_title", _title(spec))
+
+    def __getattribute__(self, name: str) -> Any:
+        if name not in CachedFigure._CLEAN_ACCESS:
+            object.__setattr__(self, "_payload", None)
+        return super().__getattribute__(name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Figure as a dict, parsed from the cached JSON while unmodified."""
+        payload = self._payload
+        if payload is None:
+            return super().to_dict()
+        return json.loads(payload)
+
+    def to_plotly_json(self) -> Dict[str, Any]:
+        """Same as to_dict()."""
+        return self.to_dict()
+
+
+def cached_figure(helper: Callable[..., go.Figure]) -> Callable[..., go.Figure]:
+    """
+    Memoize a chart helper taking a DataFrame as its first argument.
+
+    Calls with arguments that are not plain JSON values (or with data that
+    cannot be hashed) are built as before and only instrumented.
+
+    Args:
+        helper: Chart helper returning a Plotly figure
+
+    Returns:
+        Wrapped helper with the same signature
+    """
+    @functools.wraps(helper)
+    def wrapper(data, *args, **kwargs):
+        start = time.perf_counter()
+        key = figure_key(helper.__name__, data, args, kwargs)
+        cache = get_figure_cache() if key is not None else None
+        payload = cache.get(key) if cache is not None else None
+
+        hit = payload is not None
+        if hit:
+            fig = CachedFigure(payload)
+            title = fig.cached_title
+        else:
+            fig = helper(data, *args, **kwargs)
+            title = fig.layout.title.text or ""
+            # Uncached figures are only serialized to check the size budget
+            if cache is not None or Config.get_debug_mode():
+                payload = pio.to_json(fig, validate=False)
+            if cache is not None:
+                cache.put(key, payload)
+
+        _record(
+            helper.__name__,
+            title,
+            time.perf_counter() - start,
+            None if payload is None else len(payload),
+            hit if cache is not None else None,
+        )
+        return fig
+
+    return wrapper
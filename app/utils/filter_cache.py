@@ -0,0 +1,354 @@
+"""
+Process-wide cache of filtered datasets.
+
+Every page applies the sidebar filters on each rerun, so users moving
+between pages with the same sidebar state recomputed identical subsets.
+FilterCache memoizes the filtered frames keyed on the dataset name, the
+data store version and a canonical hash of the filter dictionary. Entries
+are evicted least-recently-used once either the entry limit or the memory
+cap is exceeded.
+
+Cached frames are shared between sessions; callers always receive
+read-only views (see data_store), so pages can never modify an entry.
+
+Environment variables:
+    FILTER_CACHE_MAX_ENTRIES: Maximum number of cached results (default: 64)
+    FILTER_CACHE_MAX_MB: Memory cap for cached results in MB (default: 256)
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from .data_store import DataSnapshot, read_only_view
+from .filters import (
+    apply_density_filters,
+    apply_dispensary_filters,
+    apply_sentiment_filters,
+    get_density_mask,
+    get_dispensary_mask,
+    get_sentiment_mask,
+)
+
+# Filter function for each dataset name in load_data()
+FILTER_FUNCTIONS: Dict[str, Callable[[pd.DataFrame, Dict[str, Any]], pd.DataFrame]] = {
+    "dispensaries": apply_dispensary_filters,
+    "tweet_sentiment": apply_sentiment_filters,
+    "density": apply_density_filters,
+}
+
+# Mask builder for each dataset name, used to test filters against partitions
+MASK_FUNCTIONS: Dict[str, Callable[[pd.DataFrame, Dict[str, Any]], Any]] = {
+    "dispensaries": get_dispensary_mask,
+    "tweet_sentiment": get_sentiment_mask,
+    "density": get_density_mask,
+}
+
+
+def _canonical(value: Any) -> Any:
+    """Convert filter values to a JSON-serializable, order-independent form."""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        # Tuples are ranges, e.g. (start_year, end_year): order matters
+        return [_canonical(v) for v in value]
+    if isinstance(value, (list, set, frozenset)):
+        # Lists are selections, e.g. counties: order does not matter
+        return sorted((_canonical(v) for v in value), key=repr)
+    if hasattr(value, "item"):
+        # NumPy scalars from slider widgets
+        return value.item()
+    return value
+
+
+def filters_key(filters: Dict[str, Any]) -> str:
+    """
+    Build a canonical hash of a filter dictionary.
+
+    Dictionaries that select the same data hash identically regardless of
+    key order or the order of selected counties and license types.
+
+    Args:
+        filters: Filter dictionary from generate_sidebar()
+
+    Returns:
+        str: Hex digest identifying the filter state
+    """
+    raw = json.dumps(_canonical(filters or {}), sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def estimate_nbytes(value: Any) -> int:
+    """
+    Estimate the memory held by a cached value.
+
+    Args:
+        value: A DataFrame, Series, string or other object
+
+    Returns:
+        int: Approximate size in bytes
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return 0
+
+
+class FilterCache:
+    """Thread-safe LRU cache with an entry limit and a memory cap."""
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept
+            max_bytes: Maximum total estimated size of the entries
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    @property
+    def nbytes(self) -> int:
+        """Total estimated size of the cached entries."""
+        return self._bytes
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up an entry and mark it as most recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, tag: Any = None) -> bool:
+        """
+        Store an entry, evicting least recently used entries as needed.
+
+        Values larger than the memory cap on their own are not stored.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            tag: Extra data kept with the entry and passed to rekey()
+
+        Returns:
+            bool: True if the value was stored
+        """
+        nbytes = estimate_nbytes(value)
+        if nbytes > self.max_bytes or self.max_entries <= 0:
+            return False
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes, tag)
+            self._bytes += nbytes
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_bytes, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_bytes
+                self.evictions += 1
+        return True
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Any],
+        tag: Any = None
+    ) -> Any:
+        """
+        Return the cached value for key, computing and storing it on a miss.
+
+        Args:
+            key: Cache key
+            compute: Zero-argument callable producing the value
+            tag: Extra data kept with a newly stored entry
+
+        Returns:
+            The cached or freshly computed value
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value, tag)
+        return value
+
+    def rekey(self, mapper: Callable[[Hashable, Any], Optional[Hashable]]) -> int:
+        """
+        Rename or drop entries in place, keeping their recency order.
+
+        If several entries are renamed to the same key, only the most
+        recently used one is kept.
+
+        Args:
+            mapper: Callable receiving (key, tag) and returning the entry's
+                new key, or None to drop the entry
+
+        Returns:
+            int: Number of entries dropped
+        """
+        with self._lock:
+            kept: "OrderedDict[Hashable, Tuple[Any, int, Any]]" = OrderedDict()
+            dropped = 0
+            for key, entry in self._entries.items():
+                new_key = mapper(key, entry[2])
+                if new_key is None:
+                    self._bytes -= entry[1]
+                    dropped += 1
+                    continue
+                if new_key in kept:
+                    # Two entries now share a key: keep the more recent one
+                    self._bytes -= kept.pop(new_key)[1]
+                    dropped += 1
+                kept[new_key] = entry
+            self._entries = kept
+        return dropped
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache usage counters for sizing.
+
+        Returns:
+            dict: hits, misses, evictions, hit_rate, entries, bytes and limits
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+
+@st.cache_resource
+def get_filter_cache() -> FilterCache:
+    """
+    Get the process-wide filter cache shared by all sessions and pages.
+
+    Returns:
+        FilterCache: Cache sized from the FILTER_CACHE_* environment variables
+    """
+    max_entries = int(os.getenv("FILTER_CACHE_MAX_ENTRIES", "64"))
+    max_mb = float(os.getenv("FILTER_CACHE_MAX_MB", "256"))
+    return FilterCache(max_entries=max_entries, max_bytes=int(max_mb * 1024 * 1024))
+
+
+def filter_dataset(
+    name: str,
+    filters: Dict[str, Any],
+    snapshot: Optional[DataSnapshot] = None,
+    cache: Optional[FilterCache] = None
+) -> pd.DataFrame:
+    """
+    Get a dataset with the sidebar filters applied, memoized across pages.
+
+    Args:
+        name: Dataset name ("dispensaries", "tweet_sentiment" or "density")
+        filters: Filter dictionary from generate_sidebar()
+        snapshot: Data snapshot to filter (default: the shared data store's)
+        cache: Cache to use (default: get_filter_cache())
+
+    Returns:
+        pd.DataFrame: Read-only view of the filtered dataset
+
+    Example:
+        >>> from utils.filter_cache import filter_dataset
+        >>> dispensaries = filter_dataset("dispensaries", generate_sidebar())
+    """
+    if snapshot is None:
+        from .data_loader import get_data_store
+        snapshot = get_data_store().snapshot()
+    if cache is None:
+        cache = get_filter_cache()
+
+    filter_func = FILTER_FUNCTIONS[name]
+    key = (name, snapshot.version, filters_key(filters))
+    result = cache.get_or_compute(
+        key, lambda: filter_func(snapshot.get(name), filters), tag=filters
+    )
+    return read_only_view(result)
+
+
+def carry_forward(
+    old_version: int,
+    new_version: int,
+    changed_partitions: Dict[str, pd.DataFrame],
+    cache: Optional[FilterCache] = None
+) -> int:
+    """
+    Keep cached results that are still valid after an incremental update.
+
+    Results for datasets that did not change, and results whose filters
+    select none of the changed partitions, are moved to the new data
+    version. All other results of the old version are dropped.
+
+    Args:
+        old_version: Snapshot version the cached results were computed on
+        new_version: Version of the updated snapshot
+        changed_partitions: Dataset name to a frame with one row per changed
+            partition, using the dataset's filter columns (e.g. County,
+            County_Key, Year, Month)
+        cache: Cache to update (default: get_filter_cache())
+
+    Returns:
+        int: Number of invalidated results
+    """
+    if cache is None:
+        cache = get_filter_cache()
+
+    def mapper(key, filters):
+        if not (isinstance(key, tuple) and len(key) == 3 and key[1] == old_version):
+            return key
+
+        name = key[0]
+        partitions = changed_partitions.get(name)
+        if partitions is not None and len(partitions):
+            mask = MASK_FUNCTIONS[name](partitions, filters or {})
+            if mask is None or mask.any():
+                return None
+        return (name, new_version, key[2])
+
+    return cache.rekey(mapper)
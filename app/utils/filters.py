@@ -1,8 +1,164 @@
 """
 Data filtering utilities for applying sidebar filters to datasets.
+
+Each dataset has a ``get_*_mask`` function that combines all active
+predicates into a single boolean mask over the shared source frame, and an
+``apply_*_filters`` function that materializes the result exactly once.
+Callers that only aggregate can use the mask directly and skip the copy.
 """
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
+from .data_utils import COUNTY_KEY_COLUMN, normalize_county_name, normalize_county_codes
+
+
+def _county_mask(df: pd.DataFrame, counties: List[str]) -> np.ndarray:
+    """
+    Build a boolean mask of rows whose county matches any of the given names.
+
+    Uses the precomputed County_Key codes when present (added at load time),
+    so the per-row work is a single integer isin. Frames without the key
+    fall back to factorizing the County column and normalizing each distinct
+    name once.
+
+    Args:
+        df: DataFrame with a County (and optionally County_Key) column
+        counties: County names in any format
+
+    Returns:
+        np.ndarray: Boolean mask aligned with df
+    """
+    targets = [normalize_county_name(c) for c in counties]
+
+    if COUNTY_KEY_COLUMN in df.columns:
+        key = df[COUNTY_KEY_COLUMN]
+        codes = key.cat.codes.to_numpy()
+        wanted = key.cat.categories.get_indexer(targets)
+    else:
+        codes, names = normalize_county_codes(df["County"])
+        wanted = names.get_indexer(targets)
+
+    return np.isin(codes, wanted[wanted >= 0])
+
+
+def _year_mask(df: pd.DataFrame, filters: Dict[str, Any]) -> Optional[np.ndarray]:
+    """Boolean mask for the year range filter, or None if it does not apply."""
+    if "years" in filters and filters["years"] and "Year" in df.columns:
+        start_year, end_year = filters["years"]
+        in_range = (df["Year"] >= start_year) & (df["Year"] <= end_year)
+        # Nullable Year columns yield <NA> for missing years; treat as no match
+        return in_range.to_numpy(dtype=bool, na_value=False)
+    return None
+
+
+def _selected_counties(filters: Dict[str, Any]) -> Optional[List[str]]:
+    """Counties selected in the sidebar ("counties" or legacy "county" key)."""
+    if "counties" in filters and filters["counties"]:
+        # New format: list of counties
+        if "All Counties" not in filters["counties"]:
+            return filters["counties"]
+    elif "county" in filters and filters["county"] != "All Counties":
+        # Old format: single county (backward compatibility)
+        return [filters["county"]]
+    return None
+
+
+def _combine(*masks: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """AND together the masks that apply; None means no restriction."""
+    combined = None
+    for mask in masks:
+        if mask is None:
+            continue
+        if combined is None:
+            # Arrays from Series.to_numpy() may be read-only under Copy-on-Write
+            combined = mask if mask.flags.writeable else mask.copy()
+        else:
+            combined &= mask
+    return combined
+
+
+def _materialize(df: pd.DataFrame, mask: Optional[np.ndarray]) -> pd.DataFrame:
+    """Materialize the filtered frame once (a shallow view if unfiltered)."""
+    if mask is None:
+        return df.copy(deep=False)
+    return df[mask]
+
+
+def get_dispensary_mask(
+    dispensaries: pd.DataFrame,
+    filters: Dict[str, Any]
+) -> Optional[np.ndarray]:
+    """
+    Build the combined boolean mask for the dispensary filters.
+
+    Args:
+        dispensaries (pd.DataFrame): Dispensary dataset
+        filters (dict): Filter dictionary from generate_sidebar()
+
+    Returns:
+        np.ndarray or None: Boolean row mask, or None if no filter applies
+    """
+    # Apply license type filter
+    license_mask = None
+    if "license_types" in filters and filters["license_types"]:
+        if "License Designation" in dispensaries.columns:
+            license_mask = dispensaries["License Designation"].isin(
+                filters["license_types"]
+            ).to_numpy(dtype=bool)
+
+    # Apply county filter (supports both "county" and "counties" keys)
+    county_mask = None
+    counties_to_filter = _selected_counties(filters)
+    if counties_to_filter and "County" in dispensaries.columns:
+        county_mask = _county_mask(dispensaries, counties_to_filter)
+
+    return _combine(_year_mask(dispensaries, filters), license_mask, county_mask)
+
+
+def get_sentiment_mask(
+    sentiment: pd.DataFrame,
+    filters: Dict[str, Any]
+) -> Optional[np.ndarray]:
+    """
+    Build the combined boolean mask for the sentiment filters.
+
+    Args:
+        sentiment (pd.DataFrame): Sentiment dataset
+        filters (dict): Filter dictionary from generate_sidebar()
+
+    Returns:
+        np.ndarray or None: Boolean row mask, or None if no filter applies
+    """
+    # Apply county filter (supports both "county" and "counties" keys)
+    county_mask = None
+    counties_to_filter = _selected_counties(filters)
+    if counties_to_filter and "County" in sentiment.columns:
+        county_mask = _county_mask(sentiment, counties_to_filter)
+
+    return _combine(_year_mask(sentiment, filters), county_mask)
+
+
+def get_density_mask(
+    density: pd.DataFrame,
+    filters: Dict[str, Any]
+) -> Optional[np.ndarray]:
+    """
+    Build the combined boolean mask for the density filters.
+
+    Args:
+        density (pd.DataFrame): Density dataset
+        filters (dict): Filter dictionary from generate_sidebar()
+
+    Returns:
+        np.ndarray or None: Boolean row mask, or None if no filter applies
+    """
+    # Apply county filter (legacy single "county" key only)
+    county_mask = None
+    if "county" in filters and filters["county"] != "All Counties":
+        if "County" in density.columns:
+            county_mask = _county_mask(density, [filters["county"]])
+
+    return _combine(_year_mask(density, filters), county_mask)
 
 
 def apply_dispensary_filters(
@@ -31,44 +187,7 @@ def apply_dispensary_filters(
         >>> filters = generate_sidebar()
         >>> filtered = apply_dispensary_filters(data['dispensaries'], filters)
     """
-    filtered_df = dispensaries.copy()
-
-    # Apply year filter
-    if "years" in filters and filters["years"]:
-        start_year, end_year = filters["years"]
-        if "Year" in filtered_df.columns:
-            filtered_df = filtered_df[
-                (filtered_df["Year"] >= start_year) &
-                (filtered_df["Year"] <= end_year)
-            ]
-
-    # Apply license type filter
-    if "license_types" in filters and filters["license_types"]:
-        if "License Designation" in filtered_df.columns:
-            filtered_df = filtered_df[
-                filtered_df["License Designation"].isin(filters["license_types"])
-            ]
-
-    # Apply county filter (supports both "county" and "counties" keys)
-    counties_to_filter = None
-    if "counties" in filters and filters["counties"]:
-        # New format: list of counties
-        if "All Counties" not in filters["counties"]:
-            counties_to_filter = filters["counties"]
-    elif "county" in filters and filters["county"] != "All Counties":
-        # Old format: single county (backward compatibility)
-        counties_to_filter = [filters["county"]]
-
-    if counties_to_filter and "County" in filtered_df.columns:
-        from .data_utils import normalize_county_name
-        # Normalize filter counties
-        normalized_filter_counties = [normalize_county_name(c) for c in counties_to_filter]
-        # Normalize dataframe counties
-        filtered_df["_normalized_county"] = filtered_df["County"].apply(normalize_county_name)
-        filtered_df = filtered_df[filtered_df["_normalized_county"].isin(normalized_filter_counties)]
-        filtered_df = filtered_df.drop(columns=["_normalized_county"])
-
-    return filtered_df
+    return _materialize(dispensaries, get_dispensary_mask(dispensaries, filters))
 
 
 def apply_sentiment_filters(
@@ -85,37 +204,7 @@ def apply_sentiment_filters(
     Returns:
         pd.DataFrame: Filtered sentiment data
     """
-    filtered_df = sentiment.copy()
-
-    # Apply year filter
-    if "years" in filters and filters["years"]:
-        start_year, end_year = filters["years"]
-        if "Year" in filtered_df.columns:
-            filtered_df = filtered_df[
-                (filtered_df["Year"] >= start_year) &
-                (filtered_df["Year"] <= end_year)
-            ]
-
-    # Apply county filter (supports both "county" and "counties" keys)
-    counties_to_filter = None
-    if "counties" in filters and filters["counties"]:
-        # New format: list of counties
-        if "All Counties" not in filters["counties"]:
-            counties_to_filter = filters["counties"]
-    elif "county" in filters and filters["county"] != "All Counties":
-        # Old format: single county (backward compatibility)
-        counties_to_filter = [filters["county"]]
-
-    if counties_to_filter and "County" in filtered_df.columns:
-        from .data_utils import normalize_county_name
-        # Normalize filter counties
-        normalized_filter_counties = [normalize_county_name(c) for c in counties_to_filter]
-        # Normalize dataframe counties
-        filtered_df["_normalized_county"] = filtered_df["County"].apply(normalize_county_name)
-        filtered_df = filtered_df[filtered_df["_normalized_county"].isin(normalized_filter_counties)]
-        filtered_df = filtered_df.drop(columns=["_normalized_county"])
-
-    return filtered_df
+    return _materialize(sentiment, get_sentiment_mask(sentiment, filters))
 
 
 def apply_density_filters(
@@ -132,27 +221,7 @@ def apply_density_filters(
     Returns:
         pd.DataFrame: Filtered density data
     """
-    filtered_df = density.copy()
-
-    # Apply year filter
-    if "years" in filters and filters["years"]:
-        start_year, end_year = filters["years"]
-        if "Year" in filtered_df.columns:
-            filtered_df = filtered_df[
-                (filtered_df["Year"] >= start_year) &
-                (filtered_df["Year"] <= end_year)
-            ]
-
-    # Apply county filter
-    if "county" in filters and filters["county"] != "All Counties":
-        if "County" in filtered_df.columns:
-            from .data_utils import normalize_county_name
-            filter_county = normalize_county_name(filters["county"])
-            filtered_df["_normalized_county"] = filtered_df["County"].apply(normalize_county_name)
-            filtered_df = filtered_df[filtered_df["_normalized_county"] == filter_county]
-            filtered_df = filtered_df.drop(columns=["_normalized_county"])
-
-    return filtered_df
+    return _materialize(density, get_density_mask(density, filters))
 
 
 def get_filter_summary(filters: Dict[str, Any]) -> str:
@@ -186,7 +255,6 @@ def get_filter_summary(filters: Dict[str, Any]) -> str:
         if "All Counties" in filters["counties"]:
             parts.append("all counties")
         else:
-            from .data_utils import normalize_county_name
             normalized_counties = [normalize_county_name(c) for c in filters["counties"]]
             if len(normalized_counties) == 1:
                 parts.append(normalized_counties[0])
@@ -197,7 +265,6 @@ def get_filter_summary(filters: Dict[str, Any]) -> str:
         if filters["county"] == "All Counties":
             parts.append("all counties")
         else:
-            from .data_utils import normalize_county_name
             county = normalize_county_name(filters["county"])
             parts.append(county)
 
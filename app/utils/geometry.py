@@ -0,0 +1,611 @@
+"""
+Simplified multi-resolution county geometries.
+
+Every choropleth ships its county polygons to the browser inside the figure
+JSON, so full-resolution boundaries dominate the payload of the map pages.
+This module converts the county GeoJSON into a TopoJSON-style topology:
+coordinates are quantized to an integer grid and every boundary shared by
+two counties is stored once, as a single arc. The arcs are then simplified
+(Douglas-Peucker) into several levels of detail. Because a shared arc is
+simplified once for both neighbours, simplification never opens gaps or
+overlaps between counties, and rings are never reduced below a triangle.
+
+A zoom factor (1 = the statewide view) selects the coarsest level whose
+tolerance is still below one screen pixel.
+
+The topology can be precomputed offline next to the GeoJSON file:
+
+    python -m app.utils.geometry data/California_County_Boundaries.geojson
+
+This writes California_County_Boundaries.topojson, which is used at load
+time for as long as the GeoJSON content it was built from is unchanged.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .load_geojson import CountyFeatureCollection, get_geojson, load_geojson
+
+logger = logging.getLogger(__name__)
+
+# Levels of detail as (name, simplification tolerance in degrees), finest first
+LEVELS: List[Tuple[str, float]] = [
+    ("full", 0.0),
+    ("high", 0.0005),
+    ("medium", 0.0025),
+    ("low", 0.01),
+]
+
+# Grid size used to quantize coordinates (per axis, over the bounding box)
+DEFAULT_QUANTIZATION = 100_000
+
+# Feature properties kept in the simplified GeoJSON (choropleths match on NAME)
+LEVEL_PROPERTIES = ("NAME", "GEOID")
+
+# Map height the zoom factor is relative to (see get_california_map_layout())
+MAP_HEIGHT_PX = 600
+
+# Levels of detail per (GeoJSON path, quantization), with the parsed GeoJSON
+# they were built from
+_geometries: Dict[Tuple[str, int], Tuple[Dict[str, Any], "CountyGeometries"]] = {}
+_geometries_lock = threading.Lock()
+
+
+def _polygons(geometry: Optional[Dict[str, Any]]) -> Optional[List[List[Any]]]:
+    """Rings of a Polygon or MultiPolygon as a list of polygons."""
+    if not geometry:
+        return None
+    if geometry.get("type") == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry.get("type") == "MultiPolygon":
+        return geometry["coordinates"]
+    return None
+
+
+def _quantized_ring(
+    ring: Any, translate: np.ndarray, scale: np.ndarray
+) -> Optional[np.ndarray]:
+    """Quantize a ring, dropping repeated points; None if it degenerates."""
+    points = np.asarray(ring, dtype=np.float64)[:, :2]
+    q = np.round((points - translate) / scale).astype(np.int64)
+    q = q[np.r_[True, (np.diff(q, axis=0) != 0).any(axis=1)]]
+    if len(q) and (q[0] != q[-1]).any():
+        q = np.vstack([q, q[:1]])
+    return q if len(q) >= 4 else None
+
+
+def _point_keys(points: np.ndarray, quantization: int) -> np.ndarray:
+    """Encode quantized (x, y) points as single integers."""
+    return points[:, 0] * (quantization + 1) + points[:, 1]
+
+
+class _ArcIndex:
+    """Deduplicates arcs so each shared boundary is stored once."""
+
+    def __init__(self):
+        self.arcs: List[np.ndarray] = []
+        self._index: Dict[bytes, int] = {}
+
+    def add(self, points: np.ndarray, keys: np.ndarray) -> int:
+        """Add an arc; returns its index, or ~index if stored reversed."""
+        forward = keys.tobytes()
+        if forward in self._index:
+            return self._index[forward]
+        backward = keys[::-1].tobytes()
+        if backward in self._index:
+            return ~self._index[backward]
+        self._index[forward] = len(self.arcs)
+        self.arcs.append(points)
+        return len(self.arcs) - 1
+
+    def add_closed(self, points: np.ndarray, keys: np.ndarray) -> int:
+        """Add a ring without junctions, rotated to a canonical start point."""
+        # Both orientations then start and end at the same point, so the
+        # reversed ring of a neighbour (e.g. a hole) is found by add()
+        start = int(np.argmin(keys[:-1]))
+        rotated = np.roll(points[:-1], -start, axis=0)
+        rotated_keys = np.roll(keys[:-1], -start)
+        return self.add(
+            np.vstack([rotated, rotated[:1]]), np.append(rotated_keys, rotated_keys[0])
+        )
+
+
+def build_topology(
+    geojson: Dict[str, Any], quantization: int = DEFAULT_QUANTIZATION
+) -> Dict[str, Any]:
+    """
+    Convert a GeoJSON FeatureCollection into a quantized topology.
+
+    The result follows the TopoJSON format (delta-encoded arcs, a quantization
+    transform and one "counties" GeometryCollection), so it can also be read
+    by standard TopoJSON tools.
+
+    Args:
+        geojson: FeatureCollection of Polygon / MultiPolygon features
+        quantization: Grid size per axis
+
+    Returns:
+        dict: TopoJSON topology
+    """
+    features = geojson.get("features", [])
+    shapes = [_polygons(feature.get("geometry")) for feature in features]
+
+    coordinates = [
+        np.asarray(ring, dtype=np.float64)[:, :2]
+        for polygons in shapes
+        if polygons
+        for polygon in polygons
+        for ring in polygon
+        if len(ring)
+    ]
+    if coordinates:
+        stacked = np.vstack(coordinates)
+        lower, upper = stacked.min(axis=0), stacked.max(axis=0)
+    else:
+        lower = upper = np.zeros(2)
+    translate = lower
+    scale = np.where(upper > lower, (upper - lower) / (quantization - 1), 1.0)
+
+    # Quantize every ring: shapes become nested lists of integer rings
+    quantized = [
+        (
+            None
+            if polygons is None
+            else [
+                [
+                    q
+                    for q in (
+                        _quantized_ring(ring, translate, scale) for ring in polygon
+                    )
+                    if q is not None
+                ]
+                for polygon in polygons
+            ]
+        )
+        for polygons in shapes
+    ]
+    rings = [
+        ring
+        for polygons in quantized
+        if polygons
+        for polygon in polygons
+        for ring in polygon
+    ]
+
+    # A junction is a point whose neighbours differ between the rings using it,
+    # i.e. where a boundary shared by two counties starts or ends
+    junctions = np.empty(0, dtype=np.int64)
+    if rings:
+        triples = []
+        for ring in rings:
+            keys = _point_keys(ring[:-1], quantization)
+            previous, following = np.roll(keys, 1), np.roll(keys, -1)
+            triples.append(
+                np.column_stack(
+                    [
+                        keys,
+                        np.minimum(previous, following),
+                        np.maximum(previous, following),
+                    ]
+                )
+            )
+        distinct = np.unique(np.vstack(triples), axis=0)
+        points, counts = np.unique(distinct[:, 0], return_counts=True)
+        junctions = points[counts > 1]
+
+    index = _ArcIndex()
+
+    def ring_arcs(ring: np.ndarray) -> List[int]:
+        keys = _point_keys(ring, quantization)
+        cuts = np.flatnonzero(np.isin(keys[:-1], junctions))
+        if not len(cuts):
+            return [index.add_closed(ring, keys)]
+        # Start the ring at a junction and split it at every junction
+        open_ring, open_keys = ring[:-1], keys[:-1]
+        rotated = np.roll(open_ring, -cuts[0], axis=0)
+        rotated_keys = np.roll(open_keys, -cuts[0])
+        rotated = np.vstack([rotated, rotated[:1]])
+        rotated_keys = np.append(rotated_keys, rotated_keys[0])
+        bounds = np.append(cuts - cuts[0], len(open_ring))
+        return [
+            index.add(rotated[start : stop + 1], rotated_keys[start : stop + 1])
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+
+    geometries = []
+    for feature, polygons in zip(features, quantized):
+        geometry: Dict[str, Any] = {"properties": feature.get("properties") or {}}
+        if "id" in feature:
+            geometry["id"] = feature["id"]
+        parts = [[ring_arcs(ring) for ring in polygon] for polygon in polygons or []]
+        parts = [part for part in parts if part]
+        if not parts:
+            geometry["type"] = None
+        elif feature["geometry"]["type"] == "Polygon":
+            geometry.update(type="Polygon", arcs=parts[0])
+        else:
+            geometry.update(type="MultiPolygon", arcs=parts)
+        geometries.append(geometry)
+
+    arcs = [np.vstack([arc[:1], np.diff(arc, axis=0)]).tolist() for arc in index.arcs]
+    return {
+        "type": "Topology",
+        "bbox": [*map(float, lower), *map(float, upper)],
+        "transform": {"scale": scale.tolist(), "translate": translate.tolist()},
+        "objects": {
+            "counties": {"type": "GeometryCollection", "geometries": geometries}
+        },
+        "arcs": arcs,
+    }
+
+
+def _importance(points: np.ndarray) -> np.ndarray:
+    """
+    Douglas-Peucker importance of each point of an arc.
+
+    A point is kept at tolerance t exactly when its importance exceeds t, so
+    every level of detail is a threshold over one precomputed array. Endpoints
+    are always kept.
+    """
+    n = len(points)
+    importance = np.zeros(n)
+    importance[0] = importance[-1] = np.inf
+    stack = [(0, n - 1, np.inf)]
+    while stack:
+        first, last, limit = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        inner = points[first + 1 : last]
+        direction = end - start
+        length = math.hypot(*direction)
+        if length == 0:
+            distances = np.hypot(*(inner - start).T)
+        else:
+            offsets = inner - start
+            distances = (
+                np.abs(direction[0] * offsets[:, 1] - direction[1] * offsets[:, 0])
+                / length
+            )
+        split = int(np.argmax(distances))
+        # Cap by the parent so importance never increases down the recursion
+        value = min(float(distances[split]), limit)
+        importance[first + 1 + split] = value
+        stack.append((first, first + 1 + split, value))
+        stack.append((first + 1 + split, last, value))
+    return importance
+
+
+def _decimals(tolerance: float, step: float) -> int:
+    """Decimal places needed to keep rounding well below the tolerance."""
+    precision = max(tolerance / 10, step)
+    return max(0, math.ceil(-math.log10(precision))) if precision > 0 else 6
+
+
+class CountyGeometries:
+    """County boundaries at several levels of detail, built from one topology."""
+
+    def __init__(self, topology: Dict[str, Any]):
+        """
+        Initialize from a topology produced by build_topology().
+
+        Args:
+            topology: TopoJSON topology with a "counties" object
+        """
+        transform = topology["transform"]
+        scale = np.asarray(transform["scale"], dtype=np.float64)
+        translate = np.asarray(transform["translate"], dtype=np.float64)
+
+        self.bbox = topology["bbox"]
+        self.step = float(scale.max())
+        self._arcs = [
+            np.cumsum(np.asarray(arc, dtype=np.int64).reshape(-1, 2), axis=0) * scale
+            + translate
+            for arc in topology["arcs"]
+        ]
+        self._importance = [_importance(arc) for arc in self._arcs]
+        self._geometries = topology["objects"]["counties"]["geometries"]
+        self._levels: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_geojson(
+        cls, geojson: Dict[str, Any], quantization: int = DEFAULT_QUANTIZATION
+    ) -> "CountyGeometries":
+        """
+        Build the levels of detail directly from GeoJSON.
+
+        Args:
+            geojson: County FeatureCollection
+            quantization: Grid size per axis
+
+        Returns:
+            CountyGeometries
+        """
+        return cls(build_topology(geojson, quantization))
+
+    def __len__(self) -> int:
+        return len(self._geometries)
+
+    @property
+    def span(self) -> float:
+        """Largest extent of the boundaries in degrees."""
+        x0, y0, x1, y1 = self.bbox
+        return max(x1 - x0, y1 - y0)
+
+    def select_level(self, zoom: float = 1.0, height_px: int = MAP_HEIGHT_PX) -> str:
+        """
+        Choose the coarsest level that is still finer than one pixel.
+
+        Args:
+            zoom: Zoom factor relative to the statewide view
+            height_px: Rendered map height in pixels
+
+        Returns:
+            str: Level name from LEVELS
+        """
+        pixel = self.span / (height_px * max(zoom, 1e-9))
+        name = LEVELS[0][0]
+        for level, tolerance in LEVELS:
+            if tolerance <= pixel:
+                name = level
+        return name
+
+    def for_zoom(
+        self, zoom: float = 1.0, height_px: int = MAP_HEIGHT_PX
+    ) -> CountyFeatureCollection:
+        """
+        Get the GeoJSON to draw at a zoom factor.
+
+        Args:
+            zoom: Zoom factor relative to the statewide view
+            height_px: Rendered map height in pixels
+
+        Returns:
+            CountyFeatureCollection: GeoJSON with its county index
+        """
+        return self.level(self.select_level(zoom, height_px))
+
+    def level(self, name: str) -> CountyFeatureCollection:
+        """
+        Get one level of detail as GeoJSON, building it on first use.
+
+        The returned FeatureCollection is shared; do not modify it.
+
+        Args:
+            name: Level name from LEVELS
+
+        Returns:
+            CountyFeatureCollection: GeoJSON with its county index
+
+        Raises:
+            KeyError: If name is not a known level
+        """
+        tolerance = dict(LEVELS)[name]
+        with self._lock:
+            if name not in self._levels:
+                self._levels[name] = self._build_level(tolerance)
+            return self._levels[name]
+
+    def _build_level(self, tolerance: float) -> Dict[str, Any]:
+        kept = [importance > tolerance for importance in self._importance]
+        rings = [
+            ring
+            for geometry in self._geometries
+            if geometry.get("type")
+            for polygon in self._polygon_arcs(geometry)
+            for ring in polygon
+        ]
+        # Restore points on shared arcs so no ring collapses below a triangle
+        for ring in rings:
+            self._keep_ring_valid(ring, kept)
+
+        decimals = _decimals(tolerance, self.step)
+        arcs = [np.round(arc[mask], decimals) for arc, mask in zip(self._arcs, kept)]
+
+        features = []
+        for geometry in self._geometries:
+            properties = geometry.get("properties") or {}
+            feature: Dict[str, Any] = {
+                "type": "Feature",
+                "properties": {
+                    k: properties[k] for k in LEVEL_PROPERTIES if k in properties
+                },
+                "geometry": None,
+            }
+            if "id" in geometry:
+                feature["id"] = geometry["id"]
+            if geometry.get("type"):
+                polygons = [
+                    [self._ring_coordinates(ring, arcs) for ring in polygon]
+                    for polygon in self._polygon_arcs(geometry)
+                ]
+                if geometry["type"] == "Polygon":
+                    feature["geometry"] = {
+                        "type": "Polygon",
+                        "coordinates": polygons[0],
+                    }
+                else:
+                    feature["geometry"] = {
+                        "type": "MultiPolygon",
+                        "coordinates": polygons,
+                    }
+            features.append(feature)
+
+        return CountyFeatureCollection(
+            {"type": "FeatureCollection", "features": features}
+        )
+
+    @staticmethod
+    def _polygon_arcs(geometry: Dict[str, Any]) -> List[List[List[int]]]:
+        arcs = geometry["arcs"]
+        return [arcs] if geometry["type"] == "Polygon" else arcs
+
+    @staticmethod
+    def _ring_size(ring: List[int], kept: List[np.ndarray]) -> int:
+        """Number of coordinates of a ring, including the closing point."""
+        return sum(int(kept[a if a >= 0 else ~a].sum()) for a in ring) - (len(ring) - 1)
+
+    def _keep_ring_valid(self, ring: List[int], kept: List[np.ndarray]) -> None:
+        while self._ring_size(ring, kept) < 4:
+            best, best_arc, best_point = -1.0, None, None
+            for ref in ring:
+                arc = ref if ref >= 0 else ~ref
+                dropped = np.flatnonzero(~kept[arc])
+                if len(dropped):
+                    point = dropped[np.argmax(self._importance[arc][dropped])]
+                    if self._importance[arc][point] > best:
+                        best, best_arc, best_point = (
+                            self._importance[arc][point],
+                            arc,
+                            point,
+                        )
+            if best_arc is None:
+                return
+            kept[best_arc][best_point] = True
+
+    @staticmethod
+    def _ring_coordinates(ring: List[int], arcs: List[np.ndarray]) -> List[List[float]]:
+        parts = []
+        for i, ref in enumerate(ring):
+            points = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+            parts.append(points if i == 0 else points[1:])
+        coordinates = np.vstack(parts)
+        # Rounding can merge neighbouring points; drop the repeats
+        distinct = coordinates[
+            np.r_[True, (np.diff(coordinates, axis=0) != 0).any(axis=1)]
+        ]
+        if len(distinct) >= 4:
+            coordinates = distinct
+        return coordinates.tolist()
+
+
+def topology_path(geojson_path: str) -> str:
+    """
+    Get the path of the precomputed topology for a GeoJSON file.
+
+    Args:
+        geojson_path: Path to the GeoJSON file
+
+    Returns:
+        str: Path with the .topojson extension
+    """
+    return os.path.splitext(geojson_path)[0] + ".topojson"
+
+
+def _content_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def write_topology(
+    geojson_path: str,
+    output_path: Optional[str] = None,
+    quantization: int = DEFAULT_QUANTIZATION,
+) -> str:
+    """
+    Precompute the topology of a GeoJSON file.
+
+    Args:
+        geojson_path: Path to the GeoJSON file
+        output_path: Destination (default: topology_path(geojson_path))
+        quantization: Grid size per axis
+
+    Returns:
+        str: Path of the written topology
+    """
+    topology = build_topology(load_geojson(geojson_path), quantization)
+    topology["source_sha256"] = _content_hash(geojson_path)
+    topology["quantization"] = quantization
+
+    output_path = output_path or topology_path(geojson_path)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(topology, f, separators=(",", ":"))
+    return output_path
+
+
+def _read_topology(geojson_path: str, quantization: int) -> Optional[Dict[str, Any]]:
+    """The precomputed topology of a GeoJSON file, if it is current."""
+    precomputed = topology_path(geojson_path)
+    if not os.path.exists(precomputed):
+        return None
+    try:
+        with open(precomputed, encoding="utf-8") as f:
+            topology = json.load(f)
+        if topology.get("quantization") == quantization and topology.get(
+            "source_sha256"
+        ) == _content_hash(geojson_path):
+            return topology
+        logger.info("Ignoring outdated topology '%s'", precomputed)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Could not read topology '%s': %s", precomputed, e)
+    return None
+
+
+def load_county_geometries(
+    geojson_path: str,
+    geojson: Optional[Dict[str, Any]] = None,
+    quantization: int = DEFAULT_QUANTIZATION,
+) -> CountyGeometries:
+    """
+    Load the county levels of detail, preferring a precomputed topology.
+
+    The topology written by write_topology() is used if it was built from
+    the current GeoJSON content; otherwise it is rebuilt from the GeoJSON.
+    The result is reused for as long as the parsed GeoJSON from
+    get_geojson() is unchanged, so reloading other datasets does not
+    rebuild the geometry.
+
+    Args:
+        geojson_path: Path to the GeoJSON file
+        geojson: Already loaded GeoJSON (default: get_geojson(geojson_path))
+        quantization: Grid size per axis
+
+    Returns:
+        CountyGeometries
+    """
+    if geojson is None:
+        geojson = get_geojson(geojson_path)
+
+    key = (os.path.abspath(geojson_path), quantization)
+    with _geometries_lock:
+        cached = _geometries.get(key)
+        if cached is not None and cached[0] is geojson:
+            return cached[1]
+
+        topology = _read_topology(geojson_path, quantization)
+        if topology is not None:
+            geometries = CountyGeometries(topology)
+        else:
+            geometries = CountyGeometries.from_geojson(geojson, quantization)
+        _geometries[key] = (geojson, geometries)
+        return geometries
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Precompute the topology of a county GeoJSON file."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("geojson", help="Path to the county GeoJSON file")
+    parser.add_argument("--output", help="Output path (default: next to the GeoJSON)")
+    parser.add_argument("--quantization", type=int, default=DEFAULT_QUANTIZATION)
+    args = parser.parse_args(argv)
+
+    output = write_topology(args.geojson, args.output, args.quantization)
+    with open(output, encoding="utf-8") as f:
+        geometries = CountyGeometries(json.load(f))
+    print(f"Wrote {output}")
+    for name, _ in LEVELS:
+        size = len(json.dumps(geometries.level(name), separators=(",", ":")))
+        print(f"  {name:<8} {size / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Hexagonal binning of dispensary coordinates.
+
+County averages hide large differences inside big counties. The hexbin
+layer counts dispensaries in a regular grid of hexagons instead, at a few
+fixed resolutions (in the spirit of H3, but computed with NumPy):
+
+- Coordinates are projected to a plane with longitudes scaled by the cosine
+  of a fixed reference latitude, so hexagons have the same shape everywhere
+  and bins are stable across filter states.
+- Each point is assigned its hexagon with vectorized cube-coordinate
+  rounding; DispensaryHexbins stores that cell code for every row at every
+  resolution once at load time.
+- The counts of a filtered subset are then one np.bincount over the codes of
+  its rows, so the map follows the sidebar filters without re-binning.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .spatial_index import LATITUDE_COLUMN, LONGITUDE_COLUMN
+
+# Hexagon circumradius in degrees of latitude, from coarse to fine
+HEX_RESOLUTIONS = {
+    0: 0.5,
+    1: 0.2,
+    2: 0.08,
+    3: 0.03,
+}
+
+# Latitude at which longitudes are scaled (center of California)
+REFERENCE_LATITUDE = 37.0
+
+_SQRT3 = np.sqrt(3.0)
+_SCALE = np.cos(np.radians(REFERENCE_LATITUDE))
+
+
+def hex_cells(lon: np.ndarray, lat: np.ndarray, size: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the pointy-top hexagon containing each point.
+
+    Args:
+        lon: Point longitudes
+        lat: Point latitudes
+        size: Hexagon circumradius in degrees of latitude
+
+    Returns:
+        tuple: Axial coordinates (q, r) of each point's hexagon (int64)
+    """
+    x = np.asarray(lon, dtype=np.float64) * _SCALE
+    y = np.asarray(lat, dtype=np.float64)
+    q = (_SQRT3 / 3 * x - y / 3) / size
+    r = (2 / 3 * y) / size
+
+    # Round the cube coordinates (q, r, -q - r), fixing the one that moved most
+    s = -q - r
+    rq, rr, rs = np.rint(q), np.rint(r), np.rint(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+
+def hex_centers(q: np.ndarray, r: np.ndarray, size: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get the centers of hexagons.
+
+    Args:
+        q: Axial q coordinates
+        r: Axial r coordinates
+        size: Hexagon circumradius in degrees of latitude
+
+    Returns:
+        tuple: (longitudes, latitudes) of the centers
+    """
+    x = size * _SQRT3 * (q + r / 2)
+    y = size * 1.5 * r
+    return x / _SCALE, y
+
+
+def hex_polygons(q: np.ndarray, r: np.ndarray, size: float) -> np.ndarray:
+    """
+    Get the outlines of hexagons.
+
+    Args:
+        q: Axial q coordinates
+        r: Axial r coordinates
+        size: Hexagon circumradius in degrees of latitude
+
+    Returns:
+        np.ndarray: (n, 7, 2) closed rings of (lon, lat) corners
+    """
+    lon, lat = hex_centers(np.asarray(q), np.asarray(r), size)
+    angles = np.radians(30 + 60 * np.arange(7))
+    corners_x = lon[:, None] * _SCALE + size * np.cos(angles)
+    corners_y = lat[:, None] + size * np.sin(angles)
+    return np.stack([corners_x / _SCALE, corners_y], axis=-1)
+
+
+class HexGrid:
+    """Occupied hexagons at one resolution, with each point's cell code."""
+
+    def __init__(self, lon: np.ndarray, lat: np.ndarray, resolution: int):
+        """
+        Bin points into hexagons.
+
+        Args:
+            lon: Point longitudes (NaN for points without coordinates)
+            lat: Point latitudes
+            resolution: Key of HEX_RESOLUTIONS
+        """
+        self.resolution = resolution
+        self.size = HEX_RESOLUTIONS[resolution]
+        located = ~(np.isnan(lon) | np.isnan(lat))
+
+        q, r = hex_cells(lon[located], lat[located], self.size)
+        # One integer key per cell, so occupied cells are found with a 1-D sort
+        q0 = q.min(initial=0)
+        r0 = r.min(initial=0)
+        span = r.max(initial=0) - r0 + 1
+        keys, inverse = np.unique((q - q0) * span + (r - r0), return_inverse=True)
+        self.q, self.r = keys // span + q0, keys % span + r0
+
+        # Cell code per point, -1 for points without coordinates
+        self.codes = np.full(len(lon), -1, dtype=np.int32)
+        self.codes[located] = inverse
+
+    def __len__(self) -> int:
+        return len(self.q)
+
+    def counts(self, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Count points per cell.
+
+        Args:
+            positions: Row positions of the points to count (default: all)
+
+        Returns:
+            np.ndarray: Count per cell, aligned with q and r
+        """
+        codes = self.codes if positions is None else self.codes[positions]
+        return np.bincount(codes[codes >= 0], minlength=len(self))
+
+
+class DispensaryHexbins:
+    """Hexagon cell codes of every dispensary at all resolutions."""
+
+    def __init__(self, index: pd.Index, grids: Dict[int, HexGrid]):
+        """
+        Initialize the bins.
+
+        Args:
+            index: Row index of the binned frame
+            grids: HexGrid per resolution
+        """
+        self.index = index
+        self.grids = grids
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> Optional["DispensaryHexbins"]:
+        """
+        Bin the rows of a frame with Latitude and Longitude columns.
+
+        Args:
+            df: Dispensary dataset
+
+        Returns:
+            DispensaryHexbins or None if the frame has no coordinates
+        """
+        if LATITUDE_COLUMN not in df.columns or LONGITUDE_COLUMN not in df.columns:
+            return None
+        lon = pd.to_numeric(df[LONGITUDE_COLUMN], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        lat = pd.to_numeric(df[LATITUDE_COLUMN], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        return cls(df.index, {
+            resolution: HexGrid(lon, lat, resolution) for resolution in HEX_RESOLUTIONS
+        })
+
+    def counts(self, resolution: int, rows: Optional[pd.Index] = None) -> pd.DataFrame:
+        """
+        Count dispensaries per occupied hexagon.
+
+        Args:
+            resolution: Key of HEX_RESOLUTIONS
+            rows: Index of a filtered subset of the binned frame (default: all rows)
+
+        Returns:
+            pd.DataFrame: One row per non-empty hexagon with columns Hex_ID,
+            q, r, Longitude, Latitude (center) and Count
+        """
+        grid = self.grids[resolution]
+        positions = None
+        if rows is not None:
+            positions = self.index.get_indexer(rows)
+            positions = positions[positions >= 0]
+
+        counts = grid.counts(positions)
+        occupied = np.flatnonzero(counts)
+        q, r = grid.q[occupied], grid.r[occupied]
+        lon, lat = hex_centers(q, r, grid.size)
+        return pd.DataFrame({
+            "Hex_ID": [f"{resolution}:{a}:{b}" for a, b in zip(q.tolist(), r.tolist())],
+            "q": q,
+            "r": r,
+            LONGITUDE_COLUMN: lon,
+            LATITUDE_COLUMN: lat,
+            "Count": counts[occupied],
+        })
+
+    def geojson(self, resolution: int, cells: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Build the hexagon outlines of counted cells.
+
+        Args:
+            resolution: Key of HEX_RESOLUTIONS
+            cells: Result of counts()
+
+        Returns:
+            dict: FeatureCollection with one Polygon per cell, id = Hex_ID
+        """
+        rings = hex_polygons(cells["q"].to_numpy(), cells["r"].to_numpy(), HEX_RESOLUTIONS[resolution])
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "id": hex_id, "properties": {},
+                 "geometry": {"type": "Polygon", "coordinates": [ring]}}
+                for hex_id, ring in zip(cells["Hex_ID"], np.round(rings, 3).tolist())
+            ],
+        }
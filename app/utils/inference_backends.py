@@ -0,0 +1,264 @@
+"""
+CPU inference backends for the star-rating model.
+
+Full-precision PyTorch BERT is the bottleneck of refreshing BERT_Sentiment
+on hosts without a GPU. StarRatingModel runs its forward passes through one
+of these backends:
+
+- "torch": the reference float32 model.
+- "int8": the model with its Linear layers dynamically quantized to int8
+  (weights quantized once, activations per batch).
+- "onnx": the model exported to ONNX and run in an onnxruntime session
+  (optional; needs the onnxruntime package). Exports are cached in the
+  dataset cache directory.
+
+A faster backend is only useful if it labels tweets like the reference, so
+label_agreement() / check_agreement() compare star labels on a sample and
+the scoring CLIs refuse backends agreeing on less than MIN_AGREEMENT of it.
+"""
+import hashlib
+import logging
+import os
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from .dataset_cache import get_cache_dir
+
+try:
+    import onnxruntime
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "int8", "onnx")
+
+# Share of star labels a backend must reproduce
+MIN_AGREEMENT = 0.99
+
+ONNX_OPSET = 17
+
+# A backend maps padded (input_ids, attention_mask) int64 arrays to logits
+Backend = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+def torch_backend(model: Any, torch: Any) -> Backend:
+    """
+    Run a model with PyTorch.
+
+    Args:
+        model: Sequence classification model in eval mode
+        torch: The torch module
+
+    Returns:
+        Backend function
+    """
+    def run(input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        with torch.inference_mode():
+            logits = model(
+                input_ids=torch.from_numpy(input_ids),
+                attention_mask=torch.from_numpy(attention_mask),
+            ).logits
+        return logits.float().numpy()
+
+    return run
+
+
+def quantized_backend(model: Any, torch: Any) -> Backend:
+    """
+    Run a copy of a model with dynamically int8-quantized Linear layers.
+
+    Args:
+        model: Sequence classification model in eval mode
+        torch: The torch module
+
+    Returns:
+        Backend function
+    """
+    quantization = getattr(torch, "ao", torch).quantization
+    quantized = quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    quantized.eval()
+    return torch_backend(quantized, torch)
+
+
+def _model_fingerprint(model_name: str) -> str:
+    """Hash a model id, plus file sizes and times for local model directories."""
+    digest = hashlib.blake2b(model_name.encode("utf-8"), digest_size=12)
+    if os.path.isdir(model_name):
+        for name in sorted(os.listdir(model_name)):
+            stat = os.stat(os.path.join(model_name, name))
+            digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def export_onnx(model: Any, torch: Any, path: str) -> str:
+    """
+    Export a sequence classification model to ONNX.
+
+    Args:
+        model: Model in eval mode
+        torch: The torch module
+        path: Output path
+
+    Returns:
+        str: The output path
+    """
+    class LogitsOnly(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask):
+            return self.inner(input_ids=input_ids, attention_mask=attention_mask).logits
+
+    dummy = torch.ones((2, 8), dtype=torch.long)
+    partial_path = path + ".partial"
+    kwargs = dict(
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=ONNX_OPSET,
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with torch.inference_mode():
+        try:
+            torch.onnx.export(LogitsOnly(model), (dummy, dummy), partial_path, dynamo=False, **kwargs)
+        except TypeError:  # torch < 2.5 has no dynamo argument
+            torch.onnx.export(LogitsOnly(model), (dummy, dummy), partial_path, **kwargs)
+    os.replace(partial_path, path)
+    return path
+
+
+def onnx_backend(
+    model: Any,
+    torch: Any,
+    model_name: str,
+    threads: int = 1,
+    path: Optional[str] = None
+) -> Backend:
+    """
+    Run a model in an onnxruntime session, exporting it first if needed.
+
+    Args:
+        model: Sequence classification model in eval mode
+        torch: The torch module
+        model_name: Model id or directory, keying the cached export
+        threads: Intra-op threads of the session
+        path: ONNX file (default: cached under the dataset cache directory)
+
+    Returns:
+        Backend function
+
+    Raises:
+        ImportError: If onnxruntime is not installed
+    """
+    if not ONNX_AVAILABLE:
+        raise ImportError("The onnx backend needs the onnxruntime package")
+
+    if path is None:
+        path = os.path.join(get_cache_dir(), "onnx", f"{_model_fingerprint(model_name)}.onnx")
+    if not os.path.exists(path):
+        logger.info("Exporting %s to %s", model_name, path)
+        export_onnx(model, torch, path)
+
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    def run(input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        return session.run(
+            ["logits"],
+            {"input_ids": input_ids.astype(np.int64), "attention_mask": attention_mask.astype(np.int64)},
+        )[0]
+
+    return run
+
+
+def make_backend(name: str, model: Any, torch: Any, model_name: str, threads: int = 1) -> Backend:
+    """
+    Create an inference backend.
+
+    Args:
+        name: One of BACKENDS
+        model: Loaded model in eval mode
+        torch: The torch module
+        model_name: Model id or directory
+        threads: Threads for backends managing their own pool (onnx)
+
+    Returns:
+        Backend function
+
+    Raises:
+        ValueError: If the backend name is unknown
+        ImportError: If the backend's package is not installed
+    """
+    if name == "torch":
+        return torch_backend(model, torch)
+    if name == "int8":
+        return quantized_backend(model, torch)
+    if name == "onnx":
+        return onnx_backend(model, torch, model_name, threads)
+    raise ValueError(f"unknown backend '{name}'; expected one of {list(BACKENDS)}")
+
+
+def label_agreement(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """
+    Share of texts given the same label by two models.
+
+    Args:
+        reference: Class per text from the reference model
+        candidate: Class per text from the candidate
+
+    Returns:
+        float: Agreement between 0 and 1 (1 for no texts)
+    """
+    reference = np.asarray(reference)
+    candidate = np.asarray(candidate)
+    if reference.shape != candidate.shape:
+        raise ValueError("label arrays differ in length")
+    return float(np.mean(reference == candidate)) if len(reference) else 1.0
+
+
+def check_agreement(
+    reference: Any,
+    candidate: Any,
+    texts: Any,
+    min_agreement: float = MIN_AGREEMENT,
+    **kwargs
+) -> Dict[str, float]:
+    """
+    Validate a backend against the reference model on sample texts.
+
+    Args:
+        reference: StarRatingModel with the torch backend
+        candidate: StarRatingModel with the backend to validate
+        texts: Sample texts
+        min_agreement: Required share of equal star labels
+        **kwargs: Batching options passed to predict()
+
+    Returns:
+        dict: "agreement" and "texts" (sample size)
+
+    Raises:
+        ValueError: If the agreement is below min_agreement
+    """
+    texts = [str(text) for text in texts]
+    agreement = label_agreement(reference.predict(texts, **kwargs), candidate.predict(texts, **kwargs))
+    logger.info(
+        "Backend %s agrees with the reference on %.2f%% of %d texts",
+        candidate.backend_name, agreement * 100, len(texts)
+    )
+    if agreement < min_agreement:
+        raise ValueError(
+            f"backend '{candidate.backend_name}' agrees with the reference on "
+            f"{agreement:.2%} of {len(texts)} texts, below the required {min_agreement:.0%}"
+        )
+    return {"agreement": agreement, "texts": len(texts)}
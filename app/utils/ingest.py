@@ -0,0 +1,285 @@
+"""
+Incremental ingestion of new tweet sentiment batches.
+
+New tweets are delivered as additional CSV files next to the main dataset,
+named ``Tweet_Sentiment_<anything>.csv`` (for example
+``Tweet_Sentiment_2024-06-01.csv``). Each new batch is parsed and converted
+on its own, appended to the tweet data in the shared data store and folded
+into the tweet cubes; the existing history is never re-read.
+
+Cached filter results are kept across the update unless their filters
+select one of the County / Year / Month partitions the batch touched.
+
+A batch that changes after it was ingested cannot be un-appended; its new
+contents are picked up on the next full reload.
+"""
+import glob
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .data_store import DataSnapshot, DataStore
+from .data_utils import (
+    COUNTY_KEY_COLUMN,
+    add_county_key,
+    build_county_dimension,
+    rebase_county_key,
+)
+from .dataset_cache import source_fingerprint
+
+logger = logging.getLogger(__name__)
+
+BATCH_PATTERN = "Tweet_Sentiment_*.csv"
+
+# Columns identifying the partitions an appended batch touches
+PARTITION_COLUMNS = ["County", COUNTY_KEY_COLUMN, "Year", "Month"]
+
+# Cubes of the tweet data that new batches are folded into
+TWEET_CUBES = ("sentiment_cube", "agreement_cube")
+
+
+def find_tweet_batches(data_dir: str) -> Dict[str, Dict[str, int]]:
+    """
+    Find tweet batch files in the data directory.
+
+    Args:
+        data_dir: Data directory
+
+    Returns:
+        dict: Batch file name to source fingerprint, in file name order
+    """
+    batches = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, BATCH_PATTERN))):
+        try:
+            batches[os.path.basename(path)] = source_fingerprint(path)
+        except OSError:
+            continue  # Removed while listing
+    return batches
+
+
+def read_tweet_batch(path: str, synthetic_start: Any = "2020-01-01") -> pd.DataFrame:
+    """
+    Parse and convert a single tweet batch file.
+
+    Args:
+        path: Path to the batch CSV
+        synthetic_start: First date used if the batch has no date column
+
+    Returns:
+        pd.DataFrame: Processed tweet rows (without County_Key)
+
+    Raises:
+        ValueError: If required columns are missing
+    """
+    from .data_loader import COLUMN_DTYPES, REQUIRED_COLUMNS, prepare_tweet_sentiment
+
+    batch = pd.read_csv(path, index_col=None, dtype=COLUMN_DTYPES["tweet_sentiment"])
+
+    missing_cols = [col for col in REQUIRED_COLUMNS["tweet_sentiment"] if col not in batch.columns]
+    if missing_cols:
+        raise ValueError(f"missing required columns: {', '.join(missing_cols)}")
+
+    return prepare_tweet_sentiment(batch, synthetic_start=synthetic_start)
+
+
+def append_rows(history: pd.DataFrame, batch: pd.DataFrame) -> pd.DataFrame:
+    """
+    Append new rows to a loaded dataset, keeping its column types.
+
+    Categorical columns get the batch's new values appended to their
+    categories, so existing codes stay valid and the column stays
+    categorical.
+
+    Args:
+        history: Existing rows
+        batch: New rows
+
+    Returns:
+        pd.DataFrame: Existing rows followed by the new rows
+    """
+    history = history.copy(deep=False)
+    batch = batch.copy(deep=False)
+
+    for column in history.columns:
+        dtype = history[column].dtype
+        if not isinstance(dtype, pd.CategoricalDtype) or column not in batch.columns:
+            continue
+        categories = dtype.categories
+        new_values = pd.Index(batch[column].dropna().unique())
+        if column != COUNTY_KEY_COLUMN and len(new_values):
+            categories = categories.append(new_values.difference(categories))
+            history[column] = history[column].cat.set_categories(categories)
+        batch[column] = batch[column].astype(pd.CategoricalDtype(categories))
+
+    combined = pd.concat([history, batch], ignore_index=True)
+    combined.attrs = dict(history.attrs)
+    return combined
+
+
+def changed_partitions(batch: pd.DataFrame) -> pd.DataFrame:
+    """
+    List the County / Year / Month partitions present in a batch.
+
+    Args:
+        batch: New rows with County_Key
+
+    Returns:
+        pd.DataFrame: One row per partition
+    """
+    columns = [c for c in PARTITION_COLUMNS if c in batch.columns]
+    return batch[columns].drop_duplicates().reset_index(drop=True)
+
+
+def _next_synthetic_start(history: pd.DataFrame) -> Any:
+    """Day after the last known tweet date, used for batches without dates."""
+    if "Tweet_Date" in history.columns and history["Tweet_Date"].notna().any():
+        return history["Tweet_Date"].max() + pd.Timedelta(days=1)
+    return "2020-01-01"
+
+
+def apply_batches(
+    snapshot: DataSnapshot,
+    data_dir: str,
+    batches: Dict[str, Dict[str, int]]
+) -> Optional[Tuple[Tuple[Dict[str, Any], List[str], Dict[str, Any]], Dict[str, Any]]]:
+    """
+    Build the contents of the next snapshot with all pending batches applied.
+
+    Args:
+        snapshot: Snapshot to apply the batches to (left unchanged)
+        data_dir: Data directory holding the batch files
+        batches: Batch file name to fingerprint, from find_tweet_batches()
+
+    Returns:
+        tuple or None: ((data, warnings, sources), details), or None if no
+        batch is pending. details holds "ingested" (file names),
+        "partitions" (changed partitions) and "dimension_changed".
+    """
+    sources = dict(snapshot.sources)
+    pending = [name for name, fingerprint in batches.items() if sources.get(name) != fingerprint]
+    if not pending:
+        return None
+
+    data = snapshot.views()
+    warnings = list(snapshot.warnings)
+    dimension = data["county_dimension"]
+    tweet_sentiment = data["tweet_sentiment"]
+    cubes = {name: data[name] for name in TWEET_CUBES if data.get(name) is not None}
+
+    ingested, partitions = [], []
+    for name in pending:
+        fingerprint = batches[name]
+        if name in sources:
+            logger.warning(
+                "Tweet batch '%s' changed after it was ingested; "
+                "the change is picked up on the next full reload", name
+            )
+            sources[name] = fingerprint
+            continue
+        sources[name] = fingerprint
+
+        try:
+            batch = read_tweet_batch(
+                os.path.join(data_dir, name),
+                synthetic_start=_next_synthetic_start(tweet_sentiment)
+            )
+        except Exception as e:
+            logger.warning("Skipping tweet batch '%s': %s", name, e)
+            warnings.append(f"⚠️ Skipped tweet batch {name}: {e}")
+            continue
+
+        if batch.empty:
+            continue
+
+        # New counties extend the shared dimension; existing keys are remapped
+        new_dimension = build_county_dimension([pd.Series(dimension), batch["County"]])
+        if not new_dimension.equals(dimension):
+            dimension = new_dimension
+            tweet_sentiment = rebase_county_key(tweet_sentiment, dimension)
+            for other in ("dispensaries", "density"):
+                data[other] = rebase_county_key(data[other], dimension)
+
+        batch = add_county_key(batch, dimension)
+        tweet_sentiment = append_rows(tweet_sentiment, batch)
+        cubes = {name: cube.append(batch) for name, cube in cubes.items()}
+
+        ingested.append(name)
+        partitions.append(changed_partitions(batch))
+
+    details = {
+        "ingested": ingested,
+        "partitions": pd.concat(partitions, ignore_index=True) if partitions else None,
+        "dimension_changed": not dimension.equals(data["county_dimension"]),
+    }
+
+    data["tweet_sentiment"] = tweet_sentiment
+    data["county_dimension"] = dimension
+    data.update(cubes)
+
+    return (data, warnings, sources), details
+
+
+def ingest_tweet_batches(
+    store: DataStore,
+    data_dir: Optional[str] = None,
+    cache: Any = None
+) -> List[str]:
+    """
+    Append any new tweet batch files to the shared data store.
+
+    Cheap when nothing changed: only the batch files are listed and
+    compared with the fingerprints recorded in the current snapshot.
+
+    Args:
+        store: Shared data store
+        data_dir: Data directory (default: get_data_dir())
+        cache: Filter cache to carry forward (default: get_filter_cache())
+
+    Returns:
+        list: Names of the batch files ingested by this call
+    """
+    if data_dir is None:
+        from .data_loader import get_data_dir
+        data_dir = get_data_dir()
+
+    batches = find_tweet_batches(data_dir)
+    current = store.snapshot()
+    if all(current.sources.get(name) == fp for name, fp in batches.items()):
+        return []
+
+    details = {}
+
+    def updater(snapshot):
+        result = apply_batches(snapshot, data_dir, batches)
+        if result is None:
+            return None
+        contents, batch_details = result
+        details.update(batch_details, old_version=snapshot.version)
+        return contents
+
+    updated = store.update(updater)
+    if not details:
+        return []
+
+    ingested = details["ingested"]
+    if ingested:
+        logger.info(
+            "Ingested %d tweet batch(es) into data version %d: %s",
+            len(ingested), updated.version, ", ".join(ingested)
+        )
+
+    # Keep cached filter results whose selection misses the new partitions.
+    # If the county dimension grew, old results are left to age out instead.
+    if not details["dimension_changed"]:
+        from .filter_cache import carry_forward
+        partitions = details["partitions"]
+        carry_forward(
+            details["old_version"],
+            updated.version,
+            {"tweet_sentiment": partitions} if partitions is not None else {},
+            cache=cache
+        )
+
+    return ingested
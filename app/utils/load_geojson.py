@@ -1,28 +1,587 @@
 """
 Module for loading and processing GeoJSON data.
+
+Loaded county boundaries carry a CountyIndex: for every county its feature
+position, canonical key (normalize_county_name), bounding box and centroid
+are computed once at load time, so map code can look counties up, subset
+the collection and fit bounds without rescanning the geometry.
+
+get_geojson() keeps one parsed copy of each boundaries file per process and
+only reads the file again after it changed on disk. Parsing uses orjson or
+msgspec when installed and falls back to the standard json module; large
+files (e.g. tract- or ZIP-level boundaries) are instead streamed feature by
+feature with iter_geojson_features().
 """
+
 import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .data_utils import normalize_county_name
+from .dataset_cache import source_fingerprint
+
+# Fastest available JSON parser for the boundaries file
+try:
+    import orjson
+
+    JSON_PARSER = "orjson"
+    _parse_json = orjson.loads
+    _JSON_ERRORS: Tuple[type, ...] = (orjson.JSONDecodeError,)
+except ImportError:
+    try:
+        import msgspec
+
+        JSON_PARSER = "msgspec"
+        _parse_json = msgspec.json.decode
+        _JSON_ERRORS = (msgspec.DecodeError,)
+    except ImportError:
+        JSON_PARSER = "json"
+        _parse_json = json.loads
+        _JSON_ERRORS = (json.JSONDecodeError, UnicodeDecodeError)
+
+# Files larger than this are parsed incrementally by load_geojson()
+STREAMING_THRESHOLD_BYTES = 64 * 1024 * 1024
+
+# Characters read per chunk when streaming
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Parsed boundaries shared by every caller in the process, keyed on the path
+_store: Dict[str, Tuple[Dict[str, int], "CountyFeatureCollection"]] = {}
+_store_lock = threading.Lock()
+
+
+class CountyFeature(NamedTuple):
+    """Precomputed facts about one county feature."""
+
+    name: str  # properties.NAME as stored in the file
+    key: str  # Canonical name, as returned by normalize_county_name()
+    position: int  # Position in the "features" list
+    bbox: Tuple[float, float, float, float]  # (min_lon, min_lat, max_lon, max_lat)
+    centroid: Tuple[float, float]  # Area-weighted (lon, lat)
+
+
+def _ring_area_centroid(ring: np.ndarray) -> Tuple[float, float, float]:
+    """Signed area and centroid of a closed ring (shoelace formula)."""
+    x, y = ring[:-1, 0], ring[:-1, 1]
+    x1, y1 = ring[1:, 0], ring[1:, 1]
+    cross = x * y1 - x1 * y
+    area = cross.sum() / 2
+    if area == 0:
+        return 0.0, float(x.mean()), float(y.mean())
+    return (
+        float(area),
+        float(((x + x1) * cross).sum() / (6 * area)),
+        float(((y + y1) * cross).sum() / (6 * area)),
+    )
+
+
+def _feature_extent(
+    geometry: Any,
+) -> Optional[Tuple[Tuple[float, ...], Tuple[float, float]]]:
+    """Bounding box and centroid of a Polygon or MultiPolygon geometry."""
+    if not isinstance(geometry, dict):
+        return None
+    if geometry.get("type") == "Polygon":
+        polygons = [geometry.get("coordinates") or []]
+    elif geometry.get("type") == "MultiPolygon":
+        polygons = geometry.get("coordinates") or []
+    else:
+        return None
+
+    rings = [
+        [np.asarray(ring, dtype=np.float64)[:, :2] for ring in polygon if len(ring)]
+        for polygon in polygons
+    ]
+    rings = [polygon for polygon in rings if polygon]
+    if not rings:
+        return None
+
+    points = np.vstack([ring for polygon in rings for ring in polygon])
+    lower, upper = points.min(axis=0), points.max(axis=0)
+
+    # Exterior rings add area, holes subtract it (orientation independent)
+    total = cx = cy = 0.0
+    for polygon in rings:
+        for i, ring in enumerate(polygon):
+            area, x, y = _ring_area_centroid(ring)
+            weight = abs(area) if i == 0 else -abs(area)
+            total += weight
+            cx += weight * x
+            cy += weight * y
+    if total > 0:
+        centroid = (cx / total, cy / total)
+    else:
+        centroid = tuple(map(float, points.mean(axis=0)))
+
+    return (*map(float, lower), *map(float, upper)), centroid
+
+
+class CountyIndex:
+    """Lookup of county features by name in any format."""
+
+    def __init__(self, features: List[Any]):
+        """
+        Index the county features of a FeatureCollection.
+
+        Features without a NAME property or polygon geometry are skipped.
+
+        Args:
+            features: The collection's "features" list
+        """
+        self._counties: Dict[str, CountyFeature] = {}
+        for position, feature in enumerate(features):
+            self.add(position, feature)
+
+    def add(self, position: int, feature: Any) -> None:
+        """
+        Index one feature (skipped like in __init__ if it has no county).
+
+        Args:
+            position: Position of the feature in the "features" list
+            feature: The feature
+        """
+        if not isinstance(feature, dict):
+            return
+        name = (feature.get("properties") or {}).get("NAME")
+        key = normalize_county_name(name)
+        extent = _feature_extent(feature.get("geometry"))
+        if key is None or extent is None or key in self._counties:
+            return
+        bbox, centroid = extent
+        self._counties[key] = CountyFeature(name, key, position, bbox, centroid)
+
+    def __len__(self) -> int:
+        return len(self._counties)
+
+    def __iter__(self):
+        return iter(self._counties.values())
+
+    def __contains__(self, name: Any) -> bool:
+        return self.get(name) is not None
+
+    def get(self, name: Any) -> Optional[CountyFeature]:
+        """
+        Look up a county, e.g. "Los Angeles County" or "Los Angeles".
+
+        Args:
+            name: County name in any format
+
+        Returns:
+            CountyFeature or None if the county is not in the collection
+        """
+        key = normalize_county_name(name)
+        return None if key is None else self._counties.get(key)
+
+    @property
+    def keys(self) -> List[str]:
+        """Canonical names of the indexed counties."""
+        return list(self._counties)
+
+    def bounds(
+        self, names: Optional[Iterable[Any]] = None
+    ) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Get the bounding box enclosing several counties.
+
+        Args:
+            names: Counties to include (default: all)
+
+        Returns:
+            tuple or None: (min_lon, min_lat, max_lon, max_lat), or None if no
+            county matched
+        """
+        counties = self._counties.values() if names is None else self.lookup(names)
+        boxes = np.array([county.bbox for county in counties])
+        if not len(boxes):
+            return None
+        return (
+            *map(float, boxes[:, :2].min(axis=0)),
+            *map(float, boxes[:, 2:].max(axis=0)),
+        )
+
+    def lookup(self, names: Iterable[Any]) -> List[CountyFeature]:
+        """
+        Look up several counties, ignoring names that are not indexed.
+
+        Args:
+            names: County names in any format (duplicates are ignored)
+
+        Returns:
+            list: Matching counties in feature order
+        """
+        matched = {}
+        for name in dict.fromkeys(names):
+            county = self.get(name)
+            if county is not None:
+                matched[county.position] = county
+        return [matched[position] for position in sorted(matched)]
+
+    def subset(self, counties: List[CountyFeature]) -> "CountyIndex":
+        """Index of a collection holding only the given counties, in order."""
+        index = CountyIndex([])
+        index._counties = {
+            county.key: county._replace(position=position)
+            for position, county in enumerate(counties)
+        }
+        return index
+
+
+class CountyFeatureCollection(dict):
+    """
+    A GeoJSON FeatureCollection dict with a CountyIndex attached.
+
+    Behaves exactly like the plain dict (it serializes to the same JSON), so it
+    can be passed to Plotly directly.
+    """
+
+    def __init__(
+        self, data: Dict[str, Any], county_index: Optional[CountyIndex] = None
+    ):
+        """
+        Wrap a FeatureCollection.
+
+        Args:
+            data: GeoJSON FeatureCollection
+            county_index: Index of data["features"] (built if not given)
+        """
+        super().__init__(data)
+        if county_index is None:
+            county_index = CountyIndex(self.get("features", []))
+        self.county_index = county_index
+
+    def read_only_view(self) -> "CountyFeatureCollection":
+        """
+        Get a copy that can be modified without touching this collection.
+
+        The collection, its features list and every feature's dicts
+        (properties and geometry) are copied; the coordinate lists are
+        shared, so this costs one small copy per county.
+
+        Returns:
+            CountyFeatureCollection: Copy sharing the county index
+        """
+        view = dict(self)
+        if isinstance(self.get("features"), list):
+            view["features"] = [_copy_feature(feature) for feature in self["features"]]
+        return CountyFeatureCollection(view, self.county_index)
+
+    def subset(self, names: Iterable[Any]) -> "CountyFeatureCollection":
+        """
+        Get a collection with only the given counties.
+
+        Map builders use this to ship only the counties present in the
+        filtered data. Features are shared with this collection, not copied.
+
+        Args:
+            names: County names in any format
+
+        Returns:
+            CountyFeatureCollection: The matching features in their original order
+        """
+        features = self["features"]
+        counties = self.county_index.lookup(names)
+        if len(counties) == len(features):
+            return self
+        subset = dict(self)
+        subset["features"] = [features[county.position] for county in counties]
+        return CountyFeatureCollection(subset, self.county_index.subset(counties))
+
+
+def _copy_feature(feature):
+    """Copy a feature and its properties and geometry dicts."""
+    if not isinstance(feature, dict):
+        return feature
+    copied = dict(feature)
+    for key in ("properties", "geometry"):
+        if isinstance(copied.get(key), dict):
+            copied[key] = dict(copied[key])
+    return copied
+
+
+def _validate_feature(i, feature):
+    """Check the structure of feature number i."""
+    if not isinstance(feature, dict):
+        raise ValueError(
+            f"Feature {i} is not a dictionary, got {type(feature).__name__}"
+        )
+
+    if "type" not in feature or feature["type"] != "Feature":
+        raise ValueError(f"Feature {i} missing or invalid 'type' field")
+
+    if "geometry" not in feature:
+        raise ValueError(f"Feature {i} missing 'geometry' field")
+
+    if "properties" not in feature:
+        raise ValueError(f"Feature {i} missing 'properties' field")
+
+
+def _project(feature, properties, include_geometry):
+    """Keep only the requested properties (and optionally drop the geometry)."""
+    if properties is None and include_geometry:
+        return feature
+    projected = dict(feature)
+    if properties is not None:
+        source = feature["properties"] or {}
+        projected["properties"] = {k: source[k] for k in properties if k in source}
+    if not include_geometry:
+        projected["geometry"] = None
+    return projected
+
+
+class _JSONStream:
+    """
+    Incremental reader decoding one JSON value at a time from a text file.
 
-def load_geojson(file_path):
+    Only the current value and one chunk of text are held in memory. A value
+    that does not fit in the buffer is retried with a doubled read size, so
+    large features are parsed in amortized linear time.
+    """
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, f, chunk_size):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._consumed = 0  # Characters dropped from the front of the buffer
+        self._eof = False
+
+    @property
+    def offset(self):
+        """Character offset of the read position in the file."""
+        return self._consumed + self._pos
+
+    def _fill(self, size=None):
+        if self._eof:
+            return False
+        chunk = self._file.read(size or self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._consumed += self._pos
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ("" at the end of the file)."""
+        while True:
+            while (
+                self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n"
+            ):
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill():
+                return self._buffer[self._pos : self._pos + 1]
+
+    def expect(self, char):
+        """Consume the next structural character, which must be char."""
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self._buffer, self._pos)
+        self._pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                # Errors close to the end of the buffer may just be truncation
+                truncated = e.pos >= len(self._buffer) - 32 or e.msg.startswith(
+                    "Unterminated"
+                )
+                if truncated and self._fill(max(self._chunk_size, len(self._buffer))):
+                    continue
+                raise
+            # A number ending the buffer may continue in the next chunk
+            is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+            if end == len(self._buffer) and is_number and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def _stream_features(
+    file_path, header, properties=None, include_geometry=True, chunk_size=None
+):
+    """
+    Yield validated features one at a time, collecting other top-level keys.
+
+    Args:
+        file_path: Path to the GeoJSON file
+        header: Dict receiving the top-level members other than "features"
+        properties: Property names to keep (default: all)
+        include_geometry: Whether to keep feature geometries
+        chunk_size: Characters read per chunk
+
+    Yields:
+        dict: Each feature, in file order
+    """
+    try:
+        f = open(file_path, encoding="utf-8")
+    except FileNotFoundError:
+        raise FileNotFoundError(f"GeoJSON file not found: '{file_path}'")
+
+    with f:
+        stream = _JSONStream(f, chunk_size or STREAM_CHUNK_SIZE)
+        count = None
+        try:
+            if stream.peek() != "{":
+                data = stream.value()
+                raise ValueError(
+                    f"GeoJSON must be a dictionary, got {type(data).__name__}"
+                )
+            stream.expect("{")
+
+            first = True
+            while stream.peek() != "}":
+                if not first:
+                    stream.expect(",")
+                first = False
+                key = stream.value()
+                stream.expect(":")
+
+                if key != "features":
+                    header[key] = stream.value()
+                    if key == "type" and header[key] != "FeatureCollection":
+                        raise ValueError(
+                            "GeoJSON must be a FeatureCollection, "
+                            f"got type='{header[key]}'"
+                        )
+                    continue
+
+                if stream.peek() != "[":
+                    features = stream.value()
+                    raise ValueError(
+                        "GeoJSON 'features' must be a list, "
+                        f"got {type(features).__name__}"
+                    )
+                stream.expect("[")
+                count = 0
+                while stream.peek() != "]":
+                    if count:
+                        stream.expect(",")
+                    offset = stream.offset
+                    try:
+                        feature = stream.value()
+                    except json.JSONDecodeError as e:
+                        raise ValueError(
+                            f"Invalid JSON in GeoJSON file '{file_path}': "
+                            f"feature {count} (starting at character {offset}): {e.msg}"
+                        )
+                    _validate_feature(count, feature)
+                    yield _project(feature, properties, include_geometry)
+                    count += 1
+                stream.expect("]")
+
+            stream.expect("}")
+            if stream.peek():
+                raise json.JSONDecodeError("Extra data", "", stream.offset)
+        except json.JSONDecodeError as e:
+            raise ValueError(
+                f"Invalid JSON in GeoJSON file '{file_path}': {e.msg} "
+                f"(near character {stream.offset})"
+            )
+
+    geojson_type = header.get("type")
+    if geojson_type != "FeatureCollection":
+        raise ValueError(
+            f"GeoJSON must be a FeatureCollection, got type='{geojson_type}'"
+        )
+    if count is None:
+        raise ValueError("GeoJSON FeatureCollection must contain 'features' array")
+    if count == 0:
+        raise ValueError("GeoJSON FeatureCollection contains no features")
+
+
+def iter_geojson_features(
+    file_path, properties=None, include_geometry=True, chunk_size=None
+):
+    """
+    Stream the features of a GeoJSON FeatureCollection with bounded memory.
+
+    Features are parsed incrementally and validated one at a time, so
+    boundary files of hundreds of MB can be processed without loading them
+    whole, and a malformed feature is reported as soon as it is reached.
+
+    Args:
+        file_path (str): Path to the GeoJSON file
+        properties (list, optional): Property names to keep (default: all)
+        include_geometry (bool): Whether to keep feature geometries
+        chunk_size (int, optional): Characters read per chunk
+
+    Yields:
+        dict: Each validated (and projected) feature, in file order
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        ValueError: If the GeoJSON structure, its JSON or feature N is invalid
+
+    Example:
+        >>> features = iter_geojson_features(
+        ...     path, properties=["NAME"], include_geometry=False
+        ... )
+        >>> names = [f["properties"]["NAME"] for f in features]
+    """
+    return _stream_features(file_path, {}, properties, include_geometry, chunk_size)
+
+
+def load_geojson(file_path, properties=None, include_geometry=True):
     """
     Load and validate GeoJSON data from a file.
 
+    Every feature is validated. Files larger than STREAMING_THRESHOLD_BYTES,
+    and loads that project properties or drop geometries, are parsed
+    incrementally: each feature is projected and indexed as soon as it is
+    read, so the raw text is never held in memory at once and peak memory
+    is the returned collection plus one chunk. To process files whose
+    features do not fit in memory, iterate over iter_geojson_features()
+    instead.
+
     Args:
         file_path (str): Path to the GeoJSON file
+        properties (list, optional): Property names to keep (default: all)
+        include_geometry (bool): Whether to keep feature geometries
 
     Returns:
-        dict: Loaded and validated GeoJSON data
+        CountyFeatureCollection: Loaded and validated GeoJSON data (a dict)
+            with its county index
 
     Raises:
         FileNotFoundError: If the file doesn't exist
-        ValueError: If the GeoJSON structure is invalid
-        json.JSONDecodeError: If the file contains invalid JSON
+        ValueError: If the GeoJSON structure or its JSON is invalid
     """
+    try:
+        size = os.path.getsize(file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"GeoJSON file not found: '{file_path}'")
+
+    if (
+        size > STREAMING_THRESHOLD_BYTES
+        or properties is not None
+        or not include_geometry
+    ):
+        header = {}
+        features = []
+        county_index = CountyIndex([])
+        for feature in _stream_features(
+            file_path, header, properties, include_geometry
+        ):
+            county_index.add(len(features), feature)
+            features.append(feature)
+        header["features"] = features
+        return CountyFeatureCollection(header, county_index)
+
     # Load the JSON file
     try:
-        with open(file_path, encoding='utf-8') as f:
-            data = json.load(f)
-    except json.JSONDecodeError as e:
+        with open(file_path, "rb") as f:
+            data = _parse_json(f.read())
+    except _JSON_ERRORS as e:
         raise ValueError(f"Invalid JSON in GeoJSON file '{file_path}': {str(e)}")
     except FileNotFoundError:
         raise FileNotFoundError(f"GeoJSON file not found: '{file_path}'")
@@ -51,20 +610,47 @@ def load_geojson(file_path):
     if len(features) == 0:
         raise ValueError("GeoJSON FeatureCollection contains no features")
 
-    # Validate feature structure (sample first few features)
-    for i, feature in enumerate(features[:5]):  # Check first 5 features
-        if not isinstance(feature, dict):
-            raise ValueError(
-                f"Feature {i} is not a dictionary, got {type(feature).__name__}"
-            )
+    for i, feature in enumerate(features):
+        _validate_feature(i, feature)
+
+    return CountyFeatureCollection(data)
+
+
+def get_geojson(file_path):
+    """
+    Get the parsed boundaries of a GeoJSON file, shared across the process.
+
+    The file is read and validated by load_geojson() on first use and again
+    only when its size or modification time changes, so map code can call
+    this on every render.
+
+    Args:
+        file_path (str): Path to the GeoJSON file
+
+    Returns:
+        CountyFeatureCollection: Shared collection; do not modify it
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        ValueError: If the GeoJSON structure or its JSON is invalid
+    """
+    path = os.path.abspath(file_path)
+    try:
+        fingerprint = source_fingerprint(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"GeoJSON file not found: '{file_path}'")
 
-        if "type" not in feature or feature["type"] != "Feature":
-            raise ValueError(f"Feature {i} missing or invalid 'type' field")
+    with _store_lock:
+        cached = _store.get(path)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
 
-        if "geometry" not in feature:
-            raise ValueError(f"Feature {i} missing 'geometry' field")
+        collection = load_geojson(path)
+        _store[path] = (fingerprint, collection)
+        return collection
 
-        if "properties" not in feature:
-            raise ValueError(f"Feature {i} missing 'properties' field")
 
-    return data
+def clear_geojson_store():
+    """Drop all parsed boundaries held by get_geojson()."""
+    with _store_lock:
+        _store.clear()
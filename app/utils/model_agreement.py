@@ -0,0 +1,224 @@
+"""
+Agreement between the three sentiment models of the tweet data.
+
+Every tweet carries three independent sentiment signals on different
+scales: VADER (continuous compound score), BERT (star rating, -1 to 1 after
+conversion) and GPT (-1/0/1). To compare them, each is mapped to a
+negative / neutral / positive label:
+
+- VADER: the usual compound thresholds, >= 0.05 positive, <= -0.05 negative
+- BERT: the sign of the converted score (1-2 stars negative, 3 neutral);
+  tweets without a rating (BERT_LABELED_COLUMN is False) have no label
+- GPT: the label itself
+
+Everything is computed on whole columns with NumPy: labels per row,
+confusion matrices per group with one np.bincount per model pair, and
+Cohen's kappa from stacked confusion matrices. AgreementCube (in cube)
+precomputes the confusion counts per County x Year x Month cell at load
+time, so the county table of any filter state is a roll-up of those cells;
+agreement_table() memoizes it in the filter cache.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .filter_cache import FilterCache, filters_key, get_filter_cache
+
+# Model name to its column in Tweet_Sentiment.csv
+MODEL_COLUMNS = {
+    "VADER": "VADER_Sentiment",
+    "BERT": "BERT_Sentiment",
+    "GPT": "GPT_Sentiment",
+}
+
+# Flags the tweets that had a BERT rating before conversion, which sets
+# missing ratings to 0 (see data_loader.prepare_tweet_sentiment())
+BERT_LABELED_COLUMN = "BERT_Labeled"
+
+# Compared model pairs
+PAIRS: List[Tuple[str, str]] = [("VADER", "BERT"), ("VADER", "GPT"), ("BERT", "GPT")]
+
+CLASS_NAMES = ["Negative", "Neutral", "Positive"]
+
+# VADER compound scores closer to 0 than this are neutral
+VADER_THRESHOLD = 0.05
+
+
+def label_codes(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Map each model's scores to class codes.
+
+    Args:
+        df: Tweet sentiment rows (BERT_Sentiment already converted)
+
+    Returns:
+        dict: Model name to int8 codes, 0 = negative, 1 = neutral,
+        2 = positive, -1 = missing score (or missing column, or no BERT
+        rating per BERT_LABELED_COLUMN)
+    """
+    codes = {}
+    for model, column in MODEL_COLUMNS.items():
+        if column not in df.columns:
+            codes[model] = np.full(len(df), -1, dtype=np.int8)
+            continue
+        scores = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        if model == "BERT" and BERT_LABELED_COLUMN in df.columns:
+            labeled = df[BERT_LABELED_COLUMN].to_numpy(dtype=bool, na_value=False)
+            scores = np.where(labeled, scores, np.nan)
+        threshold = VADER_THRESHOLD if model == "VADER" else 0.0
+        with np.errstate(invalid="ignore"):
+            label = (scores > threshold).astype(np.int8) - (scores < -threshold).astype(np.int8)
+        codes[model] = np.where(np.isnan(scores), -1, label + 1).astype(np.int8)
+    return codes
+
+
+def row_agreement(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Label every row and flag where the models agree.
+
+    Args:
+        df: Tweet sentiment rows
+
+    Returns:
+        pd.DataFrame: Aligned with df; <Model>_Label (-1/0/1, <NA> when
+        missing), <A>_<B>_Agree per pair and Unanimous (<NA> unless the
+        models involved all have a label)
+    """
+    codes = label_codes(df)
+    result = {}
+    for model, code in codes.items():
+        result[f"{model}_Label"] = pd.array(np.where(code >= 0, code - 1, 0), dtype="Int8")
+        result[f"{model}_Label"][code < 0] = pd.NA
+    for a, b in PAIRS:
+        agree = pd.array(codes[a] == codes[b], dtype="boolean")
+        agree[(codes[a] < 0) | (codes[b] < 0)] = pd.NA
+        result[f"{a}_{b}_Agree"] = agree
+
+    stacked = np.stack(list(codes.values()))
+    unanimous = pd.array((stacked == stacked[0]).all(axis=0), dtype="boolean")
+    unanimous[(stacked < 0).any(axis=0)] = pd.NA
+    result["Unanimous"] = unanimous
+    return pd.DataFrame(result, index=df.index)
+
+
+def confusion_counts(
+    codes_a: np.ndarray,
+    codes_b: np.ndarray,
+    groups: Optional[np.ndarray] = None,
+    n_groups: int = 1
+) -> np.ndarray:
+    """
+    Count label pairs per group.
+
+    Args:
+        codes_a: Class codes of the first model (-1 = missing)
+        codes_b: Class codes of the second model
+        groups: Group index per row (default: one group)
+        n_groups: Number of groups
+
+    Returns:
+        np.ndarray: (n_groups, 3, 3) counts, rows = first model's class
+    """
+    valid = (codes_a >= 0) & (codes_b >= 0)
+    group = np.zeros(int(valid.sum()), dtype=np.int64) if groups is None else groups[valid].astype(np.int64)
+    flat = group * 9 + codes_a[valid].astype(np.int64) * 3 + codes_b[valid]
+    return np.bincount(flat, minlength=n_groups * 9).reshape(n_groups, 3, 3)
+
+
+def cohen_kappa(confusion: np.ndarray) -> np.ndarray:
+    """
+    Cohen's kappa of stacked confusion matrices.
+
+    Args:
+        confusion: (..., k, k) counts
+
+    Returns:
+        np.ndarray: Kappa per matrix, NaN for empty matrices and where
+        chance agreement is 1
+    """
+    confusion = np.asarray(confusion, dtype=np.float64)
+    total = confusion.sum(axis=(-2, -1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        observed = np.trace(confusion, axis1=-2, axis2=-1) / total
+        expected = (confusion.sum(axis=-1) * confusion.sum(axis=-2)).sum(axis=-1) / total ** 2
+        kappa = (observed - expected) / (1 - expected)
+    return np.where((total > 0) & (expected < 1), kappa, np.nan)
+
+
+def agreement_measures(confusion: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Summarize stacked confusion matrices of one model pair.
+
+    Args:
+        confusion: (n, 3, 3) counts
+
+    Returns:
+        dict: Compared (rows with both labels), Agreement and Disagreement
+        (percent of Compared) and Kappa, one value per matrix
+    """
+    compared = confusion.sum(axis=(1, 2))
+    agreeing = np.trace(confusion, axis1=1, axis2=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        agreement = np.where(compared > 0, agreeing / compared * 100, np.nan)
+    return {
+        "Compared": compared,
+        "Agreement": agreement,
+        "Disagreement": 100 - agreement,
+        "Kappa": cohen_kappa(confusion),
+    }
+
+
+def confusion_columns(a: str, b: str) -> List[str]:
+    """Cube measure columns holding the confusion counts of a pair, row-major."""
+    return [f"{a}_{b}_{i}{j}" for i in range(3) for j in range(3)]
+
+
+def confusion_frame(counts: Dict[str, Any], a: str, b: str) -> pd.DataFrame:
+    """
+    Arrange the confusion counts of a pair as a labeled 3x3 table.
+
+    Args:
+        counts: Cube totals (see AgreementCube.totals())
+        a: First model (rows)
+        b: Second model (columns)
+
+    Returns:
+        pd.DataFrame: Counts with class names on both axes
+    """
+    values = np.array([counts[column] for column in confusion_columns(a, b)], dtype=np.int64)
+    return pd.DataFrame(
+        values.reshape(3, 3),
+        index=pd.Index(CLASS_NAMES, name=a),
+        columns=pd.Index(CLASS_NAMES, name=b),
+    )
+
+
+def agreement_table(
+    filters: Dict[str, Any],
+    snapshot: Any = None,
+    cache: Optional[FilterCache] = None
+) -> pd.DataFrame:
+    """
+    Get the per-county agreement table of a filter state, memoized.
+
+    Args:
+        filters: Filter dictionary from generate_sidebar()
+        snapshot: Data snapshot (default: the shared data store's)
+        cache: Cache to use (default: get_filter_cache())
+
+    Returns:
+        pd.DataFrame: AgreementCube roll-up by County
+    """
+    if snapshot is None:
+        from .data_loader import get_data_store
+        snapshot = get_data_store().snapshot()
+    if cache is None:
+        cache = get_filter_cache()
+
+    cube = snapshot.get("agreement_cube")
+    # Four-part key: not carried forward by incremental ingestion, which
+    # only knows how to re-check dataset filter results
+    key = ("agreement_cube", snapshot.version, filters_key(filters), "County")
+    table = cache.get_or_compute(key, lambda: cube.rollup(["County"], filters), tag=filters)
+    return table.copy(deep=False)
@@ -0,0 +1,518 @@
+r"""
+Multiprocess sentiment scoring of a CSV file, sharded by byte range.
+
+sentiment_scoring scores a file in one process. For refreshing the
+VADER_Sentiment, BERT_Sentiment and GPT_Sentiment columns of large files,
+score_file_parallel() spreads the work over a process pool:
+
+- The file is cut into byte ranges at record boundaries. A boundary is a
+  newline outside any quoted field, found by tracking the parity of quote
+  characters, so tweets with embedded newlines are never split.
+- Each worker process loads its scorers once (with one torch thread by
+  default, so workers x threads matches the cores), then reads and scores
+  its ranges in chunks, writing each range to its own part file.
+- The part files are concatenated in range order, so the output keeps the
+  original row order without the main process parsing anything.
+
+There are several ranges per worker, so workers that get slow ranges (long
+tweets) do not hold up the others. Duplicates are scored once per chunk and,
+with a score cache, once across all workers and runs.
+
+    python -m app.utils.parallel_scoring tweets.csv scored.csv \
+        --workers 32 --scorers vader bert
+
+Predictions is not regenerated: the model behind it is not part of this
+repository.
+"""
+
+import argparse
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Type, Union
+
+import numpy as np
+import pandas as pd
+
+from .score_cache import ScoreCache, get_cache_path
+from .inference_backends import BACKENDS
+from .sentiment_scoring import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_VALIDATION_SAMPLE,
+    TEXT_COLUMN,
+    GPTScorer,
+    StarRatingModel,
+    TextScorer,
+    VaderScorer,
+    score_series,
+    validate_backend,
+)
+
+logger = logging.getLogger(__name__)
+
+# Scorer name to class, in the column order of Tweet_Sentiment.csv
+SCORERS = {
+    "vader": VaderScorer,
+    "bert": StarRatingModel,
+    "gpt": GPTScorer,
+}
+
+# Byte ranges per worker, for load balancing
+RANGES_PER_WORKER = 4
+
+# Bytes scanned at once when looking for record boundaries
+SCAN_BLOCK = 1 << 20
+
+# Scorer name or class
+ScorerSpec = Union[str, Type[TextScorer]]
+
+_QUOTE = ord('"')
+_NEWLINE = ord("\n")
+
+# Scorers and cache of the current worker process, set by _init_worker()
+_worker: Dict[str, Any] = {}
+
+
+def record_boundaries(path: str, offsets: Sequence[int]) -> List[int]:
+    """
+    Find the first record start at or after each offset of a CSV file.
+
+    A record starts after a newline that is outside quoted fields, i.e.
+    preceded by an even number of quote characters ("" escapes count twice).
+
+    Args:
+        path: CSV file path
+        offsets: Byte offsets, ascending
+
+    Returns:
+        list: Record start per offset (the file size if there is none)
+    """
+    size = os.path.getsize(path)
+    boundaries = []
+    pending = list(offsets)
+    quotes = 0  # Quote characters before the current block
+    position = 0
+    with open(path, "rb") as f:
+        while pending:
+            block = f.read(SCAN_BLOCK)
+            if not block:
+                break
+            end = position + len(block)
+            if pending[0] >= end:
+                # No offset in this block; only its quote count matters
+                quotes += block.count(b'"')
+                position = end
+                continue
+
+            data = np.frombuffer(block, dtype=np.uint8)
+            parity = (np.cumsum(data == _QUOTE) + quotes) & 1
+            starts = position + np.flatnonzero((data == _NEWLINE) & (parity == 0)) + 1
+            while pending and pending[0] < end:
+                i = np.searchsorted(starts, pending[0])
+                if i == len(starts):
+                    break  # Next record starts in a later block
+                boundaries.append(int(starts[i]))
+                pending.pop(0)
+            quotes += int(np.count_nonzero(data == _QUOTE))
+            position = end
+    return boundaries + [size] * len(pending)
+
+
+def byte_ranges(path: str, count: int) -> Tuple[int, List[Tuple[int, int]]]:
+    """
+    Cut the records of a CSV file into byte ranges of about equal size.
+
+    Args:
+        path: CSV file path with a header row
+        count: Number of ranges wanted
+
+    Returns:
+        tuple: (end of the header row, list of non-empty (start, end) ranges
+        covering all records in order)
+    """
+    size = os.path.getsize(path)
+    header_end = record_boundaries(path, [0])[0]
+    step = (size - header_end) / max(count, 1)
+    targets = [int(header_end + step * i) for i in range(1, count)]
+    cuts = [header_end] + record_boundaries(path, targets) + [size]
+    ranges = [(start, end) for start, end in zip(cuts[:-1], cuts[1:]) if end > start]
+    return header_end, ranges
+
+
+class _RangeReader(io.RawIOBase):
+    """Read a file's header followed by one byte range of it."""
+
+    def __init__(self, path: str, header: bytes, start: int, end: int):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._header = header
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._header:
+            n = min(len(buffer), len(self._header))
+            buffer[:n] = self._header[:n]
+            self._header = self._header[n:]
+            return n
+        data = self._file.read(min(len(buffer), self._remaining))
+        buffer[: len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+class RangeStats(NamedTuple):
+    """Outcome of scoring one byte range in a worker."""
+
+    rows: int
+    seconds: float
+    inferred: int
+    cache_hits: int
+    cache_lookups: int
+
+
+class ParallelStats(NamedTuple):
+    """Outcome of a parallel scoring run."""
+
+    rows: int
+    ranges: int
+    workers: int
+    threads_per_worker: int
+    seconds: float
+    busy_seconds: float
+    inferred: int
+    cache_hits: int
+    cache_lookups: int
+
+    @property
+    def cores(self) -> int:
+        return self.workers * self.threads_per_worker
+
+    @property
+    def tweets_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def tweets_per_second_per_core(self) -> float:
+        return self.tweets_per_second / max(self.cores, 1)
+
+    @property
+    def utilization(self) -> float:
+        """Share of the workers' wall time spent scoring."""
+        return (
+            self.busy_seconds / (self.seconds * self.workers)
+            if self.seconds > 0
+            else 0.0
+        )
+
+    def summary(self) -> str:
+        summary = (
+            f"Scored {self.rows:,} rows in {self.ranges} ranges "
+            f"on {self.workers} worker(s) "
+            f"x {self.threads_per_worker} thread(s) in {self.seconds:.1f} s: "
+            f"{self.tweets_per_second:,.1f} tweets/s, "
+            f"{self.tweets_per_second_per_core:,.1f} tweets/s per core, "
+            f"{self.utilization:.0%} worker utilization; "
+            f"{self.inferred:,} texts run through the models"
+        )
+        if self.cache_lookups:
+            summary += (
+                f"; score cache hit rate {self.cache_hits / self.cache_lookups:.1%} "
+                f"({self.cache_hits:,} of {self.cache_lookups:,})"
+            )
+        return summary
+
+
+def resolve_scorer(spec: ScorerSpec) -> Tuple[str, Type[TextScorer]]:
+    """
+    Look up a scorer.
+
+    Args:
+        spec: Key of SCORERS, or a TextScorer subclass (importable by the
+            worker processes)
+
+    Returns:
+        tuple: (name used for options, scorer class)
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if isinstance(spec, str):
+        if spec not in SCORERS:
+            raise ValueError(
+                f"unknown scorer '{spec}'; expected one of {list(SCORERS)}"
+            )
+        return spec, SCORERS[spec]
+    return spec.__name__, spec
+
+
+def _init_worker(
+    scorers: Sequence[ScorerSpec],
+    options: Dict[str, Dict[str, Any]],
+    threads: int,
+    cache_path: Optional[str],
+) -> None:
+    """Load the scorers of a worker process once."""
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    loaded = []
+    for name, cls in map(resolve_scorer, scorers):
+        kwargs = dict(options.get(name, {}))
+        if issubclass(cls, StarRatingModel):
+            kwargs.setdefault("threads", threads)
+        loaded.append(cls(**kwargs))
+    _worker["scorers"] = loaded
+    _worker["cache"] = ScoreCache(cache_path) if cache_path else None
+
+
+def _score_range(
+    path: str,
+    header: bytes,
+    start: int,
+    end: int,
+    part_path: str,
+    text_column: str,
+    chunk_size: int,
+    kwargs: Dict[str, Any],
+) -> RangeStats:
+    """Score one byte range in a worker and write its rows to part_path."""
+    began = time.perf_counter()
+    scorers: List[TextScorer] = _worker["scorers"]
+    cache: Optional[ScoreCache] = _worker["cache"]
+    inferred = sum(scorer.inferred for scorer in scorers)
+    hits, lookups = (cache.hits, cache.lookups) if cache is not None else (0, 0)
+
+    rows = 0
+    with (
+        io.BufferedReader(_RangeReader(path, header, start, end)) as reader,
+        open(part_path, "w", encoding="utf-8", newline="") as part,
+    ):
+        for chunk in pd.read_csv(reader, dtype=str, chunksize=chunk_size):
+            if text_column not in chunk.columns:
+                raise ValueError(f"{path} has no '{text_column}' column")
+            for scorer in scorers:
+                scores = scorer.score(chunk[text_column], cache=cache, **kwargs)
+                chunk[scorer.column] = score_series(scores, scorer, chunk.index)
+            chunk.to_csv(part, header=False, index=False)
+            rows += len(chunk)
+
+    return RangeStats(
+        rows,
+        time.perf_counter() - began,
+        sum(scorer.inferred for scorer in scorers) - inferred,
+        cache.hits - hits if cache is not None else 0,
+        cache.lookups - lookups if cache is not None else 0,
+    )
+
+
+def output_columns(path: str, scorers: Sequence[ScorerSpec]) -> List[str]:
+    """
+    Get the columns of the scored output.
+
+    Args:
+        path: Input CSV path
+        scorers: Scorer names or classes
+
+    Returns:
+        list: Input columns, followed by the score columns not among them
+    """
+    columns = pd.read_csv(path, nrows=0).columns.tolist()
+    for _, cls in map(resolve_scorer, scorers):
+        if cls.column not in columns:
+            columns.append(cls.column)
+    return columns
+
+
+def score_file_parallel(
+    input_path: str,
+    output_path: str,
+    scorers: Sequence[ScorerSpec] = ("bert",),
+    workers: Optional[int] = None,
+    threads_per_worker: int = 1,
+    ranges_per_worker: int = RANGES_PER_WORKER,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    text_column: str = TEXT_COLUMN,
+    cache_path: Optional[str] = None,
+    options: Optional[Dict[str, Dict[str, Any]]] = None,
+    **kwargs,
+) -> ParallelStats:
+    """
+    Score a CSV file with a process pool and write the result.
+
+    Like score_file(), the output has the input columns with the score
+    columns replaced (or added), and replaces output_path only when
+    complete.
+
+    Args:
+        input_path: Input CSV path
+        output_path: Output CSV path
+        scorers: Keys of SCORERS (or TextScorer subclasses) to run
+        workers: Worker processes (default: CPU count / threads_per_worker)
+        threads_per_worker: Torch threads per worker
+        ranges_per_worker: Byte ranges per worker
+        chunk_size: Rows read per chunk in the workers
+        text_column: Column holding the text
+        cache_path: Score cache file shared by the workers (None: no cache)
+        options: Constructor arguments per scorer name, e.g.
+            {"bert": {"model_name": "..."}}
+        **kwargs: Options passed to the scorers, e.g. batching options
+
+    Returns:
+        ParallelStats: Rows, ranges, pool size, timings and cache hits
+
+    Raises:
+        ValueError: If a scorer name is unknown or the input has no text_column
+    """
+    if workers is None:
+        workers = max((os.cpu_count() or 1) // threads_per_worker, 1)
+    columns = output_columns(input_path, scorers)
+    if text_column not in columns:
+        raise ValueError(f"{input_path} has no '{text_column}' column")
+
+    start = time.perf_counter()
+    header_end, ranges = byte_ranges(input_path, workers * ranges_per_worker)
+    workers = min(workers, max(len(ranges), 1))
+    with open(input_path, "rb") as f:
+        header = f.read(header_end)
+
+    work_dir = tempfile.mkdtemp(
+        prefix="scoring-", dir=os.path.dirname(os.path.abspath(output_path))
+    )
+    partial_path = output_path + ".partial"
+    try:
+        parts = [os.path.join(work_dir, f"{i:05d}.csv") for i in range(len(ranges))]
+        context = multiprocessing.get_context(
+            "spawn"
+        )  # No forked torch or SQLite state
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(list(scorers), options or {}, threads_per_worker, cache_path),
+        ) as pool:
+            futures = [
+                pool.submit(
+                    _score_range,
+                    input_path,
+                    header,
+                    range_start,
+                    range_end,
+                    part,
+                    text_column,
+                    chunk_size,
+                    kwargs,
+                )
+                for (range_start, range_end), part in zip(ranges, parts)
+            ]
+            results = [future.result() for future in futures]
+
+        with open(partial_path, "wb") as out:
+            out.write(pd.DataFrame(columns=columns).to_csv(index=False).encode("utf-8"))
+            for part in parts:
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, out)
+        os.replace(partial_path, output_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    stats = ParallelStats(
+        rows=sum(r.rows for r in results),
+        ranges=len(ranges),
+        workers=workers,
+        threads_per_worker=threads_per_worker,
+        seconds=time.perf_counter() - start,
+        busy_seconds=sum(r.seconds for r in results),
+        inferred=sum(r.inferred for r in results),
+        cache_hits=sum(r.cache_hits for r in results),
+        cache_lookups=sum(r.cache_lookups for r in results),
+    )
+    if stats.cache_lookups:
+        logger.info(
+            "Score cache hit rate for %s: %.1f%% (%d of %d distinct texts)",
+            input_path,
+            stats.cache_hits / stats.cache_lookups * 100,
+            stats.cache_hits,
+            stats.cache_lookups,
+        )
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Score the sentiment columns of a CSV file with a process pool."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="CSV file with a text column")
+    parser.add_argument("output", help="Output CSV path")
+    parser.add_argument("--scorers", nargs="+", default=["bert"], choices=list(SCORERS))
+    parser.add_argument(
+        "--workers", type=int, help="Worker processes (default: one per core)"
+    )
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--ranges-per-worker", type=int, default=RANGES_PER_WORKER)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--text-column", default=TEXT_COLUMN)
+    parser.add_argument("--model", help="BERT model id or local directory")
+    parser.add_argument(
+        "--backend",
+        default="torch",
+        choices=list(BACKENDS),
+        help="BERT inference backend",
+    )
+    parser.add_argument(
+        "--validate",
+        type=int,
+        default=DEFAULT_VALIDATION_SAMPLE,
+        help="Texts a non-torch backend is checked against the reference on",
+    )
+    parser.add_argument("--gpt-model", help="OpenAI chat model for GPT_Sentiment")
+    parser.add_argument(
+        "--cache", default=None, help="Score cache file (default: data/.cache)"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Do not use the score cache"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    options = {"bert": {"backend": args.backend}}
+    if args.model:
+        options["bert"]["model_name"] = args.model
+    if args.gpt_model:
+        options["gpt"] = {"model": args.gpt_model}
+    if "bert" in args.scorers and args.backend != "torch" and args.validate:
+        # Once in the main process, before the workers load the backend
+        validate_backend(
+            StarRatingModel(threads=args.threads_per_worker, **options["bert"]),
+            args.input,
+            args.validate,
+            args.text_column,
+        )
+    stats = score_file_parallel(
+        args.input,
+        args.output,
+        scorers=args.scorers,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        ranges_per_worker=args.ranges_per_worker,
+        chunk_size=args.chunk_size,
+        text_column=args.text_column,
+        cache_path=None if args.no_cache else args.cache or get_cache_path(),
+        options=options,
+    )
+    print(stats.summary())
+
+
+if __name__ == "__main__":
+    main()
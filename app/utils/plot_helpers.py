@@ -1,11 +1,18 @@
 """
 Plot helper functions for creating consistent visualizations across the dashboard.
 """
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Sequence, Tuple, Union
 from config.theme import PLOTLY_THEME, GREEN_PALETTE, COLOR_SCALES
+from .figure_cache import cached_figure
+from .geometry import CountyGeometries
+from .hexbin import DispensaryHexbins
+from .load_geojson import CountyFeatureCollection
+from .raster import RENDER_MODES, render_choropleth
 
 
 def get_california_map_layout() -> Dict[str, Any]:
@@ -29,6 +36,7 @@ def get_california_map_layout() -> Dict[str, Any]:
     }
 
 
+@cached_figure
 def create_bar_chart(
     data: pd.DataFrame,
     x: str,
@@ -82,6 +90,7 @@ def create_bar_chart(
     return fig
 
 
+@cached_figure
 def create_line_chart(
     data: pd.DataFrame,
     x: str,
@@ -135,88 +144,425 @@ def create_line_chart(
     return fig
 
 
-def create_histogram(data, x, title, x_label=None, y_label=None, **kwargs):
+# Bin origin and width per metric, so bins line up across filter states
+HISTOGRAM_BINS = {
+    "BERT_Sentiment": {"start": -1.05, "size": 0.1},  # Centered on -1.0, -0.9, ..., 1.0
+    "VADER_Sentiment": {"start": -1.05, "size": 0.1},
+    "Dispensary_PerCapita": {"start": 0.0, "size": 1.0},
+}
+
+# Upper limit on the number of bins sent to the browser
+MAX_HISTOGRAM_BINS = 200
+
+
+def histogram_counts(
+    values: Any,
+    metric: Optional[str] = None,
+    nbins: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bin values on the server.
+
+    Metrics listed in HISTOGRAM_BINS use fixed bin widths aligned to a fixed
+    origin, so the bins of any filtered subset are a subset of the bins of
+    the full data. Other values get NumPy's automatic bin edges.
+
+    Args:
+        values: Values to bin (NaN and infinite values are ignored)
+        metric: Column name, looked up in HISTOGRAM_BINS
+        nbins: Number of bins, overriding the metric's fixed width
+
+    Returns:
+        tuple: (counts, edges) as returned by np.histogram()
+    """
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return np.zeros(0, dtype=np.int64), np.zeros(1)
+
+    low, high = values.min(), values.max()
+    spec = HISTOGRAM_BINS.get(metric)
+    if spec is not None and nbins is None:
+        size, start = spec["size"], spec["start"]
+        # Coarsen by whole multiples so wide ranges stay aligned
+        size *= max(int(np.ceil((high - low) / size / MAX_HISTOGRAM_BINS)), 1)
+        first = np.floor((low - start) / size)
+        last = max(np.floor((high - start) / size) + 1, first + 1)
+        edges = start + np.arange(first, last + 1) * size
+    else:
+        edges = np.histogram_bin_edges(values, bins=nbins or "auto")
+        if len(edges) > MAX_HISTOGRAM_BINS + 1:
+            edges = np.histogram_bin_edges(values, bins=MAX_HISTOGRAM_BINS)
+    return np.histogram(values, bins=edges)
+
+
+def histogram_trace(counts: np.ndarray, edges: np.ndarray, label: str, **kwargs) -> go.Bar:
+    """
+    Draw binned counts as a bar trace shaped like a histogram.
+
+    Args:
+        counts: Count per bin
+        edges: Bin edges (one more than counts)
+        label: Name of the binned values for the hover label
+        **kwargs: Additional arguments to pass to go.Bar()
+
+    Returns:
+        go.Bar: One bar per bin, spanning the bin
+    """
+    if "marker" not in kwargs:
+        kwargs.setdefault("marker_color", GREEN_PALETTE["primary"])
+    return go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate=f"{label}=%{{customdata[0]:.4g}} – %{{customdata[1]:.4g}}<br>count=%{{y}}<extra></extra>",
+        **kwargs
+    )
+
+
+@cached_figure
+def create_histogram(data, x, title, x_label=None, y_label=None, nbins=None, **kwargs):
     """
     Create a standardized histogram with cannabis theme.
 
+    The values are binned on the server (see histogram_counts()) and sent as
+    one bar per bin, so the payload does not grow with the number of rows.
+
     Args:
         data: DataFrame containing the data
         x (str): Column name for histogram
         title (str): Chart title
         x_label (str, optional): X-axis label
         y_label (str, optional): Y-axis label
-        **kwargs: Additional arguments to pass to px.histogram()
+        nbins (int, optional): Number of bins (default: fixed width per
+            metric, see HISTOGRAM_BINS)
+        **kwargs: Additional arguments to pass to go.Bar()
 
     Returns:
         plotly.graph_objects.Figure: Configured histogram
     """
-    fig = px.histogram(
-        data,
-        x=x,
-        title=title,
+    counts, edges = histogram_counts(data[x], metric=x, nbins=nbins)
+
+    fig = go.Figure(histogram_trace(counts, edges, x_label or x, **kwargs))
+    fig.update_layout(
+        title={"text": title},
         template=PLOTLY_THEME,
-        **kwargs
+        bargap=0,
+        xaxis_title=x_label or x,
+        yaxis_title=y_label or "count",
     )
 
-    # Apply green color
-    fig.update_traces(marker_color=GREEN_PALETTE["primary"])
+    return fig
 
-    # Apply axis labels if provided
-    layout_updates = {}
-    if x_label:
-        layout_updates['xaxis_title'] = x_label
-    if y_label:
-        layout_updates['yaxis_title'] = y_label
 
-    if layout_updates:
-        fig.update_layout(**layout_updates)
+@lru_cache(maxsize=32)
+def _choropleth_base(
+    locations: str,
+    color: str,
+    title: str,
+    hover_data: Tuple[str, ...],
+    labels: Tuple[Tuple[str, str], ...]
+) -> Tuple[Dict[str, Any], Dict[str, Any], Tuple[str, ...]]:
+    """
+    Build the data-independent part of a county choropleth once.
+
+    Returns:
+        Tuple of (trace properties, layout, columns passed as customdata);
+        shared between calls, so callers must not modify them
+    """
+    label = dict(labels).get
+    extra = tuple(c for c in dict.fromkeys(hover_data) if c not in (locations, color))
+
+    hover = [f"{label(locations, locations)}=%{{location}}", f"{label(color, color)}=%{{z}}"]
+    hover += [f"{label(c, c)}=%{{customdata[{i}]}}" for i, c in enumerate(extra)]
 
+    trace = {
+        "type": "choropleth",
+        "featureidkey": "properties.NAME",
+        "coloraxis": "coloraxis",
+        "hovertemplate": "<br>".join(hover) + "<extra></extra>",
+    }
+
+    layout = get_california_map_layout()
+    layout["geo"]["scope"] = "usa"
+    layout["title"] = {"text": title}
+    layout["coloraxis"] = {
+        "colorscale": COLOR_SCALES["sequential"],
+        "colorbar": {"title": {"text": label(color, color)}},
+    }
+    return trace, layout, extra
+
+
+def build_choropleth_figure(
+    trace: Dict[str, Any],
+    layout: Dict[str, Any],
+    data: pd.DataFrame,
+    geojson: Dict[str, Any],
+    locations: str,
+    color: str,
+    customdata: Sequence[str] = ()
+) -> go.Figure:
+    """
+    Create a choropleth from a prebuilt trace and layout.
+
+    Only the location, color and hover arrays are taken from the data; the
+    styling comes from the cached base, so no Plotly Express processing is
+    repeated per call.
+
+    Args:
+        trace: Choropleth trace properties without data arrays
+        layout: Figure layout
+        data: DataFrame containing the data
+        geojson: GeoJSON to draw
+        locations: Column name for location matching
+        color: Column name for color values
+        customdata: Columns referenced as customdata in the hover template
+
+    Returns:
+        Configured choropleth map
+    """
+    arrays = {"locations": data[locations].to_numpy(), "z": data[color].to_numpy()}
+    if customdata:
+        arrays["customdata"] = data[list(customdata)].to_numpy()
+
+    fig = go.Figure(data=[dict(trace, **arrays)], layout=layout)
+    # Assigned after construction: passing it to the constructor deep-copies
+    # the whole geometry on every call
+    fig.data[0].geojson = geojson
     return fig
 
 
 def create_choropleth_map(
     data: pd.DataFrame,
-    geojson: Dict[str, Any],
+    geojson: Union[Dict[str, Any], CountyGeometries],
     locations: str,
     color: str,
     title: str,
     hover_data: Optional[List[str]] = None,
-    labels: Optional[Dict[str, str]] = None
+    labels: Optional[Dict[str, str]] = None,
+    zoom: float = 1.0,
+    mode: str = "vector"
 ) -> go.Figure:
     """
     Create a standardized California county choropleth map.
 
+    The trace styling and layout are built once per set of arguments and
+    reused; each call only fills in the values of the filtered data.
+
+    In "raster" mode the counties are drawn on the server into one cached
+    image (see utils.raster) instead of shipping their outlines; hover
+    labels are kept on invisible markers at the county centroids.
+
     Args:
         data: DataFrame containing the data
-        geojson: GeoJSON data for California counties
+        geojson: GeoJSON data for California counties, or CountyGeometries to
+            draw the simplified level of detail matching the zoom
         locations: Column name for location matching
         color: Column name for color values
         title: Map title
         hover_data: Columns to show on hover
         labels: Custom labels for columns
+        zoom: Zoom factor relative to the statewide view
+        mode: "vector" or "raster" output
 
     Returns:
         Configured choropleth map
+
+    Raises:
+        ValueError: If the mode is unknown
     """
-    fig = px.choropleth(
-        data,
-        geojson=geojson,
-        locations=locations,
-        featureidkey="properties.NAME",
-        color=color,
-        color_continuous_scale=COLOR_SCALES["sequential"],
-        scope="usa",
-        title=title,
-        hover_data=hover_data,
-        labels=labels,
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Unknown map render mode '{mode}', expected one of {RENDER_MODES}")
+    if isinstance(geojson, CountyGeometries):
+        geojson = geojson.for_zoom(zoom)
+    if (
+        mode == "raster"
+        and isinstance(geojson, CountyFeatureCollection)
+        and pd.api.types.is_numeric_dtype(data[color])
+    ):
+        return create_raster_choropleth_map(
+            data, geojson, locations, color, title, hover_data, labels
+        )
+    if isinstance(geojson, CountyFeatureCollection) and locations in data.columns:
+        # Ship only the counties that are actually drawn
+        geojson = geojson.subset(data[locations].dropna().unique())
+
+    if not pd.api.types.is_numeric_dtype(data[color]):
+        # Categorical colors need one trace per category
+        fig = px.choropleth(
+            data,
+            geojson=geojson,
+            locations=locations,
+            featureidkey="properties.NAME",
+            color=color,
+            scope="usa",
+            title=title,
+            hover_data=hover_data,
+            labels=labels,
+        )
+        fig.update_layout(**get_california_map_layout())
+        return fig
+
+    trace, layout, customdata = _choropleth_base(
+        locations,
+        color,
+        title,
+        tuple(hover_data or ()),
+        tuple(sorted((labels or {}).items())),
+    )
+    return build_choropleth_figure(trace, layout, data, geojson, locations, color, customdata)
+
+
+def create_raster_choropleth_map(
+    data: pd.DataFrame,
+    geojson: CountyFeatureCollection,
+    locations: str,
+    color: str,
+    title: str,
+    hover_data: Optional[List[str]] = None,
+    labels: Optional[Dict[str, str]] = None
+) -> go.Figure:
+    """
+    Create a county choropleth drawn server-side as an image.
+
+    Args:
+        data: DataFrame containing the data
+        geojson: County boundaries (one geometry level)
+        locations: Column name for location matching
+        color: Numeric column name for color values
+        title: Map title
+        hover_data: Columns to show on hover
+        labels: Custom labels for columns
+
+    Returns:
+        Figure with the map image and hover markers
+    """
+    label = (labels or {}).get
+    uri, frame, (low, high) = render_choropleth(
+        data, geojson, locations, color, COLOR_SCALES["sequential"]
+    )
+
+    # Hover markers at the centroids of the drawn counties
+    counties = [geojson.county_index.get(name) for name in data[locations]]
+    drawn = [i for i, county in enumerate(counties) if county is not None]
+    rows = data.iloc[drawn]
+    lon, lat = np.array([counties[i].centroid for i in drawn]).reshape(-1, 2).T
+    x, y = frame.to_plot(lon, lat)
+
+    extra = [c for c in dict.fromkeys(hover_data or ()) if c not in (locations, color)]
+    hover = [f"{label(locations, locations)}=%{{text}}", f"{label(color, color)}=%{{marker.color}}"]
+    hover += [f"{label(c, c)}=%{{customdata[{i}]}}" for i, c in enumerate(extra)]
+
+    fig = go.Figure(go.Scatter(
+        x=x,
+        y=y,
+        mode="markers",
+        text=rows[locations].to_numpy(),
+        customdata=rows[extra].to_numpy() if extra else None,
+        hovertemplate="<br>".join(hover) + "<extra></extra>",
+        marker={
+            "color": rows[color].to_numpy(),
+            "colorscale": COLOR_SCALES["sequential"],
+            "cmin": low,
+            "cmax": high,
+            "opacity": 0,
+            "size": 12,
+            "showscale": True,
+            "colorbar": {"title": {"text": label(color, color)}},
+        },
+    ))
+
+    (x0, x1), (y0, y1) = frame.to_plot(
+        np.array([frame.min_lon, frame.max_lon]), np.array([frame.min_lat, frame.max_lat])
     )
+    layout = get_california_map_layout()
+    del layout["geo"]
+    fig.update_layout(
+        **layout,
+        title={"text": title},
+        images=[{
+            "source": uri, "xref": "x", "yref": "y", "x": x0, "y": y1,
+            "sizex": x1 - x0, "sizey": y1 - y0, "sizing": "stretch", "layer": "below",
+        }],
+        xaxis={"visible": False, "range": [x0, x1]},
+        yaxis={"visible": False, "range": [y0, y1], "scaleanchor": "x"},
+    )
+    return fig
+
+
+def create_hexbin_map(
+    hexbins: DispensaryHexbins,
+    resolution: int,
+    title: str,
+    rows: Optional[pd.Index] = None,
+    counties: Optional[Union[Dict[str, Any], CountyGeometries]] = None,
+    label: str = "Dispensaries"
+) -> go.Figure:
+    """
+    Create a hexagonal density map of dispensary locations.
 
-    # Apply California-specific map layout
-    fig.update_layout(**get_california_map_layout())
+    Counts come from the bins precomputed at load time, so changing the
+    filters only recounts, and only occupied hexagons are shipped.
 
+    Args:
+        hexbins: Binned dispensaries (data["dispensary_hexbins"])
+        resolution: Key of HEX_RESOLUTIONS (higher is finer)
+        title: Map title
+        rows: Index of the filtered dispensaries (default: all)
+        counties: County boundaries drawn as outlines under the hexagons
+        label: Color bar title
+
+    Returns:
+        Configured hexbin map, drawn like create_choropleth_map()
+    """
+    cells = hexbins.counts(resolution, rows)
+
+    traces = []
+    if counties is not None:
+        if isinstance(counties, CountyGeometries):
+            counties = counties.level("low")
+        names = [f["properties"].get("NAME") for f in counties["features"]]
+        traces.append(go.Choropleth(
+            locations=names,
+            z=np.zeros(len(names)),
+            featureidkey="properties.NAME",
+            colorscale=[[0, "rgba(0,0,0,0)"], [1, "rgba(0,0,0,0)"]],
+            marker_line={"color": GREEN_PALETTE["light"], "width": 0.5},
+            showscale=False,
+            hoverinfo="skip",
+        ))
+
+    traces.append(go.Choropleth(
+        locations=cells["Hex_ID"],
+        z=cells["Count"],
+        featureidkey="id",
+        coloraxis="coloraxis",
+        marker_line_width=0,
+        customdata=cells[["Latitude", "Longitude"]].round(3).to_numpy(),
+        hovertemplate=(
+            f"{label}=%{{z}}<br>Center=%{{customdata[0]}}, %{{customdata[1]}}<extra></extra>"
+        ),
+    ))
+
+    layout = get_california_map_layout()
+    layout["geo"]["scope"] = "usa"
+    fig = go.Figure(data=traces, layout=layout)
+    fig.update_layout(
+        title={"text": title},
+        coloraxis={
+            "colorscale": COLOR_SCALES["sequential"],
+            "colorbar": {"title": {"text": label}},
+        },
+    )
+    # Assigned after construction to avoid a deep copy (see build_choropleth_figure)
+    if counties is not None:
+        fig.data[0].geojson = counties
+    fig.data[-1].geojson = hexbins.geojson(resolution, cells)
     return fig
 
 
+@cached_figure
 def create_scatter_plot(data, x, y, title, x_label=None, y_label=None, color=None, size=None, **kwargs):
     """
     Create a standardized scatter plot with cannabis theme.
@@ -0,0 +1,430 @@
+"""
+Server-side rasterized county choropleths.
+
+A vector choropleth ships every county outline to every browser. In raster
+mode the map is drawn on the server instead and sent as one small image:
+
+- A label raster holding the index of the county covering each pixel is
+  computed once per geometry level and image size with a NumPy scanline
+  fill (even-odd rule, so holes and multi-part counties are handled).
+- Coloring a metric is then a table lookup from county values to colors.
+- Encoded images are cached per (metric, data hash, color scale, size), so
+  sessions with the same filter state share one encoded image.
+
+Images are encoded as lossless WebP when Pillow is installed and as PNG
+(written with zlib) otherwise.
+
+Environment variables:
+    MAP_RENDER_MODE: "vector" (default) or "raster"
+"""
+
+import base64
+import hashlib
+import io
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Hashable, List, Tuple
+
+import numpy as np
+import pandas as pd
+from plotly.colors import get_colorscale, sample_colorscale, unlabel_rgb
+
+from .geometry import MAP_HEIGHT_PX
+from .load_geojson import CountyFeatureCollection
+
+# Optional WebP encoding
+try:
+    from PIL import Image
+
+    WEBP_AVAILABLE = True
+except ImportError:
+    WEBP_AVAILABLE = False
+
+RENDER_MODES = ("vector", "raster")
+
+# Image format used for raster maps
+RASTER_FORMAT = "webp" if WEBP_AVAILABLE else "png"
+
+# Colors sampled from a color scale
+LUT_SIZE = 256
+
+# Encoded images and label rasters kept in memory
+MAX_IMAGES = 64
+MAX_LABEL_RASTERS = 8
+
+_images: (
+    "OrderedDict[Hashable, Tuple[CountyFeatureCollection, str, Tuple[float, float]]]"
+) = OrderedDict()
+_labels: "OrderedDict[Tuple[int, int, int], Tuple[Dict[str, Any], np.ndarray]]" = (
+    OrderedDict()
+)
+_cache_lock = threading.Lock()
+
+
+def get_map_render_mode() -> str:
+    """
+    Get the configured render mode of the county maps.
+
+    Returns:
+        str: "vector" or "raster"
+    """
+    mode = os.getenv("MAP_RENDER_MODE", "vector").strip().lower()
+    return mode if mode in RENDER_MODES else "vector"
+
+
+class MapFrame:
+    """Pixel grid of a raster map in an equirectangular projection."""
+
+    def __init__(
+        self, bounds: Tuple[float, float, float, float], height: int = MAP_HEIGHT_PX
+    ):
+        """
+        Fit a raster of the given height around a bounding box.
+
+        Longitudes are scaled by the cosine of the middle latitude so counties
+        keep their shape.
+
+        Args:
+            bounds: (min_lon, min_lat, max_lon, max_lat)
+            height: Image height in pixels
+        """
+        self.min_lon, self.min_lat, self.max_lon, self.max_lat = bounds
+        self.aspect = float(np.cos(np.radians((self.min_lat + self.max_lat) / 2)))
+        self.height = int(height)
+        self.pixel_size = (
+            self.max_lat - self.min_lat
+        ) / self.height  # Degrees of latitude
+        width = (self.max_lon - self.min_lon) * self.aspect / self.pixel_size
+        self.width = max(int(np.ceil(width)), 1)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(width, height) in pixels."""
+        return self.width, self.height
+
+    def to_pixels(
+        self, lon: np.ndarray, lat: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Continuous pixel coordinates (column, row) of points."""
+        column = (lon - self.min_lon) * self.aspect / self.pixel_size
+        row = (self.max_lat - lat) / self.pixel_size
+        return column, row
+
+    def to_plot(
+        self, lon: np.ndarray, lat: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Plot coordinates of points (the axes the image is placed on)."""
+        return (np.asarray(lon) - self.min_lon) * self.aspect, np.asarray(lat)
+
+
+def polygon_edges(geometry: Dict[str, Any]) -> np.ndarray:
+    """All ring edges of a Polygon or MultiPolygon as rows (x0, y0, x1, y1)."""
+    polygons = (
+        [geometry["coordinates"]]
+        if geometry["type"] == "Polygon"
+        else geometry["coordinates"]
+    )
+    edges = []
+    for polygon in polygons:
+        for ring in polygon:
+            points = np.asarray(ring, dtype=np.float64)[:, :2]
+            if len(points) < 3:
+                continue
+            if not np.array_equal(points[0], points[-1]):
+                points = np.vstack([points, points[:1]])
+            edges.append(np.hstack([points[:-1], points[1:]]))
+    return np.vstack(edges) if edges else np.empty((0, 4))
+
+
+def fill_polygon(
+    edges: np.ndarray, width: int, height: int
+) -> Tuple[slice, slice, np.ndarray]:
+    """
+    Rasterize a polygon with the even-odd rule.
+
+    A pixel is inside when its center is. For every scanline through the
+    pixel centers the edge crossings are found at once; each crossing toggles
+    the parity of all pixels to its right, which a cumulative sum resolves
+    without sorting crossings or looping over rows.
+
+    Args:
+        edges: Edges in pixel coordinates, rows of (x0, y0, x1, y1)
+        width: Raster width in pixels
+        height: Raster height in pixels
+
+    Returns:
+        tuple: (row slice, column slice, boolean mask) of the window of the
+        raster covered by the polygon
+    """
+    x0, y0, x1, y1 = edges.T
+    lo_y, hi_y = np.minimum(y0, y1), np.maximum(y0, y1)
+
+    # Rows whose center r + 0.5 satisfies lo_y <= r + 0.5 < hi_y
+    first = np.clip(np.ceil(lo_y - 0.5), 0, height).astype(np.int64)
+    stop = np.clip(np.ceil(hi_y - 0.5), 0, height).astype(np.int64)
+    counts = np.maximum(stop - first, 0)
+    if not counts.sum():
+        return slice(0, 0), slice(0, 0), np.zeros((0, 0), dtype=bool)
+
+    edge = np.repeat(np.arange(len(edges)), counts)
+    rows = first[edge] + (
+        np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    )
+    t = (rows + 0.5 - y0[edge]) / (y1[edge] - y0[edge])
+    x = x0[edge] + t * (x1[edge] - x0[edge])
+    # First pixel whose center lies right of the crossing
+    columns = np.clip(np.ceil(x - 0.5), 0, width).astype(np.int64)
+
+    r0, r1 = rows.min(), rows.max() + 1
+    c0 = columns.min()
+    c1 = min(int(np.ceil(max(x0.max(), x1.max()))) + 1, width)
+    c1 = max(c1, c0 + 1)
+    toggles = np.zeros((r1 - r0, c1 - c0 + 1), dtype=np.int32)
+    np.add.at(toggles, (rows - r0, np.minimum(columns, c1) - c0), 1)
+    inside = (np.cumsum(toggles, axis=1)[:, :-1] & 1).astype(bool)
+    return slice(r0, r1), slice(c0, c1), inside
+
+
+def rasterize_labels(geojson: CountyFeatureCollection, frame: MapFrame) -> np.ndarray:
+    """
+    Compute which county covers each pixel.
+
+    Args:
+        geojson: County boundaries with their index
+        frame: Pixel grid to draw
+
+    Returns:
+        np.ndarray: (height, width) int32 array of feature positions, -1 where
+        no county is drawn
+    """
+    labels = np.full((frame.height, frame.width), -1, dtype=np.int32)
+    features = geojson["features"]
+    for county in geojson.county_index:
+        edges = polygon_edges(features[county.position]["geometry"])
+        if not len(edges):
+            continue
+        x0, y0 = frame.to_pixels(edges[:, 0], edges[:, 1])
+        x1, y1 = frame.to_pixels(edges[:, 2], edges[:, 3])
+        rows, columns, inside = fill_polygon(
+            np.column_stack([x0, y0, x1, y1]), frame.width, frame.height
+        )
+        labels[rows, columns][inside] = county.position
+    return labels
+
+
+def get_labels(geojson: CountyFeatureCollection, frame: MapFrame) -> np.ndarray:
+    """Cached rasterize_labels() for a geometry level and image size."""
+    key = (id(geojson), frame.width, frame.height)
+    with _cache_lock:
+        cached = _labels.get(key)
+        if cached is not None and cached[0] is geojson:
+            _labels.move_to_end(key)
+            return cached[1]
+
+    labels = rasterize_labels(geojson, frame)
+    with _cache_lock:
+        _labels[key] = (geojson, labels)
+        while len(_labels) > MAX_LABEL_RASTERS:
+            _labels.popitem(last=False)
+    return labels
+
+
+@lru_cache(maxsize=16)
+def color_lut(colorscale: Any) -> np.ndarray:
+    """
+    Sample a Plotly color scale into a lookup table.
+
+    Args:
+        colorscale: Named scale (e.g. "Greens") or a tuple of colors
+
+    Returns:
+        np.ndarray: (LUT_SIZE, 4) uint8 RGBA colors from low to high values
+    """
+    scale = (
+        get_colorscale(colorscale) if isinstance(colorscale, str) else list(colorscale)
+    )
+    colors = sample_colorscale(scale, np.linspace(0, 1, LUT_SIZE), colortype="rgb")
+    rgb = np.array([unlabel_rgb(c) for c in colors], dtype=np.float64)
+    return np.column_stack([np.rint(rgb), np.full(LUT_SIZE, 255)]).astype(np.uint8)
+
+
+def colorize(
+    labels: np.ndarray,
+    positions: np.ndarray,
+    values: np.ndarray,
+    lut: np.ndarray,
+    value_range: Tuple[float, float],
+) -> np.ndarray:
+    """
+    Color a label raster by county values.
+
+    Args:
+        labels: Label raster from rasterize_labels()
+        positions: Feature position of each value
+        values: Value per county (NaN counties are left transparent)
+        lut: Color lookup table from color_lut()
+        value_range: (min, max) mapped to the ends of the color scale
+
+    Returns:
+        np.ndarray: (height, width, 4) uint8 RGBA image
+    """
+    palette = np.zeros((int(labels.max(initial=-1)) + 2, 4), dtype=np.uint8)
+    low, high = value_range
+    scaled = (values - low) / (high - low) if high > low else np.zeros(len(values))
+    valid = ~np.isnan(scaled) & (positions + 1 < len(palette))
+    index = np.clip(np.rint(scaled[valid] * (len(lut) - 1)), 0, len(lut) - 1).astype(
+        np.intp
+    )
+    palette[positions[valid] + 1] = lut[index]
+    # Shift by one so -1 (no county) picks the transparent first row
+    return palette[labels + 1]
+
+
+def encode_png(image: np.ndarray) -> bytes:
+    """
+    Encode an RGBA image as PNG using only zlib.
+
+    Args:
+        image: (height, width, 4) uint8 array
+
+    Returns:
+        bytes: PNG file contents
+    """
+    height, width = image.shape[:2]
+
+    def chunk(tag: bytes, payload: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(payload))
+            + tag
+            + payload
+            + struct.pack(">I", zlib.crc32(tag + payload))
+        )
+
+    # Every scanline starts with filter type 0 (none)
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = image.reshape(height, width * 4)
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return b"".join(
+        [
+            b"\x89PNG\r\n\x1a\n",
+            chunk(b"IHDR", header),
+            chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)),
+            chunk(b"IEND", b""),
+        ]
+    )
+
+
+def encode_image(image: np.ndarray, image_format: str = RASTER_FORMAT) -> str:
+    """
+    Encode an RGBA image as a data URI.
+
+    Args:
+        image: (height, width, 4) uint8 array
+        image_format: "png" or "webp" (requires Pillow)
+
+    Returns:
+        str: data URI usable as an image source
+    """
+    if image_format == "webp":
+        buffer = io.BytesIO()
+        Image.fromarray(image).save(buffer, format="WEBP", lossless=True)
+        payload = buffer.getvalue()
+    else:
+        payload = encode_png(image)
+    return f"data:image/{image_format};base64," + base64.b64encode(payload).decode(
+        "ascii"
+    )
+
+
+def data_hash(data: pd.DataFrame, columns: List[str]) -> str:
+    """
+    Hash the content of the columns a map is drawn from.
+
+    Two filter states selecting the same values hash identically, so they
+    share one cached image.
+
+    Args:
+        data: Filtered data
+        columns: Columns the image depends on
+
+    Returns:
+        str: Hex digest
+    """
+    hashed = pd.util.hash_pandas_object(data[columns], index=False).to_numpy()
+    return hashlib.blake2b(hashed.tobytes(), digest_size=16).hexdigest()
+
+
+def render_choropleth(
+    data: pd.DataFrame,
+    geojson: CountyFeatureCollection,
+    locations: str,
+    color: str,
+    colorscale: Any,
+    height: int = MAP_HEIGHT_PX,
+    image_format: str = RASTER_FORMAT,
+) -> Tuple[str, MapFrame, Tuple[float, float]]:
+    """
+    Render a county choropleth to an encoded image, using the cache.
+
+    Args:
+        data: DataFrame containing the data
+        geojson: County boundaries (one geometry level)
+        locations: Column with county names
+        color: Numeric column to color by
+        colorscale: Plotly color scale
+        height: Image height in pixels
+        image_format: "png" or "webp"
+
+    Returns:
+        tuple: (data URI, map frame, (min, max) of the colored values)
+    """
+    frame = MapFrame(geojson.county_index.bounds(), height)
+    scale_key = (
+        colorscale if isinstance(colorscale, str) else tuple(map(tuple, colorscale))
+    )
+    key = (
+        id(geojson),
+        color,
+        data_hash(data, [locations, color]),
+        scale_key,
+        frame.size,
+        image_format,
+    )
+    with _cache_lock:
+        cached = _images.get(key)
+        if cached is not None and cached[0] is geojson:
+            _images.move_to_end(key)
+            return cached[1], frame, cached[2]
+
+    counties = [geojson.county_index.get(name) for name in data[locations]]
+    positions = np.array(
+        [-1 if c is None else c.position for c in counties], dtype=np.int64
+    )
+    values = pd.to_numeric(data[color], errors="coerce").to_numpy(
+        dtype=np.float64, na_value=np.nan
+    )
+    finite = values[~np.isnan(values)]
+    value_range = (
+        (float(finite.min()), float(finite.max())) if len(finite) else (0.0, 1.0)
+    )
+
+    image = colorize(
+        get_labels(geojson, frame), positions, values, color_lut(scale_key), value_range
+    )
+    uri = encode_image(image, image_format)
+    with _cache_lock:
+        _images[key] = (geojson, uri, value_range)
+        while len(_images) > MAX_IMAGES:
+            _images.popitem(last=False)
+    return uri, frame, value_range
+
+
+def clear_raster_cache() -> None:
+    """Drop all cached label rasters and images."""
+    with _cache_lock:
+        _images.clear()
+        _labels.clear()
@@ -0,0 +1,228 @@
+"""
+Persistent cache of sentiment scores keyed by text content.
+
+Tweets repeat heavily (retweets, bots, identical Cleaned_Content), and every
+scoring pass paid for each copy. ScoreCache stores one score per
+(model, normalized text) in a SQLite file, so rescoring runs and
+incremental batches only run the model on texts it has never seen:
+
+- Keys are a 16-byte BLAKE2b hash of the model identifier and the text
+  after Unicode (NFKC) and whitespace normalization; the text itself is
+  not stored.
+- The file is capped in size. When it grows past the cap, the least
+  recently used scores are evicted and the file is compacted (VACUUM);
+  evictions leave room for 10% more scores, so this stays rare.
+
+Hits and lookups are counted per ScoreCache object, so each scoring run
+reports its own hit rate.
+
+Environment variables:
+    SCORE_CACHE_MAX_MB: Size cap of the cache file in MB (default: 256)
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from typing import Optional, Sequence
+
+import numpy as np
+
+from .dataset_cache import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = "sentiment_scores.sqlite"
+
+# Keys per SQL statement, below SQLite's host parameter limit
+QUERY_CHUNK = 500
+
+# Share of the size cap kept after an eviction, so evictions are not
+# triggered again by the next few inserts
+EVICT_TO = 0.9
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def get_cache_path(data_dir: Optional[str] = None) -> str:
+    """
+    Get the default path of the score cache file.
+
+    Args:
+        data_dir: Data directory the cache lives under (default: project data dir)
+
+    Returns:
+        str: Path inside the dataset cache directory
+    """
+    return os.path.join(get_cache_dir(data_dir), CACHE_FILE)
+
+
+def get_max_bytes() -> int:
+    """
+    Get the size cap of the score cache.
+
+    Returns:
+        int: Cap in bytes
+    """
+    try:
+        return int(float(os.getenv("SCORE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+    except ValueError:
+        return 256 * 1024 * 1024
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize a text so trivially different copies share a cache entry.
+
+    Args:
+        text: Tweet text
+
+    Returns:
+        str: NFKC-normalized text with runs of whitespace collapsed and the
+        ends stripped
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def text_key(text: str, model_id: str) -> bytes:
+    """
+    Hash a normalized text for one model.
+
+    Args:
+        text: Normalized text (see normalize_text())
+        model_id: Identifier of the model producing the score
+
+    Returns:
+        bytes: 16-byte key
+    """
+    digest = hashlib.blake2b(model_id.encode("utf-8"), digest_size=16)
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.digest()
+
+
+class ScoreCache:
+    """SQLite store of scores per (model, text) hash with LRU eviction."""
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Open (or create) a cache file.
+
+        Args:
+            path: Cache file path (default: get_cache_path())
+            max_bytes: Size cap (default: get_max_bytes())
+        """
+        self.path = path or get_cache_path()
+        self.max_bytes = get_max_bytes() if max_bytes is None else max_bytes
+        self.hits = 0
+        self.lookups = 0
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # Worker processes may share the file; writers wait for each other
+        self._db = sqlite3.connect(self.path, timeout=60)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "key BLOB PRIMARY KEY, score REAL NOT NULL, used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS scores_used ON scores (used)")
+        self._db.commit()
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        self._db.close()
+
+    def __enter__(self) -> "ScoreCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups answered from the cache since it was opened."""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def get_many(self, keys: Sequence[bytes]) -> np.ndarray:
+        """
+        Look up the scores of many keys.
+
+        Args:
+            keys: Keys from text_key()
+
+        Returns:
+            np.ndarray: Score per key, NaN for misses
+        """
+        found = {}
+        now = time.time()
+        for start in range(0, len(keys), QUERY_CHUNK):
+            chunk = list(keys[start:start + QUERY_CHUNK])
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._db.execute(
+                f"SELECT key, score FROM scores WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            found.update(rows)
+            if rows:
+                self._db.execute(
+                    f"UPDATE scores SET used = ? WHERE key IN ({','.join('?' * len(rows))})",
+                    [now] + [key for key, _ in rows],
+                )
+        self._db.commit()
+
+        self.lookups += len(keys)
+        self.hits += len(found)
+        return np.array([found.get(bytes(key), np.nan) for key in keys], dtype=np.float64)
+
+    def put_many(self, keys: Sequence[bytes], scores: Sequence[float]) -> None:
+        """
+        Store scores, evicting the least recently used ones past the size cap.
+
+        Args:
+            keys: Keys from text_key()
+            scores: Score per key (NaN scores are not stored)
+        """
+        now = time.time()
+        rows = [
+            (key, float(score)) for key, score in zip(keys, scores) if not np.isnan(score)
+        ]
+        self._db.executemany(
+            "INSERT OR REPLACE INTO scores (key, score, used) VALUES (?, ?, ?)",
+            [(key, score, now) for key, score in rows],
+        )
+        self._db.commit()
+        self._evict()
+
+    def size_bytes(self) -> int:
+        """Bytes of the database pages in use."""
+        page_size = self._db.execute("PRAGMA page_size").fetchone()[0]
+        pages = self._db.execute("PRAGMA page_count").fetchone()[0]
+        free = self._db.execute("PRAGMA freelist_count").fetchone()[0]
+        return (pages - free) * page_size
+
+    def _evict(self) -> None:
+        """Drop the least recently used scores while over the size cap."""
+        size = self.size_bytes()
+        if size <= self.max_bytes:
+            return
+
+        count = len(self)
+        keep = int(count * self.max_bytes * EVICT_TO / size)
+        self._db.execute(
+            "DELETE FROM scores WHERE key IN "
+            "(SELECT key FROM scores ORDER BY used LIMIT ?)",
+            (count - keep,),
+        )
+        self._db.commit()
+        # Deleted rows leave half-empty pages behind; rebuild to release them
+        self._db.execute("VACUUM")
+        logger.info(
+            "Score cache over %.0f MB: evicted %d of %d scores",
+            self.max_bytes / 1024 / 1024, count - keep, count
+        )
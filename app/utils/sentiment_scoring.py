@@ -0,0 +1,643 @@
+r"""
+Offline BERT star-rating scoring of tweet text.
+
+Tweet_Sentiment.csv arrives with BERT_Sentiment precomputed. This module
+scores new tweets with a star-rating model (1 to 5 stars) on CPU:
+
+- The input CSV is read in chunks, so files of any size stream through in
+  bounded memory.
+- Within a chunk, texts are tokenized once, sorted by token length and
+  grouped into batches of at most a token budget (rows x longest row), so
+  short tweets are not padded to the length of long ones.
+- Forward passes run under torch.inference_mode() with a configurable
+  number of threads, or through a quantized or ONNX Runtime backend (see
+  inference_backends).
+
+Scores are written in the convert_sentiment_score() scale (1 star = -1,
+3 stars = 0, 5 stars = 1), so a scored file loads like the original data,
+for example as a tweet batch:
+
+    python -m app.utils.sentiment_scoring new_tweets.csv \
+        data/Tweet_Sentiment_2024-06.csv --threads 4
+
+Identical texts (after normalization) are scored once per chunk, and with a
+ScoreCache (see score_cache; on by default in the CLI) once across runs.
+Rows without text get no score. torch and transformers are only imported
+when a model is loaded.
+
+The other sentiment columns have scorers sharing the same deduplication and
+cache: VaderScorer (VADER_Sentiment, needs the vaderSentiment package) and
+GPTScorer (GPT_Sentiment, -1/0/1 through the OpenAI API). parallel_scoring
+runs any of them over a process pool.
+"""
+
+import argparse
+import logging
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .data_loader import convert_sentiment_scores
+from .inference_backends import BACKENDS, check_agreement, make_backend
+from .score_cache import ScoreCache, get_cache_path, normalize_text, text_key
+
+logger = logging.getLogger(__name__)
+
+# Multilingual 1-5 star review model, the source of BERT_Sentiment
+DEFAULT_MODEL = "nlptown/bert-base-multilingual-uncased-sentiment"
+
+TEXT_COLUMN = "Cleaned_Content"
+SCORE_COLUMN = "BERT_Sentiment"
+
+# Rows read from the input per chunk
+DEFAULT_CHUNK_SIZE = 10_000
+
+# Padded tokens (rows x longest row) per forward pass, and rows per pass
+DEFAULT_MAX_TOKENS = 4096
+DEFAULT_MAX_BATCH = 64
+
+# Tokens kept per text; tweets are far shorter
+MAX_LENGTH = 128
+
+# Input texts a non-reference backend is validated on before scoring
+DEFAULT_VALIDATION_SAMPLE = 1000
+
+# Chat model labeling GPT_Sentiment, overridable with OPENAI_SENTIMENT_MODEL
+DEFAULT_GPT_MODEL = "gpt-4o-mini"
+
+GPT_PROMPT = (
+    "Classify the sentiment of the tweet about cannabis. "
+    "Answer with one number only: -1 (negative), 0 (neutral) or 1 (positive)."
+)
+
+
+def import_torch() -> Any:
+    """
+    Import torch and transformers.
+
+    Returns:
+        tuple: (torch, transformers) modules
+
+    Raises:
+        ImportError: If either package is not installed
+    """
+    try:
+        import torch
+        import transformers
+    except ImportError as e:
+        raise ImportError(
+            f"Sentiment scoring needs torch and transformers ({e}); "
+            "install them with 'poetry install'"
+        ) from e
+    return torch, transformers
+
+
+def label_scores(id2label: Any) -> np.ndarray:
+    """
+    Map the class labels of a star-rating model to sentiment scores.
+
+    Args:
+        id2label: Class index to label ("1 star" ... "5 stars"), as in the
+            model config
+
+    Returns:
+        np.ndarray: Score of each class index in the convert_sentiment_score
+        scale
+
+    Raises:
+        ValueError: If a label is not a star rating
+    """
+    labels = [str(id2label[i]) for i in range(len(id2label))]
+    if not all("star" in label.lower() for label in labels):
+        raise ValueError(f"model labels are not star ratings: {labels}")
+    return convert_sentiment_scores(pd.Series(labels, dtype=object)).to_numpy(
+        dtype=np.float64
+    )
+
+
+def length_batches(
+    lengths: np.ndarray,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    max_batch: int = DEFAULT_MAX_BATCH,
+) -> List[np.ndarray]:
+    """
+    Group texts into batches of similar token length.
+
+    Args:
+        lengths: Token count of each text
+        max_tokens: Padded tokens per batch (rows x longest row); a single
+            longer text still gets a batch of its own
+        max_batch: Rows per batch
+
+    Returns:
+        list: Arrays of text positions, shortest texts first
+    """
+    lengths = np.asarray(lengths)
+    order = np.argsort(lengths, kind="stable")
+    batches = []
+    start = 0
+    while start < len(order):
+        # Sorted ascending, so the row being added is the batch's longest
+        size = 1
+        while (
+            start + size < len(order)
+            and size < max_batch
+            and (size + 1) * lengths[order[start + size]] <= max_tokens
+        ):
+            size += 1
+        batches.append(order[start : start + size])
+        start += size
+    return batches
+
+
+class ScoringStats(NamedTuple):
+    """Outcome of a scoring run."""
+
+    rows: int
+    scored: int
+    seconds: float
+    threads: int
+    inferred: int = 0
+    cache_hits: int = 0
+    cache_lookups: int = 0
+
+    @property
+    def tweets_per_second(self) -> float:
+        return self.scored / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def tweets_per_second_per_core(self) -> float:
+        return self.tweets_per_second / max(self.threads, 1)
+
+    @property
+    def cache_hit_rate(self) -> float:
+        return self.cache_hits / self.cache_lookups if self.cache_lookups else 0.0
+
+    def summary(self) -> str:
+        summary = (
+            f"Scored {self.scored:,} of {self.rows:,} rows in {self.seconds:.1f} s "
+            f"with {self.threads} thread(s): {self.tweets_per_second:,.1f} tweets/s, "
+            f"{self.tweets_per_second_per_core:,.1f} tweets/s per core; "
+            f"{self.inferred:,} distinct texts run through the model"
+        )
+        if self.cache_lookups:
+            summary += (
+                f"; score cache hit rate {self.cache_hit_rate:.1%} "
+                f"({self.cache_hits:,} of {self.cache_lookups:,})"
+            )
+        return summary
+
+
+class TextScorer(ABC):
+    """Base of the sentiment scorers: deduplication and caching around a model."""
+
+    # Identifier in cache keys, column written and its dtype
+    model_id = ""
+    column = SCORE_COLUMN
+    dtype = "float64"
+
+    # Threads each scorer computes with, and distinct texts it has scored
+    threads = 1
+    inferred = 0
+
+    @abstractmethod
+    def score_distinct(self, texts: List[str], **kwargs) -> np.ndarray:
+        """
+        Score distinct normalized texts with the model.
+
+        Args:
+            texts: Non-empty texts
+            **kwargs: Scorer-specific options
+
+        Returns:
+            np.ndarray: Score per text (NaN if the model gave none)
+        """
+
+    def score(
+        self, texts: Any, cache: Optional[ScoreCache] = None, **kwargs
+    ) -> np.ndarray:
+        """
+        Score texts in the scale of the scorer's column.
+
+        Texts are normalized (see normalize_text()) and each distinct text is
+        looked up in the cache, or passed to score_distinct() once.
+
+        Args:
+            texts: Texts to score (array-like); missing or blank texts are
+                not scored
+            cache: Persistent score cache to read and update
+            **kwargs: Options passed to score_distinct()
+
+        Returns:
+            np.ndarray: Score per text, NaN for texts not scored
+        """
+        texts = pd.Series(texts, dtype=object)
+        scores = np.full(len(texts), np.nan)
+        present = texts.notna().to_numpy()
+        normalized = texts[present].astype(str).map(normalize_text)
+        positions = np.flatnonzero(present)[(normalized != "").to_numpy()]
+        codes, distinct = pd.factorize(normalized[normalized != ""])
+        distinct = distinct.tolist()
+
+        distinct_scores = np.full(len(distinct), np.nan)
+        keys = None
+        if cache is not None:
+            keys = [text_key(text, self.model_id) for text in distinct]
+            distinct_scores = cache.get_many(keys)
+
+        missing = np.flatnonzero(np.isnan(distinct_scores))
+        if len(missing):
+            distinct_scores[missing] = self.score_distinct(
+                [distinct[i] for i in missing], **kwargs
+            )
+            self.inferred += len(missing)
+            if cache is not None:
+                cache.put_many([keys[i] for i in missing], distinct_scores[missing])
+
+        scores[positions] = distinct_scores[codes]
+        return scores
+
+
+class StarRatingModel(TextScorer):
+    """A star-rating sequence classifier scoring texts on CPU."""
+
+    column = SCORE_COLUMN
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        threads: Optional[int] = None,
+        max_length: int = MAX_LENGTH,
+        backend: str = "torch",
+    ):
+        """
+        Load a model and its tokenizer.
+
+        Args:
+            model_name: Hugging Face model id or local model directory
+            threads: Intra-op threads for torch (default: torch's default)
+            max_length: Tokens kept per text
+            backend: Inference backend, one of inference_backends.BACKENDS
+
+        Raises:
+            ImportError: If torch, transformers or the backend's package is
+                not installed
+            ValueError: If the model's labels are not star ratings or the
+                backend is unknown
+        """
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"unknown backend '{backend}'; expected one of {list(BACKENDS)}"
+            )
+        self._torch, transformers = import_torch()
+        if threads:
+            self._torch.set_num_threads(threads)
+        self.threads = self._torch.get_num_threads()
+        self.model_name = model_name
+        self.backend_name = backend
+        # Backends may label a few texts differently, so they cache apart
+        self.model_id = model_name if backend == "torch" else f"{model_name}#{backend}"
+        self.max_length = max_length
+        self.inferred = 0
+
+        self.tokenizer = transformers.AutoTokenizer.from_pretrained(model_name)
+        self.model = transformers.AutoModelForSequenceClassification.from_pretrained(
+            model_name
+        )
+        self.model.eval()
+        self.class_scores = label_scores(self.model.config.id2label)
+        self.backend = make_backend(
+            backend, self.model, self._torch, model_name, self.threads
+        )
+
+    def predict(
+        self,
+        texts: Sequence[str],
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+    ) -> np.ndarray:
+        """
+        Predict the class of each text.
+
+        Args:
+            texts: Texts to classify
+            max_tokens: Padded tokens per forward pass
+            max_batch: Rows per forward pass
+
+        Returns:
+            np.ndarray: Class index per text (int64)
+        """
+        classes = np.empty(len(texts), dtype=np.int64)
+        if not len(texts):
+            return classes
+
+        input_ids = self.tokenizer(
+            list(texts), truncation=True, max_length=self.max_length
+        )["input_ids"]
+        lengths = np.fromiter(
+            (len(ids) for ids in input_ids), dtype=np.int64, count=len(input_ids)
+        )
+
+        for batch in length_batches(lengths, max_tokens, max_batch):
+            encoded = self.tokenizer.pad(
+                {"input_ids": [input_ids[i] for i in batch]}, return_tensors="np"
+            )
+            logits = self.backend(
+                encoded["input_ids"].astype(np.int64),
+                encoded["attention_mask"].astype(np.int64),
+            )
+            classes[batch] = logits.argmax(axis=-1)
+        return classes
+
+    def score_distinct(self, texts: List[str], **kwargs) -> np.ndarray:
+        """Score texts by their predicted star rating (see predict())."""
+        return self.class_scores[self.predict(texts, **kwargs)]
+
+
+class VaderScorer(TextScorer):
+    """VADER compound polarity (-1 to 1), the source of VADER_Sentiment."""
+
+    model_id = "vader"
+    column = "VADER_Sentiment"
+
+    def __init__(self):
+        """
+        Load the VADER lexicon.
+
+        Raises:
+            ImportError: If the vaderSentiment package is not installed
+        """
+        try:
+            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        except ImportError as e:
+            raise ImportError(
+                f"VADER scoring needs the vaderSentiment package ({e}); "
+                "install it with 'pip install vaderSentiment'"
+            ) from e
+        self.analyzer = SentimentIntensityAnalyzer()
+
+    def score_distinct(self, texts: List[str], **kwargs) -> np.ndarray:
+        """Score texts by their compound polarity."""
+        return np.fromiter(
+            (self.analyzer.polarity_scores(text)["compound"] for text in texts),
+            dtype=np.float64,
+            count=len(texts),
+        )
+
+
+class GPTScorer(TextScorer):
+    """GPT sentiment label (-1, 0 or 1) through the OpenAI API."""
+
+    column = "GPT_Sentiment"
+    dtype = "Int8"
+
+    def __init__(self, model: Optional[str] = None):
+        """
+        Create an API client.
+
+        Args:
+            model: Chat model (default: OPENAI_SENTIMENT_MODEL or DEFAULT_GPT_MODEL)
+
+        Raises:
+            ImportError: If the openai package is not installed
+        """
+        try:
+            from dotenv import load_dotenv
+            from openai import OpenAI
+        except ImportError as e:
+            raise ImportError(f"GPT scoring needs the openai package ({e})") from e
+        load_dotenv()
+        self.model_id = model or os.getenv("OPENAI_SENTIMENT_MODEL", DEFAULT_GPT_MODEL)
+        self.client = OpenAI()  # Reads OPENAI_API_KEY
+
+    def label(self, text: str) -> float:
+        """
+        Ask the model for the sentiment of one text.
+
+        Args:
+            text: Tweet text
+
+        Returns:
+            float: -1, 0 or 1, NaN if the answer holds no label
+        """
+        response = self.client.chat.completions.create(
+            model=self.model_id,
+            temperature=0,
+            max_tokens=3,
+            messages=[
+                {"role": "system", "content": GPT_PROMPT},
+                {"role": "user", "content": text},
+            ],
+        )
+        match = re.search(r"-1|0|1", response.choices[0].message.content or "")
+        return float(match.group()) if match else np.nan
+
+    def score_distinct(self, texts: List[str], **kwargs) -> np.ndarray:
+        """Label texts one API request at a time."""
+        return np.array([self.label(text) for text in texts], dtype=np.float64)
+
+
+def read_chunks(
+    path: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV file in chunks, all columns as text.
+
+    Args:
+        path: Input CSV path
+        chunk_size: Rows per chunk
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the file
+    """
+    yield from pd.read_csv(path, dtype=str, chunksize=chunk_size)
+
+
+def score_series(scores: np.ndarray, model: TextScorer, index: pd.Index) -> pd.Series:
+    """
+    Convert scores to a column of the scorer's dtype.
+
+    Args:
+        scores: Scores from TextScorer.score()
+        model: Scorer that produced them
+        index: Index of the scored rows
+
+    Returns:
+        pd.Series: Scores, missing where NaN
+    """
+    return pd.Series(scores, index=index).astype(model.dtype)
+
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    model: TextScorer,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    text_column: str = TEXT_COLUMN,
+    score_column: Optional[str] = None,
+    cache: Optional[ScoreCache] = None,
+    **kwargs,
+) -> ScoringStats:
+    """
+    Score every row of a CSV file and write the result.
+
+    The output has the columns of the input, with the score column replaced
+    (or added) by the numeric scores. It is written to a temporary file that
+    replaces output_path only when complete, so the data watcher never
+    picks up a partial file.
+
+    Args:
+        input_path: Input CSV path
+        output_path: Output CSV path
+        model: Loaded scorer
+        chunk_size: Rows read per chunk
+        text_column: Column holding the text
+        score_column: Column receiving the scores (default: the scorer's column)
+        cache: Persistent score cache to read and update
+        **kwargs: Options passed to the scorer, e.g. batching options of
+            StarRatingModel.predict()
+
+    Returns:
+        ScoringStats: Rows read and scored, time taken, threads used, texts
+        run through the model and cache hits of this run
+
+    Raises:
+        ValueError: If the input has no text_column
+    """
+    partial_path = output_path + ".partial"
+    rows = scored = 0
+    inferred = model.inferred
+    hits, lookups = (cache.hits, cache.lookups) if cache is not None else (0, 0)
+    start = time.perf_counter()
+    try:
+        for i, chunk in enumerate(read_chunks(input_path, chunk_size)):
+            if text_column not in chunk.columns:
+                raise ValueError(f"{input_path} has no '{text_column}' column")
+            scores = model.score(chunk[text_column], cache=cache, **kwargs)
+            chunk[score_column or model.column] = score_series(
+                scores, model, chunk.index
+            )
+            chunk.to_csv(
+                partial_path, mode="w" if i == 0 else "a", header=i == 0, index=False
+            )
+
+            rows += len(chunk)
+            scored += int(np.count_nonzero(~np.isnan(scores)))
+            logger.info("Scored %d rows of %s", rows, input_path)
+        os.replace(partial_path, output_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    stats = ScoringStats(
+        rows,
+        scored,
+        time.perf_counter() - start,
+        model.threads,
+        inferred=model.inferred - inferred,
+        cache_hits=cache.hits - hits if cache is not None else 0,
+        cache_lookups=cache.lookups - lookups if cache is not None else 0,
+    )
+    if cache is not None:
+        logger.info(
+            "Score cache hit rate for %s: %.1f%% (%d of %d distinct texts)",
+            input_path,
+            stats.cache_hit_rate * 100,
+            stats.cache_hits,
+            stats.cache_lookups,
+        )
+    return stats
+
+
+def validate_backend(
+    model: StarRatingModel,
+    input_path: str,
+    sample: int = DEFAULT_VALIDATION_SAMPLE,
+    text_column: str = TEXT_COLUMN,
+) -> float:
+    """
+    Check a model's backend against the torch backend on the first texts of a file.
+
+    Args:
+        model: Model with a non-reference backend
+        input_path: CSV file to sample
+        sample: Number of texts
+        text_column: Column holding the text
+
+    Returns:
+        float: Share of texts with the same star label
+
+    Raises:
+        ValueError: If the agreement is below inference_backends.MIN_AGREEMENT
+    """
+    texts = pd.read_csv(input_path, usecols=[text_column], dtype=str, nrows=sample)[
+        text_column
+    ]
+    texts = texts.dropna().map(normalize_text)
+    reference = StarRatingModel(model.model_name, max_length=model.max_length)
+    return check_agreement(reference, model, texts[texts != ""].tolist())["agreement"]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Score the tweets of a CSV file with a star-rating model."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="CSV file with a text column")
+    parser.add_argument("output", help="Output CSV path")
+    parser.add_argument(
+        "--model", default=DEFAULT_MODEL, help="Model id or local directory"
+    )
+    parser.add_argument(
+        "--threads", type=int, help="Torch threads (default: all cores)"
+    )
+    parser.add_argument("--backend", default="torch", choices=list(BACKENDS))
+    parser.add_argument(
+        "--validate",
+        type=int,
+        default=DEFAULT_VALIDATION_SAMPLE,
+        help="Texts a non-torch backend is checked against the reference on",
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--text-column", default=TEXT_COLUMN)
+    parser.add_argument(
+        "--score-column", default=None, help="Output column (default: BERT_Sentiment)"
+    )
+    parser.add_argument(
+        "--cache", default=None, help="Score cache file (default: data/.cache)"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Do not use the score cache"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    model = StarRatingModel(args.model, threads=args.threads, backend=args.backend)
+    if args.backend != "torch" and args.validate:
+        validate_backend(model, args.input, args.validate, args.text_column)
+    cache = None if args.no_cache else ScoreCache(args.cache or get_cache_path())
+    try:
+        stats = score_file(
+            args.input,
+            args.output,
+            model,
+            chunk_size=args.chunk_size,
+            text_column=args.text_column,
+            score_column=args.score_column,
+            cache=cache,
+            max_tokens=args.max_tokens,
+            max_batch=args.max_batch,
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+    print(stats.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Point-in-polygon spatial index for assigning coordinates to counties.
+
+Upstream feeds increasingly provide latitude/longitude without a reliable
+county. CountySpatialIndex assigns counties to many points at once:
+
+- A grid is laid over the county boundaries. Every cell not crossed by a
+  boundary lies entirely inside one county (or outside all of them), so
+  points falling into it are labeled with a single array lookup.
+- Only points in cells touched by a boundary get an exact crossing-number
+  test, vectorized over all edges of the candidate counties whose bounding
+  boxes contain them.
+
+fill_counties_from_coordinates() uses it to fill the County column of rows
+that have coordinates but no county, so filters and group-bys keep working
+on County as before.
+"""
+
+import threading
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .load_geojson import CountyFeatureCollection
+from .raster import MapFrame, polygon_edges, rasterize_labels
+
+# Coordinate columns read by fill_counties_from_coordinates()
+LATITUDE_COLUMN = "Latitude"
+LONGITUDE_COLUMN = "Longitude"
+
+# Grid cells along the latitude axis
+DEFAULT_RESOLUTION = 512
+
+# Point x edge comparisons evaluated at once by points_in_polygon()
+CHUNK_ELEMENTS = 4_000_000
+
+# Cell marker for cells crossed by a boundary
+_BOUNDARY = -2
+
+# Index per GeoJSON object, with the object it was built from
+_indexes: Dict[Tuple[int, int], Tuple[Dict[str, Any], "CountySpatialIndex"]] = {}
+_indexes_lock = threading.Lock()
+
+
+def points_in_polygon(x: np.ndarray, y: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Test points against a polygon with the even-odd (crossing number) rule.
+
+    Args:
+        x: Point x coordinates (longitudes)
+        y: Point y coordinates (latitudes)
+        edges: Polygon edges, rows of (x0, y0, x1, y1); holes and multiple
+            parts are simply more edges
+
+    Returns:
+        np.ndarray: Boolean mask of the points inside
+    """
+    inside = np.zeros(len(x), dtype=bool)
+    edges = edges[edges[:, 1] != edges[:, 3]]  # Horizontal edges never cross a ray
+    if not len(edges) or not len(x):
+        return inside
+
+    x0, y0, x1, y1 = edges.T
+    slope = (x1 - x0) / (y1 - y0)
+    step = max(CHUNK_ELEMENTS // len(edges), 1)
+    for start in range(0, len(x), step):
+        px = x[start : start + step, None]
+        py = y[start : start + step, None]
+        # Edges crossing the horizontal ray from each point towards +x
+        crosses = ((y0 > py) != (y1 > py)) & (px < x0 + (py - y0) * slope)
+        inside[start : start + step] = np.count_nonzero(crosses, axis=1) & 1
+    return inside.astype(bool)
+
+
+class CountySpatialIndex:
+    """Grid-accelerated lookup of the county containing each point."""
+
+    def __init__(
+        self, geojson: CountyFeatureCollection, resolution: int = DEFAULT_RESOLUTION
+    ):
+        """
+        Index the county polygons of a FeatureCollection.
+
+        Args:
+            geojson: County boundaries with their index (from load_geojson())
+            resolution: Grid cells along the latitude axis
+        """
+        self.geojson = geojson
+        features = geojson["features"]
+
+        # (position, bbox, edges) of every county, edges in lon/lat
+        self._polygons = []
+        for county in geojson.county_index:
+            edges = polygon_edges(features[county.position]["geometry"])
+            if len(edges):
+                self._polygons.append((county.position, county.bbox, edges))
+
+        bounds = geojson.county_index.bounds()
+        self.frame = MapFrame(bounds, resolution) if bounds is not None else None
+        self._cells = self._build_cells() if self.frame is not None else None
+
+    def _build_cells(self) -> np.ndarray:
+        """Label every grid cell with its county, -1 (none) or _BOUNDARY."""
+        frame = self.frame
+        # Label of each cell center; exact for cells no boundary passes through
+        cells = rasterize_labels(self.geojson, frame)
+
+        # Mark cells touched by an edge: sample every edge at most half a cell
+        # apart, then grow the marks by one cell so the segments between
+        # samples are covered too
+        edges = np.vstack([edges for _, _, edges in self._polygons])
+        x0, y0 = frame.to_pixels(edges[:, 0], edges[:, 1])
+        x1, y1 = frame.to_pixels(edges[:, 2], edges[:, 3])
+        samples = np.ceil(np.hypot(x1 - x0, y1 - y0) * 2).astype(np.int64) + 1
+        edge = np.repeat(np.arange(len(edges)), samples)
+        t = (
+            np.arange(samples.sum()) - np.repeat(np.cumsum(samples) - samples, samples)
+        ) / np.repeat(np.maximum(samples - 1, 1), samples)
+        columns = np.clip(
+            np.floor(x0[edge] + t * (x1 - x0)[edge]), 0, frame.width - 1
+        ).astype(np.intp)
+        rows = np.clip(
+            np.floor(y0[edge] + t * (y1 - y0)[edge]), 0, frame.height - 1
+        ).astype(np.intp)
+
+        touched = np.zeros((frame.height + 2, frame.width + 2), dtype=bool)
+        touched[rows + 1, columns + 1] = True
+        boundary = np.zeros((frame.height, frame.width), dtype=bool)
+        for dr in range(3):
+            for dc in range(3):
+                boundary |= touched[dr : dr + frame.height, dc : dc + frame.width]
+
+        cells[boundary] = _BOUNDARY
+        return cells
+
+    def assign(self, longitude: Any, latitude: Any) -> np.ndarray:
+        """
+        Find the county containing each point.
+
+        Args:
+            longitude: Point longitudes (array-like)
+            latitude: Point latitudes (array-like)
+
+        Returns:
+            np.ndarray: Feature position of the containing county per point,
+            -1 for points outside all counties or without coordinates
+        """
+        lon = np.asarray(longitude, dtype=np.float64)
+        lat = np.asarray(latitude, dtype=np.float64)
+        result = np.full(len(lon), -1, dtype=np.int64)
+        if self.frame is None or not len(lon):
+            return result
+
+        column, row = self.frame.to_pixels(lon, lat)
+        with np.errstate(invalid="ignore"):
+            valid = (
+                (column >= 0)
+                & (column < self.frame.width)
+                & (row >= 0)
+                & (row < self.frame.height)
+            )
+        result[valid] = self._cells[
+            row[valid].astype(np.intp), column[valid].astype(np.intp)
+        ]
+
+        # Exact test for points near a boundary
+        pending = np.flatnonzero(result == _BOUNDARY)
+        result[pending] = -1
+        for position, (min_lon, min_lat, max_lon, max_lat), edges in self._polygons:
+            if not len(pending):
+                break
+            px, py = lon[pending], lat[pending]
+            in_box = (
+                (px >= min_lon) & (px <= max_lon) & (py >= min_lat) & (py <= max_lat)
+            )
+            candidates = pending[in_box]
+            hit = candidates[points_in_polygon(lon[candidates], lat[candidates], edges)]
+            result[hit] = position
+            pending = pending[result[pending] < 0]
+        return result
+
+    def county_names(self, longitude: Any, latitude: Any) -> np.ndarray:
+        """
+        Find the name (properties.NAME) of the county containing each point.
+
+        Args:
+            longitude: Point longitudes (array-like)
+            latitude: Point latitudes (array-like)
+
+        Returns:
+            np.ndarray: Object array of county names, None outside all counties
+        """
+        names = np.array(
+            [None]
+            + [
+                feature["properties"].get("NAME")
+                for feature in self.geojson["features"]
+            ],
+            dtype=object,
+        )
+        return names[self.assign(longitude, latitude) + 1]
+
+
+def get_spatial_index(
+    geojson: CountyFeatureCollection, resolution: int = DEFAULT_RESOLUTION
+) -> CountySpatialIndex:
+    """
+    Get the spatial index of a boundaries object, building it once.
+
+    Args:
+        geojson: County boundaries (e.g. from get_geojson())
+        resolution: Grid cells along the latitude axis
+
+    Returns:
+        CountySpatialIndex: Index shared by all callers passing this object
+    """
+    key = (id(geojson), resolution)
+    with _indexes_lock:
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] is geojson:
+            return cached[1]
+        index = CountySpatialIndex(geojson, resolution)
+        _indexes.clear()  # Older boundaries are not used again
+        _indexes[key] = (geojson, index)
+        return index
+
+
+def has_coordinates(df: pd.DataFrame) -> bool:
+    """Whether a frame has the Latitude and Longitude columns."""
+    return LATITUDE_COLUMN in df.columns and LONGITUDE_COLUMN in df.columns
+
+
+def fill_counties_from_coordinates(
+    df: pd.DataFrame, geojson: CountyFeatureCollection, county_column: str = "County"
+) -> pd.DataFrame:
+    """
+    Fill missing counties from the Latitude/Longitude columns.
+
+    Rows that already have a county keep it. If the frame has no county
+    column at all, it is created from the coordinates.
+
+    Args:
+        df: Frame with Latitude and Longitude columns
+        geojson: County boundaries
+        county_column: Name of the county column
+
+    Returns:
+        pd.DataFrame: Frame with counties filled in (unchanged if it has no
+        coordinates or nothing is missing)
+    """
+    if not has_coordinates(df):
+        return df
+
+    if county_column in df.columns:
+        counties = df[county_column]
+        blank = counties.astype("string").str.strip() == ""
+        missing = (counties.isna() | blank.fillna(False)).to_numpy(dtype=bool)
+    else:
+        counties = None
+        missing = np.ones(len(df), dtype=bool)
+    if not missing.any():
+        return df
+
+    rows = np.flatnonzero(missing)
+    lon = pd.to_numeric(df[LONGITUDE_COLUMN].iloc[rows], errors="coerce").to_numpy(
+        dtype=np.float64, na_value=np.nan
+    )
+    lat = pd.to_numeric(df[LATITUDE_COLUMN].iloc[rows], errors="coerce").to_numpy(
+        dtype=np.float64, na_value=np.nan
+    )
+    found = get_spatial_index(geojson).county_names(lon, lat)
+
+    filled = np.empty(len(df), dtype=object)
+    if counties is not None:
+        filled[:] = counties.astype(object).where(counties.notna(), None).to_numpy()
+    filled[rows] = found
+
+    df = df.copy(deep=False)
+    dtype = (
+        "category"
+        if counties is None or isinstance(counties.dtype, pd.CategoricalDtype)
+        else object
+    )
+    df[county_column] = pd.Series(filled, index=df.index).astype(dtype)
+    return df
@@ -0,0 +1,100 @@
+"""
+Benchmark choropleth construction with and without the cached base figure.
+
+Times building the county map for a series of filter states (random county
+subsets with new values) with the previous implementation, a full
+px.choropleth() call per figure, against create_choropleth_map(), which
+reuses the cached trace styling and layout and only fills in the arrays.
+Both draw the same geometry level, so only construction time differs.
+
+Usage:
+    python benchmarks/bench_choropleth.py [--calls 50] [--level low]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+from utils.geometry import CountyGeometries  # noqa: E402
+from utils.load_geojson import load_geojson  # noqa: E402
+from utils.plot_helpers import create_choropleth_map, get_california_map_layout  # noqa: E402
+from config.theme import COLOR_SCALES  # noqa: E402
+
+TITLE = "Cannabis Retailer Density by County"
+LABELS = {"Dispensary_PerCapita": "Retailers per 100k Residents", "County": "County"}
+
+
+def previous_choropleth(data, geojson):
+    """The implementation before the base figure was cached."""
+    fig = px.choropleth(
+        data,
+        geojson=geojson,
+        locations="County",
+        featureidkey="properties.NAME",
+        color="Dispensary_PerCapita",
+        color_continuous_scale=COLOR_SCALES["sequential"],
+        scope="usa",
+        title=TITLE,
+        hover_data=["County"],
+        labels=LABELS,
+    )
+    fig.update_layout(**get_california_map_layout())
+    return fig
+
+
+def filter_states(counties, calls, seed=0):
+    """Random county subsets with new values, one per simulated rerun."""
+    rng = np.random.default_rng(seed)
+    for _ in range(calls):
+        selected = rng.choice(counties, size=rng.integers(5, len(counties) + 1), replace=False)
+        yield pd.DataFrame({
+            "County": selected,
+            "Dispensary_PerCapita": rng.uniform(0, 20, len(selected)).round(2),
+        })
+
+
+def time_builder(build, frames):
+    """Mean milliseconds per figure."""
+    start = time.perf_counter()
+    for frame in frames:
+        build(frame)
+    return (time.perf_counter() - start) / len(frames) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--level", default="low")
+    args = parser.parse_args()
+
+    geojson = load_geojson(os.path.join(ROOT, "data", "California_County_Boundaries.geojson"))
+    geometries = CountyGeometries.from_geojson(geojson)
+    level = geometries.level(args.level)
+    frames = list(filter_states(np.array(level.county_index.keys, dtype=object), args.calls))
+
+    # Warm up both paths (imports, templates, the cached base)
+    previous_choropleth(frames[0], level)
+    create_choropleth_map(frames[0], level, "County", "Dispensary_PerCapita", TITLE, ["County"], LABELS)
+
+    previous = time_builder(lambda df: previous_choropleth(df, level), frames)
+    cached = time_builder(
+        lambda df: create_choropleth_map(
+            df, level, "County", "Dispensary_PerCapita", TITLE, ["County"], LABELS
+        ),
+        frames,
+    )
+
+    print(f"{args.calls} figures at level '{args.level}'")
+    print(f"  px.choropleth per call: {previous:8.2f} ms")
+    print(f"  cached base + patch:    {cached:8.2f} ms  ({previous / cached:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark the single-mask filter pipeline against sequential copies.
+
+Builds a synthetic dispensary frame with the loaded dtype schema and times
+apply_dispensary_filters() against the previous implementation, which made
+a defensive copy and then re-materialized the frame after every filter step.
+Peak allocations are measured with tracemalloc.
+
+Usage:
+    python benchmarks/bench_filters.py [--rows 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.utils.filters import apply_dispensary_filters  # noqa: E402
+
+COUNTIES = pd.Index([f"County {i}" for i in range(58)], name="County_Key")
+LICENSE_TYPES = ["Adult-Use", "Medicinal", "Adult-Use and Medicinal"]
+FILTERS = {
+    "years": (2019, 2023),
+    "license_types": ["Adult-Use", "Adult-Use and Medicinal"],
+    "counties": COUNTIES[:40].tolist(),
+}
+
+
+def make_dispensaries(n_rows, seed=0):
+    """Create a dispensary-shaped frame of n_rows."""
+    rng = np.random.default_rng(seed)
+    county_codes = rng.integers(0, len(COUNTIES), n_rows)
+    return pd.DataFrame({
+        "Year": pd.array(rng.integers(2018, 2025, n_rows), dtype="Int16"),
+        "Month": pd.array(rng.integers(1, 13, n_rows), dtype="Int8"),
+        "County": pd.Categorical.from_codes(county_codes, COUNTIES),
+        "County_Key": pd.Categorical.from_codes(county_codes, COUNTIES),
+        "License Designation": pd.Categorical.from_codes(
+            rng.integers(0, len(LICENSE_TYPES), n_rows), LICENSE_TYPES
+        ),
+        "License Number": pd.Series(rng.integers(0, 20_000, n_rows)).astype(str),
+    })
+
+
+def sequential_filters(df, filters):
+    """The previous pipeline: defensive copy plus a copy per filter step."""
+    filtered = df.copy()
+    start_year, end_year = filters["years"]
+    filtered = filtered[(filtered["Year"] >= start_year) & (filtered["Year"] <= end_year)]
+    filtered = filtered[filtered["License Designation"].isin(filters["license_types"])]
+    return filtered[filtered["County_Key"].isin(filters["counties"])]
+
+
+def peak_allocation(func):
+    """Peak traced allocation in bytes while running func."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'sequential (ms)':>16} {'mask (ms)':>10} "
+          f"{'sequential peak':>16} {'mask peak':>10}")
+    for n_rows in args.rows:
+        df = make_dispensaries(n_rows)
+        assert sequential_filters(df, FILTERS).index.equals(
+            apply_dispensary_filters(df, FILTERS).index
+        )
+
+        seq_time = min(timeit.repeat(
+            lambda: sequential_filters(df, FILTERS), number=1, repeat=args.repeat
+        ))
+        mask_time = min(timeit.repeat(
+            lambda: apply_dispensary_filters(df, FILTERS), number=1, repeat=args.repeat
+        ))
+        seq_peak = peak_allocation(lambda: sequential_filters(df, FILTERS))
+        mask_peak = peak_allocation(lambda: apply_dispensary_filters(df, FILTERS))
+        print(f"{n_rows:>10,} {seq_time * 1000:>16.1f} {mask_time * 1000:>10.1f} "
+              f"{seq_peak / 1e6:>13.1f} MB {mask_peak / 1e6:>7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark the CPU inference backends of the star-rating model.
+
+Scores a sample of Cleaned_Content from data/Tweet_Sentiment.csv with every
+backend (torch float32, int8 dynamic quantization, ONNX Runtime) and
+reports load time, single-tweet latency (p50/p95), batched throughput and
+agreement of the star labels with the torch reference. Backends whose
+packages are missing are skipped.
+
+Usage:
+    python benchmarks/bench_scoring_backends.py [--rows 2000] [--threads 4] [--model DIR]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from app.utils.inference_backends import BACKENDS, MIN_AGREEMENT, label_agreement  # noqa: E402
+from app.utils.score_cache import normalize_text  # noqa: E402
+from app.utils.sentiment_scoring import DEFAULT_MODEL, StarRatingModel  # noqa: E402
+
+
+def load_texts(n_rows, seed=0):
+    """Sample distinct tweet texts, resampled with replacement past the dataset size."""
+    path = os.path.join(ROOT, "data", "Tweet_Sentiment.csv")
+    texts = pd.read_csv(path, usecols=["Cleaned_Content"], dtype=str)["Cleaned_Content"]
+    texts = texts.dropna().map(normalize_text)
+    texts = texts[texts != ""].drop_duplicates().to_numpy()
+    rng = np.random.default_rng(seed)
+    return rng.choice(texts, n_rows, replace=n_rows > len(texts)).tolist()
+
+
+def bench_backend(name, args, texts):
+    """Load time, latencies, throughput and labels of one backend."""
+    start = time.perf_counter()
+    model = StarRatingModel(args.model, threads=args.threads, backend=name)
+    load_seconds = time.perf_counter() - start
+    model.predict(texts[:16])  # Warm-up
+
+    latencies = []
+    for text in texts[:args.latency_samples]:
+        start = time.perf_counter()
+        model.predict([text])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    labels = model.predict(texts, max_batch=args.max_batch)
+    seconds = time.perf_counter() - start
+    return {
+        "load_s": load_seconds,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "tweets_s": len(texts) / seconds,
+        "per_core": len(texts) / seconds / model.threads,
+        "labels": labels,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--latency-samples", type=int, default=100)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    args = parser.parse_args()
+
+    texts = load_texts(args.rows)
+    results = {}
+    for name in ["torch"] + [b for b in args.backends if b != "torch"]:
+        try:
+            results[name] = bench_backend(name, args, texts)
+        except ImportError as e:
+            print(f"Skipping {name}: {e}")
+
+    if "torch" not in results:
+        return
+    reference = results["torch"]["labels"]
+    print(f"{len(texts)} tweets, model {args.model}")
+    print(f"{'backend':>8} {'load (s)':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} "
+          f"{'tweets/s':>9} {'/core':>7} {'speedup':>8} {'agreement':>10}")
+    for name, result in results.items():
+        agreement = label_agreement(reference, result["labels"])
+        flag = "" if agreement >= MIN_AGREEMENT else "  below required"
+        print(
+            f"{name:>8} {result['load_s']:9.1f} {result['p50_ms']:9.1f} {result['p95_ms']:9.1f} "
+            f"{result['tweets_s']:9.1f} {result['per_core']:7.1f} "
+            f"{result['tweets_s'] / results['torch']['tweets_s']:7.2f}x {agreement:10.2%}{flag}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark the vectorized BERT star-rating conversion against the apply path.
+
+Builds a synthetic sentiment column by resampling the labels found in
+data/Tweet_Sentiment.csv (with a sprinkling of missing and malformed values)
+and times both conversion paths at several sizes.
+
+Usage:
+    python benchmarks/bench_sentiment_conversion.py [--rows 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.utils.data_loader import (  # noqa: E402
+    convert_sentiment_score,
+    convert_sentiment_scores,
+    get_data_dir,
+)
+
+
+def make_scores(n_rows, seed=0):
+    """Create a star-rating column of n_rows resampled from the real data."""
+    path = os.path.join(get_data_dir(), "Tweet_Sentiment.csv")
+    if os.path.exists(path):
+        labels = pd.read_csv(path, usecols=["BERT_Sentiment"])["BERT_Sentiment"]
+        labels = labels.dropna().tolist()
+    else:
+        labels = ["1 star", "2 stars", "3 stars", "4 stars", "5 stars"]
+    labels = labels + [None, "star", "n/a"]
+
+    rng = np.random.default_rng(seed)
+    return pd.Series(np.asarray(labels, dtype=object)[rng.integers(0, len(labels), n_rows)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'apply (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for n_rows in args.rows:
+        scores = make_scores(n_rows)
+
+        expected = scores.apply(convert_sentiment_score)
+        result = convert_sentiment_scores(scores)
+        assert np.array_equal(expected.to_numpy(float), result.to_numpy(float))
+
+        apply_time = min(timeit.repeat(
+            lambda: scores.apply(convert_sentiment_score), number=1, repeat=args.repeat
+        ))
+        vector_time = min(timeit.repeat(
+            lambda: convert_sentiment_scores(scores), number=1, repeat=args.repeat
+        ))
+        print(f"{n_rows:>10,} {apply_time:>12.4f} {vector_time:>15.4f} "
+              f"{apply_time / vector_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
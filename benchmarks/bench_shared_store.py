@@ -0,0 +1,132 @@
+"""
+Benchmark per-rerun latency and RSS of the shared data store.
+
+Simulates N concurrent sessions that each rerun their page R times and
+keep the frames they were handed. Two strategies are compared, each in a
+fresh subprocess so RSS numbers are independent:
+
+- cache_data: what ``@st.cache_data`` does on a hit - unpickle a private
+  deep copy of the whole data dict for every call.
+- shared: DataStore.views() - read-only views over one copy per process.
+
+Usage:
+    python benchmarks/bench_shared_store.py [--sessions 50] [--reruns 5] [--scale 20]
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from app.utils.data_loader import (  # noqa: E402
+    COLUMN_DTYPES,
+    get_data_dir,
+    prepare_tweet_sentiment,
+)
+from app.utils.data_store import DataStore  # noqa: E402
+
+
+def current_rss_mb():
+    """Return the resident set size of this process in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def build_data(scale):
+    """Load the bundled datasets, replicating the tweet table `scale` times."""
+    data_dir = get_data_dir()
+    tweets = pd.read_csv(
+        os.path.join(data_dir, "Tweet_Sentiment.csv"),
+        dtype=COLUMN_DTYPES["tweet_sentiment"],
+    )
+    tweets = prepare_tweet_sentiment(pd.concat([tweets] * scale, ignore_index=True))
+    density = pd.read_csv(
+        os.path.join(data_dir, "Dispensary_Density.csv"), dtype=COLUMN_DTYPES["density"]
+    )
+    return {"tweet_sentiment": tweets, "density": density}
+
+
+def run_strategy(strategy, sessions, reruns, scale):
+    """Run one strategy in this process and return its measurements."""
+    data = build_data(scale)
+    baseline_rss = current_rss_mb()
+
+    if strategy == "cache_data":
+        payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        del data
+
+        def get_data():
+            return pickle.loads(payload)
+    else:
+        store = DataStore(lambda: (data, []))
+        store.snapshot()
+
+        def get_data():
+            return store.views()
+
+    held = [None] * sessions
+    latencies = []
+    for _ in range(reruns):
+        for session in range(sessions):
+            start = time.perf_counter()
+            frames = get_data()
+            # A typical page touches the frame it was handed
+            frames["tweet_sentiment"]["BERT_Sentiment"].mean()
+            latencies.append(time.perf_counter() - start)
+            held[session] = frames
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "strategy": strategy,
+        "mean_ms": float(latencies.mean()),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "rss_delta_mb": current_rss_mb() - baseline_rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--scale", type=int, default=20,
+                        help="Replicate the tweet table N times")
+    parser.add_argument("--strategy", choices=["cache_data", "shared"],
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.strategy:
+        result = run_strategy(args.strategy, args.sessions, args.reruns, args.scale)
+        print(json.dumps(result))
+        return
+
+    print(f"{args.sessions} sessions x {args.reruns} reruns, tweet table x{args.scale}")
+    print(f"{'strategy':<12} {'mean ms':>10} {'p95 ms':>10} {'RSS delta MB':>14}")
+    for strategy in ("cache_data", "shared"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--strategy", strategy,
+             "--sessions", str(args.sessions), "--reruns", str(args.reruns),
+             "--scale", str(args.scale)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{strategy:<12} {result['mean_ms']:>10.3f} {result['p95_ms']:>10.3f} "
+              f"{result['rss_delta_mb']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
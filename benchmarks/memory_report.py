@@ -0,0 +1,99 @@
+"""
+Report the per-session memory footprint of the loaded datasets.
+
+For each CSV in data/, compares the frame pandas infers on its own against
+the frame read with the declared COLUMN_DTYPES schema. Two sizes are shown:
+the deep in-memory size, and the pickled size, which is what
+``st.cache_data`` serializes and copies for every session that reads it.
+
+Usage:
+    python benchmarks/memory_report.py [--scale 10]
+"""
+import argparse
+import os
+import pickle
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.utils.data_loader import (  # noqa: E402
+    COLUMN_DTYPES,
+    convert_sentiment_scores,
+    get_data_dir,
+)
+
+DATASET_FILES = {
+    "dispensaries": "Dispensaries.csv",
+    "density": "Dispensary_Density.csv",
+    "tweet_sentiment": "Tweet_Sentiment.csv",
+}
+
+
+def _mb(n_bytes):
+    return n_bytes / 1024 ** 2
+
+
+def frame_sizes(df):
+    """Return (deep memory bytes, pickled bytes) for a frame."""
+    return (
+        int(df.memory_usage(deep=True).sum()),
+        len(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)),
+    )
+
+
+def load_pair(path, dataset, scale):
+    """Load a CSV with inferred and with declared dtypes."""
+    inferred = pd.read_csv(path)
+    typed = pd.read_csv(path, dtype=COLUMN_DTYPES[dataset])
+
+    if dataset == "tweet_sentiment":
+        inferred["BERT_Sentiment"] = convert_sentiment_scores(inferred["BERT_Sentiment"])
+        typed["BERT_Sentiment"] = convert_sentiment_scores(
+            typed["BERT_Sentiment"]
+        ).astype("float32")
+
+    if scale > 1:
+        inferred = pd.concat([inferred] * scale, ignore_index=True)
+        typed = pd.concat([typed] * scale, ignore_index=True)
+
+    return inferred, typed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", type=int, default=1,
+                        help="Replicate each dataset N times to project growth")
+    args = parser.parse_args()
+
+    data_dir = get_data_dir()
+    print(f"{'dataset':<16} {'column':<22} {'inferred':>10} {'schema':>10} "
+          f"{'inferred MB':>12} {'schema MB':>10}")
+
+    totals = [0, 0, 0, 0]
+    for dataset, filename in DATASET_FILES.items():
+        path = os.path.join(data_dir, filename)
+        if not os.path.exists(path):
+            print(f"{dataset:<16} (missing {filename}, skipped)")
+            continue
+
+        inferred, typed = load_pair(path, dataset, args.scale)
+        for col in typed.columns:
+            before = inferred[col].memory_usage(deep=True, index=False)
+            after = typed[col].memory_usage(deep=True, index=False)
+            print(f"{dataset:<16} {col[:22]:<22} {str(inferred[col].dtype):>10} "
+                  f"{str(typed[col].dtype):>10} {_mb(before):>12.3f} {_mb(after):>10.3f}")
+
+        for i, size in enumerate(frame_sizes(inferred) + frame_sizes(typed)):
+            totals[i] += size
+
+    print()
+    print(f"Deep memory:  {_mb(totals[0]):8.2f} MB -> {_mb(totals[2]):8.2f} MB "
+          f"({100 * (1 - totals[2] / totals[0]):.0f}% smaller)")
+    print(f"Pickled size: {_mb(totals[1]):8.2f} MB -> {_mb(totals[3]):8.2f} MB "
+          f"({100 * (1 - totals[3] / totals[1]):.0f}% smaller, copied per session)")
+
+
+if __name__ == "__main__":
+    main()
@@ -86,3 +86,36 @@ def mock_data_dir(tmp_path, sample_dispensaries_data, sample_density_data,
         json.dump(sample_geojson, f)
 
     return data_dir
+
+
+@pytest.fixture(scope="session")
+def tiny_star_model(tmp_path_factory):
+    """Save a tiny randomly initialized 1-5 star BERT classifier to a local directory."""
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+
+    model_dir = tmp_path_factory.mktemp("tiny_star_model")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]",
+             "good", "bad", "great", "awful", "weed", "joint", "blunt", "smoke",
+             "love", "hate", "this", "the", "is", "a", "not"]
+    vocab_file = model_dir / "vocab.txt"
+    vocab_file.write_text("\n".join(vocab) + "\n")
+    tokenizer = transformers.BertTokenizerFast(vocab_file=str(vocab_file), do_lower_case=True)
+
+    labels = {0: "1 star", 1: "2 stars", 2: "3 stars", 3: "4 stars", 4: "5 stars"}
+    config = transformers.BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=160,
+        num_labels=5,
+        id2label=labels,
+        label2id={label: i for i, label in labels.items()},
+    )
+    torch.manual_seed(0)
+    model = transformers.BertForSequenceClassification(config)
+    model.save_pretrained(model_dir)
+    tokenizer.save_pretrained(model_dir)
+    return str(model_dir)
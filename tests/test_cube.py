@@ -0,0 +1,170 @@
+"""
+Tests for the cube module.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils import cube as cube_module
+from app.utils.cube import DispensaryCube, SentimentCube
+from app.utils.filters import apply_dispensary_filters, apply_sentiment_filters
+
+
+@pytest.fixture
+def dispensaries():
+    """Dispensary rows with repeated licenses across months and counties."""
+    rng = np.random.default_rng(1)
+    n_rows = 2000
+    counties = ["Los Angeles County", "San Diego County", "Orange County", "Kern County"]
+    license_ids = rng.integers(0, 150, n_rows)
+    return pd.DataFrame({
+        "County": pd.Categorical(np.asarray(counties)[license_ids % len(counties)]),
+        "Year": pd.array(rng.integers(2018, 2023, n_rows), dtype="Int16"),
+        "Month": pd.array(rng.integers(1, 13, n_rows), dtype="Int8"),
+        "License Designation": pd.Categorical(
+            np.asarray(["Adult-Use", "Medicinal", "Adult-Use and Medicinal"])[license_ids % 3]
+        ),
+        "License Number": [f"C10-{i:07d}-LIC" for i in license_ids],
+        "Dispensary Name": [f"Dispensary {i // 2}" for i in license_ids],
+    })
+
+
+FILTER_CASES = [
+    {},
+    {"years": (2019, 2021)},
+    {"counties": ["Los Angeles", "Kern County"]},
+    {"years": (2020, 2020), "license_types": ["Medicinal"], "county": "San Diego County"},
+]
+
+
+class TestDispensaryCube:
+    """Tests for DispensaryCube."""
+
+    @pytest.mark.parametrize("filters", FILTER_CASES)
+    def test_rollup_by_year_matches_groupby(self, dispensaries, filters):
+        """Test that yearly roll-ups equal a group-by over the filtered rows."""
+        cube = DispensaryCube.from_frame(dispensaries)
+        result = cube.rollup(["Year"], filters)
+
+        filtered = apply_dispensary_filters(dispensaries, filters)
+        expected = filtered.groupby("Year").agg(
+            Records=("County", "size"),
+            Licenses=("License Number", "nunique"),
+            Dispensaries=("Dispensary Name", "nunique"),
+        ).reset_index()
+
+        assert result["Year"].tolist() == expected["Year"].tolist()
+        for column in ["Records", "Licenses", "Dispensaries"]:
+            assert result[column].tolist() == expected[column].tolist()
+
+    @pytest.mark.parametrize("filters", FILTER_CASES)
+    def test_totals_match_filtered_rows(self, dispensaries, filters):
+        """Test that totals equal the distinct counts over the filtered rows."""
+        totals = DispensaryCube.from_frame(dispensaries).totals(filters)
+        filtered = apply_dispensary_filters(dispensaries, filters)
+
+        assert totals["Records"] == len(filtered)
+        assert totals["Licenses"] == filtered["License Number"].nunique()
+        assert totals["Dispensaries"] == filtered["Dispensary Name"].nunique()
+        assert totals["Counties"] == filtered["County"].nunique()
+
+    def test_rollup_by_county_uses_suffixed_names(self, dispensaries):
+        """Test that county roll-ups are labeled like the source data."""
+        result = DispensaryCube.from_frame(dispensaries).rollup(["County"])
+        expected = dispensaries.groupby("County", observed=True)["License Number"].nunique()
+
+        assert dict(zip(result["County"].astype(str), result["Licenses"])) == expected.to_dict()
+
+    def test_cube_is_smaller_than_raw_rows(self, dispensaries):
+        """Test that cells are one per observed dimension combination."""
+        cube = DispensaryCube.from_frame(dispensaries)
+        expected = dispensaries.groupby(
+            ["County", "Year", "Month", "License Designation"], observed=True
+        ).ngroups
+        assert len(cube) == expected
+
+    def test_missing_values_are_dropped_from_groups(self):
+        """Test that rows with a missing year only count toward totals."""
+        df = pd.DataFrame({
+            "County": ["Kern County", "Kern County"],
+            "Year": pd.array([2020, None], dtype="Int16"),
+            "License Number": ["A", "B"],
+        })
+        cube = DispensaryCube.from_frame(df)
+
+        assert cube.rollup(["Year"])["Licenses"].tolist() == [1]
+        assert cube.totals()["Licenses"] == 2
+
+    def test_empty_selection(self, dispensaries):
+        """Test that a filter matching nothing yields zeros."""
+        cube = DispensaryCube.from_frame(dispensaries)
+        assert cube.totals({"county": "Atlantis County"})["Licenses"] == 0
+        assert len(cube.rollup(["Year"], {"county": "Atlantis County"})) == 0
+
+
+    def test_many_distinct_values_use_bounded_sketches(self, monkeypatch):
+        """Test that wide distinct counts switch to fixed-size HyperLogLog sketches."""
+        monkeypatch.setattr(cube_module, "SKETCH_PRECISION", 10)
+        n_rows = 20000
+        df = pd.DataFrame({
+            "County": pd.Categorical(np.asarray(["Kern County", "Orange County"])[np.arange(n_rows) % 2]),
+            "Year": pd.array(2020 + np.arange(n_rows) % 3, dtype="Int16"),
+            "License Number": [f"C10-{i:07d}-LIC" for i in range(n_rows)],
+        })
+        cube = DispensaryCube.from_frame(df)
+        sketch = cube.sketches["Licenses"]
+
+        assert not sketch.exact
+        assert sketch.data.shape == (len(cube), 1 << 10)
+        assert abs(cube.totals()["Licenses"] - n_rows) < 0.1 * n_rows
+        by_county = cube.rollup(["County"])["Licenses"].to_numpy()
+        np.testing.assert_allclose(by_county, n_rows / 2, rtol=0.1)
+        assert cube.totals({"county": "Atlantis County"})["Licenses"] == 0
+
+    def test_few_distinct_values_are_exact(self, dispensaries):
+        """Test that narrow distinct counts are kept as exact bitmaps."""
+        cube = DispensaryCube.from_frame(dispensaries)
+        assert cube.sketches["Licenses"].exact
+        assert cube.sketches["Licenses"].data.shape[1] <= 1 << cube_module.SKETCH_PRECISION
+
+
+class TestSentimentCube:
+    """Tests for SentimentCube."""
+
+    @pytest.fixture
+    def sentiment(self, sample_sentiment_data):
+        df = sample_sentiment_data.copy()
+        df["Month"] = [1, 1, 2, 2, 3, 3]
+        df.loc[1, "BERT_Sentiment"] = np.nan
+        return df
+
+    @pytest.mark.parametrize("filters", [{}, {"years": (2020, 2021)}, {"counties": ["San Diego"]}])
+    def test_county_rollup_matches_groupby(self, sentiment, filters):
+        """Test mean, count, std and positive ratio against pandas."""
+        result = SentimentCube.from_frame(sentiment).rollup(["County"], filters)
+        filtered = apply_sentiment_filters(sentiment, filters)
+        expected = filtered.groupby("County")["BERT_Sentiment"].agg(
+            ["mean", "count", "std", lambda x: (x > 0).mean() * 100]
+        )
+
+        assert result["County"].astype(str).tolist() == expected.index.tolist()
+        np.testing.assert_allclose(result["Mean"], expected["mean"])
+        assert result["Count"].tolist() == expected["count"].tolist()
+        np.testing.assert_allclose(result["Std"], expected["std"])
+        np.testing.assert_allclose(result["Positive_Ratio"], expected.iloc[:, 3])
+
+    def test_totals(self, sentiment):
+        """Test overall metrics against the raw rows."""
+        totals = SentimentCube.from_frame(sentiment).totals()
+
+        assert totals["Records"] == len(sentiment)
+        assert totals["Mean"] == pytest.approx(sentiment["BERT_Sentiment"].mean())
+        assert totals["Positive_Ratio"] == pytest.approx(
+            (sentiment["BERT_Sentiment"] > 0).mean() * 100
+        )
+
+    def test_monthly_rollup(self, sentiment):
+        """Test roll-up over two dimensions."""
+        result = SentimentCube.from_frame(sentiment).rollup(["Year", "Month"])
+        assert list(zip(result["Year"], result["Month"], result["Records"])) == [
+            (2020, 1, 2), (2020, 2, 1), (2021, 2, 1), (2021, 3, 1), (2022, 3, 1)
+        ]
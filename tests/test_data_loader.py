@@ -2,8 +2,17 @@
 Tests for the data_loader module.
 """
 import pytest
+import numpy as np
 import pandas as pd
-from app.utils.data_loader import convert_sentiment_score, get_data_dir
+from app.utils import data_loader
+from app.utils.data_loader import (
+    COLUMN_DTYPES,
+    apply_schema,
+    convert_sentiment_score,
+    convert_sentiment_scores,
+    get_data_dir,
+    prepare_tweet_sentiment,
+)
 
 
 class TestConvertSentimentScore:
@@ -41,6 +50,73 @@ class TestConvertSentimentScore:
         assert convert_sentiment_score("positive") == 0
         assert convert_sentiment_score("negative") == 0
 
+    def test_convert_numeric_string(self):
+        """Test that numeric strings (scored batches read as text) are parsed."""
+        assert convert_sentiment_score("0.5") == 0.5
+        assert convert_sentiment_score("-1.0") == -1.0
+        assert convert_sentiment_score("nan") == 0
+
+
+class TestConvertSentimentScores:
+    """Tests for the vectorized convert_sentiment_scores function."""
+
+    def test_matches_scalar_for_star_labels(self):
+        """Test that star labels convert exactly like the scalar function."""
+        scores = pd.Series(["1 star", "2 stars", "3 stars", "4 stars", "5 stars"])
+        result = convert_sentiment_scores(scores)
+        expected = scores.apply(convert_sentiment_score)
+        assert result.tolist() == expected.tolist()
+        assert result.tolist() == [-1.0, -0.5, 0.0, 0.5, 1.0]
+
+    def test_nan_and_malformed_fall_back_to_zero(self):
+        """Test that missing and malformed values convert to 0."""
+        scores = pd.Series(["5 stars", None, "star", "invalid star", "positive", np.nan])
+        result = convert_sentiment_scores(scores)
+        assert result.tolist() == [1.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+
+    def test_mixed_object_column_matches_scalar(self):
+        """Test that mixed numeric/string columns match the apply path."""
+        scores = pd.Series(["4 stars", 0.25, 1, "1 STAR", None, "3.5 stars", "x"],
+                           dtype=object)
+        result = convert_sentiment_scores(scores)
+        expected = scores.apply(convert_sentiment_score).astype(float)
+        assert result.tolist() == expected.tolist()
+
+    def test_numeric_column(self):
+        """Test that numeric columns are returned as floats with NaN -> 0."""
+        scores = pd.Series([0.5, np.nan, -1.0])
+        result = convert_sentiment_scores(scores)
+        assert result.dtype == float
+        assert result.tolist() == [0.5, 0.0, -1.0]
+
+    def test_preserves_index_and_name(self):
+        """Test that the result aligns with the input index."""
+        scores = pd.Series(["5 stars", "1 star"], index=[10, 20], name="BERT_Sentiment")
+        result = convert_sentiment_scores(scores)
+        assert list(result.index) == [10, 20]
+        assert result.name == "BERT_Sentiment"
+
+    def test_categorical_column(self):
+        """Test that categorical input converts like plain strings."""
+        scores = pd.Series(["5 stars", "1 star", "5 stars", None], dtype="category")
+        result = convert_sentiment_scores(scores)
+        assert result.tolist() == [1.0, -1.0, 1.0, 0.0]
+
+
+class TestPrepareTweetSentiment:
+    """Tests for prepare_tweet_sentiment."""
+
+    def test_flags_tweets_without_bert_rating(self):
+        """Test that missing and malformed ratings are flagged, not just set to 0."""
+        df = pd.DataFrame({
+            "BERT_Sentiment": ["5 stars", "3 stars", None, "n/a", "0.5"],
+            "Tweet_Date": pd.date_range("2021-01-01", periods=5),
+        })
+        result = prepare_tweet_sentiment(df)
+
+        assert result["BERT_Sentiment"].tolist() == [1.0, 0.0, 0.0, 0.0, 0.5]
+        assert result["BERT_Labeled"].tolist() == [True, True, False, False, True]
+
 
 class TestGetDataDir:
     """Tests for the get_data_dir function."""
@@ -56,5 +132,65 @@ class TestGetDataDir:
         assert 'data' in result.lower()
 
 
-# Note: Testing load_data() requires mocking Streamlit's st.error and st.stop
-# which is more complex. These tests would need to be added with proper mocking.
+class TestColumnSchema:
+    """Tests for the declared column dtypes."""
+
+    def test_apply_schema_casts_present_columns(self, sample_dispensaries_data):
+        """Test that declared columns are cast and others left alone."""
+        result = apply_schema(sample_dispensaries_data, "dispensaries")
+        assert isinstance(result["County"].dtype, pd.CategoricalDtype)
+        assert isinstance(result["License Designation"].dtype, pd.CategoricalDtype)
+        assert result["Year"].dtype == "Int16"
+        assert result["Dispensary Name"].dtype == sample_dispensaries_data["Dispensary Name"].dtype
+
+    def test_apply_schema_is_noop_when_typed(self, sample_density_data):
+        """Test that an already-typed frame is returned unchanged."""
+        typed = apply_schema(sample_density_data, "density")
+        assert apply_schema(typed, "density") is typed
+
+    def test_schema_reduces_memory(self, sample_sentiment_data):
+        """Test that the declared dtypes shrink a repetitive frame."""
+        df = pd.concat([sample_sentiment_data] * 500, ignore_index=True)
+        df["Month"] = 1
+        typed = apply_schema(df, "tweet_sentiment")
+        assert typed.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+
+    def test_read_datasets_applies_schema(self, mock_data_dir, monkeypatch):
+        """Test that read_datasets() returns frames with the declared dtypes."""
+        monkeypatch.setattr(data_loader, "get_data_dir", lambda: str(mock_data_dir))
+        monkeypatch.setenv("DATASET_CACHE", "false")
+
+        data = data_loader.read_datasets()[0]
+
+        for name in ("dispensaries", "density", "tweet_sentiment"):
+            for col, dtype in COLUMN_DTYPES[name].items():
+                if col in data[name].columns:
+                    assert data[name][col].dtype == dtype, (name, col)
+        assert data["tweet_sentiment"]["BERT_Sentiment"].dtype == np.float32
+
+    def test_read_datasets_keeps_numeric_bert_scores(self, mock_data_dir, monkeypatch):
+        """Test that a numeric BERT_Sentiment column is not read as labels."""
+        monkeypatch.setattr(data_loader, "get_data_dir", lambda: str(mock_data_dir))
+        monkeypatch.setenv("DATASET_CACHE", "false")
+
+        data = data_loader.read_datasets()[0]
+
+        np.testing.assert_allclose(
+            data["tweet_sentiment"]["BERT_Sentiment"].to_numpy(),
+            [0.5, -0.2, 0.8, 0.3, -0.1, 0.6],
+            rtol=1e-6,
+        )
+
+    def test_read_datasets_geocodes_coordinates(self, mock_data_dir, monkeypatch):
+        """Test that dispensaries with coordinates but no county are assigned one."""
+        monkeypatch.setattr(data_loader, "get_data_dir", lambda: str(mock_data_dir))
+        monkeypatch.setenv("DATASET_CACHE", "false")
+        dispensaries = pd.read_csv(mock_data_dir / "Dispensaries.csv").drop(columns="County")
+        dispensaries["Latitude"] = 34.5
+        dispensaries["Longitude"] = -117.5
+        dispensaries.to_csv(mock_data_dir / "Dispensaries.csv", index=False)
+
+        data = data_loader.read_datasets()[0]
+
+        assert set(data["dispensaries"]["County"]) == {"Los Angeles"}
+        assert data["dispensaries"]["County_Key"].notna().all()
@@ -0,0 +1,215 @@
+"""
+Tests for the data_store module.
+"""
+import threading
+import pytest
+import numpy as np
+import pandas as pd
+from app.utils import data_loader
+from app.utils.cube import DispensaryCube
+from app.utils.data_store import DataSnapshot, DataStore, read_only_view
+from app.utils.load_geojson import CountyFeatureCollection
+
+
+@pytest.fixture(autouse=True)
+def copy_on_write():
+    """Run with Copy-on-Write, as the app does, without leaking the option."""
+    with pd.option_context("mode.copy_on_write", True):
+        yield
+
+
+@pytest.fixture
+def shared_data(sample_density_data, sample_sentiment_data, sample_geojson):
+    """Build a data dict like the one returned by read_datasets()."""
+    return {
+        "density": sample_density_data,
+        "tweet_sentiment": sample_sentiment_data,
+        "ca_counties": sample_geojson,
+    }
+
+
+class TestReadOnlyView:
+    """Tests for read_only_view."""
+
+    def test_view_shares_memory(self, sample_density_data):
+        """Test that a view does not copy the column data."""
+        view = read_only_view(sample_density_data)
+        assert view is not sample_density_data
+        assert np.shares_memory(
+            view["Dispensary_PerCapita"].to_numpy(),
+            sample_density_data["Dispensary_PerCapita"].to_numpy(),
+        )
+
+    def test_column_assignment_does_not_leak(self, sample_density_data):
+        """Test that replacing a column in a view leaves the source intact."""
+        original = sample_density_data["County"].copy()
+        view = read_only_view(sample_density_data)
+        view["County"] = view["County"].str.replace(" County", "")
+        pd.testing.assert_series_equal(sample_density_data["County"], original)
+
+    def test_inplace_write_does_not_leak(self, sample_density_data):
+        """Test that element writes to a view leave the source intact."""
+        view = read_only_view(sample_density_data)
+        view.loc[0, "Dispensary_PerCapita"] = -1.0
+        view["Population"] *= 2
+        assert sample_density_data.loc[0, "Dispensary_PerCapita"] == 5.2
+        assert sample_density_data.loc[0, "Population"] == 10000000
+
+    def test_non_pandas_values_pass_through(self, sample_geojson):
+        """Test that non-pandas objects are shared as-is."""
+        assert read_only_view(sample_geojson) is sample_geojson
+
+    def test_county_collection_view_does_not_leak(self, sample_geojson):
+        """Test that modifying a view of the boundaries leaves the source intact."""
+        collection = CountyFeatureCollection(sample_geojson)
+        view = read_only_view(collection)
+        view["features"][0]["properties"]["NAME"] = "Mutated"
+        view["features"].append({"type": "Feature"})
+
+        assert collection["features"][0]["properties"]["NAME"] == "Los Angeles"
+        assert len(collection["features"]) == 1
+        assert view.county_index is collection.county_index
+        assert (view["features"][0]["geometry"]["coordinates"]
+                is collection["features"][0]["geometry"]["coordinates"])
+
+    def test_cube_view_does_not_leak(self, sample_dispensaries_data):
+        """Test that cube views share data but cannot modify the cube."""
+        cube = DispensaryCube.from_frame(sample_dispensaries_data)
+        records = cube.cells["Records"].copy()
+        view = read_only_view(cube)
+        view.cells["Records"] = 0
+
+        pd.testing.assert_series_equal(cube.cells["Records"], records)
+        assert view.totals()["Licenses"] == cube.totals()["Licenses"]
+        with pytest.raises(ValueError):
+            view.sketches["Licenses"].data[0, 0] = 0xFF
+        with pytest.raises(TypeError):
+            view.sketches["Licenses"] = None
+
+
+class TestDataSnapshot:
+    """Tests for DataSnapshot."""
+
+    def test_views_have_same_keys(self, shared_data):
+        """Test that views() mirrors the loaded data dict."""
+        snapshot = DataSnapshot(shared_data, version=1)
+        assert set(snapshot.views()) == set(shared_data)
+        assert "density" in snapshot
+        assert snapshot.version == 1
+
+    def test_get_returns_view(self, shared_data):
+        """Test that get() returns a fresh view of one dataset."""
+        snapshot = DataSnapshot(shared_data, version=1)
+        first = snapshot.get("density")
+        second = snapshot.get("density")
+        assert first is not second
+        pd.testing.assert_frame_equal(first, shared_data["density"])
+
+
+class TestDataStore:
+    """Tests for DataStore."""
+
+    def test_loads_once(self, shared_data):
+        """Test that repeated and concurrent calls run the loader once."""
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return shared_data, []
+
+        store = DataStore(loader)
+        threads = [threading.Thread(target=store.views) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.views()
+
+        assert len(calls) == 1
+        assert store.version == 1
+
+    def test_failed_load_is_retried(self, shared_data):
+        """Test that a loader error leaves the store empty for a retry."""
+        attempts = []
+
+        def loader():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ValueError("boom")
+            return shared_data, ["⚠️ warning"]
+
+        store = DataStore(loader)
+        with pytest.raises(ValueError):
+            store.snapshot()
+        assert not store.is_loaded
+
+        snapshot = store.snapshot()
+        assert snapshot.warnings == ["⚠️ warning"]
+
+    def test_views_are_isolated(self, shared_data):
+        """Test that one session's mutation is invisible to another."""
+        store = DataStore(lambda: (shared_data, []))
+        session_a = store.views()
+        session_a["density"]["County"] = "Mutated"
+
+        session_b = store.views()
+        assert (session_b["density"]["County"] != "Mutated").all()
+
+    def test_update_swaps_in_new_version(self, shared_data):
+        """Test that update() creates a new version and keeps the old snapshot intact."""
+        store = DataStore(lambda: (shared_data, []))
+        old = store.snapshot()
+
+        def updater(snapshot):
+            data = snapshot.views()
+            data["density"] = data["density"].iloc[:2]
+            return data, ["⚠️ updated"], {"batch.csv": {"size": 1}}
+
+        new = store.update(updater)
+
+        assert new.version == old.version + 1
+        assert len(new.get("density")) == 2
+        assert len(old.get("density")) == len(shared_data["density"])
+        assert new.sources == {"batch.csv": {"size": 1}}
+        assert store.snapshot() is new
+
+    def test_update_without_changes_keeps_version(self, shared_data):
+        """Test that an updater returning None leaves the snapshot in place."""
+        store = DataStore(lambda: (shared_data, []))
+        old = store.snapshot()
+        assert store.update(lambda snapshot: None) is old
+        assert store.version == old.version
+
+
+    def test_replace_swaps_in_prebuilt_snapshot(self, shared_data):
+        """Test that replace() publishes data built outside the store."""
+        store = DataStore(lambda: (shared_data, []))
+        old = store.snapshot()
+
+        new = store.replace({"density": shared_data["density"].iloc[:1]}, [], {"a.csv": {"size": 2}})
+
+        assert new.version == old.version + 1
+        assert store.snapshot() is new
+        assert new.created_at >= old.created_at
+        assert len(old.get("density")) == len(shared_data["density"])
+
+class TestLoadData:
+    """Tests for load_data() backed by the shared store."""
+
+    def test_load_data_returns_views(self, mock_data_dir, monkeypatch):
+        """Test that load_data() serves views of one shared copy."""
+        monkeypatch.setattr(data_loader, "get_data_dir", lambda: str(mock_data_dir))
+        monkeypatch.setenv("DATASET_CACHE", "false")
+        monkeypatch.setenv("DATA_WATCH_INTERVAL", "0")
+        data_loader.get_data_store.clear()
+        try:
+            first = data_loader.load_data()
+            second = data_loader.load_data()
+        finally:
+            data_loader.get_data_store.clear()
+
+        assert first["tweet_sentiment"] is not second["tweet_sentiment"]
+        assert np.shares_memory(
+            first["tweet_sentiment"]["BERT_Sentiment"].to_numpy(),
+            second["tweet_sentiment"]["BERT_Sentiment"].to_numpy(),
+        )
@@ -4,10 +4,14 @@ Tests for the data_utils module.
 import pytest
 import pandas as pd
 from app.utils.data_utils import (
+    COUNTY_KEY_COLUMN,
     normalize_county_name,
     add_county_suffix,
     normalize_dataframe_counties,
-    validate_county_names
+    validate_county_names,
+    normalize_county_codes,
+    build_county_dimension,
+    add_county_key
 )
 
 
@@ -220,3 +224,42 @@ class TestValidateCountyNames:
         is_valid, invalid = validate_county_names(df, known_counties=known)
         assert is_valid is True
         assert invalid == []
+
+
+class TestCountyDimension:
+    """Tests for the canonical county key helpers."""
+
+    def test_normalize_county_codes(self):
+        """Test that variants of one county share a code and NaN maps to -1."""
+        counties = pd.Series(["Los Angeles County", "Alameda", None, "Alameda County"])
+        codes, names = normalize_county_codes(counties)
+        assert names.tolist() == ["Alameda", "Los Angeles"]
+        assert codes.tolist() == [1, 0, -1, 0]
+
+    def test_build_county_dimension(self):
+        """Test that the dimension merges all columns and extra names."""
+        dimension = build_county_dimension(
+            [pd.Series(["Los Angeles County"]), pd.Series(["Alameda", None])],
+            extra_names=["Orange", None],
+        )
+        assert dimension.tolist() == ["Alameda", "Los Angeles", "Orange"]
+        assert dimension.name == COUNTY_KEY_COLUMN
+
+    def test_add_county_key_codes_are_shared(self):
+        """Test that key codes agree across datasets with different formats."""
+        with_suffix = pd.DataFrame({"County": ["Los Angeles County", "Orange County"]})
+        without_suffix = pd.DataFrame({"County": pd.Categorical(["Orange", "Los Angeles"])})
+        dimension = build_county_dimension([with_suffix["County"], without_suffix["County"]])
+
+        a = add_county_key(with_suffix, dimension)
+        b = add_county_key(without_suffix, dimension)
+
+        assert a[COUNTY_KEY_COLUMN].cat.codes.tolist() == [0, 1]
+        assert b[COUNTY_KEY_COLUMN].cat.codes.tolist() == [1, 0]
+        assert COUNTY_KEY_COLUMN not in with_suffix.columns
+
+    def test_add_county_key_unknown_county(self):
+        """Test that counties outside the dimension get a missing key."""
+        df = pd.DataFrame({"County": ["Atlantis County", "Orange"]})
+        result = add_county_key(df, pd.Index(["Orange"]))
+        assert result[COUNTY_KEY_COLUMN].isna().tolist() == [True, False]
@@ -0,0 +1,135 @@
+"""
+Tests for the data_watcher module.
+"""
+import time
+
+import pandas as pd
+import pytest
+from app.utils.data_loader import DataLoadError, load_snapshot_contents, read_datasets
+from app.utils.data_store import DataStore
+from app.utils.data_watcher import DataWatcher, get_watch_interval, source_fingerprints
+
+
+@pytest.fixture
+def data_dir(mock_data_dir, monkeypatch):
+    """Sample data directory, loaded without the Parquet cache."""
+    monkeypatch.setenv("DATASET_CACHE", "false")
+    return mock_data_dir
+
+
+def make_watcher(data_dir, interval=30.0):
+    def builder():
+        return load_snapshot_contents(str(data_dir), interactive=False)
+
+    store = DataStore(builder)
+    store.snapshot()
+    return store, DataWatcher(store, str(data_dir), builder, interval=interval)
+
+
+def add_dispensary(data_dir, sample_dispensaries_data):
+    """Rewrite Dispensaries.csv with one more row."""
+    extra = sample_dispensaries_data.iloc[[0]].assign(**{"License Number": "C10-NEW"})
+    pd.concat([sample_dispensaries_data, extra]).to_csv(
+        data_dir / "Dispensaries.csv", index=False
+    )
+
+
+class TestWatchInterval:
+    """Tests for get_watch_interval."""
+
+    def test_default(self, monkeypatch):
+        monkeypatch.delenv("DATA_WATCH_INTERVAL", raising=False)
+        assert get_watch_interval() == 30.0
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setenv("DATA_WATCH_INTERVAL", "0")
+        assert get_watch_interval() == 0
+
+
+class TestSnapshotSources:
+    """Tests for the fingerprints recorded with each snapshot."""
+
+    def test_snapshot_records_all_inputs(self, data_dir):
+        """Test that a fresh snapshot matches the files on disk."""
+        store, _ = make_watcher(data_dir)
+        assert store.snapshot().sources == source_fingerprints(str(data_dir))
+
+    def test_background_load_raises(self, data_dir):
+        """Test that non-interactive loads raise instead of stopping the run."""
+        (data_dir / "Dispensary_Density.csv").unlink()
+        with pytest.raises(DataLoadError, match="Dispensary_Density.csv"):
+            read_datasets(str(data_dir), interactive=False)
+
+
+class TestDataWatcher:
+    """Tests for DataWatcher."""
+
+    def test_unchanged_files(self, data_dir):
+        """Test that polling without changes does nothing."""
+        store, watcher = make_watcher(data_dir)
+        assert watcher.check() is None
+        assert watcher.check() is None
+        assert store.version == 1
+
+    def test_changed_file_is_reloaded_after_settling(self, data_dir, sample_dispensaries_data):
+        """Test that a changed file is swapped in once it stops changing."""
+        store, watcher = make_watcher(data_dir)
+        old = store.snapshot()
+        add_dispensary(data_dir, sample_dispensaries_data)
+
+        assert watcher.check() is None  # Still settling
+        assert watcher.check() == "reloaded"
+
+        assert store.version == old.version + 1
+        assert len(store.snapshot().get("dispensaries")) == 7
+        # Sessions holding the old snapshot are unaffected
+        assert len(old.get("dispensaries")) == 6
+
+    def test_new_batch_is_appended(self, data_dir):
+        """Test that a new tweet batch is appended rather than reloaded."""
+        store, watcher = make_watcher(data_dir)
+        pd.DataFrame({"County": ["Kern"], "BERT_Sentiment": ["4 stars"]}).to_csv(
+            data_dir / "Tweet_Sentiment_1.csv", index=False
+        )
+
+        watcher.check()
+        assert watcher.check() == "appended"
+        assert len(store.snapshot().get("tweet_sentiment")) == 7
+
+    def test_removed_batch_triggers_reload(self, data_dir):
+        """Test that removing an applied batch rebuilds without it."""
+        batch = data_dir / "Tweet_Sentiment_1.csv"
+        pd.DataFrame({"County": ["Kern"], "BERT_Sentiment": ["4 stars"]}).to_csv(batch, index=False)
+        store, watcher = make_watcher(data_dir)
+        assert len(store.snapshot().get("tweet_sentiment")) == 7
+
+        batch.unlink()
+        watcher.check()
+        assert watcher.check() == "reloaded"
+        assert len(store.snapshot().get("tweet_sentiment")) == 6
+
+    def test_failed_reload_keeps_serving(self, data_dir):
+        """Test that a broken file leaves the current snapshot in place."""
+        store, watcher = make_watcher(data_dir)
+        pd.DataFrame({"County": ["Kern"]}).to_csv(data_dir / "Dispensaries.csv", index=False)
+
+        watcher.check()
+        assert watcher.check() is None
+        assert watcher.check() is None
+        assert store.version == 1
+        assert len(store.snapshot().get("dispensaries")) == 6
+
+    def test_thread_swaps_in_background(self, data_dir, sample_dispensaries_data):
+        """Test that the polling thread picks up a change on its own."""
+        store, watcher = make_watcher(data_dir, interval=0.02)
+        watcher.start()
+        try:
+            add_dispensary(data_dir, sample_dispensaries_data)
+            deadline = time.time() + 5
+            while store.version == 1 and time.time() < deadline:
+                time.sleep(0.02)
+        finally:
+            watcher.stop(timeout=5)
+
+        assert store.version == 2
+        assert not watcher.is_running
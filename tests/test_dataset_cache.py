@@ -0,0 +1,150 @@
+"""
+Tests for the dataset_cache module.
+"""
+import os
+import pytest
+import pandas as pd
+from app.utils import data_loader
+from app.utils.dataset_cache import (
+    cache_key,
+    clear_cache,
+    read_cached_frame,
+    source_fingerprint,
+    write_cached_frame,
+)
+
+
+@pytest.fixture
+def source_file(tmp_path, sample_density_data):
+    """Write a small CSV source file and return its path."""
+    path = tmp_path / "Dispensary_Density.csv"
+    sample_density_data.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    """Return an empty cache directory path."""
+    return str(tmp_path / "cache")
+
+
+class TestDatasetCache:
+    """Tests for reading and writing cached frames."""
+
+    def test_miss_when_empty(self, source_file, cache_dir):
+        """Test that an empty cache returns None."""
+        assert read_cached_frame("density", source_file, cache_dir) is None
+
+    def test_round_trip(self, source_file, cache_dir, sample_density_data):
+        """Test that a written frame is read back unchanged."""
+        path = write_cached_frame("density", source_file, sample_density_data, cache_dir)
+        assert path is not None and os.path.exists(path)
+
+        cached = read_cached_frame("density", source_file, cache_dir)
+        pd.testing.assert_frame_equal(cached, sample_density_data)
+
+    def test_round_trip_keeps_dtypes_and_attrs(self, source_file, cache_dir):
+        """Test that datetimes, categoricals and attrs survive the cache."""
+        df = pd.DataFrame({
+            "Tweet_Date": pd.date_range("2020-01-01", periods=3),
+            "County": pd.Categorical(["A", "B", "A"]),
+        })
+        df.attrs["synthetic_dates"] = True
+        write_cached_frame("tweet_sentiment", source_file, df, cache_dir)
+
+        cached = read_cached_frame("tweet_sentiment", source_file, cache_dir)
+        assert pd.api.types.is_datetime64_any_dtype(cached["Tweet_Date"])
+        assert isinstance(cached["County"].dtype, pd.CategoricalDtype)
+        assert cached.attrs.get("synthetic_dates") is True
+
+    def test_invalidated_when_source_changes(self, source_file, cache_dir,
+                                             sample_density_data):
+        """Test that modifying the source file invalidates the entry."""
+        write_cached_frame("density", source_file, sample_density_data, cache_dir)
+        old_key = cache_key("density", source_file)
+
+        with open(source_file, "a") as f:
+            f.write("Orange County,2023,1.0,100\n")
+
+        assert cache_key("density", source_file) != old_key
+        assert read_cached_frame("density", source_file, cache_dir) is None
+
+    def test_stale_entries_are_replaced(self, source_file, cache_dir,
+                                        sample_density_data):
+        """Test that writing a new version removes the old cache file."""
+        write_cached_frame("density", source_file, sample_density_data, cache_dir)
+        stat = os.stat(source_file)
+        os.utime(source_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        write_cached_frame("density", source_file, sample_density_data, cache_dir)
+
+        files = [f for f in os.listdir(cache_dir) if f.startswith("density-")]
+        assert len(files) == 1
+
+    def test_not_written_when_source_changes_during_read(self, source_file, cache_dir,
+                                                          sample_density_data):
+        """Test that a frame parsed from old contents is never cached."""
+        fingerprint = source_fingerprint(source_file)
+        with open(source_file, "a") as f:
+            f.write("Orange County,2023,1.0,100\n")
+
+        assert write_cached_frame("density", source_file, sample_density_data,
+                                  cache_dir, fingerprint=fingerprint) is None
+        assert read_cached_frame("density", source_file, cache_dir) is None
+        assert not os.path.exists(cache_dir) or not os.listdir(cache_dir)
+
+    def test_written_under_fingerprint_taken_before_read(self, source_file, cache_dir,
+                                                         sample_density_data):
+        """Test that an unchanged source is cached under the given fingerprint."""
+        fingerprint = source_fingerprint(source_file)
+        write_cached_frame("density", source_file, sample_density_data,
+                           cache_dir, fingerprint=fingerprint)
+
+        cached = read_cached_frame("density", source_file, cache_dir)
+        pd.testing.assert_frame_equal(cached, sample_density_data)
+
+    def test_corrupt_entry_is_ignored(self, source_file, cache_dir,
+                                      sample_density_data):
+        """Test that an unreadable cache file is treated as a miss."""
+        path = write_cached_frame("density", source_file, sample_density_data, cache_dir)
+        with open(path, "wb") as f:
+            f.write(b"not parquet")
+
+        assert read_cached_frame("density", source_file, cache_dir) is None
+
+    def test_disabled_by_environment(self, source_file, cache_dir,
+                                     sample_density_data, monkeypatch):
+        """Test that DATASET_CACHE=false disables reads and writes."""
+        monkeypatch.setenv("DATASET_CACHE", "false")
+        assert write_cached_frame("density", source_file, sample_density_data, cache_dir) is None
+        assert read_cached_frame("density", source_file, cache_dir) is None
+
+    def test_missing_source_is_a_miss(self, tmp_path, cache_dir):
+        """Test that a missing source file never raises."""
+        missing = str(tmp_path / "missing.csv")
+        assert read_cached_frame("density", missing, cache_dir) is None
+
+    def test_clear_cache(self, source_file, cache_dir, sample_density_data):
+        """Test that clear_cache removes all entries."""
+        write_cached_frame("density", source_file, sample_density_data, cache_dir)
+        assert clear_cache(cache_dir) == 1
+        assert read_cached_frame("density", source_file, cache_dir) is None
+
+
+class TestLoadDataUsesCache:
+    """Tests for the cache integration in read_datasets()."""
+
+    def test_second_load_skips_csv_parse(self, mock_data_dir, monkeypatch):
+        """Test that a warm cache serves frames without calling read_csv."""
+        monkeypatch.setattr(data_loader, "get_data_dir", lambda: str(mock_data_dir))
+        monkeypatch.setenv("DATASET_CACHE_DIR", str(mock_data_dir / ".cache"))
+
+        first = data_loader.read_datasets()[0]
+
+        def fail_read_csv(*args, **kwargs):
+            raise AssertionError("read_csv called despite warm cache")
+
+        monkeypatch.setattr(data_loader.pd, "read_csv", fail_read_csv)
+        second = data_loader.read_datasets()[0]
+
+        for name in ("dispensaries", "density", "tweet_sentiment"):
+            pd.testing.assert_frame_equal(first[name], second[name])
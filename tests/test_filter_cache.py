@@ -0,0 +1,163 @@
+"""
+Tests for the filter_cache module.
+"""
+import pytest
+import pandas as pd
+from app.utils.data_store import DataSnapshot
+from app.utils.filter_cache import FilterCache, estimate_nbytes, filter_dataset, filters_key
+
+
+@pytest.fixture
+def snapshot(sample_dispensaries_data, sample_density_data, sample_sentiment_data):
+    """Build a snapshot like the one held by the data store."""
+    return DataSnapshot(
+        {
+            "dispensaries": sample_dispensaries_data,
+            "density": sample_density_data,
+            "tweet_sentiment": sample_sentiment_data,
+        },
+        version=1,
+    )
+
+
+class TestFiltersKey:
+    """Tests for filters_key."""
+
+    def test_key_order_does_not_matter(self):
+        """Test that dictionary key order does not change the key."""
+        a = {"years": (2020, 2022), "counties": ["Orange"]}
+        b = {"counties": ["Orange"], "years": (2020, 2022)}
+        assert filters_key(a) == filters_key(b)
+
+    def test_selection_order_does_not_matter(self):
+        """Test that the order of selected counties does not change the key."""
+        a = {"counties": ["Orange", "Los Angeles"]}
+        b = {"counties": ["Los Angeles", "Orange"]}
+        assert filters_key(a) == filters_key(b)
+
+    def test_range_order_matters(self):
+        """Test that year ranges are not treated as unordered selections."""
+        assert filters_key({"years": (2020, 2022)}) != filters_key({"years": (2022, 2020)})
+
+    def test_different_filters_differ(self):
+        """Test that different selections produce different keys."""
+        assert filters_key({"counties": ["Orange"]}) != filters_key({"counties": ["Kern"]})
+
+
+class TestFilterCache:
+    """Tests for the FilterCache class."""
+
+    def test_hits_and_misses_are_counted(self):
+        """Test the hit and miss counters."""
+        cache = FilterCache()
+        assert cache.get("a") is None
+        cache.put("a", pd.DataFrame({"x": [1]}))
+        assert cache.get("a") is not None
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_lru_eviction_by_entries(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = FilterCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert "a" in cache and "c" in cache
+        assert "b" not in cache
+        assert cache.stats()["evictions"] == 1
+
+    def test_memory_cap(self):
+        """Test that entries are evicted to stay under the memory cap."""
+        df = pd.DataFrame({"x": range(1000)})
+        size = estimate_nbytes(df)
+        cache = FilterCache(max_bytes=int(size * 2.5))
+
+        for key in "abc":
+            cache.put(key, df)
+
+        assert len(cache) == 2
+        assert cache.nbytes <= cache.max_bytes
+        assert "a" not in cache
+
+    def test_oversized_value_is_not_stored(self):
+        """Test that a value larger than the cap is never cached."""
+        cache = FilterCache(max_bytes=10)
+        assert cache.put("a", pd.DataFrame({"x": range(100)})) is False
+        assert len(cache) == 0
+
+    def test_get_or_compute_computes_once(self):
+        """Test that repeated lookups reuse the computed value."""
+        cache = FilterCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return pd.DataFrame({"x": [1, 2]})
+
+        cache.get_or_compute("k", compute)
+        cache.get_or_compute("k", compute)
+        assert len(calls) == 1
+
+    def test_rekey_onto_existing_key_keeps_size(self):
+        """Test that entries renamed onto one key leave a single, counted entry."""
+        df = pd.DataFrame({"x": range(1000)})
+        cache = FilterCache()
+        cache.put(("v1", "a"), df)
+        cache.put(("v2", "a"), df.iloc[:10])
+
+        dropped = cache.rekey(lambda key, tag: ("v2", key[1]))
+
+        assert dropped == 1
+        assert len(cache) == 1
+        assert cache.get(("v2", "a")) is not None and len(cache.get(("v2", "a"))) == 10
+        assert cache.nbytes == estimate_nbytes(df.iloc[:10])
+
+
+class TestFilterDataset:
+    """Tests for filter_dataset."""
+
+    def test_matches_direct_filtering(self, snapshot, sample_dispensaries_data):
+        """Test that cached results equal the directly filtered data."""
+        from app.utils.filters import apply_dispensary_filters
+
+        filters = {"years": (2020, 2020), "counties": ["Los Angeles County"]}
+        result = filter_dataset("dispensaries", filters, snapshot, FilterCache())
+        expected = apply_dispensary_filters(sample_dispensaries_data, filters)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_shared_across_calls(self, snapshot):
+        """Test that a second page with the same filters hits the cache."""
+        cache = FilterCache()
+        filters = {"counties": ["Orange County"]}
+
+        filter_dataset("tweet_sentiment", filters, snapshot, cache)
+        filter_dataset("tweet_sentiment", {"counties": ["Orange County"]}, snapshot, cache)
+
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_new_version_misses(self, snapshot):
+        """Test that a reloaded data store does not serve stale results."""
+        cache = FilterCache()
+        filter_dataset("density", {}, snapshot, cache)
+
+        reloaded = DataSnapshot({"density": snapshot.get("density")}, version=2)
+        filter_dataset("density", {}, reloaded, cache)
+
+        assert cache.stats()["misses"] == 2
+
+    def test_results_are_read_only(self, snapshot):
+        """Test that modifying a returned frame does not change the cache."""
+        cache = FilterCache()
+        filters = {"years": (2020, 2020)}
+
+        first = filter_dataset("dispensaries", filters, snapshot, cache)
+        first["County"] = "changed"
+        second = filter_dataset("dispensaries", filters, snapshot, cache)
+
+        assert "changed" not in second["County"].tolist()
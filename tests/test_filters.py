@@ -1,15 +1,21 @@
 """
 Tests for the filters module.
 """
+import tracemalloc
+
+import numpy as np
 import pytest
 import pandas as pd
 from app.utils.filters import (
     apply_dispensary_filters,
     apply_sentiment_filters,
     apply_density_filters,
+    get_dispensary_mask,
+    get_sentiment_mask,
     get_filter_summary,
     has_active_filters
 )
+from app.utils.data_utils import add_county_key, build_county_dimension
 
 
 class TestApplyDispensaryFilters:
@@ -118,6 +124,116 @@ class TestApplyDispensaryFilters:
         assert len(result) == len(data)
 
 
+class TestCountyKeyFiltering:
+    """Tests for county filtering through the precomputed County_Key."""
+
+    def _with_key(self, df):
+        dimension = build_county_dimension([df["County"]])
+        return add_county_key(df, dimension)
+
+    def test_key_and_fallback_agree(self, sample_dispensaries_data):
+        """Test that keyed and unkeyed frames filter identically."""
+        keyed = self._with_key(sample_dispensaries_data)
+        filters = {"counties": ["Los Angeles", "San Diego County"]}
+
+        with_key = apply_dispensary_filters(keyed, filters)
+        without_key = apply_dispensary_filters(sample_dispensaries_data, filters)
+
+        assert with_key.index.tolist() == without_key.index.tolist() == [0, 2, 3, 5]
+
+    def test_key_filtering_does_not_use_county_column(self, sample_sentiment_data):
+        """Test that the key, not the raw County strings, drives filtering."""
+        keyed = self._with_key(sample_sentiment_data)
+        keyed["County"] = "overwritten"
+        result = apply_sentiment_filters(keyed, {"counties": ["Orange County"]})
+        assert len(result) == 1
+
+    def test_unknown_county_matches_nothing(self, sample_density_data):
+        """Test that a county outside the dimension yields an empty result."""
+        keyed = self._with_key(sample_density_data)
+        result = apply_density_filters(keyed, {"county": "Atlantis County"})
+        assert len(result) == 0
+
+
+def _legacy_dispensary_filters(df, filters):
+    """Reference implementation: defensive copy plus one copy per filter step."""
+    filtered = df.copy()
+    start_year, end_year = filters["years"]
+    filtered = filtered[(filtered["Year"] >= start_year) & (filtered["Year"] <= end_year)]
+    filtered = filtered[filtered["License Designation"].isin(filters["license_types"])]
+    return filtered[filtered["County_Key"].isin(filters["counties"])]
+
+
+def _peak_allocation(func):
+    """Peak traced memory (bytes) allocated while running func."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class TestCombinedMask:
+    """Tests for the single-mask filter pipeline."""
+
+    def test_no_filters_returns_none_mask(self, sample_dispensaries_data):
+        """Test that no active filter yields no mask at all."""
+        assert get_dispensary_mask(sample_dispensaries_data, {}) is None
+        assert get_sentiment_mask(sample_dispensaries_data, {"counties": ["All Counties"]}) is None
+
+    def test_mask_matches_filtered_rows(self, sample_dispensaries_data):
+        """Test that the mask selects exactly the rows the filter returns."""
+        filters = {"years": (2020, 2021), "counties": ["Los Angeles County"]}
+        mask = get_dispensary_mask(sample_dispensaries_data, filters)
+
+        assert isinstance(mask, np.ndarray) and mask.dtype == bool
+        result = apply_dispensary_filters(sample_dispensaries_data, filters)
+        assert result.index.tolist() == sample_dispensaries_data.index[mask].tolist()
+
+    def test_unfiltered_result_does_not_modify_source(self, sample_dispensaries_data):
+        """Test that writing to an unfiltered result leaves the source intact."""
+        result = apply_dispensary_filters(sample_dispensaries_data, {})
+        result["County"] = "changed"
+        assert "changed" not in sample_dispensaries_data["County"].tolist()
+
+    def test_missing_year_never_matches(self):
+        """Test that rows with a missing year are excluded by a year filter."""
+        df = pd.DataFrame({"Year": pd.array([2020, None, 2021], dtype="Int16")})
+        result = apply_sentiment_filters(df, {"years": (2018, 2024)})
+        assert result.index.tolist() == [0, 2]
+
+    def test_allocates_less_than_sequential_copies(self):
+        """Test that a 1M-row filter allocates well under the copy-per-step path."""
+        n_rows = 1_000_000
+        rng = np.random.default_rng(0)
+        counties = pd.Index([f"County {i}" for i in range(58)], name="County_Key")
+        county_codes = rng.integers(0, 58, n_rows)
+        df = pd.DataFrame({
+            "Year": pd.array(rng.integers(2018, 2025, n_rows), dtype="Int16"),
+            "License Designation": pd.Categorical.from_codes(
+                rng.integers(0, 3, n_rows), ["Adult-Use", "Medicinal", "Both"]
+            ),
+            "County": pd.Categorical.from_codes(county_codes, counties),
+            "County_Key": pd.Categorical.from_codes(county_codes, counties),
+            "Value": rng.random(n_rows),
+        })
+        filters = {
+            "years": (2019, 2023),
+            "license_types": ["Adult-Use", "Both"],
+            "counties": [f"County {i}" for i in range(40)],
+        }
+
+        expected = _legacy_dispensary_filters(df, filters)
+        result = apply_dispensary_filters(df, filters)
+        assert result.index.equals(expected.index)
+
+        legacy_peak = _peak_allocation(lambda: _legacy_dispensary_filters(df, filters))
+        masked_peak = _peak_allocation(lambda: apply_dispensary_filters(df, filters))
+        assert masked_peak < legacy_peak * 0.75
+
+
 class TestApplySentimentFilters:
     """Tests for apply_sentiment_filters function."""
 
@@ -0,0 +1,175 @@
+"""
+Tests for the geometry module.
+"""
+import json
+
+import numpy as np
+import pytest
+from app.utils.geometry import (
+    LEVELS,
+    CountyGeometries,
+    build_topology,
+    load_county_geometries,
+    topology_path,
+    write_topology,
+)
+
+
+def wiggly_edge(n=200):
+    """Points along x=0 from y=0 to y=1 with small alternating offsets."""
+    y = np.linspace(0, 1, n)
+    x = 0.002 * np.sin(np.arange(n) * 1.3)
+    x[0] = x[-1] = 0
+    return np.column_stack([x, y]).tolist()
+
+
+def polygon(name, ring):
+    return {
+        "type": "Feature",
+        "properties": {"NAME": name, "ALAND": 1},
+        "geometry": {"type": "Polygon", "coordinates": [ring]},
+    }
+
+
+@pytest.fixture
+def neighbours():
+    """Two counties sharing a detailed boundary, plus a tiny island county."""
+    edge = wiggly_edge()
+    west = [[-1, 1], [-1, 0]] + edge + [[-1, 1]]
+    east = edge[::-1] + [[1, 0], [1, 1], edge[-1]]
+    island = [[2, 0], [2.0001, 0], [2.0001, 0.0001], [2.00005, 0.00012], [2, 0.0001], [2, 0]]
+    return {
+        "type": "FeatureCollection",
+        "features": [polygon("West", west), polygon("East", east), polygon("Island", island)],
+    }
+
+
+def rings(level, name):
+    feature = next(f for f in level["features"] if f["properties"]["NAME"] == name)
+    return feature["geometry"]["coordinates"]
+
+
+class TestBuildTopology:
+    """Tests for build_topology."""
+
+    def test_shared_boundary_is_stored_once(self, neighbours):
+        """Test that the common edge becomes one arc used by both counties."""
+        topology = build_topology(neighbours)
+        west, east, _ = topology["objects"]["counties"]["geometries"]
+
+        shared = set(a if a >= 0 else ~a for a in west["arcs"][0]) & set(
+            a if a >= 0 else ~a for a in east["arcs"][0]
+        )
+        assert len(shared) == 1
+        # The shared arc is the only one long enough to hold the wiggly edge
+        assert len(topology["arcs"][shared.pop()]) == 200
+
+    def test_identical_rings_are_shared(self):
+        """Test that an enclave and the hole around it share one arc."""
+        inner = [[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]
+        outer = [[-1, -1], [2, -1], [2, 2], [-1, 2], [-1, -1]]
+        geojson = {"type": "FeatureCollection", "features": [
+            {"type": "Feature", "properties": {"NAME": "Ring"},
+             "geometry": {"type": "Polygon", "coordinates": [outer, inner[::-1]]}},
+            polygon("Enclave", inner),
+        ]}
+        topology = build_topology(geojson)
+        ring, enclave = topology["objects"]["counties"]["geometries"]
+
+        assert len(topology["arcs"]) == 2
+        assert ring["arcs"][1] == [~enclave["arcs"][0][0]]
+
+
+class TestCountyGeometries:
+    """Tests for CountyGeometries."""
+
+    def test_full_level_round_trips(self, neighbours):
+        """Test that the full level reproduces the input within quantization."""
+        level = CountyGeometries.from_geojson(neighbours).level("full")
+        original = np.asarray(neighbours["features"][0]["geometry"]["coordinates"][0])
+        result = np.asarray(rings(level, "West")[0])
+
+        # Rings may start at a different vertex (a junction)
+        assert result.shape == original.shape
+        start = np.argmin(np.hypot(*(result[:-1] - original[0]).T))
+        np.testing.assert_allclose(np.roll(result[:-1], -start, axis=0), original[:-1], atol=1e-4)
+
+    def test_coarser_levels_are_smaller(self, neighbours):
+        """Test that each level ships fewer bytes than the previous one."""
+        geometries = CountyGeometries.from_geojson(neighbours)
+        sizes = [len(json.dumps(geometries.level(name))) for name, _ in LEVELS]
+        assert sizes == sorted(sizes, reverse=True)
+        assert sizes[-1] < sizes[0] / 3
+
+    @pytest.mark.parametrize("name", [name for name, _ in LEVELS])
+    def test_neighbours_keep_identical_boundary(self, neighbours, name):
+        """Test that simplification opens no gap between neighbours."""
+        level = CountyGeometries.from_geojson(neighbours).level(name)
+        west = {tuple(p) for p in rings(level, "West")[0] if p[0] > -1}
+        east = {tuple(p) for p in rings(level, "East")[0] if p[0] < 1}
+        assert west == east
+
+    @pytest.mark.parametrize("name", [name for name, _ in LEVELS])
+    def test_rings_stay_valid(self, neighbours, name):
+        """Test that every ring stays closed with at least four points."""
+        level = CountyGeometries.from_geojson(neighbours).level(name)
+        for feature in level["features"]:
+            for ring in feature["geometry"]["coordinates"]:
+                assert len(ring) >= 4
+                assert ring[0] == ring[-1]
+
+    def test_only_matching_properties_are_kept(self, neighbours):
+        """Test that unused properties are not shipped to the browser."""
+        level = CountyGeometries.from_geojson(neighbours).level("low")
+        assert level["features"][0]["properties"] == {"NAME": "West"}
+
+    def test_zoom_selects_finer_levels(self, neighbours):
+        """Test that zooming in never selects a coarser level."""
+        geometries = CountyGeometries.from_geojson(neighbours)
+        order = [name for name, _ in LEVELS]
+        selected = [order.index(geometries.select_level(z)) for z in (0.1, 1, 4, 16, 1000)]
+
+        assert selected == sorted(selected, reverse=True)
+        assert geometries.select_level(1000) == "full"
+        assert geometries.for_zoom(1) is geometries.level(geometries.select_level(1))
+
+    def test_multipolygon(self, sample_geojson):
+        """Test that MultiPolygon features keep all their parts."""
+        square = sample_geojson["features"][0]["geometry"]["coordinates"]
+        shifted = [[[x + 2, y] for x, y in square[0]]]
+        sample_geojson["features"][0]["geometry"] = {
+            "type": "MultiPolygon", "coordinates": [square, shifted]
+        }
+        level = CountyGeometries.from_geojson(sample_geojson).level("low")
+        geometry = level["features"][0]["geometry"]
+
+        assert geometry["type"] == "MultiPolygon"
+        assert len(geometry["coordinates"]) == 2
+
+
+class TestPrecomputedTopology:
+    """Tests for write_topology and load_county_geometries."""
+
+    def test_precomputed_topology_is_used(self, tmp_path, neighbours, monkeypatch):
+        """Test that a current topology file skips the build."""
+        path = tmp_path / "counties.geojson"
+        path.write_text(json.dumps(neighbours))
+        assert write_topology(str(path)) == topology_path(str(path))
+
+        monkeypatch.setattr(
+            "app.utils.geometry.build_topology",
+            lambda *args: pytest.fail("topology was rebuilt"),
+        )
+        geometries = load_county_geometries(str(path))
+        assert len(geometries) == 3
+
+    def test_outdated_topology_is_rebuilt(self, tmp_path, neighbours):
+        """Test that a topology of older GeoJSON content is ignored."""
+        path = tmp_path / "counties.geojson"
+        path.write_text(json.dumps(neighbours))
+        write_topology(str(path))
+
+        neighbours["features"] = neighbours["features"][:1]
+        path.write_text(json.dumps(neighbours))
+
+        assert len(load_county_geometries(str(path))) == 1
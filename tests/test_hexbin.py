@@ -0,0 +1,104 @@
+"""
+Tests for the hexbin module.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.hexbin import (
+    HEX_RESOLUTIONS,
+    DispensaryHexbins,
+    hex_cells,
+    hex_centers,
+    hex_polygons,
+)
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Longitude": rng.normal(-118.3, 0.4, 5000),
+        "Latitude": rng.normal(34.1, 0.3, 5000),
+    })
+
+
+def nearest_center(lon, lat, size):
+    """Brute-force nearest hexagon center among the candidates around each point."""
+    q, r = hex_cells(lon, lat, size)
+    candidates = [(q + dq, r + dr) for dq in (-1, 0, 1) for dr in (-1, 0, 1)]
+    distances = []
+    for cq, cr in candidates:
+        clon, clat = hex_centers(cq, cr, size)
+        distances.append(np.hypot((clon - lon) * np.cos(np.radians(37)), clat - lat))
+    best = np.argmin(distances, axis=0)
+    return np.choose(best, [c[0] for c in candidates]), np.choose(best, [c[1] for c in candidates])
+
+
+class TestHexCells:
+    """Tests for the hexagon assignment."""
+
+    @pytest.mark.parametrize("resolution", list(HEX_RESOLUTIONS))
+    def test_points_get_nearest_center(self, points, resolution):
+        """Test that every point is binned into the hexagon with the nearest center."""
+        size = HEX_RESOLUTIONS[resolution]
+        lon, lat = points["Longitude"].to_numpy(), points["Latitude"].to_numpy()
+        q, r = hex_cells(lon, lat, size)
+        expected_q, expected_r = nearest_center(lon, lat, size)
+
+        np.testing.assert_array_equal(q, expected_q)
+        np.testing.assert_array_equal(r, expected_r)
+
+    def test_polygons_surround_centers(self):
+        """Test that hexagon outlines are closed rings around their centers."""
+        rings = hex_polygons(np.array([3]), np.array([-2]), 0.1)
+        lon, lat = hex_centers(3, -2, 0.1)
+
+        assert rings.shape == (1, 7, 2)
+        np.testing.assert_allclose(rings[0, 0], rings[0, -1])
+        np.testing.assert_allclose(rings[0, :-1].mean(axis=0), [lon, lat])
+
+
+class TestDispensaryHexbins:
+    """Tests for DispensaryHexbins."""
+
+    def test_counts_cover_every_located_point(self, points):
+        """Test that counts add up and points without coordinates are skipped."""
+        points.loc[:9, "Latitude"] = np.nan
+        hexbins = DispensaryHexbins.from_frame(points)
+
+        for resolution in HEX_RESOLUTIONS:
+            cells = hexbins.counts(resolution)
+            assert cells["Count"].sum() == len(points) - 10
+            assert cells["Hex_ID"].is_unique
+        assert len(hexbins.counts(3)) > len(hexbins.counts(0))
+
+    def test_filtered_counts(self, points):
+        """Test that a filtered subset is counted without re-binning."""
+        hexbins = DispensaryHexbins.from_frame(points)
+        subset = points[points["Longitude"] < -118.3]
+
+        cells = hexbins.counts(2, subset.index)
+        expected = DispensaryHexbins.from_frame(subset).counts(2)
+
+        pd.testing.assert_series_equal(
+            cells.set_index("Hex_ID")["Count"].sort_index(),
+            expected.set_index("Hex_ID")["Count"].sort_index(),
+        )
+
+    def test_without_coordinates(self):
+        """Test that frames without coordinates have no bins."""
+        assert DispensaryHexbins.from_frame(pd.DataFrame({"County": ["Kern"]})) is None
+
+    def test_binning_is_fast(self):
+        """Test that binning 200k points at all resolutions stays sub-second."""
+        rng = np.random.default_rng(1)
+        frame = pd.DataFrame({
+            "Longitude": rng.uniform(-124, -114, 200_000),
+            "Latitude": rng.uniform(32.5, 42, 200_000),
+        })
+        start = time.perf_counter()
+        hexbins = DispensaryHexbins.from_frame(frame)
+        hexbins.counts(3, frame.index[::3])
+        assert time.perf_counter() - start < 1.0
@@ -0,0 +1,85 @@
+"""
+Tests for the inference_backends module.
+"""
+import numpy as np
+import pytest
+from app.utils.inference_backends import label_agreement
+
+TEXTS = [
+    "this weed is great",
+    "awful",
+    "i love a good joint but hate the smoke",
+    "bad blunt",
+    "great great great",
+    "the",
+    "not good not good at all",
+    "smoke a joint",
+]
+
+
+class TestLabelAgreement:
+    def test_agreement(self):
+        assert label_agreement(np.array([0, 1, 2, 3]), np.array([0, 1, 2, 4])) == 0.75
+        assert label_agreement(np.array([]), np.array([])) == 1.0
+
+    def test_length_mismatch(self):
+        with pytest.raises(ValueError):
+            label_agreement(np.array([0, 1]), np.array([0]))
+
+
+class TestBackends:
+    @pytest.fixture
+    def reference(self, tiny_star_model):
+        from app.utils.sentiment_scoring import StarRatingModel
+
+        return StarRatingModel(tiny_star_model, threads=1)
+
+    def test_unknown_backend(self, tiny_star_model):
+        from app.utils.sentiment_scoring import StarRatingModel
+
+        with pytest.raises(ValueError, match="unknown backend"):
+            StarRatingModel(tiny_star_model, backend="tpu")
+
+    def test_torch_backend_matches_model(self, reference):
+        import torch
+
+        encoded = reference.tokenizer(TEXTS, padding=True, return_tensors="pt")
+        with torch.inference_mode():
+            expected = reference.model(**encoded).logits.argmax(-1).numpy()
+        assert np.array_equal(reference.predict(TEXTS), expected)
+
+    def test_int8_backend(self, tiny_star_model, reference):
+        from app.utils.inference_backends import check_agreement
+        from app.utils.sentiment_scoring import StarRatingModel
+
+        quantized = StarRatingModel(tiny_star_model, threads=1, backend="int8")
+        assert quantized.model_id.endswith("#int8")
+        assert set(quantized.predict(TEXTS).tolist()) <= set(range(5))
+        result = check_agreement(reference, quantized, TEXTS, min_agreement=0.0)
+        assert 0.0 <= result["agreement"] <= 1.0 and result["texts"] == len(TEXTS)
+
+    def test_onnx_backend_matches_torch(self, tiny_star_model, reference, tmp_path, monkeypatch):
+        pytest.importorskip("onnxruntime")
+        from app.utils.inference_backends import check_agreement
+        from app.utils.sentiment_scoring import StarRatingModel
+
+        monkeypatch.setenv("DATASET_CACHE_DIR", str(tmp_path))
+        exported = StarRatingModel(tiny_star_model, threads=1, backend="onnx")
+        assert list((tmp_path / "onnx").glob("*.onnx"))
+
+        ids = reference.tokenizer(TEXTS, padding=True, return_tensors="np")
+        args = ids["input_ids"].astype(np.int64), ids["attention_mask"].astype(np.int64)
+        np.testing.assert_allclose(exported.backend(*args), reference.backend(*args), atol=1e-4)
+        assert check_agreement(reference, exported, TEXTS)["agreement"] == 1.0
+
+    def test_check_agreement_rejects_disagreeing_backend(self, reference):
+        from app.utils.inference_backends import check_agreement
+
+        class Flipped:
+            backend_name = "flipped"
+
+            def predict(self, texts, **kwargs):
+                return (reference.predict(texts) + 1) % 5
+
+        with pytest.raises(ValueError, match="below the required"):
+            check_agreement(reference, Flipped(), TEXTS)
@@ -0,0 +1,148 @@
+"""
+Tests for the ingest module.
+"""
+import pandas as pd
+import pytest
+from app.utils.data_loader import read_datasets
+from app.utils.data_store import DataStore
+from app.utils.filter_cache import FilterCache, filter_dataset
+from app.utils.ingest import append_rows, find_tweet_batches, ingest_tweet_batches
+
+
+def write_batch(data_dir, name, counties, years=None):
+    """Write a tweet batch file with one row per county."""
+    years = years or [2022] * len(counties)
+    pd.DataFrame({
+        "Year": years,
+        "Month": [6] * len(counties),
+        "County": counties,
+        "BERT_Sentiment": ["5 stars"] * len(counties),
+    }).to_csv(data_dir / name, index=False)
+
+
+@pytest.fixture
+def store(mock_data_dir, monkeypatch):
+    """Data store over the sample data directory (without the Parquet cache)."""
+    monkeypatch.setenv("DATASET_CACHE", "false")
+    return DataStore(lambda: read_datasets(str(mock_data_dir)))
+
+
+class TestFindTweetBatches:
+    """Tests for find_tweet_batches."""
+
+    def test_only_batch_files_are_listed(self, mock_data_dir):
+        """Test that the main file and unrelated files are ignored."""
+        write_batch(mock_data_dir, "Tweet_Sentiment_b.csv", ["Kern"])
+        write_batch(mock_data_dir, "Tweet_Sentiment_a.csv", ["Kern"])
+        (mock_data_dir / "notes.csv").write_text("x\n1\n")
+
+        assert list(find_tweet_batches(str(mock_data_dir))) == [
+            "Tweet_Sentiment_a.csv", "Tweet_Sentiment_b.csv"
+        ]
+
+
+class TestAppendRows:
+    """Tests for append_rows."""
+
+    def test_categoricals_stay_categorical(self):
+        """Test that new category values extend the existing categories."""
+        history = pd.DataFrame({"County": pd.Categorical(["Kern", "Inyo"])})
+        batch = pd.DataFrame({"County": ["Mono"]})
+        result = append_rows(history, batch)
+
+        assert isinstance(result["County"].dtype, pd.CategoricalDtype)
+        assert result["County"].tolist() == ["Kern", "Inyo", "Mono"]
+        assert result.index.tolist() == [0, 1, 2]
+
+
+class TestIngestTweetBatches:
+    """Tests for ingest_tweet_batches."""
+
+    def test_no_batches_is_a_no_op(self, store, mock_data_dir):
+        """Test that the store version is unchanged without batch files."""
+        store.snapshot()
+        assert ingest_tweet_batches(store, str(mock_data_dir), FilterCache()) == []
+        assert store.version == 1
+
+    def test_batch_is_appended_once(self, store, mock_data_dir):
+        """Test that a batch is appended to the rows and the cube exactly once."""
+        before = store.snapshot()
+        write_batch(mock_data_dir, "Tweet_Sentiment_1.csv", ["Orange", "Los Angeles"])
+
+        assert ingest_tweet_batches(store, str(mock_data_dir), FilterCache()) == [
+            "Tweet_Sentiment_1.csv"
+        ]
+        assert ingest_tweet_batches(store, str(mock_data_dir), FilterCache()) == []
+
+        after = store.snapshot()
+        assert after.version == before.version + 1
+        assert len(after.get("tweet_sentiment")) == len(before.get("tweet_sentiment")) + 2
+        assert len(before.get("tweet_sentiment")) == 6
+
+        totals = after.get("sentiment_cube").totals({"counties": ["Orange County"]})
+        assert totals["Records"] == 2
+        assert after.get("sentiment_cube").totals()["Records"] == 8
+
+    def test_history_is_not_reread(self, store, mock_data_dir, monkeypatch):
+        """Test that ingestion never parses the main tweet file again."""
+        store.snapshot()
+        write_batch(mock_data_dir, "Tweet_Sentiment_1.csv", ["Orange"])
+
+        read_paths = []
+        original_read_csv = pd.read_csv
+
+        def tracking_read_csv(path, *args, **kwargs):
+            read_paths.append(str(path))
+            return original_read_csv(path, *args, **kwargs)
+
+        monkeypatch.setattr(pd, "read_csv", tracking_read_csv)
+        ingest_tweet_batches(store, str(mock_data_dir), FilterCache())
+
+        assert [p.rsplit("/", 1)[-1] for p in read_paths] == ["Tweet_Sentiment_1.csv"]
+
+    def test_new_county_extends_dimension(self, store, mock_data_dir):
+        """Test that a county unseen so far becomes filterable."""
+        store.snapshot()
+        write_batch(mock_data_dir, "Tweet_Sentiment_1.csv", ["Mono"])
+        ingest_tweet_batches(store, str(mock_data_dir), FilterCache())
+
+        snapshot = store.snapshot()
+        assert "Mono" in snapshot.get("county_dimension")
+        filtered = filter_dataset("tweet_sentiment", {"counties": ["Mono"]}, snapshot, FilterCache())
+        assert len(filtered) == 1
+
+    def test_invalid_batch_is_reported(self, store, mock_data_dir):
+        """Test that a batch missing columns is skipped with a warning."""
+        store.snapshot()
+        pd.DataFrame({"County": ["Kern"]}).to_csv(
+            mock_data_dir / "Tweet_Sentiment_bad.csv", index=False
+        )
+
+        assert ingest_tweet_batches(store, str(mock_data_dir), FilterCache()) == []
+        assert any("Tweet_Sentiment_bad.csv" in w for w in store.snapshot().warnings)
+        assert len(store.snapshot().get("tweet_sentiment")) == 6
+
+    def test_only_affected_partitions_are_invalidated(self, store, mock_data_dir):
+        """Test that cached results outside the new partitions survive."""
+        cache = FilterCache()
+        snapshot = store.snapshot()
+        untouched = {"counties": ["San Diego County"]}
+        touched = {"counties": ["Orange County"]}
+        other_year = {"counties": ["Orange County"], "years": (2020, 2021)}
+        for filters in (untouched, touched, other_year):
+            filter_dataset("tweet_sentiment", filters, snapshot, cache)
+        filter_dataset("density", {}, snapshot, cache)
+
+        write_batch(mock_data_dir, "Tweet_Sentiment_1.csv", ["Orange"], years=[2022])
+        ingest_tweet_batches(store, str(mock_data_dir), cache)
+        cache.hits = cache.misses = 0
+
+        snapshot = store.snapshot()
+        filter_dataset("tweet_sentiment", untouched, snapshot, cache)
+        filter_dataset("tweet_sentiment", other_year, snapshot, cache)
+        filter_dataset("density", {}, snapshot, cache)
+        assert cache.stats()["hits"] == 3
+
+        result = filter_dataset("tweet_sentiment", touched, snapshot, cache)
+        assert cache.stats()["misses"] == 1
+        assert len(result) == 2
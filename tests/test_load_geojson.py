@@ -5,7 +5,35 @@ import pytest
 import json
 import tempfile
 import os
-from app.utils.load_geojson import load_geojson
+import tracemalloc
+
+from app.utils import load_geojson as load_geojson_module
+from app.utils.load_geojson import (
+    CountyIndex,
+    clear_geojson_store,
+    get_geojson,
+    iter_geojson_features,
+    load_geojson,
+)
+
+
+@pytest.fixture
+def geojson_opens(monkeypatch):
+    """Count how often any .geojson file is opened."""
+    import builtins
+
+    opened = []
+    real_open = builtins.open
+
+    def counting_open(file, *args, **kwargs):
+        if str(file).endswith(".geojson"):
+            opened.append(str(file))
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", counting_open)
+    clear_geojson_store()
+    yield opened
+    clear_geojson_store()
 
 
 class TestLoadGeoJSON:
@@ -196,8 +224,8 @@ class TestLoadGeoJSON:
         with pytest.raises(ValueError, match="Feature 0 missing 'properties' field"):
             load_geojson(str(geojson_file))
 
-    def test_validates_first_5_features_only(self, tmp_path):
-        """Test that only first 5 features are validated."""
+    def test_validates_every_feature(self, tmp_path):
+        """Test that features after the first five are validated too."""
         # Create GeoJSON with 6 features, last one invalid
         features = []
         for i in range(6):
@@ -212,7 +240,7 @@ class TestLoadGeoJSON:
                     }
                 })
             else:
-                # Invalid 6th feature (should not be validated)
+                # Invalid 6th feature
                 features.append({
                     "type": "Feature",
                     # Missing geometry and properties
@@ -227,9 +255,8 @@ class TestLoadGeoJSON:
         with open(geojson_file, 'w') as f:
             json.dump(geojson_data, f)
 
-        # Should not raise error since 6th feature is not validated
-        result = load_geojson(str(geojson_file))
-        assert len(result["features"]) == 6
+        with pytest.raises(ValueError, match="Feature 5 missing 'geometry' field"):
+            load_geojson(str(geojson_file))
 
     def test_multiple_features(self, tmp_path):
         """Test that GeoJSON with multiple features loads correctly."""
@@ -263,3 +290,255 @@ class TestLoadGeoJSON:
         assert len(result["features"]) == 2
         assert result["features"][0]["properties"]["NAME"] == "Los Angeles"
         assert result["features"][1]["properties"]["NAME"] == "San Francisco"
+
+
+def write_counties(path, n, ring_points=50, bad_feature=None):
+    """Write n county features, optionally truncating feature bad_feature."""
+    ring = [[i * 0.001, i * 0.002] for i in range(ring_points)] + [[0.0, 0.0]]
+    with open(path, "w") as f:
+        f.write('{"type": "FeatureCollection", "features": [')
+        for i in range(n):
+            feature = json.dumps({
+                "type": "Feature",
+                "properties": {"NAME": f"County {i}", "GEOID": str(i), "ALAND": i * 10},
+                "geometry": {"type": "Polygon", "coordinates": [ring]},
+            })
+            if i == bad_feature:
+                feature = feature[:-20] + ", }"
+            f.write(("," if i else "") + feature)
+        f.write("]}")
+
+
+class TestStreamingGeoJSON:
+    """Tests for the incremental feature parser."""
+
+    def test_streams_with_bounded_memory(self, tmp_path):
+        """Test that peak memory stays far below the size of the file."""
+        path = tmp_path / "large.geojson"
+        write_counties(path, 4000)
+        size = os.path.getsize(path)
+
+        tracemalloc.start()
+        try:
+            count = sum(1 for _ in iter_geojson_features(str(path), chunk_size=64 * 1024))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert count == 4000
+        assert peak < size / 4
+
+    def test_reports_malformed_feature_number(self, tmp_path):
+        """Test that a malformed feature is reported by number when reached."""
+        path = tmp_path / "broken.geojson"
+        write_counties(path, 1000, bad_feature=700)
+
+        seen = []
+        with pytest.raises(ValueError, match="feature 700"):
+            for feature in iter_geojson_features(str(path), chunk_size=4096):
+                seen.append(feature["properties"]["NAME"])
+        assert len(seen) == 700
+
+    def test_projection(self, tmp_path):
+        """Test that only the requested properties are kept."""
+        path = tmp_path / "counties.geojson"
+        write_counties(path, 3)
+
+        result = load_geojson(str(path), properties=["NAME"])
+        assert result["type"] == "FeatureCollection"
+        assert result["features"][2]["properties"] == {"NAME": "County 2"}
+        assert result.county_index.keys == ["County 0", "County 1", "County 2"]
+
+        names_only = load_geojson(str(path), properties=["NAME"], include_geometry=False)
+        assert names_only["features"][2]["geometry"] is None
+
+    def test_large_files_are_streamed(self, tmp_path, monkeypatch):
+        """Test that files over the threshold give the same result."""
+        path = tmp_path / "counties.geojson"
+        write_counties(path, 20)
+        monkeypatch.setattr(load_geojson_module, "STREAMING_THRESHOLD_BYTES", 0)
+
+        result = load_geojson(str(path))
+        assert result == json.loads(path.read_text())
+        assert list(result.county_index) == list(CountyIndex(result["features"]))
+
+    def test_streamed_load_has_bounded_memory(self, tmp_path, monkeypatch):
+        """Test that a projected load never holds the whole parsed file."""
+        path = tmp_path / "large.geojson"
+        write_counties(path, 2000)
+        monkeypatch.setattr(load_geojson_module, "STREAM_CHUNK_SIZE", 64 * 1024)
+
+        def peak_of(read):
+            tracemalloc.start()
+            try:
+                result = read()
+                return result, tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        _, full_peak = peak_of(lambda: json.loads(path.read_text()))
+        result, peak = peak_of(
+            lambda: load_geojson(str(path), properties=["NAME"], include_geometry=False)
+        )
+
+        assert len(result["features"]) == 2000
+        assert result["features"][1999]["properties"] == {"NAME": "County 1999"}
+        assert peak < full_peak / 4
+
+    @pytest.mark.parametrize("text, message", [
+        ('[1, 2]', "must be a dictionary, got list"),
+        ('{"type": "Feature", "features": []}', "must be a FeatureCollection"),
+        ('{"type": "FeatureCollection"}', "must contain 'features' array"),
+        ('{"type": "FeatureCollection", "features": {}}', "'features' must be a list"),
+        ('{"type": "FeatureCollection", "features": []}', "contains no features"),
+        ('{"type": "FeatureCollection", "features": [1]}', "Feature 0 is not a dictionary"),
+        ('{"type": "FeatureCollection", "features": []', "Invalid JSON"),
+        ('{"type": "FeatureCollection", "features": [1]} x', "Feature 0 is not"),
+        ('{"type": "FeatureCollection", "features": [{"type": "Feature", '
+         '"properties": {}, "geometry": null}]} x', "Invalid JSON"),
+    ])
+    def test_structure_errors(self, tmp_path, text, message):
+        """Test that the streaming path reports the same structure errors."""
+        path = tmp_path / "bad.geojson"
+        path.write_text(text)
+
+        with pytest.raises(ValueError, match=message):
+            list(iter_geojson_features(str(path)))
+
+
+def square(name, x, y, size=1.0):
+    """Feature for an axis-aligned square county."""
+    return {
+        "type": "Feature",
+        "properties": {"NAME": name},
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]]
+        }
+    }
+
+
+class TestCountyIndex:
+    """Tests for the county index built by load_geojson."""
+
+    @pytest.fixture
+    def counties(self, tmp_path):
+        geojson_data = {
+            "type": "FeatureCollection",
+            "features": [
+                square("Los Angeles", -118, 34),
+                square("San Francisco", -123, 37, size=0.5),
+                {
+                    "type": "Feature",
+                    "properties": {"NAME": "Santa Cruz County"},
+                    "geometry": {
+                        "type": "MultiPolygon",
+                        "coordinates": [
+                            [[[0, 0], [2, 0], [2, 2], [0, 2], [0, 0]],
+                             [[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+                            [[[10, 10], [11, 10], [11, 11], [10, 11], [10, 10]]],
+                        ]
+                    }
+                },
+            ]
+        }
+        geojson_file = tmp_path / "counties.geojson"
+        with open(geojson_file, 'w') as f:
+            json.dump(geojson_data, f)
+        return load_geojson(str(geojson_file))
+
+    def test_result_is_still_plain_geojson(self, counties):
+        """Test that the indexed collection serializes like the raw file."""
+        assert isinstance(counties, dict)
+        assert json.loads(json.dumps(counties))["features"][0]["properties"]["NAME"] == "Los Angeles"
+
+    def test_lookup_by_any_name_format(self, counties):
+        """Test that counties are found by their canonical key."""
+        index = counties.county_index
+        assert index.keys == ["Los Angeles", "San Francisco", "Santa Cruz"]
+        assert index.get("Los Angeles County").position == 0
+        assert index.get("  San Francisco County ").name == "San Francisco"
+        assert index.get("Santa Cruz").name == "Santa Cruz County"
+        assert index.get("Atlantis") is None
+        assert "Los Angeles" in index
+
+    def test_bbox_and_centroid(self, counties):
+        """Test the precomputed extent of polygons, holes and multipolygons."""
+        index = counties.county_index
+        los_angeles = index.get("Los Angeles")
+        assert los_angeles.bbox == (-118.0, 34.0, -117.0, 35.0)
+        assert los_angeles.centroid == pytest.approx((-117.5, 34.5))
+
+        # 2x2 square minus its lower-left 1x1 hole (area 3), plus a 1x1 island
+        santa_cruz = index.get("Santa Cruz")
+        assert santa_cruz.bbox == (0.0, 0.0, 11.0, 11.0)
+        expected_x = (4 * 1 - 1 * 0.5 + 1 * 10.5) / 4
+        assert santa_cruz.centroid == pytest.approx((expected_x, expected_x))
+
+    def test_bounds(self, counties):
+        """Test the combined bounding box of selected counties."""
+        index = counties.county_index
+        assert index.bounds(["Los Angeles County", "San Francisco"]) == (-123.0, 34.0, -117.0, 37.5)
+        assert index.bounds(["Atlantis"]) is None
+
+    def test_subset(self, counties):
+        """Test that subsets keep feature order and a matching index."""
+        subset = counties.subset(["San Francisco County", "Los Angeles", "Los Angeles", "Atlantis"])
+
+        assert [f["properties"]["NAME"] for f in subset["features"]] == ["Los Angeles", "San Francisco"]
+        assert subset["features"][0] is counties["features"][0]
+        assert subset.county_index.get("San Francisco").position == 1
+        assert counties.subset(["Los Angeles", "San Francisco", "Santa Cruz"]) is counties
+        assert counties.subset([])["features"] == []
+
+    def test_unindexable_features_are_skipped(self, sample_geojson):
+        """Test that features without a name or polygon are not indexed."""
+        from app.utils.load_geojson import CountyFeatureCollection
+
+        sample_geojson["features"].append({"type": "Feature", "properties": {}, "geometry": None})
+        sample_geojson["features"].append("not a feature")
+        collection = CountyFeatureCollection(sample_geojson)
+
+        assert collection.county_index.keys == ["Los Angeles"]
+
+
+class TestGeoJSONStore:
+    """Tests for the process-wide parsed boundaries."""
+
+    def test_file_is_parsed_once(self, mock_data_dir, geojson_opens):
+        """Test that repeated lookups share one parsed copy."""
+        path = str(mock_data_dir / "California_County_Boundaries.geojson")
+        first = get_geojson(path)
+        assert get_geojson(path) is first
+        assert get_geojson(path) is first
+        assert len(geojson_opens) == 1
+
+    def test_changed_file_is_read_again(self, mock_data_dir, geojson_opens, sample_geojson):
+        """Test that replacing the file replaces the shared copy."""
+        path = mock_data_dir / "California_County_Boundaries.geojson"
+        first = get_geojson(str(path))
+
+        sample_geojson["features"].append(square("Kern", 0, 0))
+        path.write_text(json.dumps(sample_geojson))
+
+        second = get_geojson(str(path))
+        assert second is not first
+        assert second.county_index.keys == ["Los Angeles", "Kern"]
+        assert len(geojson_opens) == 2
+
+    def test_missing_file(self, tmp_path):
+        """Test that a missing file raises like load_geojson."""
+        with pytest.raises(FileNotFoundError, match="GeoJSON file not found"):
+            get_geojson(str(tmp_path / "missing.geojson"))
+
+    def test_data_reloads_do_not_reparse(self, mock_data_dir, geojson_opens, monkeypatch):
+        """Test that reloading the datasets reuses the parsed boundaries."""
+        from app.utils.data_loader import read_datasets
+
+        monkeypatch.setenv("DATASET_CACHE", "false")
+        first, _ = read_datasets(str(mock_data_dir), interactive=False)
+        second, _ = read_datasets(str(mock_data_dir), interactive=False)
+
+        assert second["ca_counties"] is first["ca_counties"]
+        assert second["county_geometries"] is first["county_geometries"]
+        assert len(geojson_opens) == 1
@@ -0,0 +1,219 @@
+"""
+Tests for the model_agreement module and AgreementCube.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.cube import AgreementCube
+from app.utils.data_store import DataSnapshot
+from app.utils.filter_cache import FilterCache
+from app.utils.filters import apply_sentiment_filters
+from app.utils.model_agreement import (
+    PAIRS,
+    agreement_table,
+    cohen_kappa,
+    confusion_counts,
+    confusion_frame,
+    label_codes,
+    row_agreement,
+)
+
+
+@pytest.fixture
+def tweets():
+    """Tweets with correlated, partly missing scores from the three models."""
+    rng = np.random.default_rng(7)
+    n_rows = 3000
+    truth = rng.integers(-1, 2, n_rows)
+    noisy = lambda: np.where(rng.random(n_rows) < 0.3, rng.integers(-1, 2, n_rows), truth)
+
+    vader = noisy() * rng.uniform(0.0, 1.0, n_rows)
+    vader[rng.random(n_rows) < 0.05] = np.nan
+    bert = noisy() * rng.choice([0.5, 1.0], n_rows)
+    bert[rng.random(n_rows) < 0.05] = np.nan
+    gpt = pd.array(noisy(), dtype="Int8")
+    gpt[rng.random(n_rows) < 0.05] = pd.NA
+
+    counties = np.asarray(["Los Angeles County", "San Diego County", "Orange County"])
+    return pd.DataFrame({
+        "VADER_Sentiment": vader.astype(np.float32),
+        "BERT_Sentiment": bert,
+        "GPT_Sentiment": gpt,
+        "Year": rng.integers(2020, 2023, n_rows),
+        "Month": rng.integers(1, 13, n_rows),
+        "County": pd.Categorical(counties[rng.integers(0, 3, n_rows)]),
+    })
+
+
+def reference_label(model, score):
+    """Label of one score, written out per value."""
+    if pd.isna(score):
+        return None
+    threshold = 0.05 if model == "VADER" else 0.0
+    return 1 if score > threshold else -1 if score < -threshold else 0
+
+
+def reference_kappa(labels_a, labels_b):
+    """Cohen's kappa over paired label lists."""
+    n = len(labels_a)
+    observed = sum(a == b for a, b in zip(labels_a, labels_b)) / n
+    expected = sum(labels_a.count(c) * labels_b.count(c) for c in (-1, 0, 1)) / n ** 2
+    return (observed - expected) / (1 - expected)
+
+
+class TestLabels:
+    """Tests for label_codes and row_agreement."""
+
+    def test_labels_match_thresholds(self, tweets):
+        """Test vectorized labels against a per-value mapping."""
+        labels = row_agreement(tweets)
+        for model, column in [("VADER", "VADER_Sentiment"), ("BERT", "BERT_Sentiment"),
+                              ("GPT", "GPT_Sentiment")]:
+            expected = [reference_label(model, score) for score in tweets[column]]
+            actual = [None if pd.isna(v) else int(v) for v in labels[f"{model}_Label"]]
+            assert actual == expected
+
+    def test_vader_neutral_band(self):
+        """Test that small VADER scores are neutral."""
+        df = pd.DataFrame({"VADER_Sentiment": [0.04, -0.05, 0.05, -0.5]})
+        assert label_codes(df)["VADER"].tolist() == [1, 1, 1, 0]
+        assert label_codes(pd.DataFrame({"VADER_Sentiment": [0.051]}))["VADER"].tolist() == [2]
+
+    def test_missing_column_is_unlabeled(self):
+        """Test that a missing model column yields no labels."""
+        codes = label_codes(pd.DataFrame({"BERT_Sentiment": [0.5]}))
+        assert codes["GPT"].tolist() == [-1]
+
+    def test_rows_without_bert_rating_are_unlabeled(self):
+        """Test that tweets the loader flagged as unrated are left out."""
+        df = pd.DataFrame({
+            "VADER_Sentiment": [0.5, 0.0, -0.5, 0.0],
+            "BERT_Sentiment": [1.0, 0.0, 0.0, 0.0],
+            "BERT_Labeled": [True, True, False, False],
+            "GPT_Sentiment": pd.array([1, 0, -1, 0], dtype="Int8"),
+            "Year": 2021,
+            "Month": 1,
+            "County": "Kern County",
+        })
+
+        assert label_codes(df)["BERT"].tolist() == [2, 1, -1, -1]
+        totals = AgreementCube.from_frame(df).totals()
+        assert totals["Rated"] == 2
+        assert totals["VADER_BERT_Compared"] == 2
+        assert totals["BERT_GPT_Compared"] == 2
+        assert totals["VADER_GPT_Compared"] == 4
+        assert confusion_frame(totals, "VADER", "BERT").to_numpy().sum() == 2
+
+    def test_agree_flags(self):
+        """Test pair and unanimous flags, with <NA> for missing labels."""
+        df = pd.DataFrame({
+            "VADER_Sentiment": [0.5, 0.5, np.nan],
+            "BERT_Sentiment": [1.0, -0.5, 1.0],
+            "GPT_Sentiment": pd.array([1, 1, 1], dtype="Int8"),
+        })
+        result = row_agreement(df)
+        assert result["VADER_BERT_Agree"].tolist() == [True, False, pd.NA]
+        assert result["BERT_GPT_Agree"].tolist() == [True, False, True]
+        assert result["Unanimous"].tolist() == [True, False, pd.NA]
+
+
+class TestConfusion:
+    """Tests for confusion_counts and cohen_kappa."""
+
+    def test_counts_match_crosstab(self, tweets):
+        """Test per-group counts against pandas crosstab."""
+        codes = label_codes(tweets)
+        groups = tweets["County"].cat.codes.to_numpy()
+        counts = confusion_counts(codes["VADER"], codes["GPT"], groups, 3)
+
+        valid = (codes["VADER"] >= 0) & (codes["GPT"] >= 0)
+        for group in range(3):
+            selected = valid & (groups == group)
+            expected = pd.crosstab(codes["VADER"][selected], codes["GPT"][selected]).reindex(
+                index=range(3), columns=range(3), fill_value=0
+            )
+            np.testing.assert_array_equal(counts[group], expected.to_numpy())
+
+    def test_kappa_matches_reference(self, tweets):
+        """Test kappa against the textbook formula."""
+        labels = row_agreement(tweets)
+        for a, b in PAIRS:
+            both = labels[[f"{a}_Label", f"{b}_Label"]].dropna()
+            expected = reference_kappa(
+                both[f"{a}_Label"].astype(int).tolist(), both[f"{b}_Label"].astype(int).tolist()
+            )
+            codes = label_codes(tweets)
+            assert cohen_kappa(confusion_counts(codes[a], codes[b]))[0] == pytest.approx(expected)
+
+    def test_kappa_edge_cases(self):
+        """Test perfect, empty and single-class matrices."""
+        perfect = np.diag([5, 3, 2])
+        single_class = np.zeros((3, 3))
+        single_class[1, 1] = 4
+        kappa = cohen_kappa(np.stack([perfect, np.zeros((3, 3)), single_class]))
+        assert kappa[0] == pytest.approx(1.0)
+        assert np.isnan(kappa[1]) and np.isnan(kappa[2])
+
+
+class TestAgreementCube:
+    """Tests for AgreementCube."""
+
+    @pytest.mark.parametrize("filters", [{}, {"years": (2021, 2022)}, {"counties": ["Orange"]}])
+    def test_county_rollup_matches_direct_computation(self, tweets, filters):
+        """Test cube roll-ups against labels computed on the filtered rows."""
+        result = AgreementCube.from_frame(tweets).rollup(["County"], filters)
+        filtered = apply_sentiment_filters(tweets, filters)
+        labels = row_agreement(filtered).assign(County=filtered["County"])
+
+        assert result["County"].astype(str).tolist() == sorted(filtered["County"].unique())
+        for county, row in zip(result["County"].astype(str), result.itertuples()):
+            rows = labels[labels["County"] == county]
+            for a, b in PAIRS:
+                agree = rows[f"{a}_{b}_Agree"].dropna()
+                assert getattr(row, f"{a}_{b}_Compared") == len(agree)
+                assert getattr(row, f"{a}_{b}_Agreement") == pytest.approx(agree.mean() * 100)
+                both = rows[[f"{a}_Label", f"{b}_Label"]].dropna().astype(int)
+                assert getattr(row, f"{a}_{b}_Kappa") == pytest.approx(
+                    reference_kappa(both[f"{a}_Label"].tolist(), both[f"{b}_Label"].tolist())
+                )
+            unanimous = rows["Unanimous"].dropna()
+            assert row.Rated == len(unanimous)
+            assert row.Unanimous_Ratio == pytest.approx(unanimous.mean() * 100)
+
+    def test_confusion_frame_of_totals(self, tweets):
+        """Test that the totals' confusion matrix covers all compared tweets."""
+        totals = AgreementCube.from_frame(tweets).totals()
+        frame = confusion_frame(totals, "BERT", "GPT")
+        labels = row_agreement(tweets)
+
+        assert frame.shape == (3, 3)
+        assert frame.to_numpy().sum() == totals["BERT_GPT_Compared"]
+        assert frame.loc["Positive", "Positive"] == (
+            (labels["BERT_Label"] == 1) & (labels["GPT_Label"] == 1)
+        ).sum()
+
+    def test_append_equals_full_build(self, tweets):
+        """Test that folding in a batch matches building over all rows."""
+        full = AgreementCube.from_frame(tweets).rollup(["County", "Year"])
+        appended = AgreementCube.from_frame(tweets.iloc[:2000]).append(tweets.iloc[2000:])
+        result = appended.rollup(["County", "Year"])
+
+        assert isinstance(appended, AgreementCube)
+        pd.testing.assert_frame_equal(result, full, check_dtype=False)
+
+
+class TestAgreementTable:
+    """Tests for agreement_table."""
+
+    def test_cached_per_filter_state(self, tweets):
+        """Test that the county table is computed once per filter state."""
+        snapshot = DataSnapshot({"agreement_cube": AgreementCube.from_frame(tweets)}, version=1)
+        cache = FilterCache()
+        filters = {"years": (2021, 2022)}
+
+        first = agreement_table(filters, snapshot, cache)
+        second = agreement_table(filters, snapshot, cache)
+
+        assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 1
+        pd.testing.assert_frame_equal(first, second)
+        assert first["Rated"].sum() == AgreementCube.from_frame(tweets).totals(filters)["Rated"]
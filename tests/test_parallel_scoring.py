@@ -0,0 +1,155 @@
+"""
+Tests for the parallel_scoring module.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.parallel_scoring import (
+    byte_ranges,
+    output_columns,
+    record_boundaries,
+    score_file_parallel,
+)
+from app.utils.score_cache import ScoreCache
+from app.utils.sentiment_scoring import TextScorer, score_file
+
+
+class LengthScorer(TextScorer):
+    """Score from the text length; importable by the spawned workers."""
+
+    model_id = "length"
+    column = "BERT_Sentiment"
+
+    def score_distinct(self, texts, **kwargs):
+        return np.array([(len(t) % 5 - 2) / 2 for t in texts])
+
+
+class LabelScorer(TextScorer):
+    """Integer label written to a new column."""
+
+    model_id = "label"
+    column = "Length_Label"
+    dtype = "Int8"
+
+    def score_distinct(self, texts, **kwargs):
+        return np.array([len(t) % 3 - 1 for t in texts], dtype=float)
+
+
+def tweets(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    words = np.array(["weed", "joint", "blunt", "smoke", 'say "hi"', "a,b", "line\nbreak", "good"])
+    texts = [" ".join(rng.choice(words, rng.integers(1, 12))) for _ in range(n_rows)]
+    texts[3] = None
+    return pd.DataFrame({
+        "Year": rng.integers(2020, 2024, n_rows).astype(str),
+        "County": rng.choice(["Alameda", "Los Angeles", "San Diego"], n_rows),
+        "Cleaned_Content": texts,
+        "BERT_Sentiment": rng.choice(["1 star", "5 stars"], n_rows),
+    })
+
+
+@pytest.fixture
+def tweet_file(tmp_path):
+    path = tmp_path / "tweets.csv"
+    tweets(500).to_csv(path, index=False)
+    return str(path)
+
+
+class TestByteRanges:
+    def test_boundaries_are_record_starts(self, tmp_path):
+        frame = tweets(200)
+        path = tmp_path / "tweets.csv"
+        frame.to_csv(path, index=False)
+        data = path.read_bytes()
+
+        # Record starts, from the length of each row written on its own
+        lengths = [len(frame.iloc[[i]].to_csv(index=False, header=False).encode()) for i in range(len(frame))]
+        header = len(frame.iloc[:0].to_csv(index=False).encode())
+        starts = set((header + np.cumsum([0] + lengths)).tolist())
+        assert b"\n" in data[header:header + sum(lengths)].replace(b"\r", b"")  # Quoted newlines present
+
+        offsets = list(range(0, len(data), 7))
+        boundaries = record_boundaries(str(path), offsets)
+        expected = [min(s for s in starts if s >= offset) for offset in offsets]
+        assert boundaries == expected
+
+    def test_small_scan_blocks(self, tmp_path, monkeypatch):
+        import app.utils.parallel_scoring as parallel_scoring
+
+        path = tmp_path / "tweets.csv"
+        tweets(100).to_csv(path, index=False)
+        offsets = list(range(0, path.stat().st_size, 13))
+        expected = record_boundaries(str(path), offsets)
+        monkeypatch.setattr(parallel_scoring, "SCAN_BLOCK", 64)
+        assert record_boundaries(str(path), offsets) == expected
+
+    def test_ranges_cover_all_rows(self, tweet_file):
+        header_end, ranges = byte_ranges(tweet_file, 8)
+        assert len(ranges) == 8
+        with open(tweet_file, "rb") as f:
+            data = f.read()
+        assert ranges[0][0] == header_end and ranges[-1][1] == len(data)
+        assert all(a[1] == b[0] for a, b in zip(ranges[:-1], ranges[1:]))
+
+        import io
+        parts = [
+            pd.read_csv(io.BytesIO(data[:header_end] + data[start:end]), dtype=str)
+            for start, end in ranges
+        ]
+        combined = pd.concat(parts, ignore_index=True)
+        pd.testing.assert_frame_equal(combined, pd.read_csv(tweet_file, dtype=str))
+
+    def test_more_ranges_than_rows(self, tmp_path):
+        path = tmp_path / "tiny.csv"
+        pd.DataFrame({"Cleaned_Content": ["a", "b"]}).to_csv(path, index=False)
+        _, ranges = byte_ranges(str(path), 10)
+        assert len(ranges) == 2
+
+
+class TestScoreFileParallel:
+    def test_matches_single_process(self, tweet_file, tmp_path):
+        serial = tmp_path / "serial.csv"
+        score_file(tweet_file, str(serial), LengthScorer(), chunk_size=64)
+
+        parallel = tmp_path / "parallel.csv"
+        stats = score_file_parallel(
+            tweet_file, str(parallel), scorers=[LengthScorer], workers=2, chunk_size=64
+        )
+        pd.testing.assert_frame_equal(pd.read_csv(parallel), pd.read_csv(serial))
+        assert stats.rows == 500 and stats.ranges == 8 and stats.workers == 2
+        assert 0 < stats.utilization <= 1.0 + 1e-6
+        assert "tweets/s per core" in stats.summary()
+
+    def test_new_columns_and_cache(self, tweet_file, tmp_path):
+        cache_path = str(tmp_path / "scores.sqlite")
+        output = tmp_path / "out.csv"
+        first = score_file_parallel(
+            tweet_file, str(output), scorers=[LengthScorer, LabelScorer],
+            workers=2, cache_path=cache_path
+        )
+        result = pd.read_csv(output)
+        assert list(result.columns) == output_columns(tweet_file, [LengthScorer, LabelScorer])
+        assert result.columns[-1] == "Length_Label"
+        assert set(result["Length_Label"].dropna().astype(int)) <= {-1, 0, 1}
+        assert result["Length_Label"].isna().sum() == 1  # The row without text
+        assert first.inferred + first.cache_hits == first.cache_lookups
+
+        second = score_file_parallel(
+            tweet_file, str(output), scorers=[LengthScorer, LabelScorer],
+            workers=2, cache_path=cache_path
+        )
+        assert second.inferred == 0
+        assert second.cache_hits == second.cache_lookups > 0
+        with ScoreCache(cache_path) as cache:
+            assert 0 < len(cache) <= first.inferred  # Workers may race on a text
+
+    def test_unknown_scorer(self, tweet_file, tmp_path):
+        with pytest.raises(ValueError, match="unknown scorer"):
+            score_file_parallel(tweet_file, str(tmp_path / "out.csv"), scorers=["nope"])
+
+    def test_missing_text_column(self, tmp_path):
+        path = tmp_path / "in.csv"
+        pd.DataFrame({"Text": ["good"]}).to_csv(path, index=False)
+        with pytest.raises(ValueError, match="Cleaned_Content"):
+            score_file_parallel(str(path), str(tmp_path / "out.csv"), scorers=[LengthScorer])
+        assert not (tmp_path / "out.csv").exists()
@@ -0,0 +1,164 @@
+"""
+Tests for the cached choropleth construction in plot_helpers.
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# plot_helpers imports config.theme the way the pages do, relative to app/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "app"))
+
+from plots.choropleth import create_choropleth  # noqa: E402
+from utils.geometry import CountyGeometries  # noqa: E402
+from utils.load_geojson import clear_geojson_store  # noqa: E402
+from utils.hexbin import DispensaryHexbins  # noqa: E402
+from utils.plot_helpers import _choropleth_base, create_choropleth_map, create_hexbin_map  # noqa: E402
+
+
+def square(name, x):
+    return {
+        "type": "Feature",
+        "properties": {"NAME": name},
+        "geometry": {"type": "Polygon", "coordinates": [[[x, 0], [x + 1, 0], [x + 1, 1], [x, 1], [x, 0]]]},
+    }
+
+
+@pytest.fixture
+def geometries():
+    names = ["Alameda", "Kern", "Los Angeles"]
+    return CountyGeometries.from_geojson({
+        "type": "FeatureCollection",
+        "features": [square(name, i) for i, name in enumerate(names)],
+    })
+
+
+@pytest.fixture
+def density():
+    return pd.DataFrame({
+        "County": ["Kern", "Los Angeles"],
+        "Dispensary_PerCapita": [1.5, 3.0],
+        "Population": [900000, 10000000],
+    })
+
+
+def make_map(data, geometries, **kwargs):
+    return create_choropleth_map(
+        data,
+        geojson=geometries,
+        locations="County",
+        color="Dispensary_PerCapita",
+        title="Density",
+        labels={"Dispensary_PerCapita": "Per 100k"},
+        **kwargs,
+    )
+
+
+class TestCreateChoroplethMap:
+    """Tests for create_choropleth_map."""
+
+    def test_arrays_come_from_the_data(self, geometries, density):
+        """Test that the figure holds the filtered values and counties."""
+        trace = make_map(density, geometries).data[0]
+
+        assert list(trace.locations) == ["Kern", "Los Angeles"]
+        assert list(trace.z) == [1.5, 3.0]
+        assert trace.featureidkey == "properties.NAME"
+        assert [f["properties"]["NAME"] for f in trace.geojson["features"]] == ["Kern", "Los Angeles"]
+
+    def test_geometry_is_not_copied(self, geometries, density):
+        """Test that the figure references the shared geometry features."""
+        trace = make_map(density, geometries).data[0]
+        level = geometries.for_zoom(1)
+        assert trace.geojson["features"][0] is level["features"][1]
+
+    def test_base_is_built_once(self, geometries, density):
+        """Test that later filter states reuse the cached base."""
+        make_map(density, geometries)
+        hits = _choropleth_base.cache_info().hits
+        make_map(density.iloc[:1], geometries)
+        assert _choropleth_base.cache_info().hits == hits + 1
+
+    def test_returned_figures_are_independent(self, geometries, density):
+        """Test that changing one figure does not leak into the next."""
+        first = make_map(density, geometries)
+        first.update_layout(height=100, title_text="Changed")
+        second = make_map(density, geometries)
+
+        assert second.layout.height == 600
+        assert second.layout.title.text == "Density"
+
+    def test_hover_and_labels(self, geometries, density):
+        """Test the hover template, customdata and color bar title."""
+        fig = make_map(density, geometries, hover_data=["County", "Population"])
+        trace = fig.data[0]
+
+        assert trace.hovertemplate == (
+            "County=%{location}<br>Per 100k=%{z}<br>Population=%{customdata[0]}<extra></extra>"
+        )
+        assert [row[0] for row in trace.customdata] == [900000, 10000000]
+        assert fig.layout.coloraxis.colorbar.title.text == "Per 100k"
+
+    def test_categorical_colors_fall_back_to_express(self, geometries, density):
+        """Test that non-numeric colors still get one trace per category."""
+        density["Tier"] = ["low", "high"]
+        fig = create_choropleth_map(density, geometries, "County", "Tier", "Tiers")
+        assert len(fig.data) == 2
+
+    def test_raster_mode(self, geometries, density):
+        """Test that raster mode sends an image and hover markers instead of outlines."""
+        fig = make_map(density, geometries, mode="raster")
+
+        assert fig.layout.images[0].source.startswith("data:image/")
+        assert fig.data[0].type == "scatter"
+        assert list(fig.data[0].text) == ["Kern", "Los Angeles"]
+        assert fig.data[0].marker.colorbar.title.text == "Per 100k"
+
+    def test_unknown_mode(self, geometries, density):
+        """Test that an unknown render mode is rejected."""
+        with pytest.raises(ValueError, match="Unknown map render mode"):
+            make_map(density, geometries, mode="svg")
+
+
+class TestCreateHexbinMap:
+    """Tests for create_hexbin_map."""
+
+    def test_hexagons_follow_filtered_rows(self, geometries):
+        """Test that only occupied hexagons of the filtered rows are drawn."""
+        points = pd.DataFrame({
+            "Longitude": [0.5, 0.5, 2.5, 2.5],
+            "Latitude": [0.5, 0.5, 0.5, 0.5],
+        })
+        hexbins = DispensaryHexbins.from_frame(points)
+        fig = create_hexbin_map(hexbins, 1, "Hexbins", rows=points.index[:3], counties=geometries)
+
+        outlines, hexagons = fig.data
+        assert sorted(hexagons.z) == [1, 2]
+        assert [f["id"] for f in hexagons.geojson["features"]] == list(hexagons.locations)
+        assert len(outlines.geojson["features"]) == 3
+
+
+class TestLegacyChoropleth:
+    """Tests for plots.choropleth.create_choropleth."""
+
+    def test_boundaries_are_not_reread_per_render(self, density, monkeypatch):
+        """Test that renders share one parse of the boundaries file."""
+        import builtins
+
+        opened = []
+        real_open = builtins.open
+
+        def counting_open(file, *args, **kwargs):
+            if str(file).endswith(".geojson"):
+                opened.append(file)
+            return real_open(file, *args, **kwargs)
+
+        monkeypatch.setattr(builtins, "open", counting_open)
+        clear_geojson_store()
+
+        figures = [create_choropleth(density, "Dispensary_PerCapita", "County") for _ in range(3)]
+
+        assert len(opened) == 1
+        assert figures[0].data[0].geojson is figures[2].data[0].geojson
+        assert list(figures[2].data[0].z) == [1.5, 3.0]
@@ -0,0 +1,129 @@
+"""
+Tests for the chart figure cache.
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import plotly.tools
+import pytest
+
+# figure_cache imports config.env the way the pages do, relative to app/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "app"))
+
+from utils.figure_cache import CachedFigure, chart_stats, figure_key, get_figure_cache  # noqa: E402
+from utils.plot_helpers import create_bar_chart  # noqa: E402
+
+
+@pytest.fixture
+def counties():
+    return pd.DataFrame({"County": ["Alameda", "Kern"], "Count": [3, 5]})
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    get_figure_cache().clear()
+    yield
+    get_figure_cache().clear()
+
+
+class TestCachedFigure:
+    """Tests for the cached chart helpers."""
+
+    def test_repeated_chart_is_served_from_cache(self, counties, monkeypatch):
+        """Test that the same chart and data skip Plotly Express."""
+        first = create_bar_chart(counties, "County", "Count", "Counts", x_label="County")
+
+        monkeypatch.setattr("utils.plot_helpers.px.bar", lambda *a, **k: pytest.fail("figure was rebuilt"))
+        second = create_bar_chart(counties.copy(), "County", "Count", "Counts", x_label="County")
+
+        assert json.loads(second.to_json()) == json.loads(first.to_json())
+        assert second is not first
+        assert chart_stats()[-1]["cache"] == "hit"
+
+    def test_key_covers_data_and_arguments(self, counties):
+        """Test that changed values or arguments miss the cache."""
+        key = figure_key("create_bar_chart", counties, ("County", "Count", "Counts"), {})
+        changed = counties.assign(Count=[3, 6])
+
+        assert key == figure_key("create_bar_chart", counties.copy(), ("County", "Count", "Counts"), {})
+        assert key != figure_key("create_bar_chart", changed, ("County", "Count", "Counts"), {})
+        assert key != figure_key("create_bar_chart", counties, ("County", "Count", "Other"), {})
+        assert figure_key("create_bar_chart", counties, (), {"marker": object()}) is None
+
+    def test_key_ignores_unused_columns(self, counties):
+        """Test that only the columns named by the arguments are fingerprinted."""
+        args = ("County", "Count", "Counts")
+        with_text = counties.assign(Text=["a", "b"])
+
+        assert figure_key("create_bar_chart", with_text, args, {}) == figure_key(
+            "create_bar_chart", with_text.assign(Text=["c", "d"]), args, {}
+        )
+        assert figure_key("create_bar_chart", with_text, args, {}) != figure_key(
+            "create_bar_chart", with_text, args, {"hover_data": ["Text"]}
+        )
+
+    def test_dict_hover_data_columns_are_fingerprinted(self, counties):
+        """Test that columns named only by dict keys still reach the key."""
+        with_extra = counties.assign(c=[10, 20])
+        changed = counties.assign(c=[99, 98])
+
+        first = create_bar_chart(with_extra, "County", "Count", "Counts", hover_data={"c": True})
+        second = create_bar_chart(changed, "County", "Count", "Counts", hover_data={"c": True})
+
+        assert chart_stats()[-1]["cache"] == "miss"
+        assert list(first.data[0].customdata.ravel()) == [10, 20]
+        assert list(second.data[0].customdata.ravel()) == [99, 98]
+
+    def test_non_string_labels_are_fingerprinted(self):
+        """Test that frames with non-string column labels hash every column."""
+        data = pd.DataFrame({"County": ["Alameda", "Kern"], 2023: [3, 5]})
+        changed = data.copy()
+        changed[2023] = [3, 6]
+        args = ("County", 2023, "Counts")
+
+        assert figure_key("create_bar_chart", data, args, {}) != figure_key(
+            "create_bar_chart", changed, args, {}
+        )
+
+    def test_uncached_calls_are_not_serialized(self, counties, monkeypatch):
+        """Test that calls that cannot be cached skip serialization outside debug mode."""
+        monkeypatch.setenv("DEBUG", "false")
+        monkeypatch.setattr("utils.figure_cache.pio.to_json", lambda *a, **k: pytest.fail("serialized"))
+
+        create_bar_chart(counties, "County", "Count", "Counts", color_discrete_sequence=np.array(["red"]))
+
+        assert chart_stats()[-1]["cache"] == "uncached"
+        assert chart_stats()[-1]["bytes"] is None
+
+    def test_hit_is_serialized_from_cache(self, counties, monkeypatch):
+        """Test that an unmodified hit is handed to Streamlit without a deep copy."""
+        first = create_bar_chart(counties, "County", "Count", "Counts")
+        second = create_bar_chart(counties, "County", "Count", "Counts")
+        assert isinstance(second, CachedFigure)
+
+        with monkeypatch.context() as patch:
+            patch.setattr("plotly.basedatatypes.BaseFigure.to_dict", lambda self: pytest.fail("deep copy"))
+            spec = plotly.tools.return_figure_from_figure_or_data(second, validate_figure=True)
+        assert spec == json.loads(first.to_json())
+
+        second.update_layout(title_text="Changed")
+        assert second.to_dict()["layout"]["title"]["text"] == "Changed"
+
+    def test_cached_figures_are_independent(self, counties):
+        """Test that modifying a returned figure does not change the cache."""
+        create_bar_chart(counties, "County", "Count", "Counts").update_layout(title_text="Changed")
+        assert create_bar_chart(counties, "County", "Count", "Counts").layout.title.text == "Counts"
+
+    def test_size_budget_is_flagged_in_debug_mode(self, counties, monkeypatch, caplog):
+        """Test that charts over the payload budget are reported."""
+        monkeypatch.setenv("DEBUG", "true")
+        monkeypatch.setenv("FIGURE_SIZE_BUDGET_KB", "1")
+
+        with caplog.at_level("WARNING", logger="utils.figure_cache"):
+            create_bar_chart(counties, "County", "Count", "Counts")
+
+        assert "over the 1 KB budget" in caplog.text
+        assert chart_stats()[-1]["bytes"] > 1024
@@ -0,0 +1,67 @@
+"""
+Tests for the server-side histogram binning.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "app"))
+
+from plots.sentiment_distribution import create_sentiment_distribution_plot  # noqa: E402
+from utils.plot_helpers import create_histogram, histogram_counts  # noqa: E402
+
+
+@pytest.fixture
+def scores():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"BERT_Sentiment": rng.choice([-1.0, -0.5, 0.0, 0.5, 1.0], 20_000)})
+
+
+class TestHistogramCounts:
+    """Tests for histogram_counts."""
+
+    def test_sentiment_bins_are_centered_on_scores(self, scores):
+        """Test that each star score falls in the middle of its own bin."""
+        counts, edges = histogram_counts(scores["BERT_Sentiment"], metric="BERT_Sentiment")
+        centers = (edges[:-1] + edges[1:]) / 2
+
+        assert counts.sum() == len(scores)
+        np.testing.assert_allclose(
+            centers[counts > 0], [-1.0, -0.5, 0.0, 0.5, 1.0], atol=1e-9
+        )
+
+    def test_subset_bins_line_up(self):
+        """Test that filtered data reuses the bin edges of the full data."""
+        values = pd.Series(np.random.default_rng(1).uniform(0, 30, 1000))
+        _, full = histogram_counts(values, metric="Dispensary_PerCapita")
+        _, subset = histogram_counts(values[values > 12.3], metric="Dispensary_PerCapita")
+
+        assert np.isin(np.round(subset, 9), np.round(full, 9)).all()
+
+    def test_missing_values_are_ignored(self):
+        """Test that NaN values are not counted and empty input has no bins."""
+        counts, _ = histogram_counts(pd.Series([1.0, np.nan, 2.0, np.inf]))
+        assert counts.sum() == 2
+        assert len(histogram_counts(pd.Series([np.nan]))[0]) == 0
+
+
+class TestHistogramFigures:
+    """Tests for the histogram figures."""
+
+    def test_payload_does_not_grow_with_rows(self, scores):
+        """Test that the figure holds counts, not the raw rows."""
+        small = create_histogram(scores.iloc[:100], "BERT_Sentiment", "Sentiment")
+        large = create_histogram(scores, "BERT_Sentiment", "Sentiment")
+
+        assert large.data[0].type == "bar"
+        assert sum(large.data[0].y) == len(scores)
+        assert abs(len(large.to_json()) - len(small.to_json())) < 200
+
+    def test_sentiment_distribution_plot(self, scores):
+        """Test that the sentiment distribution sends one bar per bin."""
+        fig = create_sentiment_distribution_plot(scores, "BERT_Sentiment", "Distribution")
+        assert sum(fig.data[0].y) == len(scores)
+        assert len(fig.data[0].x) == 21
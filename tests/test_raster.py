@@ -0,0 +1,135 @@
+"""
+Tests for the raster module.
+"""
+import base64
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.load_geojson import CountyFeatureCollection
+from app.utils.raster import (
+    MapFrame,
+    clear_raster_cache,
+    colorize,
+    color_lut,
+    encode_png,
+    fill_polygon,
+    get_map_render_mode,
+    rasterize_labels,
+    render_choropleth,
+)
+
+
+def square(name, x, y, size=1.0, hole=None):
+    rings = [[[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]]
+    if hole:
+        hx, hy, hs = hole
+        rings.append([[hx, hy], [hx, hy + hs], [hx + hs, hy + hs], [hx + hs, hy], [hx, hy]])
+    return {
+        "type": "Feature",
+        "properties": {"NAME": name},
+        "geometry": {"type": "Polygon", "coordinates": rings},
+    }
+
+
+@pytest.fixture
+def counties():
+    """Two adjacent squares at the equator, the left one with a hole."""
+    return CountyFeatureCollection({
+        "type": "FeatureCollection",
+        "features": [
+            square("West", 0, 0, 1, hole=(0.25, 0.25, 0.5)),
+            square("East", 1, 0, 1),
+        ],
+    })
+
+
+def decode_png(png):
+    """Decode the RGBA PNGs written by encode_png."""
+    width, height = struct.unpack(">II", png[16:24])
+    length = struct.unpack(">I", png[33:37])[0]
+    raw = np.frombuffer(zlib.decompress(png[41:41 + length]), dtype=np.uint8)
+    return raw.reshape(height, width * 4 + 1)[:, 1:].reshape(height, width, 4)
+
+
+class TestRasterize:
+    """Tests for the polygon rasterizer."""
+
+    def test_fill_matches_pixel_centers(self):
+        """Test that exactly the pixels with centers inside are filled."""
+        triangle = np.array([[0, 0, 10, 0], [10, 0, 0, 10], [0, 10, 0, 0]], dtype=float)
+        rows, columns, inside = fill_polygon(triangle, 10, 10)
+
+        mask = np.zeros((10, 10), dtype=bool)
+        mask[rows, columns] = inside
+        centers = np.arange(10) + 0.5
+        expected = centers[None, :] + centers[:, None] < 10
+        np.testing.assert_array_equal(mask, expected)
+
+    def test_labels_respect_holes_and_shared_edges(self, counties):
+        """Test that holes stay empty and adjacent counties neither gap nor overlap."""
+        frame = MapFrame(counties.county_index.bounds(), height=20)
+        labels = rasterize_labels(counties, frame)
+
+        assert frame.size == (40, 20)
+        assert (labels[:, :20] >= 0).sum() == 400 - 100
+        assert labels[10, 10] == -1
+        assert (labels[:, 20:] == 1).all()
+
+
+class TestRenderChoropleth:
+    """Tests for coloring, encoding and caching."""
+
+    def test_png_round_trip(self):
+        """Test that encode_png writes a decodable RGBA image."""
+        image = np.random.default_rng(0).integers(0, 256, (7, 5, 4), dtype=np.uint8)
+        np.testing.assert_array_equal(decode_png(encode_png(image)), image)
+
+    def test_colors_follow_values(self, counties):
+        """Test that the highest value gets the darkest color and missing counties stay clear."""
+        frame = MapFrame(counties.county_index.bounds(), height=20)
+        labels = rasterize_labels(counties, frame)
+        lut = color_lut("Greens")
+        image = colorize(labels, np.array([1]), np.array([5.0]), lut, (0.0, 5.0))
+
+        np.testing.assert_array_equal(image[5, 30], lut[-1])
+        assert image[5, 5, 3] == 0
+
+    def test_images_are_cached_per_data(self, counties, monkeypatch):
+        """Test that identical data reuses the encoded image."""
+        clear_raster_cache()
+        data = pd.DataFrame({"County": ["West", "East"], "Value": [1.0, 2.0]})
+        first, _, value_range = render_choropleth(data, counties, "County", "Value", "Greens", 20, "png")
+
+        monkeypatch.setattr(
+            "app.utils.raster.encode_image", lambda *args: pytest.fail("image was re-encoded")
+        )
+        again, _, _ = render_choropleth(data.copy(), counties, "County", "Value", "Greens", 20, "png")
+        assert again == first
+        assert value_range == (1.0, 2.0)
+
+        png = base64.b64decode(first.split(",", 1)[1])
+        assert decode_png(png).shape == (20, 40, 4)
+
+    def test_image_cache_checks_geometry_identity(self, counties, monkeypatch):
+        """Test that a reused geometry id never serves another geometry's image."""
+        clear_raster_cache()
+        monkeypatch.setattr("app.utils.raster.id", lambda obj: 0, raising=False)
+        data = pd.DataFrame({"County": ["West", "East"], "Value": [1.0, 2.0]})
+        first, _, _ = render_choropleth(data, counties, "County", "Value", "Greens", 20, "png")
+
+        swapped = CountyFeatureCollection({
+            "type": "FeatureCollection",
+            "features": [square("West", 1, 0, 1), square("East", 0, 0, 1)],
+        })
+        again, _, _ = render_choropleth(data, swapped, "County", "Value", "Greens", 20, "png")
+        assert again != first
+
+    def test_render_mode_setting(self, monkeypatch):
+        """Test that unknown render modes fall back to vector."""
+        monkeypatch.setenv("MAP_RENDER_MODE", "Raster")
+        assert get_map_render_mode() == "raster"
+        monkeypatch.setenv("MAP_RENDER_MODE", "tiles")
+        assert get_map_render_mode() == "vector"
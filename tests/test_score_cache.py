@@ -0,0 +1,75 @@
+"""
+Tests for the score_cache module.
+"""
+import os
+
+import numpy as np
+import pytest
+from app.utils.score_cache import ScoreCache, normalize_text, text_key
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache" / "scores.sqlite")
+
+
+class TestKeys:
+    def test_normalize_text(self):
+        assert normalize_text("  smoke\tthis \n blunt ") == "smoke this blunt"
+        assert normalize_text("ｗｅｅｄ") == "weed"  # NFKC folds full-width letters
+
+    def test_key_depends_on_model(self):
+        assert text_key("good", "model-a") != text_key("good", "model-b")
+        assert text_key("good", "model-a") == text_key("good", "model-a")
+        assert len(text_key("good", "model-a")) == 16
+
+    def test_key_does_not_collide_on_boundary(self):
+        assert text_key("b c", "a") != text_key("c", "a b")
+
+
+class TestScoreCache:
+    def test_round_trip_and_misses(self, cache_path):
+        keys = [text_key(t, "m") for t in ("good", "bad", "meh")]
+        with ScoreCache(cache_path) as cache:
+            cache.put_many(keys[:2], [1.0, -1.0])
+            scores = cache.get_many(keys)
+            assert scores[:2].tolist() == [1.0, -1.0]
+            assert np.isnan(scores[2])
+            assert (cache.hits, cache.lookups) == (2, 3)
+            assert cache.hit_rate == pytest.approx(2 / 3)
+
+    def test_persists_across_opens(self, cache_path):
+        key = text_key("good", "m")
+        with ScoreCache(cache_path) as cache:
+            cache.put_many([key], [0.5])
+        with ScoreCache(cache_path) as cache:
+            assert cache.get_many([key]).tolist() == [0.5]
+            assert cache.hits == 1
+
+    def test_nan_scores_not_stored(self, cache_path):
+        with ScoreCache(cache_path) as cache:
+            cache.put_many([text_key("x", "m")], [np.nan])
+            assert len(cache) == 0
+
+    def test_many_keys(self, cache_path):
+        keys = [text_key(str(i), "m") for i in range(2000)]
+        with ScoreCache(cache_path) as cache:
+            cache.put_many(keys, np.arange(2000.0))
+            assert cache.get_many(keys).tolist() == list(range(2000))
+
+    def test_evicts_least_recently_used(self, cache_path):
+        old = [text_key(f"old {i}", "m") for i in range(3000)]
+        new = [text_key(f"new {i}", "m") for i in range(3000)]
+        with ScoreCache(cache_path, max_bytes=10 ** 9) as cache:
+            cache.put_many(old, np.zeros(len(old)))
+            full_size = cache.size_bytes()
+            cache.max_bytes = int(full_size * 1.5)  # Room for 4500 scores
+
+            cache.get_many(old[:100])  # Recently used, so kept
+            cache.put_many(new, np.ones(len(new)))
+
+            assert cache.size_bytes() <= cache.max_bytes
+            assert not np.isnan(cache.get_many(old[:100])).any()
+            assert not np.isnan(cache.get_many(new)).any()
+            assert np.isnan(cache.get_many(old[100:])).mean() > 0.5
+        assert os.path.getsize(cache_path) <= 2 * full_size
@@ -0,0 +1,175 @@
+"""
+Tests for the sentiment_scoring module.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.data_loader import convert_sentiment_score
+from app.utils.sentiment_scoring import (
+    ScoringStats,
+    StarRatingModel,
+    label_scores,
+    length_batches,
+    score_file,
+)
+
+TEXTS = [
+    "this weed is great",
+    "awful",
+    "i love a good joint but hate the smoke this is not good not good at all",
+    "",
+    None,
+    "bad blunt",
+    "great great great great great great great great great great great great",
+    "the",
+]
+
+
+class TestLabelScores:
+    def test_matches_convert_sentiment_score(self):
+        labels = {0: "1 star", 1: "2 stars", 2: "3 stars", 3: "4 stars", 4: "5 stars"}
+        scores = label_scores(labels)
+        assert scores.tolist() == [convert_sentiment_score(labels[i]) for i in range(5)]
+        assert scores.tolist() == [-1.0, -0.5, 0.0, 0.5, 1.0]
+
+    def test_rejects_other_labels(self):
+        with pytest.raises(ValueError, match="star"):
+            label_scores({0: "NEGATIVE", 1: "POSITIVE"})
+
+
+class TestLengthBatches:
+    def test_every_text_in_one_batch(self):
+        lengths = np.random.default_rng(0).integers(1, 100, 500)
+        batches = length_batches(lengths, max_tokens=512, max_batch=16)
+        positions = np.concatenate(batches)
+        assert sorted(positions.tolist()) == list(range(500))
+
+    def test_respects_budgets(self):
+        lengths = np.random.default_rng(1).integers(1, 100, 500)
+        for batch in length_batches(lengths, max_tokens=512, max_batch=16):
+            assert len(batch) <= 16
+            assert len(batch) == 1 or len(batch) * lengths[batch].max() <= 512
+
+    def test_sorted_by_length(self):
+        lengths = np.array([50, 3, 20, 3, 7])
+        batches = length_batches(lengths, max_tokens=1000, max_batch=2)
+        assert [lengths[b].tolist() for b in batches] == [[3, 3], [7, 20], [50]]
+
+    def test_long_text_gets_own_batch(self):
+        batches = length_batches(np.array([10, 500]), max_tokens=100)
+        assert [b.tolist() for b in batches] == [[0], [1]]
+
+    def test_empty(self):
+        assert length_batches(np.array([], dtype=int)) == []
+
+
+class TestScoringStats:
+    def test_throughput_per_core(self):
+        stats = ScoringStats(rows=1000, scored=800, seconds=2.0, threads=4)
+        assert stats.tweets_per_second == 400
+        assert stats.tweets_per_second_per_core == 100
+        assert "100.0 tweets/s per core" in stats.summary()
+
+
+class TestStarRatingModel:
+    def test_scores_in_star_scale(self, tiny_star_model):
+        model = StarRatingModel(tiny_star_model, threads=1)
+        scores = model.score(TEXTS)
+        assert np.isnan(scores[3]) and np.isnan(scores[4])
+        scored = np.delete(scores, [3, 4])
+        assert set(scored.tolist()) <= {-1.0, -0.5, 0.0, 0.5, 1.0}
+
+    def test_batching_does_not_change_scores(self, tiny_star_model):
+        model = StarRatingModel(tiny_star_model, threads=1)
+        texts = [t for t in TEXTS if t] * 5
+        one_by_one = model.score(texts, max_batch=1)
+        batched = model.score(texts, max_tokens=64, max_batch=8)
+        assert np.array_equal(one_by_one, batched)
+
+    def test_score_file(self, tiny_star_model, tmp_path):
+        source = pd.DataFrame({
+            "Year": ["2024"] * len(TEXTS),
+            "County": [f"County {i}" for i in range(len(TEXTS))],
+            "Cleaned_Content": TEXTS,
+            "BERT_Sentiment": ["5 stars"] * len(TEXTS),
+        })
+        input_path = tmp_path / "new.csv"
+        output_path = tmp_path / "Tweet_Sentiment_new.csv"
+        source.to_csv(input_path, index=False)
+
+        model = StarRatingModel(tiny_star_model, threads=1)
+        stats = score_file(str(input_path), str(output_path), model, chunk_size=3)
+
+        result = pd.read_csv(output_path)
+        assert list(result.columns) == list(source.columns)
+        assert result["County"].tolist() == source["County"].tolist()
+        expected = model.score(TEXTS)
+        assert np.array_equal(result["BERT_Sentiment"].to_numpy(), expected, equal_nan=True)
+        assert stats.rows == len(TEXTS) and stats.scored == len(TEXTS) - 2
+        assert not (tmp_path / "Tweet_Sentiment_new.csv.partial").exists()
+
+    def test_score_file_missing_column(self, tiny_star_model, tmp_path):
+        input_path = tmp_path / "new.csv"
+        pd.DataFrame({"Text": ["good"]}).to_csv(input_path, index=False)
+        model = StarRatingModel(tiny_star_model, threads=1)
+        with pytest.raises(ValueError, match="Cleaned_Content"):
+            score_file(str(input_path), str(tmp_path / "out.csv"), model)
+        assert not (tmp_path / "out.csv").exists()
+
+
+class LengthModel(StarRatingModel):
+    """Star rating from the text length, so scoring runs without torch."""
+
+    def __init__(self, model_id="length-model"):
+        self.model_id = model_id
+        self.threads = 1
+        self.inferred = 0
+        self.class_scores = label_scores({i: f"{i + 1} stars" for i in range(5)})
+        self.predicted = []
+
+    def predict(self, texts, **kwargs):
+        self.predicted.extend(texts)
+        return np.array([len(t) % 5 for t in texts], dtype=np.int64)
+
+
+class TestDeduplication:
+    def test_distinct_texts_scored_once(self):
+        model = LengthModel()
+        scores = model.score(["good weed", " good  weed ", "bad", None, "  ", "bad"])
+        assert sorted(model.predicted) == ["bad", "good weed"]
+        assert model.inferred == 2
+        assert scores[0] == scores[1] == model.class_scores[len("good weed") % 5]
+        assert scores[2] == scores[5]
+        assert np.isnan(scores[3]) and np.isnan(scores[4])
+
+    def test_cache_skips_known_texts(self, tmp_path):
+        from app.utils.score_cache import ScoreCache
+
+        with ScoreCache(str(tmp_path / "scores.sqlite")) as cache:
+            first = LengthModel()
+            expected = first.score(["a", "bb", "ccc"], cache=cache)
+
+            second = LengthModel()
+            result = second.score(["bb", "ccc", "dddd", "bb"], cache=cache)
+            assert second.predicted == ["dddd"]
+            assert result[:2].tolist() == expected[1:].tolist()
+            assert (cache.hits, cache.lookups) == (2, 6)
+
+            other = LengthModel("other-model")
+            other.score(["a"], cache=cache)
+            assert other.predicted == ["a"]
+
+    def test_score_file_reports_hit_rate(self, tmp_path):
+        from app.utils.score_cache import ScoreCache
+
+        input_path = tmp_path / "new.csv"
+        pd.DataFrame({"Cleaned_Content": ["a", "bb", "a", "ccc"] * 3}).to_csv(input_path, index=False)
+        with ScoreCache(str(tmp_path / "scores.sqlite")) as cache:
+            model = LengthModel()
+            first = score_file(str(input_path), str(tmp_path / "out1.csv"), model, chunk_size=4, cache=cache)
+            assert (first.cache_hits, first.cache_lookups, first.inferred) == (6, 9, 3)
+
+            second = score_file(str(input_path), str(tmp_path / "out2.csv"), model, chunk_size=4, cache=cache)
+            assert second.cache_hit_rate == 1.0 and second.inferred == 0
+            assert "hit rate 100.0%" in second.summary()
+        assert (tmp_path / "out1.csv").read_text() == (tmp_path / "out2.csv").read_text()
@@ -0,0 +1,95 @@
+"""
+Tests for the spatial_index module.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.load_geojson import CountyFeatureCollection
+from app.utils.spatial_index import (
+    CountySpatialIndex,
+    fill_counties_from_coordinates,
+    points_in_polygon,
+)
+
+
+def polygon(name, rings):
+    return {
+        "type": "Feature",
+        "properties": {"NAME": name},
+        "geometry": {"type": "Polygon", "coordinates": rings},
+    }
+
+
+@pytest.fixture
+def counties():
+    """A zigzag border between two counties, and a county with an enclave."""
+    zigzag = [[0.05 * (i % 2), i / 10] for i in range(11)]
+    return CountyFeatureCollection({
+        "type": "FeatureCollection",
+        "features": [
+            polygon("West", [[[-1, 0]] + zigzag + [[-1, 1], [-1, 0]]]),
+            polygon("East", [zigzag[::-1] + [[1, 0], [1, 1], zigzag[-1]]]),
+            polygon("Ring", [
+                [[2, 0], [3, 0], [3, 1], [2, 1], [2, 0]],
+                [[2.4, 0.4], [2.4, 0.6], [2.6, 0.6], [2.6, 0.4], [2.4, 0.4]],
+            ]),
+            polygon("Enclave", [[[2.4, 0.4], [2.6, 0.4], [2.6, 0.6], [2.4, 0.6], [2.4, 0.4]]]),
+        ],
+    })
+
+
+def brute_force(geojson, lon, lat):
+    """Reference result testing every point against every county."""
+    index = CountySpatialIndex(geojson)
+    result = np.full(len(lon), -1)
+    for position, _, edges in index._polygons:
+        hit = points_in_polygon(lon, lat, edges) & (result < 0)
+        result[hit] = position
+    return result
+
+
+class TestCountySpatialIndex:
+    """Tests for CountySpatialIndex."""
+
+    def test_points_in_polygon_with_hole(self, counties):
+        """Test the crossing-number test on a ring with a hole."""
+        index = CountySpatialIndex(counties)
+        edges = index._polygons[2][2]
+        inside = points_in_polygon(np.array([2.1, 2.5, 3.5]), np.array([0.5, 0.5, 0.5]), edges)
+        assert inside.tolist() == [True, False, False]
+
+    def test_matches_brute_force(self, counties):
+        """Test that the grid shortcut gives the exact answer for every point."""
+        rng = np.random.default_rng(0)
+        lon = rng.uniform(-1.2, 3.2, 50_000)
+        lat = rng.uniform(-0.2, 1.2, 50_000)
+
+        index = CountySpatialIndex(counties, resolution=32)
+        np.testing.assert_array_equal(index.assign(lon, lat), brute_force(counties, lon, lat))
+
+    def test_names_and_missing_coordinates(self, counties):
+        """Test that points outside all counties or without coordinates get None."""
+        index = CountySpatialIndex(counties)
+        names = index.county_names([-0.5, 0.5, 2.5, np.nan, 10], [0.5, 0.5, 0.5, 0.5, 0.5])
+        assert names.tolist() == ["West", "East", "Enclave", None, None]
+
+
+class TestFillCounties:
+    """Tests for fill_counties_from_coordinates."""
+
+    def test_fills_only_missing_counties(self, counties):
+        """Test that existing counties are kept and missing ones assigned."""
+        df = pd.DataFrame({
+            "County": pd.Categorical(["Kern", None, ""]),
+            "Latitude": [0.5, 0.5, 0.5],
+            "Longitude": [-0.5, -0.5, 0.5],
+        })
+        result = fill_counties_from_coordinates(df, counties)
+
+        assert result["County"].tolist() == ["Kern", "West", "East"]
+        assert isinstance(result["County"].dtype, pd.CategoricalDtype)
+
+    def test_without_coordinates(self, counties):
+        """Test that frames without coordinates are returned unchanged."""
+        df = pd.DataFrame({"County": [None]})
+        assert fill_counties_from_coordinates(df, counties) is df